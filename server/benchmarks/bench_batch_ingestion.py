@@ -0,0 +1,203 @@
+"""
+Throughput benchmark for batch episode ingestion.
+
+Ingests the same synthetic episodes two ways, each into a fresh ryugraph
+database:
+
+- sequential: EpisodeIngestion.ingest once per episode (what ingest_batch
+              did before it was staged)
+- batch:      EpisodeIngestion.ingest_batch (one embedding call, bulk
+              duplicate detection, one UNWIND write, concurrent extraction)
+
+Embeddings and LLM calls come from stub providers that sleep for a fixed
+latency per call (a network round trip) and return deterministic results,
+so no API keys are needed. A share of the episodes repeat earlier ones to
+exercise duplicate detection.
+
+Entity summaries are regenerated by the background summary scheduler
+(coalescing the mentions of each entity) unless --inline-summaries is
+given; the scheduler is flushed after the timed ingestion, so the call
+counts include its LLM calls.
+
+Reports episodes per second and the number of embedding and LLM calls of
+each mode.
+
+Run from the server directory:
+    python benchmarks/bench_batch_ingestion.py --episodes 200
+    python benchmarks/bench_batch_ingestion.py --episodes 200 --no-extraction
+    python benchmarks/bench_batch_ingestion.py --episodes 200 --extraction-mode separate
+    python benchmarks/bench_batch_ingestion.py --episodes 200 --inline-summaries
+    python benchmarks/bench_batch_ingestion.py --concurrency 8 --llm-latency-ms 100
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_hybrid_planner import NAMES, PLACES, RELATIONS, HashEmbedder  # noqa: E402
+from ryumem.core.config import EpisodeConfig  # noqa: E402
+from ryumem_server.core.graph_db import RyugraphDB  # noqa: E402
+from ryumem_server.ingestion.episode import EpisodeIngestion  # noqa: E402
+
+
+class StubEmbedder(HashEmbedder):
+    """Hashed embeddings with a fixed latency per call."""
+
+    def __init__(self, dimensions: int, latency: float, calls: Counter):
+        super().__init__(dimensions)
+        self.latency = latency
+        self.calls = calls
+        self._lock = threading.Lock()
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+        time.sleep(self.latency)
+
+    def embed(self, text: str) -> List[float]:
+        self._call("embed")
+        return super().embed(text)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        self._call("embed_batch")
+        return [super(StubEmbedder, self).embed(text) for text in texts]
+
+
+class StubLLM:
+    """Extracts capitalized words as entities, with a fixed latency per call."""
+
+    def __init__(self, latency: float, calls: Counter):
+        self.latency = latency
+        self.calls = calls
+        self._lock = threading.Lock()
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+        time.sleep(self.latency)
+
+    def extract_entities(self, text: str, user_id: str, context: Optional[str] = None) -> List[Dict[str, str]]:
+        self._call("extract_entities")
+        return [
+            {"entity": word, "entity_type": "PERSON" if word in NAMES else "PLACE"}
+            for word in text.split()
+            if word in NAMES or word in PLACES
+        ]
+
+    def extract_relationships(self, text: str, entities: List[str], user_id: str, context: Optional[str] = None):
+        self._call("extract_relationships")
+        return self._relationships(text, entities)
+
+    def extract_graph(self, text: str, user_id: str, context: Optional[str] = None) -> Dict[str, List[Dict[str, str]]]:
+        self._call("extract_graph")
+        entities = [word for word in text.split() if word in NAMES or word in PLACES]
+        return {
+            "entities": [{"entity": word, "entity_type": "PERSON" if word in NAMES else "PLACE"} for word in entities],
+            "relationships": self._relationships(text, entities),
+        }
+
+    @staticmethod
+    def _relationships(text: str, entities: List[str]) -> List[Dict[str, str]]:
+        words = text.split()
+        if len(entities) < 2:
+            return []
+        phrase = " ".join(words[1:-4])
+        relation = next((name for name, text in RELATIONS if text == phrase), "RELATED_TO")
+        return [{"source": entities[0], "relationship": relation, "destination": entities[1], "fact": " ".join(words[:-3])}]
+
+    def detect_contradictions(self, new_facts: List[str], existing_facts: List[str]):
+        self._call("detect_contradictions")
+        return []
+
+    def generate(self, messages, temperature: float = 0.3):
+        self._call("generate")
+        return {"content": "An entity mentioned in the notes."}
+
+
+def episodes(count: int, duplicate_rate: float, tag: str, rng: random.Random) -> List[Dict]:
+    """Synthetic episodes; a share of them repeat an earlier episode."""
+    result: List[Dict] = []
+    for i in range(count):
+        if result and rng.random() < duplicate_rate:
+            result.append(dict(rng.choice(result)))
+            continue
+        person, place = rng.choice(NAMES), rng.choice(PLACES)
+        phrase = rng.choice(RELATIONS)[1]
+        result.append({"content": f"{person} {phrase} {place} according to {tag}-{i}"})
+    return result
+
+
+def run(mode: str, batch: List[Dict], args, tmp: str) -> None:
+    calls: Counter = Counter()
+    db = RyugraphDB(str(Path(tmp) / f"{mode}.db"), embedding_dimensions=args.dimensions)
+    ingestion = EpisodeIngestion(
+        db=db,
+        llm_client=StubLLM(args.llm_latency_ms / 1000, calls),
+        embedding_client=StubEmbedder(args.dimensions, args.embed_latency_ms / 1000, calls),
+        enable_entity_extraction=not args.no_extraction,
+        episode_config=EpisodeConfig(),
+        extraction_concurrency=args.concurrency,
+        extraction_mode=args.extraction_mode,
+        deferred_summaries=not args.inline_summaries,
+    )
+
+    started = time.perf_counter()
+    if mode == "batch":
+        episode_ids = [result["episode_id"] for result in ingestion.ingest_batch(batch, user_id="bench_user")]
+    else:
+        episode_ids = [ingestion.ingest(content=episode["content"], user_id="bench_user") for episode in batch]
+    elapsed = time.perf_counter() - started
+    ingestion.close()
+
+    stored = db.execute("MATCH (e:Episode) RETURN count(e) AS n")[0]["n"]
+    entities = db.execute("MATCH (e:Entity) RETURN count(e) AS n")[0]["n"]
+    embedding_calls = calls["embed"] + calls["embed_batch"]
+    llm_calls = sum(count for name, count in calls.items() if not name.startswith("embed"))
+    print(
+        f"{mode:>10} {elapsed:8.2f} {len(batch) / elapsed:9.1f} {stored:7} {len(set(episode_ids)):7} "
+        f"{entities:8} {embedding_calls:7} {llm_calls:7}"
+    )
+    db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--episodes", type=int, default=200)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1, help="Share of episodes repeating an earlier one")
+    parser.add_argument("--concurrency", type=int, default=4, help="Batch extraction concurrency")
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0, help="Stub latency per embedding call")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Stub latency per LLM call")
+    parser.add_argument("--no-extraction", action="store_true", help="Only embed, deduplicate and save episodes")
+    parser.add_argument(
+        "--extraction-mode", choices=["combined", "separate"], default="combined",
+        help="One LLM call for entities and relationships, or one call each",
+    )
+    parser.add_argument(
+        "--inline-summaries", action="store_true",
+        help="Regenerate entity summaries during extraction instead of in the background",
+    )
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    extraction = "off" if args.no_extraction else args.extraction_mode
+    summaries = "inline" if args.inline_summaries else "deferred"
+    print(f"{args.episodes} episodes, extraction {extraction}, {summaries} summaries, concurrency {args.concurrency}")
+    print(f"{'mode':>10} {'seconds':>8} {'eps/s':>9} {'stored':>7} {'ids':>7} {'entities':>8} {'embeds':>7} {'llm':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("sequential", "batch"):
+            # Distinct contents per mode: extraction results are cached process-wide
+            batch = episodes(args.episodes, args.duplicate_rate, mode, random.Random(args.seed))
+            run(mode, batch, args, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Indexing-throughput benchmark for the BM25 analyzer pipeline.
+
+Indexes a synthetic corpus of natural-looking sentences (capitalized names,
+punctuation, stopwords, plurals, accented words) with three analyzers and
+reports indexing throughput, postings size, query throughput and how many
+documents a plain keyword query reaches:
+
+- whitespace: text.lower().split(), the tokenizer used before the analyzer
+- analyzer:   regex split + Unicode folding + stopword removal (default)
+- stemmed:    the default analyzer plus the light plural stemmer
+
+Run from the server directory:
+    python benchmarks/bench_bm25_analyzer.py --episodes 50000
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ryumem_server.core.models import EpisodeKind, EpisodeNode, EpisodeType  # noqa: E402
+from ryumem_server.retrieval.analyzer import Analyzer  # noqa: E402
+from ryumem_server.retrieval.bm25 import BM25Index  # noqa: E402
+
+NAMES = ["Alice", "Bob", "Chloé", "Dmitri", "Élodie", "Farah", "Google", "Zürich", "Acme", "OpenAI"]
+NOUNS = [
+    ("project", "projects"), ("meeting", "meetings"), ("company", "companies"), ("city", "cities"),
+    ("language", "languages"), ("library", "libraries"), ("report", "reports"), ("team", "teams"),
+    ("customer", "customers"), ("invoice", "invoices"), ("server", "servers"), ("holiday", "holidays"),
+    ("recipe", "recipes"), ("book", "books"), ("flight", "flights"), ("class", "classes"),
+]
+VERBS = ["likes", "visited", "manages", "wrote", "reviewed", "booked", "joined", "prefers", "mentioned"]
+STOPWORDS = ["the", "a", "and", "of", "to", "in", "for", "with", "on", "at", "it", "is", "was", "that"]
+PUNCTUATION = ["", "", "", ",", ".", "!", "?", ";", ":"]
+
+
+class WhitespaceAnalyzer:
+    """The tokenizer BM25Index used before the analyzer pipeline."""
+
+    settings = {"whitespace": True}
+
+    def analyze(self, text: str) -> List[str]:
+        return text.lower().split()
+
+    def analyze_query(self, text: str) -> Tuple[str, ...]:
+        return tuple(text.lower().split())
+
+
+def sentence(rng: random.Random) -> str:
+    words = []
+    for _ in range(rng.randint(6, 12)):
+        roll = rng.random()
+        if roll < 0.45:
+            word = rng.choice(STOPWORDS)
+        elif roll < 0.60:
+            word = rng.choice(NAMES)
+        elif roll < 0.75:
+            word = rng.choice(VERBS)
+        else:
+            singular, plural = rng.choice(NOUNS)
+            word = plural if rng.random() < 0.4 else singular
+        words.append(word + rng.choice(PUNCTUATION))
+    words[0] = words[0].capitalize()
+    return " ".join(words)
+
+
+def generate_episodes(count: int, users: int, seed: int) -> List[EpisodeNode]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    return [
+        EpisodeNode(
+            uuid=f"episode-{i:08d}",
+            name=f"episode {i}",
+            content=" ".join(sentence(rng) for _ in range(rng.randint(1, 2))),
+            source=EpisodeType.text,
+            kind=EpisodeKind.query,
+            user_id=f"user_{i % users}",
+            created_at=start + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def posting_count(index: BM25Index) -> int:
+    """Total number of (term, episode) postings."""
+    return sum(len(rows) for rows, _ in index._episodes.postings.values())
+
+
+def run(name: str, analyzer: Any, episodes: List[EpisodeNode], queries: List[str], rounds: int) -> Dict[str, Any]:
+    index = BM25Index(analyzer=analyzer)
+
+    started = time.perf_counter()
+    for episode in episodes:
+        index.add_episode(episode)
+    index_seconds = time.perf_counter() - started
+
+    # Warm up the IDF cache, then time repeated (hot) queries
+    index.search_episodes(queries[0])
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            index.search_episodes(query, top_k=10)
+    query_seconds = time.perf_counter() - started
+
+    reach = {
+        query: sum(1 for _, score in index.search_episodes(query, top_k=len(episodes)) if score > 0)
+        for query in queries
+    }
+
+    return {
+        "name": name,
+        "docs_per_second": len(episodes) / index_seconds,
+        "postings": posting_count(index),
+        "terms": index.stats()["term_count"],
+        "queries_per_second": rounds * len(queries) / query_seconds,
+        "reach": reach,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--episodes", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200, help="Repetitions of the query set")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    episodes = generate_episodes(args.episodes, args.users, args.seed)
+    queries = ["google", "alice project", "zurich companies", "the report", "Elodie's flights?"]
+    print(f"Corpus: {len(episodes)} episodes, {sum(len(e.content) for e in episodes) / 1e6:.1f}M characters")
+
+    results = [
+        run("whitespace", WhitespaceAnalyzer(), episodes, queries, args.rounds),
+        run("analyzer", Analyzer(), episodes, queries, args.rounds),
+        run("stemmed", Analyzer(stem=True), episodes, queries, args.rounds),
+    ]
+
+    print(f"{'':>10}  {'docs/s':>9}  {'postings':>10}  {'terms':>6}  {'queries/s':>9}")
+    for result in results:
+        print(
+            f"{result['name']:>10}  {result['docs_per_second']:9.0f}  {result['postings']:10d}  "
+            f"{result['terms']:6d}  {result['queries_per_second']:9.0f}"
+        )
+
+    print("\nEpisodes matched per query:")
+    for query in queries:
+        counts = "  ".join(f"{result['name']}={result['reach'][query]}" for result in results)
+        print(f"  {query!r:>22}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
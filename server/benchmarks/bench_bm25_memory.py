@@ -0,0 +1,163 @@
+"""
+Memory benchmark for the BM25 keyword index.
+
+Builds the episode index for a synthetic corpus twice and reports the Python
+heap retained by each layout (measured with tracemalloc, which also tracks
+NumPy buffers):
+
+- legacy:   token lists per document, a rank_bm25.BM25Okapi model and the
+            full EpisodeNode kept per episode (the pre-columnar layout)
+- columnar: the current BM25Index (integer term ids, array postings and
+            NumPy filter columns)
+
+Run from the server directory:
+    python benchmarks/bench_bm25_memory.py --episodes 100000
+    python benchmarks/bench_bm25_memory.py --episodes 100000 --embedding-dim 3072
+
+Episodes produced by ingestion carry their content embedding, which the
+legacy layout retained through episode_map. Keep --embedding-dim modest on
+small machines: the legacy layout holds every vector as Python floats.
+"""
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rank_bm25 import BM25Okapi  # noqa: E402
+
+from ryumem_server.core.models import EpisodeKind, EpisodeNode, EpisodeType  # noqa: E402
+from ryumem_server.retrieval.bm25 import BM25Index  # noqa: E402
+
+
+def generate_episodes(
+    count: int,
+    vocab_size: int,
+    words_per_episode: int,
+    users: int,
+    embedding_dim: int,
+    seed: int,
+) -> Iterator[EpisodeNode]:
+    """Yield synthetic episodes with a Zipf-like word distribution."""
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    vocab = [f"term{i}" for i in range(vocab_size)]
+    cdf = np.cumsum(1.0 / np.arange(1, vocab_size + 1))
+    cdf /= cdf[-1]
+    tags = [f"tag{i}" for i in range(32)]
+    start = datetime(2024, 1, 1)
+
+    for i in range(count):
+        ranks = np.searchsorted(cdf, np_rng.random(words_per_episode))
+        words = [vocab[rank] for rank in ranks]
+        yield EpisodeNode(
+            uuid=f"episode-{i:08d}",
+            name=f"episode {i}",
+            content=" ".join(words),
+            content_embedding=[rng.random() for _ in range(embedding_dim)] if embedding_dim else None,
+            source=EpisodeType.text,
+            kind=EpisodeKind.memory if i % 4 == 0 else EpisodeKind.query,
+            user_id=f"user_{i % users}",
+            metadata={"tags": rng.sample(tags, 2)},
+            created_at=start + timedelta(seconds=i),
+        )
+
+
+class LegacyEpisodeIndex:
+    """Episode part of the pre-columnar BM25Index layout."""
+
+    def __init__(self):
+        self.episode_uuids = []
+        self.episode_corpus = []
+        self.episode_tags = {}
+        self.episode_map = {}
+        self.episode_bm25 = None
+
+    def add_episode(self, episode: EpisodeNode) -> None:
+        self.episode_tags[episode.uuid] = {str(tag).lower() for tag in episode.metadata.get("tags", [])}
+        self.episode_map[episode.uuid] = episode
+        self.episode_uuids.append(episode.uuid)
+        # The legacy index tokenized on whitespace
+        self.episode_corpus.append(episode.content.lower().split())
+
+    def finalize(self) -> None:
+        # The legacy index rebuilt BM25Okapi after every add; build it once here
+        self.episode_bm25 = BM25Okapi(self.episode_corpus)
+
+
+class ColumnarEpisodeIndex:
+    """Adapter exposing the current BM25Index with the same interface."""
+
+    def __init__(self):
+        self.index = BM25Index()
+
+    def add_episode(self, episode: EpisodeNode) -> None:
+        self.index.add_episode(episode)
+
+    def finalize(self) -> None:
+        pass
+
+
+def measure(layout_cls, args) -> dict:
+    """Build one layout and return retained memory and build time."""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+
+    index = layout_cls()
+    for episode in generate_episodes(
+        args.episodes, args.vocab_size, args.words, args.users, args.embedding_dim, args.seed
+    ):
+        index.add_episode(episode)
+    index.finalize()
+
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del index
+    gc.collect()
+    return {"retained_mb": retained / 1024 / 1024, "build_seconds": elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--episodes", type=int, default=100_000)
+    parser.add_argument("--vocab-size", type=int, default=50_000)
+    parser.add_argument("--words", type=int, default=40, help="Words per episode")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--embedding-dim", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skip-legacy", action="store_true", help="Only measure the columnar layout")
+    args = parser.parse_args()
+
+    print(
+        f"Corpus: {args.episodes} episodes, {args.words} words/episode, "
+        f"vocab {args.vocab_size}, {args.users} users, embedding dim {args.embedding_dim}"
+    )
+
+    results = {}
+    if not args.skip_legacy:
+        results["legacy"] = measure(LegacyEpisodeIndex, args)
+    results["columnar"] = measure(ColumnarEpisodeIndex, args)
+
+    for name, result in results.items():
+        print(f"{name:>9}: {result['retained_mb']:10.1f} MB retained, built in {result['build_seconds']:.1f}s")
+
+    if "legacy" in results:
+        ratio = results["legacy"]["retained_mb"] / max(results["columnar"]["retained_mb"], 1e-9)
+        print(f"Reduction: {ratio:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
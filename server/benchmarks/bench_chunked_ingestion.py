@@ -0,0 +1,134 @@
+"""
+Long document ingestion benchmark: one piece versus chunks.
+
+Ingests the same synthetic long documents (paragraphs of short facts) with
+entity extraction, each mode into a fresh ryugraph database:
+
+- whole:   chunk_max_tokens=0 (one embedding and one extract_graph call
+           with the whole document)
+- chunked: chunk_max_tokens=N (a document episode and chunk episodes, the
+           chunks embedded in one call and extracted
+           extraction_concurrency at a time, the graphs merged)
+
+The stub LLM sleeps for a fixed latency per call, a latency per prompt
+character (see bench_extraction_backfill) and a latency per generated
+entity or fact (one fact per sentence), so one call over a whole document
+is slow. Both modes must extract the same graph (facts repeated in chunk
+overlaps resolve to one edge, see extract_pack).
+
+Run from the server directory:
+    python benchmarks/bench_chunked_ingestion.py --documents 4 --sentences 400
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_batch_ingestion import StubEmbedder, StubLLM  # noqa: E402
+from bench_extraction_backfill import PromptCountingLLM  # noqa: E402
+from bench_hybrid_planner import NAMES, PLACES, RELATIONS  # noqa: E402
+from ryumem.core.config import EpisodeConfig  # noqa: E402
+from ryumem_server.core.graph_db import RyugraphDB  # noqa: E402
+from ryumem_server.ingestion.episode import EpisodeIngestion  # noqa: E402
+
+
+class DocumentLLM(PromptCountingLLM):
+    """PromptCountingLLM generating each entity once and one fact per sentence."""
+
+    def __init__(self, latency: float, char_latency: float, output_latency: float, calls: Counter):
+        super().__init__(latency, char_latency, calls)
+        self.output_latency = output_latency
+
+    def extract_graph(self, text: str, user_id: str, context: Optional[str] = None):
+        self._call("extract_graph")
+        self._prompt([text])
+        entities, relationships = [], []
+        for sentence in text.replace("\n", " ").split(". "):
+            words = [word for word in sentence.split() if word in NAMES or word in PLACES]
+            entities.extend(word for word in words if word not in entities)
+            relationships.extend(StubLLM._relationships(sentence.rstrip("."), words))
+        time.sleep(self.output_latency * (len(entities) + len(relationships)))
+        return {
+            "entities": [{"entity": w, "entity_type": "PERSON" if w in NAMES else "PLACE"} for w in entities],
+            "relationships": relationships,
+        }
+
+
+def document(sentences: int, rng: random.Random) -> str:
+    paragraphs = []
+    for start in range(0, sentences, 8):
+        paragraphs.append(" ".join(
+            f"{rng.choice(NAMES)} {rng.choice(RELATIONS)[1]} {rng.choice(PLACES)} in week {i}."
+            for i in range(start, min(start + 8, sentences))
+        ))
+    return "\n\n".join(paragraphs)
+
+
+def run(mode: str, documents: List[str], args, tmp: str) -> Tuple[set, set]:
+    calls: Counter = Counter()
+    db = RyugraphDB(str(Path(tmp) / f"{mode}.db"), embedding_dimensions=args.dimensions)
+    ingestion = EpisodeIngestion(
+        db=db,
+        llm_client=DocumentLLM(
+            args.llm_latency_ms / 1000, args.char_latency_us / 1e6, args.output_latency_ms / 1000, calls
+        ),
+        embedding_client=StubEmbedder(args.dimensions, args.embed_latency_ms / 1000, calls),
+        episode_config=EpisodeConfig(deduplication_enabled=False),
+        deferred_summaries=False,
+        extraction_concurrency=args.concurrency,
+        chunk_max_tokens=0 if mode == "whole" else args.chunk_tokens,
+        chunk_overlap_tokens=args.overlap_tokens,
+    )
+    started = time.perf_counter()
+    for content in documents:
+        ingestion.ingest(content=content, user_id="bench_user", extract_entities=True)
+    elapsed = time.perf_counter() - started
+
+    entities = {row["name"] for row in db.execute("MATCH (e:Entity) RETURN e.name AS name")}
+    facts = {row["fact"] for row in db.execute("MATCH ()-[r:RELATES_TO]->() RETURN r.fact AS fact")}
+    episodes = db.execute("MATCH (e:Episode) RETURN count(e) AS n")[0]["n"]
+    print(
+        f"{mode:>8} {elapsed:8.2f} {elapsed / len(documents):10.2f} {episodes:8} {calls['extract_graph']:8} "
+        f"{calls['prompt_chars'] / 1000:8.0f}k {len(entities):8} {len(facts):6}"
+    )
+    ingestion.close()
+    db.close()
+    return entities, facts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=4)
+    parser.add_argument("--sentences", type=int, default=400, help="Sentences per document")
+    parser.add_argument("--chunk-tokens", type=int, default=1000)
+    parser.add_argument("--overlap-tokens", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4, help="Chunk extraction calls at a time")
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0, help="Stub latency per embedding call")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Stub latency per LLM call")
+    parser.add_argument("--char-latency-us", type=float, default=20.0, help="Stub latency per prompt character")
+    parser.add_argument("--output-latency-ms", type=float, default=10.0, help="Stub latency per generated item")
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents = [document(args.sentences, rng) for _ in range(args.documents)]
+    print(f"{args.documents} documents of {args.sentences} sentences, {args.chunk_tokens} tokens per chunk")
+    print(
+        f"{'mode':>8} {'seconds':>8} {'s/document':>10} {'episodes':>8} {'extracts':>8} {'chars':>9} "
+        f"{'entities':>8} {'edges':>6}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        extracted = [run(mode, documents, args, tmp) for mode in ("whole", "chunked")]
+    assert extracted[0] == extracted[1], "modes extracted different graphs"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Duplicate detection without embeddings: BM25 queries versus the duplicate index.
+
+Saves a corpus of synthetic episodes of many users, spread over the last
+--hours hours, into a fresh ryugraph database (and an in-memory BM25
+index), then checks new episodes of random users for duplicates within the
+24 hour deduplication window two ways:
+
+- bm25:  RyugraphDB.find_similar_episode_bm25 (exact content match query,
+         then a BM25 query over all users' episodes filtered by user and
+         time in the database)
+- index: NearDuplicateIndex.find (content hash, then MinHash LSH candidates
+         in the user's time buckets)
+
+Half of the checked episodes are near-duplicates of one of the user's
+episodes of the window (a resent message: other case and punctuation, a
+word appended), a quarter exact duplicates and a quarter new (false
+positives). The corpus grows from --sizes; the index's lookup time should
+stay flat while the BM25 path grows with the corpus. The index's one-off
+load from the database is reported separately.
+
+Run from the server directory:
+    python benchmarks/bench_duplicate_index.py --sizes 2000 8000 32000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_hybrid_planner import NAMES, PLACES, RELATIONS  # noqa: E402
+from ryumem_server.core.graph_db import RyugraphDB  # noqa: E402
+from ryumem_server.core.models import EpisodeNode, EpisodeType  # noqa: E402
+from ryumem_server.ingestion.near_duplicates import NearDuplicateIndex  # noqa: E402
+from ryumem_server.retrieval.bm25 import BM25Index  # noqa: E402
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "po", "an", "el"]
+# Pseudo-words, so unrelated episodes share few terms (as real vocabularies do)
+VOCABULARY = sorted({
+    "".join(random.Random(i).choices(SYLLABLES, k=3)) for i in range(5000)
+})
+
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(NAMES), rng.choice(RELATIONS)[1], rng.choice(PLACES)]
+    words += rng.choices(VOCABULARY, k=rng.randint(6, 14))
+    return " ".join(words)
+
+
+def corpus(size: int, users: int, hours: float, rng: random.Random) -> List[EpisodeNode]:
+    now = datetime.utcnow()
+    return [
+        EpisodeNode(
+            name=f"episode {i}",
+            content=sentence(rng),
+            source=EpisodeType.text,
+            user_id=f"user_{i % users}",
+            created_at=now - timedelta(hours=rng.uniform(0, hours)),
+            valid_at=now,
+        )
+        for i in range(size)
+    ]
+
+
+def queries(episodes: List[EpisodeNode], count: int, rng: random.Random) -> List[Tuple[str, str, str]]:
+    """(content, user_id, expected) with expected exact, near or new."""
+    window = datetime.utcnow() - timedelta(hours=23)
+    recent = [episode for episode in episodes if episode.created_at > window]
+    checks = []
+    for i in range(count):
+        episode = rng.choice(recent)
+        if i % 4 == 0:
+            checks.append((episode.content, episode.user_id, "exact"))
+        elif i % 4 == 1:
+            checks.append((sentence(rng), episode.user_id, "new"))
+        else:
+            edited = f"{episode.content.lower()} {rng.choice(VOCABULARY)}!"
+            checks.append((edited, episode.user_id, "near"))
+    return checks
+
+
+def run(size: int, args, tmp: str) -> None:
+    rng = random.Random(args.seed)
+    episodes = corpus(size, args.users, args.hours, rng)
+    db = RyugraphDB(str(Path(tmp) / f"corpus_{size}.db"), embedding_dimensions=8)
+    for start in range(0, len(episodes), 1000):
+        db.save_episodes(episodes[start:start + 1000])
+    bm25 = BM25Index()
+    for episode in episodes:
+        bm25.add_episode(episode)
+    index = NearDuplicateIndex(db.get_recent_episode_hashes)
+    checks = queries(episodes, args.queries, rng)
+
+    started = time.perf_counter()
+    index.find("", "user_0", 24, args.threshold)
+    load = time.perf_counter() - started
+
+    results = {}
+    for mode in ("bm25", "index"):
+        found = {"exact": 0, "near": 0, "new": 0}
+        started = time.perf_counter()
+        for content, user_id, expected in checks:
+            if mode == "bm25":
+                match = db.find_similar_episode_bm25(
+                    content, user_id, bm25, time_window_hours=24, similarity_threshold=args.bm25_threshold
+                )
+            else:
+                match = index.find(content, user_id, time_window_hours=24, threshold=args.threshold)
+            found[expected] += match is not None
+        results[mode] = ((time.perf_counter() - started) / len(checks) * 1000, found)
+
+    per_kind = args.queries // 4
+    for mode, (ms, found) in results.items():
+        print(
+            f"{size:>7} {mode:>6} {ms:9.2f} {found['exact']:>4}/{per_kind:<4} {found['near']:>4}/{per_kind * 2:<4} "
+            f"{found['new']:>4}/{per_kind:<4} {load if mode == 'index' else 0:7.2f}"
+        )
+    db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 8000, 32000])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--hours", type=float, default=48.0, help="Age of the oldest corpus episodes")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--threshold", type=float, default=0.8, help="Index near-duplicate threshold")
+    parser.add_argument("--bm25-threshold", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{args.users} users, {args.queries} checks per corpus (24h window)")
+    print(f"{'corpus':>7} {'mode':>6} {'ms/check':>9} {'exact':>9} {'near':>9} {'new (fp)':>9} {'load s':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            run(size, args, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Per-episode entity resolution benchmark.
+
+Seeds a ryugraph database with a user's entities (random name embeddings),
+then resolves episodes of new entity names against them two ways:
+
+- scans: one search_similar_entities vector scan per extracted entity,
+         saving each before the next is matched (resolution before the
+         ResolutionIndex)
+- index: ResolutionIndex.resolve for the whole episode (one matrix product
+         against the user's cached vectors), then the saves
+
+Half of the extracted entities are near-duplicates of stored entities, so
+both matches and creations are exercised. Both modes run on identical
+databases and must resolve every episode the same way. Reports milliseconds
+per episode spent matching (the index mode includes the one-time load of
+the user's vectors) and saving (the same in both modes).
+
+Run from the server directory:
+    python benchmarks/bench_entity_resolution.py --entities 10000 --per-episode 4 8 16
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List
+from uuid import uuid4
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ryumem_server.core.graph_db import RyugraphDB  # noqa: E402
+from ryumem_server.core.models import EntityNode  # noqa: E402
+from ryumem_server.ingestion.resolution_index import ResolutionIndex  # noqa: E402
+
+USER_ID = "bench_user"
+
+
+def seed(path: str, vectors: np.ndarray) -> RyugraphDB:
+    db = RyugraphDB(path, embedding_dimensions=vectors.shape[1])
+    rows = [{"uuid": f"seed-{i}", "name": f"entity_{i}", "embedding": vector.tolist()} for i, vector in enumerate(vectors)]
+    db.execute(
+        f"""
+        UNWIND $rows AS row
+        CREATE (e:Entity {{
+            uuid: row.uuid, name: row.name, entity_type: 'THING', summary: '', mentions: 1,
+            user_id: $user_id, name_embedding: CAST(row.embedding, 'FLOAT[{vectors.shape[1]}]')
+        }})
+        """,
+        {"rows": rows, "user_id": USER_ID},
+    )
+    return db
+
+
+def save(db: RyugraphDB, uuid: str, embedding: List[float]) -> None:
+    db.save_entity(EntityNode(
+        uuid=uuid, name="entity", entity_type="THING", summary="",
+        name_embedding=embedding, mentions=1, user_id=USER_ID,
+    ))
+
+
+def resolve_with_scans(db: RyugraphDB, episode: List[List[float]], threshold: float, timings: Counter) -> List[str]:
+    uuids = []
+    for embedding in episode:
+        started = time.perf_counter()
+        similar = db.search_similar_entities(embedding=embedding, user_id=USER_ID, threshold=threshold, limit=5)
+        timings["match"] += time.perf_counter() - started
+        uuid = similar[0]["uuid"] if similar else str(uuid4())
+        started = time.perf_counter()
+        save(db, uuid, embedding)
+        timings["save"] += time.perf_counter() - started
+        uuids.append(uuid)
+    return uuids
+
+
+def resolve_with_index(
+    db: RyugraphDB, index: ResolutionIndex, episode: List[List[float]], threshold: float, timings: Counter
+) -> List[str]:
+    started = time.perf_counter()
+    resolutions = index.resolve(USER_ID, episode, threshold=threshold, limit=5)
+    timings["match"] += time.perf_counter() - started
+    started = time.perf_counter()
+    for resolution, embedding in zip(resolutions, episode):
+        save(db, resolution.uuid, embedding)
+    timings["save"] += time.perf_counter() - started
+    return [resolution.uuid for resolution in resolutions]
+
+
+def shape(uuids: List[str]) -> List[str]:
+    """Resolution outcome independent of the random UUIDs of new entities."""
+    first = {}
+    return [uuid if uuid.startswith("seed-") else f"new-{first.setdefault(uuid, i)}" for i, uuid in enumerate(uuids)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=10000, help="Stored entities of the user")
+    parser.add_argument("--per-episode", type=int, nargs="+", default=[4, 8, 16], help="Entities extracted per episode")
+    parser.add_argument("--episodes", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    stored = rng.standard_normal((args.entities, args.dimensions)).astype(np.float32)
+
+    print(f"{args.entities} stored entities, {args.dimensions} dimensions, {args.episodes} episodes per row")
+    print(f"{'':>11} {'match ms per episode':^27} {'save ms per episode':^19}")
+    print(f"{'per episode':>11} {'scans':>9} {'index':>9} {'speedup':>7} {'scans':>9} {'index':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for per_episode in args.per_episode:
+            episodes = []
+            for _ in range(args.episodes):
+                duplicates = stored[rng.integers(0, args.entities, per_episode // 2)]
+                duplicates = duplicates + 0.2 * rng.standard_normal(duplicates.shape).astype(np.float32)
+                fresh = rng.standard_normal((per_episode - len(duplicates), args.dimensions)).astype(np.float32)
+                episodes.append(np.vstack([duplicates, fresh]).tolist())
+
+            scans_db = seed(str(Path(tmp) / f"scans-{per_episode}.db"), stored)
+            index_db = seed(str(Path(tmp) / f"index-{per_episode}.db"), stored)
+            index = ResolutionIndex("entity", index_db.get_entity_embeddings)
+            index_db.changes.subscribe(index.on_change)
+
+            scans, indexed = Counter(), Counter()
+            scanned = [shape(resolve_with_scans(scans_db, episode, args.threshold, scans)) for episode in episodes]
+            resolved = [shape(resolve_with_index(index_db, index, episode, args.threshold, indexed)) for episode in episodes]
+            assert scanned == resolved, "modes resolved differently"
+
+            scans_ms, indexed_ms = (
+                {name: timings[name] / args.episodes * 1000 for name in ("match", "save")}
+                for timings in (scans, indexed)
+            )
+            print(
+                f"{per_episode:>11} {scans_ms['match']:9.1f} {indexed_ms['match']:9.1f} "
+                f"{scans_ms['match'] / indexed_ms['match']:7.1f}x {scans_ms['save']:9.1f} {indexed_ms['save']:9.1f}"
+            )
+            scans_db.close()
+            index_db.close()
+
+
+if __name__ == "__main__":
+    main()
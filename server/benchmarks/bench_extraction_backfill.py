@@ -0,0 +1,135 @@
+"""
+Extraction backfill benchmark: packed versus one prompt per episode.
+
+Saves the same synthetic short episodes twice without extraction (a history
+import), each into a fresh ryugraph database, then extracts them with
+ExtractionBackfill:
+
+- single: max_episodes_per_prompt=1 (one extract_graph call per episode,
+          the cost of extracting at ingestion time)
+- packed: max_episodes_per_prompt=N (one extract_graph_batch call per pack)
+
+The stub LLM sleeps for a fixed latency per call plus a latency per prompt
+character, and counts the characters it is sent (instructions included) as
+a proxy for prompt tokens. Both modes must produce the same graph.
+
+Run from the server directory:
+    python benchmarks/bench_extraction_backfill.py --episodes 200 --per-prompt 8
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_batch_ingestion import StubEmbedder, StubLLM, episodes  # noqa: E402
+from bench_hybrid_planner import NAMES, PLACES  # noqa: E402
+from ryumem.core.config import EpisodeConfig  # noqa: E402
+from ryumem_server.core.graph_db import RyugraphDB  # noqa: E402
+from ryumem_server.ingestion.backfill import ExtractionBackfill  # noqa: E402
+from ryumem_server.ingestion.episode import EpisodeIngestion  # noqa: E402
+
+# Instructions and tool definition sent with every extraction prompt
+# (about the size of the extract_graph system prompt and tool schema)
+PROMPT_OVERHEAD_CHARS = 2500
+
+
+class PromptCountingLLM(StubLLM):
+    """StubLLM that also extracts packs and counts prompt characters."""
+
+    def __init__(self, latency: float, char_latency: float, calls: Counter):
+        super().__init__(latency, calls)
+        self.char_latency = char_latency
+
+    def _prompt(self, texts: List[str]) -> None:
+        chars = PROMPT_OVERHEAD_CHARS + sum(len(text) for text in texts)
+        with self._lock:
+            self.calls["prompt_chars"] += chars
+        time.sleep(self.char_latency * chars)
+
+    def extract_graph(self, text: str, user_id: str, context: Optional[str] = None):
+        self._prompt([text])
+        return super().extract_graph(text, user_id, context)
+
+    def extract_graph_batch(self, texts: List[str], user_id: str, context: Optional[str] = None):
+        self._call("extract_graph_batch")
+        self._prompt(texts)
+        graphs = []
+        for text in texts:
+            entities = [word for word in text.split() if word in NAMES or word in PLACES]
+            graphs.append({
+                "entities": [{"entity": w, "entity_type": "PERSON" if w in NAMES else "PLACE"} for w in entities],
+                "relationships": self._relationships(text, entities),
+            })
+        return graphs
+
+
+def run(mode: str, batch: List[Dict], args, tmp: str) -> List:
+    calls: Counter = Counter()
+    db = RyugraphDB(str(Path(tmp) / f"{mode}.db"), embedding_dimensions=args.dimensions)
+    ingestion = EpisodeIngestion(
+        db=db,
+        llm_client=PromptCountingLLM(args.llm_latency_ms / 1000, args.char_latency_us / 1e6, calls),
+        embedding_client=StubEmbedder(args.dimensions, args.embed_latency_ms / 1000, calls),
+        episode_config=EpisodeConfig(deduplication_enabled=False),
+        deferred_summaries=False,
+    )
+    ingestion.ingest_batch(batch, user_id="bench_user", extract_entities=False)
+    calls.clear()
+
+    backfill = ExtractionBackfill(
+        db, ingestion,
+        max_episodes_per_prompt=1 if mode == "single" else args.per_prompt,
+        max_prompts_per_minute=0,
+    )
+    started = time.perf_counter()
+    progress = backfill.run()
+    elapsed = time.perf_counter() - started
+
+    graph = sorted(
+        (row["s"], row["r"], row["t"], row["expired"])
+        for row in db.execute(
+            "MATCH (s:Entity)-[r:RELATES_TO]->(t:Entity) "
+            "RETURN s.name AS s, r.name AS r, t.name AS t, r.expired_at IS NOT NULL AS expired"
+        )
+    )
+    entities = db.execute("MATCH (e:Entity) RETURN count(e) AS n")[0]["n"]
+    print(
+        f"{mode:>7} {elapsed:8.2f} {len(batch) / elapsed:9.1f} {progress.extracted:9} {progress.prompts:7} "
+        f"{calls['prompt_chars'] / 1000:8.0f}k {entities:8} {len(graph):6} {db.count_unextracted_episodes():7}"
+    )
+    ingestion.close()
+    db.close()
+    return graph
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--episodes", type=int, default=200)
+    parser.add_argument("--per-prompt", type=int, default=8, help="Episodes packed into one prompt")
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0, help="Stub latency per embedding call")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Stub latency per LLM call")
+    parser.add_argument("--char-latency-us", type=float, default=20.0, help="Stub latency per prompt character")
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{args.episodes} episodes, {args.per_prompt} per packed prompt")
+    print(
+        f"{'mode':>7} {'seconds':>8} {'eps/s':>9} {'extracted':>9} {'prompts':>7} {'chars':>9} "
+        f"{'entities':>8} {'edges':>6} {'pending':>7}"
+    )
+    batch = episodes(args.episodes, 0.0, "import", random.Random(args.seed))
+    with tempfile.TemporaryDirectory() as tmp:
+        graphs = [run(mode, batch, args, tmp) for mode in ("single", "packed")]
+    assert graphs[0] == graphs[1], "modes extracted different graphs"
+
+
+if __name__ == "__main__":
+    main()
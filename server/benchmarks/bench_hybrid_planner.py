@@ -0,0 +1,224 @@
+"""
+Latency/recall benchmark for the hybrid search strategy planner.
+
+Builds a ryugraph database with three kinds of synthetic users and runs the
+same hybrid queries with and without the StrategyPlanner:
+
+- graph:    episodes, extracted entities and relationship facts
+- episodes: episodes only (entity extraction never ran)
+- empty:    no documents at all
+
+Queries are short entity-name lookups and longer questions. Embeddings come
+from a deterministic hashed bag-of-words model, so no embedding provider is
+needed and semantic scores track word overlap.
+
+For every user kind and query length it reports the mean and p95 latency of
+both engines and the recall of the planned results: the share of the
+unplanned top-k (entities, edges and episodes) the planned search returned.
+
+Run from the server directory:
+    python benchmarks/bench_hybrid_planner.py --users 20 --episodes 200
+    python benchmarks/bench_hybrid_planner.py --confidence 0.9 --sequential
+"""
+
+import argparse
+import hashlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ryumem_server.core.graph_db import RyugraphDB  # noqa: E402
+from ryumem_server.core.models import (  # noqa: E402
+    EntityEdge,
+    EntityNode,
+    EpisodeKind,
+    EpisodeNode,
+    EpisodeType,
+    EpisodicEdge,
+    SearchConfig,
+    SearchResult,
+)
+from ryumem_server.retrieval.bm25 import BM25Index  # noqa: E402
+from ryumem_server.retrieval.planner import StrategyPlanner  # noqa: E402
+from ryumem_server.retrieval.search import SearchEngine  # noqa: E402
+
+NAMES = ["Alice", "Bob", "Carol", "Dmitri", "Elena", "Farah", "Gustav", "Hana", "Ivan", "Julia"]
+PLACES = ["Google", "Acme", "Zurich", "Berlin", "OpenAI", "Lisbon", "Oxford", "Tokyo"]
+RELATIONS = [("WORKS_AT", "works at"), ("LIVES_IN", "lives in"), ("VISITED", "visited"), ("LIKES", "likes")]
+
+
+class HashEmbedder:
+    """Deterministic hashed bag-of-words embeddings (unit length)."""
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+
+    def embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in text.lower().split():
+            bucket = int(hashlib.md5(word.strip(".,?!").encode("utf-8")).hexdigest(), 16)
+            vector[bucket % self.dimensions] += 1.0 if bucket & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed(text) for text in texts]
+
+
+def populate(db: RyugraphDB, embedder: HashEmbedder, bm25: BM25Index, args, rng: random.Random) -> Dict[str, List[str]]:
+    """Create the users and their documents; return user ids by kind."""
+    users: Dict[str, List[str]] = defaultdict(list)
+    for u in range(args.users):
+        kind = ("graph", "episodes", "empty")[u % 3]
+        user_id = f"{kind}_{u}"
+        users[kind].append(user_id)
+        if kind == "empty":
+            continue
+
+        entities = {}
+        if kind == "graph":
+            for name in NAMES + PLACES:
+                entity = EntityNode(
+                    name=name,
+                    entity_type="PERSON" if name in NAMES else "PLACE",
+                    name_embedding=embedder.embed(name),
+                    user_id=user_id,
+                )
+                db.save_entity(entity)
+                bm25.add_entity(entity)
+                entities[name] = entity
+
+        for i in range(args.episodes):
+            person, place = rng.choice(NAMES), rng.choice(PLACES)
+            relation, phrase = rng.choice(RELATIONS)
+            content = f"{person} {phrase} {place} according to note {i}"
+            episode = EpisodeNode(
+                name=f"note {i}",
+                content=content,
+                content_embedding=embedder.embed(content),
+                source=EpisodeType.text,
+                kind=EpisodeKind.memory,
+                user_id=user_id,
+            )
+            db.save_episode(episode)
+            bm25.add_episode(episode)
+
+            if kind == "graph":
+                fact = f"{person} {phrase} {place}"
+                edge = EntityEdge(
+                    source_node_uuid=entities[person].uuid,
+                    target_node_uuid=entities[place].uuid,
+                    name=relation,
+                    fact=fact,
+                    fact_embedding=embedder.embed(fact),
+                    episodes=[episode.uuid],
+                )
+                db.save_entity_edge(edge, entities[person].uuid, entities[place].uuid)
+                bm25.add_edge(edge, user_id=user_id)
+                for name in (person, place):
+                    db.save_episodic_edge(EpisodicEdge(
+                        source_node_uuid=episode.uuid,
+                        target_node_uuid=entities[name].uuid,
+                    ))
+    return users
+
+
+def queries(rng: random.Random, count: int) -> Dict[str, List[str]]:
+    """Short entity-name lookups and longer relational questions."""
+    return {
+        "short": [rng.choice(NAMES + PLACES) for _ in range(count)],
+        "long": [
+            f"where does {rng.choice(NAMES)} work and who else {rng.choice(RELATIONS)[1]} {rng.choice(PLACES)}"
+            for _ in range(count)
+        ],
+    }
+
+
+def uuids(result: SearchResult) -> Set[str]:
+    return {item.uuid for item in [*result.entities, *result.edges, *result.episodes]}
+
+
+def run(engine: SearchEngine, user_id: str, query: str, limit: int) -> Tuple[SearchResult, float]:
+    config = SearchConfig(query=query, user_id=user_id, limit=limit, strategy="hybrid", similarity_threshold=0.3)
+    started = time.perf_counter()
+    result = engine.search(config)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def p95(values: List[float]) -> float:
+    return sorted(values)[max(int(len(values) * 0.95) - 1, 0)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=12)
+    parser.add_argument("--episodes", type=int, default=200, help="Episodes per non-empty user")
+    parser.add_argument("--queries", type=int, default=20, help="Queries per user and query length")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--confidence", type=float, default=0.8, help="Planner confidence score")
+    parser.add_argument("--short-query-terms", type=int, default=2)
+    parser.add_argument("--sequential", action="store_true", help="Run hybrid strategies one after another")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    embedder = HashEmbedder(args.dimensions)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = RyugraphDB(str(Path(tmp) / "bench.db"), embedding_dimensions=args.dimensions)
+        bm25 = BM25Index()
+        started = time.perf_counter()
+        users = populate(db, embedder, bm25, args, rng)
+        print(f"Populated {args.users} users in {time.perf_counter() - started:.1f}s")
+
+        planner = StrategyPlanner(db, confidence_score=args.confidence, short_query_terms=args.short_query_terms)
+        engines = {
+            name: SearchEngine(
+                db=db,
+                embedding_client=embedder,
+                bm25_index=bm25,
+                parallel_hybrid=not args.sequential,
+                planner=engine_planner,
+            )
+            for name, engine_planner in (("full", None), ("planned", planner))
+        }
+
+        print(f"{'users':>9} {'query':>6} {'full ms':>9} {'p95':>7} {'planned ms':>11} {'p95':>7} {'saved':>7} {'recall':>7}")
+        for kind, user_ids in users.items():
+            for length, texts in queries(rng, args.queries).items():
+                latencies: Dict[str, List[float]] = defaultdict(list)
+                recalls: List[float] = []
+                for user_id in user_ids:
+                    for text in texts:
+                        full, full_ms = run(engines["full"], user_id, text, args.limit)
+                        planned, planned_ms = run(engines["planned"], user_id, text, args.limit)
+                        latencies["full"].append(full_ms)
+                        latencies["planned"].append(planned_ms)
+                        expected = uuids(full)
+                        recalls.append(len(expected & uuids(planned)) / len(expected) if expected else 1.0)
+
+                full_mean = statistics.mean(latencies["full"])
+                planned_mean = statistics.mean(latencies["planned"])
+                print(
+                    f"{kind:>9} {length:>6} {full_mean:9.1f} {p95(latencies['full']):7.1f} "
+                    f"{planned_mean:11.1f} {p95(latencies['planned']):7.1f} "
+                    f"{(1 - planned_mean / full_mean) * 100:6.0f}% {statistics.mean(recalls):7.3f}"
+                )
+
+        for engine in engines.values():
+            engine.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Per-result overhead micro-benchmark for search result records.
+
+Turns synthetic database rows (entities, edges, episodes) into search
+results the way the strategies do, and reports the cost per candidate and
+the memory each layout retains:
+
+- models:  a validated Pydantic EntityNode/EntityEdge/EpisodeNode per
+           candidate (the layout before slotted records)
+- records: a slotted EntityRecord/EdgeRecord/EpisodeRecord per candidate,
+           and SearchHits.to_result for the final top-k only
+
+A hybrid search builds candidates for three strategies and keeps `--limit`
+of each kind after fusion, so the records layout converts far fewer
+objects than it builds.
+
+Run from the server directory:
+    python benchmarks/bench_result_records.py --candidates 300 --limit 10
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ryumem_server.core.models import (  # noqa: E402
+    EntityEdge,
+    EntityNode,
+    EpisodeKind,
+    EpisodeNode,
+    EpisodeType,
+)
+from ryumem_server.retrieval.records import (  # noqa: E402
+    EdgeRecord,
+    EntityRecord,
+    EpisodeRecord,
+    SearchHits,
+)
+
+
+def generate_rows(count: int, seed: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Rows shaped like the database results the strategies hydrate."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    entities, edges, episodes = [], [], []
+    for i in range(count):
+        created_at = start + timedelta(minutes=i)
+        entities.append({
+            "uuid": f"entity-{i}", "name": f"Entity {i}", "entity_type": "PERSON",
+            "summary": "An entity mentioned in a few episodes", "mentions": rng.randint(1, 9),
+            "user_id": "user_1", "created_at": created_at,
+        })
+        edges.append({
+            "edge_uuid": f"edge-{i}", "source_uuid": f"entity-{i}", "target_uuid": f"entity-{i + 1}",
+            "relation_type": "KNOWS", "fact": f"Entity {i} knows Entity {i + 1}",
+            "created_at": created_at, "valid_at": created_at, "invalid_at": None,
+        })
+        episodes.append({
+            "uuid": f"episode-{i}", "name": f"episode {i}", "content": f"Entity {i} met Entity {i + 1} today",
+            "source": "text", "source_description": "", "kind": "memory", "user_id": "user_1",
+            "agent_id": None, "metadata": '{"tags": ["meeting"]}', "created_at": created_at,
+        })
+    return {"entities": entities, "edges": edges, "episodes": episodes}
+
+
+def build_models(rows: Dict[str, List[Dict[str, Any]]], limit: int) -> int:
+    entities = [
+        EntityNode(
+            uuid=row["uuid"], name=row["name"], entity_type=row["entity_type"], summary=row["summary"],
+            mentions=row["mentions"], user_id=row["user_id"], created_at=row["created_at"],
+        )
+        for row in rows["entities"]
+    ]
+    edges = [
+        EntityEdge(
+            uuid=row["edge_uuid"], source_node_uuid=row["source_uuid"], target_node_uuid=row["target_uuid"],
+            name=row["relation_type"], fact=row["fact"], created_at=row["created_at"],
+            valid_at=row["valid_at"], invalid_at=row["invalid_at"],
+        )
+        for row in rows["edges"]
+    ]
+    episodes = [
+        EpisodeNode(
+            uuid=row["uuid"], name=row["name"], content=row["content"],
+            source=EpisodeType.from_str(row["source"]), source_description=row["source_description"],
+            kind=EpisodeKind.from_str(row["kind"]), user_id=row["user_id"], agent_id=row["agent_id"],
+            metadata=json.loads(row["metadata"]), created_at=row["created_at"],
+        )
+        for row in rows["episodes"]
+    ]
+    return len(entities[:limit]) + len(edges[:limit]) + len(episodes[:limit])
+
+
+def build_records(rows: Dict[str, List[Dict[str, Any]]], limit: int) -> int:
+    hits = SearchHits(
+        entities=[EntityRecord.from_row(row) for row in rows["entities"]],
+        edges=[EdgeRecord.from_row(row, "edge_uuid") for row in rows["edges"]],
+        episodes=[EpisodeRecord.from_row(row) for row in rows["episodes"]],
+    )
+    # Fusion and limits keep the top-k; only those become models
+    hits.entities, hits.edges, hits.episodes = hits.entities[:limit], hits.edges[:limit], hits.episodes[:limit]
+    result = hits.to_result()
+    return len(result.entities) + len(result.edges) + len(result.episodes)
+
+
+def time_per_candidate(build: Callable, rows, limit: int, repeats: int) -> float:
+    candidates = sum(len(kind) for kind in rows.values())
+    build(rows, limit)  # warm up
+    started = time.perf_counter()
+    for _ in range(repeats):
+        build(rows, limit)
+    return (time.perf_counter() - started) / repeats / candidates * 1e6
+
+
+def retained_bytes(build_objects: Callable[[], List[Any]]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    objects = build_objects()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return retained // max(len(objects), 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=300, help="Candidate rows per kind")
+    parser.add_argument("--limit", type=int, default=10, help="Results kept per kind")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rows = generate_rows(args.candidates, args.seed)
+    print(f"{args.candidates} candidates per kind, top {args.limit} kept")
+
+    results = {
+        name: time_per_candidate(build, rows, args.limit, args.repeats)
+        for name, build in (("models", build_models), ("records", build_records))
+    }
+    for name, microseconds in results.items():
+        print(f"{name:>8}: {microseconds:6.2f} us per candidate")
+    print(f"Speedup: {results['models'] / results['records']:.1f}x")
+
+    entity_rows = rows["entities"]
+    model_bytes = retained_bytes(lambda: [
+        EntityNode(
+            uuid=row["uuid"], name=row["name"], entity_type=row["entity_type"], summary=row["summary"],
+            mentions=row["mentions"], user_id=row["user_id"], created_at=row["created_at"],
+        )
+        for row in entity_rows
+    ])
+    record_bytes = retained_bytes(lambda: [EntityRecord.from_row(row) for row in entity_rows])
+    print(f"Entity memory: {model_bytes} bytes per model, {record_bytes} bytes per record")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,9 +23,10 @@ import httpx
 
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, Header, Query, status
+from fastapi import Depends, FastAPI, HTTPException, Header, Query, Response, status
 from urllib.parse import urlencode
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from ryumem_server import Ryumem
@@ -35,6 +36,7 @@ from ryumem_server.core.metadata_models import EpisodeMetadata, QueryRun, ToolEx
 from ryumem_server.core.graph_db import RyugraphDB
 from ryumem_server.core.graph_db import RyugraphDB
 from ryumem_server.core.config_service import ConfigService
+from ryumem_server.core.models import SearchResult
 
 # Load environment variables
 load_dotenv()
@@ -435,11 +437,8 @@ async def lifespan(app: FastAPI):
     # Close all open Ryumem instances
     for customer_id, instance in _ryumem_cache.items():
         try:
-            instance.db.close() # Assuming Ryumem has a way to close DB or we rely on GC
-            # Actually Ryumem.close() might be better if it exists, let's check lib.py
-            # lib.py doesn't seem to have a close() method on Ryumem class based on previous view_file
-            # But RyugraphDB might.
-            pass 
+            # Waits for background index rebuilds and persists the BM25 index
+            instance.close()
         except Exception as e:
             logger.error(f"Error closing instance for {customer_id}: {e}")
     _ryumem_cache.clear()
@@ -575,6 +574,89 @@ class AddEpisodeResponse(BaseModel):
     episode_id: str = Field(..., description="UUID of the created episode")
     message: str = Field(..., description="Success message")
     timestamp: str = Field(..., description="Timestamp of creation")
+    job_id: Optional[str] = Field(
+        None,
+        description="Background extraction job (async=true only; see GET /ingestion/jobs/{job_id})"
+    )
+
+
+class BatchEpisodeItem(BaseModel):
+    """One episode of a batch"""
+    content: str = Field(..., description="Episode content (text, message, or JSON)")
+    session_id: Optional[str] = Field(None, description="Optional session ID")
+    source: str = Field("text", description="Episode source type: text, message, or json")
+    kind: str = Field("query", description="Episode kind: 'query' or 'memory'")
+    metadata: Optional[Dict] = Field(None, description="Optional metadata")
+
+
+class BatchAddEpisodesRequest(BaseModel):
+    """Request model for adding several episodes at once"""
+    episodes: List[BatchEpisodeItem] = Field(..., description="Episodes to add", min_length=1, max_length=1000)
+    user_id: str = Field(..., description="User ID for isolation")
+    extract_entities: Optional[bool] = Field(None, description="Override config setting for entity extraction (None uses config default)")
+    enable_embeddings: Optional[bool] = Field(None, description="Override config setting for episode embeddings (None uses config default)")
+    deduplication_enabled: Optional[bool] = Field(None, description="Override config setting for episode deduplication (None uses config default)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "episodes": [
+                    {"content": "Alice works at Google"},
+                    {"content": "Bob lives in San Francisco", "kind": "memory"}
+                ],
+                "user_id": "user_123",
+                "extract_entities": True
+            }
+        }
+
+
+class BatchEpisodeResult(BaseModel):
+    """Outcome of one episode of a batch"""
+    episode_id: Optional[str] = Field(None, description="UUID of the created episode or of the episode it duplicates (None if it failed)")
+    status: str = Field(..., description="created, duplicate or failed")
+
+
+class BatchAddEpisodesResponse(BaseModel):
+    """Response model for batch episode ingestion"""
+    results: List[BatchEpisodeResult] = Field(..., description="One result per input episode, in input order")
+    created: int = Field(..., description="Number of episodes created")
+    duplicates: int = Field(..., description="Number of episodes that duplicate an existing or earlier episode")
+    failed: int = Field(..., description="Number of episodes that failed")
+    message: str = Field(..., description="Summary message")
+    timestamp: str = Field(..., description="Timestamp of completion")
+
+
+class IngestionJobResponse(BaseModel):
+    """Background extraction job of an asynchronously added episode"""
+    id: str = Field(..., description="Job ID")
+    status: str = Field(..., description="queued, running, done or failed")
+    episode_uuid: str = Field(..., description="Episode the job extracts entities and relationships from")
+    user_id: str = Field(..., description="Owner of the episode")
+    session_id: Optional[str] = Field(None, description="Session of the episode")
+    attempts: int = Field(..., description="Extraction attempts started so far")
+    error: Optional[str] = Field(None, description="Error of the last failed attempt")
+    created_at: str = Field(..., description="When the job was queued")
+    started_at: Optional[str] = Field(None, description="When the last attempt started")
+    finished_at: Optional[str] = Field(None, description="When the job finished")
+
+
+class IngestionJobListResponse(BaseModel):
+    """Response model for listing background extraction jobs"""
+    jobs: List[IngestionJobResponse]
+    count: int
+
+
+class BackfillResponse(BaseModel):
+    """Progress of the extraction backfill of episodes saved without extraction"""
+    state: str = Field(..., description="idle, running, stopping, stopped, done or failed")
+    user_id: Optional[str] = Field(None, description="User whose episodes are extracted (null = all users)")
+    pending: int = Field(..., description="Episodes waiting for extraction when the run started")
+    extracted: int = Field(..., description="Episodes extracted so far")
+    failed: int = Field(..., description="Episodes whose extraction failed")
+    prompts: int = Field(..., description="Extraction prompts sent")
+    started_at: Optional[str] = Field(None, description="When the run started")
+    finished_at: Optional[str] = Field(None, description="When the run ended")
+    error: Optional[str] = Field(None, description="Error that ended the run")
 
 
 class EpisodeInfo(BaseModel):
@@ -611,6 +693,7 @@ class SearchRequest(BaseModel):
     kinds: Optional[List[str]] = Field(None, description="Filter episodes by kinds (e.g., ['query'], ['memory'], or None for all)")
     tags: Optional[List[str]] = Field(None, description="Filter episodes by tags")
     tag_match_mode: str = Field("any", description="Tag matching mode: 'any' or 'all'")
+    profile: bool = Field(False, description="Return per-stage timings, query counts and cache hits")
 
     class Config:
         json_schema_extra = {
@@ -654,6 +737,50 @@ class SearchResponse(BaseModel):
     query: Optional[str] = Field(None, description="Original query")
     strategy: str = Field(..., description="Search strategy used")
     count: int = Field(..., description="Total number of results")
+    profile: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Per-stage wall time (ms), database queries, rows read and cache hits (when requested)"
+    )
+
+
+class BatchSearchRequest(BaseModel):
+    """Request model for searching several queries at once"""
+    queries: List[str] = Field(..., description="Search query texts", min_length=1, max_length=32)
+    user_id: str = Field(..., description="User ID to search within")
+    limit: int = Field(10, description="Maximum number of results per query", ge=1, le=100)
+    strategy: str = Field("hybrid", description="Search strategy: semantic, bm25, traversal, or hybrid")
+    min_rrf_score: Optional[float] = Field(None, description="Minimum RRF score for hybrid search")
+    min_bm25_score: Optional[float] = Field(None, description="Minimum BM25 score")
+    kinds: Optional[List[str]] = Field(None, description="Filter episodes by kinds (e.g., ['query'], ['memory'], or None for all)")
+    tags: Optional[List[str]] = Field(None, description="Filter episodes by tags")
+    tag_match_mode: str = Field("any", description="Tag matching mode: 'any' or 'all'")
+    fuse: bool = Field(False, description="Also return the per-query results fused with RRF")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "queries": ["Where does Alice work?", "Alice's employer"],
+                "user_id": "user_123",
+                "limit": 10,
+                "strategy": "hybrid",
+                "fuse": True
+            }
+        }
+
+
+class BatchSearchResponse(BaseModel):
+    """Response model for batch search"""
+    results: List[SearchResponse] = Field(default_factory=list, description="Results per query, in query order")
+    fused: Optional[SearchResponse] = Field(None, description="RRF fusion of all results (when requested)")
+
+
+class SearchMetricsResponse(BaseModel):
+    """Response model for search latency metrics"""
+    histograms: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict,
+        description="Latency histograms (ms) of whole searches and of each search stage"
+    )
+    search_cache: Optional[Dict[str, Any]] = Field(None, description="Search result cache statistics")
 
 
 class EntityContextResponse(BaseModel):
@@ -695,6 +822,18 @@ class HealthResponse(BaseModel):
     version: str = Field(..., description="API version")
     ryumem_initialized: bool = Field(..., description="Whether Ryumem is initialized")
     timestamp: str = Field(..., description="Current timestamp")
+    index_states: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Number of loaded tenants per keyword index state (building, ready, lagging)"
+    )
+    index: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Keyword index status of the calling tenant (when authenticated)"
+    )
+    search_cache: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Search result cache statistics of the calling tenant (when authenticated)"
+    )
 
 
 class GraphNode(BaseModel):
@@ -1280,13 +1419,42 @@ async def root():
 
 
 @app.get("/health", response_model=HealthResponse)
-async def health():
-    """Health check endpoint"""
+async def health(
+    x_api_key: Optional[str] = Header(None, description="Customer API Key"),
+    authorization: Optional[str] = Header(None, description="Bearer token for OAuth")
+):
+    """
+    Health check endpoint.
+
+    Reports how many loaded tenants have their keyword index building, ready
+    or lagging behind a rebuild. Authenticated callers also get the detailed
+    index status and search cache statistics of their own tenant (if it is
+    loaded).
+    """
+    index_states: Dict[str, int] = {}
+    for instance in list(_ryumem_cache.values()):
+        state = instance.bm25_index_status()["state"]
+        index_states[state] = index_states.get(state, 0) + 1
+
+    index = None
+    search_cache = None
+    if x_api_key or authorization:
+        try:
+            customer_id = await get_current_customer(x_api_key, authorization)
+        except HTTPException:
+            customer_id = None
+        if customer_id in _ryumem_cache:
+            index = _ryumem_cache[customer_id].bm25_index_status()
+            search_cache = _ryumem_cache[customer_id].search_cache_stats()
+
     return HealthResponse(
         status="healthy",
         version="1.0.0",
         ryumem_initialized=True,  # Always true since we use per-request instances
-        timestamp=datetime.now().isoformat()
+        timestamp=datetime.now().isoformat(),
+        index_states=index_states,
+        index=index,
+        search_cache=search_cache,
     )
 
 
@@ -1337,6 +1505,12 @@ async def get_users(ryumem: Ryumem = Depends(get_ryumem)):
 @app.post("/episodes", response_model=AddEpisodeResponse)
 async def add_episode(
     request: AddEpisodeRequest,
+    response: Response,
+    run_async: bool = Query(
+        False,
+        alias="async",
+        description="Save the episode and return 202 Accepted with a job ID; extraction runs in the background"
+    ),
     ryumem: Ryumem = Depends(get_write_ryumem)
 ):
     """
@@ -1348,9 +1522,36 @@ async def add_episode(
     3. Update the knowledge graph
     4. Detect and handle contradictions
 
+    With async=true only step 1 (the episode node and its embedding) runs
+    before the response; steps 2-4 are queued as a durable job and the
+    response is 202 Accepted with its job_id. When there is nothing to
+    extract (duplicate episode, entity extraction disabled) the response is
+    200 without a job.
+
     Use a separate write instance for adding episodes.
     """
     try:
+        if run_async:
+            episode_id, job = ryumem.queue_episode(
+                content=request.content,
+                user_id=request.user_id,
+                session_id=request.session_id,
+                source=request.source,
+                kind=request.kind,
+                metadata=request.metadata,
+                extract_entities=request.extract_entities,
+                enable_embeddings=request.enable_embeddings,
+                deduplication_enabled=request.deduplication_enabled,
+            )
+            if job is not None:
+                response.status_code = status.HTTP_202_ACCEPTED
+            return AddEpisodeResponse(
+                episode_id=episode_id,
+                message="Episode added, extraction queued" if job is not None else "Episode added successfully",
+                timestamp=datetime.now().isoformat(),
+                job_id=job.id if job is not None else None,
+            )
+
         episode_id = ryumem.add_episode(
             content=request.content,
             user_id=request.user_id,
@@ -1373,6 +1574,149 @@ async def add_episode(
         raise HTTPException(status_code=500, detail=f"Error adding episode: {str(e)}")
 
 
+@app.post("/episodes/batch", response_model=BatchAddEpisodesResponse)
+async def add_episodes_batch(
+    request: BatchAddEpisodesRequest,
+    ryumem: Ryumem = Depends(get_write_ryumem)
+):
+    """
+    Add several episodes at once.
+
+    Contents are embedded with one embedding call, deduplicated in bulk
+    (against recent episodes and within the batch) and saved with one
+    write; entities and relationships are then extracted for several
+    episodes concurrently.
+    """
+    try:
+        results = ryumem.add_episodes_batch(
+            episodes=[episode.model_dump() for episode in request.episodes],
+            user_id=request.user_id,
+            extract_entities=request.extract_entities,
+            enable_embeddings=request.enable_embeddings,
+            deduplication_enabled=request.deduplication_enabled,
+        )
+        created = sum(1 for result in results if result["status"] == "created")
+        duplicates = sum(1 for result in results if result["status"] == "duplicate")
+        failed = len(results) - created - duplicates
+        return BatchAddEpisodesResponse(
+            results=[BatchEpisodeResult(**result) for result in results],
+            created=created,
+            duplicates=duplicates,
+            failed=failed,
+            message=(
+                f"Created {created} of {len(request.episodes)} episodes "
+                f"({duplicates} duplicates, {failed} failed)"
+            ),
+            timestamp=datetime.now().isoformat(),
+        )
+    except Exception as e:
+        logger.error(f"Error adding episodes: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error adding episodes: {str(e)}")
+
+
+def _job_response(job) -> IngestionJobResponse:
+    return IngestionJobResponse(
+        id=job.id,
+        status=job.status,
+        episode_uuid=job.episode_uuid,
+        user_id=job.user_id,
+        session_id=job.session_id,
+        attempts=job.attempts,
+        error=job.error,
+        created_at=job.created_at.isoformat(),
+        started_at=job.started_at.isoformat() if job.started_at else None,
+        finished_at=job.finished_at.isoformat() if job.finished_at else None,
+    )
+
+
+@app.get("/ingestion/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(
+    job_id: str,
+    ryumem: Ryumem = Depends(get_ryumem)
+):
+    """
+    Get the status of a background extraction job (see POST /episodes?async=true).
+    """
+    job = ryumem.get_ingestion_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingestion job {job_id} not found")
+    return _job_response(job)
+
+
+@app.get("/ingestion/jobs", response_model=IngestionJobListResponse)
+async def list_ingestion_jobs(
+    user_id: Optional[str] = Query(None, description="Only jobs of this user"),
+    job_status: Optional[str] = Query(
+        None,
+        alias="status",
+        pattern="^(queued|running|done|failed)$",
+        description="Only jobs with this status"
+    ),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of jobs"),
+    ryumem: Ryumem = Depends(get_ryumem)
+):
+    """
+    List background extraction jobs, newest first.
+    """
+    try:
+        jobs = ryumem.list_ingestion_jobs(user_id=user_id, status=job_status, limit=limit)
+        return IngestionJobListResponse(jobs=[_job_response(job) for job in jobs], count=len(jobs))
+    except Exception as e:
+        logger.error(f"Error listing ingestion jobs: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error listing ingestion jobs: {str(e)}")
+
+
+def _backfill_response(progress) -> BackfillResponse:
+    return BackfillResponse(
+        state=progress.state,
+        user_id=progress.user_id,
+        pending=progress.pending,
+        extracted=progress.extracted,
+        failed=progress.failed,
+        prompts=progress.prompts,
+        started_at=progress.started_at.isoformat() if progress.started_at else None,
+        finished_at=progress.finished_at.isoformat() if progress.finished_at else None,
+        error=progress.error,
+    )
+
+
+@app.post("/ingestion/backfill", response_model=BackfillResponse)
+async def start_extraction_backfill(
+    user_id: Optional[str] = Query(None, description="Only extract the episodes of this user"),
+    ryumem: Ryumem = Depends(get_write_ryumem)
+):
+    """
+    Extract entities and relationships of the episodes saved without
+    extraction (extract_entities=false), in the background. Starting it
+    again resumes with the episodes not extracted yet.
+    """
+    try:
+        return _backfill_response(ryumem.start_extraction_backfill(user_id=user_id))
+    except Exception as e:
+        logger.error(f"Error starting extraction backfill: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error starting extraction backfill: {str(e)}")
+
+
+@app.get("/ingestion/backfill", response_model=BackfillResponse)
+async def get_extraction_backfill(
+    ryumem: Ryumem = Depends(get_ryumem)
+):
+    """
+    Get the progress of the running (or last) extraction backfill.
+    """
+    return _backfill_response(ryumem.extraction_backfill_status())
+
+
+@app.delete("/ingestion/backfill", response_model=BackfillResponse)
+async def stop_extraction_backfill(
+    ryumem: Ryumem = Depends(get_write_ryumem)
+):
+    """
+    Stop the running extraction backfill after its current prompt.
+    """
+    return _backfill_response(ryumem.stop_extraction_backfill())
+
+
 @app.get("/episodes/{episode_uuid}", response_model=Optional[Dict[str, Any]])
 async def get_episode_by_uuid(
     episode_uuid: str,
@@ -1417,6 +1761,21 @@ async def get_triggered_episodes(
         raise HTTPException(status_code=500, detail=f"Error getting triggered episodes: {str(e)}")
 
 
+@app.get("/episodes/{episode_uuid}/chunks", response_model=List[Dict[str, Any]])
+async def get_episode_chunks(
+    episode_uuid: str,
+    ryumem: Ryumem = Depends(get_ryumem)
+):
+    """
+    Get the chunk episodes of a long document episode, in document order.
+    """
+    try:
+        return ryumem.get_episode_chunks(episode_uuid)
+    except Exception as e:
+        logger.error(f"Error getting episode chunks: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error getting episode chunks: {str(e)}")
+
+
 @app.get("/episodes/session/{session_id}", response_model=Optional[Dict[str, Any]])
 async def get_episode_by_session_id(
     session_id: str,
@@ -1517,7 +1876,8 @@ async def execute_cypher(
     WARNING: This is a high-privilege endpoint.
     """
     try:
-        results = ryumem.db.execute(request.query, request.params)
+        # Raw writes bypass the change feed; a write tells derived indexes to resync
+        results = ryumem.db.execute_external(request.query, request.params, reason="cypher")
         return CypherResponse(results=results)
     except Exception as e:
         logger.error(f"Error executing cypher: {e}", exc_info=True)
@@ -1628,6 +1988,63 @@ async def get_episodes(
         raise HTTPException(status_code=500, detail=f"Error getting episodes: {str(e)}")
 
 
+def _search_response(results: SearchResult, query: Optional[str], strategy: str) -> SearchResponse:
+    """Convert a SearchResult to the API response model."""
+    episodes = []
+    for episode in results.episodes:
+        episodes.append(EpisodeInfo(
+            uuid=episode.uuid,
+            name=episode.name,
+            content=episode.content,
+            source=episode.source,
+            source_description=episode.source_description,
+            kind=episode.kind.value if hasattr(episode.kind, 'value') else str(episode.kind) if episode.kind else None,
+            created_at=episode.created_at,
+            valid_at=episode.valid_at,
+            user_id=episode.user_id or None,
+            metadata=episode.metadata or None,
+            score=results.scores.get(episode.uuid, 0.0)
+        ))
+    
+    # Convert entities to response format
+    entities = []
+    for entity in results.entities:
+        entities.append(EntityInfo(
+            uuid=entity.uuid,
+            name=entity.name,
+            entity_type=entity.entity_type,
+            summary=entity.summary or "",
+            mentions=entity.mentions,
+            score=results.scores.get(entity.uuid, 0.0)
+        ))
+    
+    # Convert edges to response format (entity names from the results, when present)
+    entity_names = {entity.uuid: entity.name for entity in results.entities}
+    edges = []
+    for edge in results.edges:
+        edges.append(EdgeInfo(
+            uuid=edge.uuid,
+            source_uuid=edge.source_node_uuid,
+            target_uuid=edge.target_node_uuid,
+            source_name=entity_names.get(edge.source_node_uuid, ""),
+            target_name=entity_names.get(edge.target_node_uuid, ""),
+            relation_type=edge.name,
+            fact=edge.fact,
+            mentions=edge.mentions,
+            score=results.scores.get(edge.uuid, 0.0)
+        ))
+    
+    return SearchResponse(
+        entities=entities,
+        edges=edges,
+        query=query,
+        strategy=strategy,
+        count=len(entities) + len(edges) + len(episodes),
+        episodes=episodes,
+        profile=results.metadata.get("profile"),
+    )
+
+
 @app.post("/search", response_model=SearchResponse)
 async def search(
     request: SearchRequest,
@@ -1656,75 +2073,119 @@ async def search(
             kinds=request.kinds,
             tags=request.tags,
             tag_match_mode=request.tag_match_mode,
+            profile=request.profile,
         )
 
-        episodes = []
-        for episode in results.episodes:
-            episodes.append(EpisodeInfo(
-                uuid=episode.uuid,
-                name=episode.name,
-                content=episode.content,
-                source=episode.source,
-                source_description=episode.source_description,
-                kind=episode.kind.value if hasattr(episode.kind, 'value') else str(episode.kind) if episode.kind else None,
-                created_at=episode.created_at,
-                valid_at=episode.valid_at,
-                user_id=episode.user_id or None,
-                metadata=episode.metadata or None,
-                score=results.scores.get(episode.uuid, 0.0)
-            ))
-        
-        # Convert entities to response format
-        entities = []
-        for entity in results.entities:
-            entities.append(EntityInfo(
-                uuid=entity.uuid,
-                name=entity.name,
-                entity_type=entity.entity_type,
-                summary=entity.summary or "",
-                mentions=entity.mentions,
-                score=results.scores.get(entity.uuid, 0.0)
-            ))
-        
-        # Convert edges to response format
-        edges = []
-        for edge in results.edges:
-            # Get entity names from the graph if available
-            source_name = ""
-            target_name = ""
-            
-            # Find source and target entities in results
-            for entity in results.entities:
-                if entity.uuid == edge.source_node_uuid:
-                    source_name = entity.name
-                if entity.uuid == edge.target_node_uuid:
-                    target_name = entity.name
-            
-            edges.append(EdgeInfo(
-                uuid=edge.uuid,
-                source_uuid=edge.source_node_uuid,
-                target_uuid=edge.target_node_uuid,
-                source_name=source_name,
-                target_name=target_name,
-                relation_type=edge.name,
-                fact=edge.fact,
-                mentions=edge.mentions,
-                score=results.scores.get(edge.uuid, 0.0)
-            ))
-        
-        return SearchResponse(
-            entities=entities,
-            edges=edges,
-            query=request.query,
-            strategy=request.strategy,
-            count=len(entities) + len(edges) + len(episodes),
-            episodes=episodes
-        )
+        return _search_response(results, request.query, request.strategy)
     except Exception as e:
         logger.error(f"Error searching: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error searching: {str(e)}")
 
 
+@app.post("/search/stream")
+async def search_stream(
+    request: SearchRequest,
+    ryumem: Ryumem = Depends(get_write_ryumem)
+):
+    """
+    Search the knowledge graph, streaming partial results as NDJSON.
+
+    Each line is a JSON object {"event": ..., "result": SearchResponse}. A
+    hybrid search emits each strategy's results ("bm25", "semantic",
+    "traversal") as soon as that strategy finishes, then the RRF-fused
+    results as "final". Other strategies only emit "final". If the search
+    fails after the response has started, the last line is
+    {"event": "error", "detail": ...}.
+    """
+    # Normalize user_id: empty string means "all users" (None)
+    user_id = request.user_id if request.user_id else None
+
+    def lines():
+        try:
+            for event, results in ryumem.search_stream(
+                user_id=user_id,
+                query=request.query or "",
+                limit=request.limit,
+                strategy=request.strategy,
+                min_rrf_score=request.min_rrf_score,
+                min_bm25_score=request.min_bm25_score,
+                kinds=request.kinds,
+                tags=request.tags,
+                tag_match_mode=request.tag_match_mode,
+                profile=request.profile,
+            ):
+                response = _search_response(results, request.query, request.strategy)
+                yield json.dumps({"event": event, "result": response.model_dump(mode="json")}) + "\n"
+        except Exception as e:
+            logger.error(f"Error in streaming search: {e}", exc_info=True)
+            yield json.dumps({"event": "error", "detail": f"Error searching: {str(e)}"}) + "\n"
+
+    # A sync iterator: Starlette runs each step in its thread pool
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def search_batch(
+    request: BatchSearchRequest,
+    ryumem: Ryumem = Depends(get_write_ryumem)
+):
+    """
+    Search several queries that share user and filter options.
+
+    The queries are embedded with one embedding call and scored against the
+    stored vectors together, so N sub-queries cost far less than N /search
+    calls. Returns per-query results and, with fuse=true, their RRF fusion.
+    """
+    try:
+        # Normalize user_id: empty string means "all users" (None)
+        user_id = request.user_id if request.user_id else None
+
+        results, fused = ryumem.search_batch(
+            user_id=user_id,
+            queries=request.queries,
+            limit=request.limit,
+            strategy=request.strategy,
+            min_rrf_score=request.min_rrf_score,
+            min_bm25_score=request.min_bm25_score,
+            kinds=request.kinds,
+            tags=request.tags,
+            tag_match_mode=request.tag_match_mode,
+            fuse=request.fuse,
+        )
+
+        return BatchSearchResponse(
+            results=[
+                _search_response(result, query, request.strategy)
+                for query, result in zip(request.queries, results)
+            ],
+            fused=_search_response(fused, None, request.strategy) if fused is not None else None,
+        )
+    except Exception as e:
+        logger.error(f"Error in batch search: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error in batch search: {str(e)}")
+
+
+@app.get("/metrics/search", response_model=SearchMetricsResponse)
+async def search_metrics(ryumem: Ryumem = Depends(get_ryumem)):
+    """
+    Get search latency metrics.
+
+    Returns histograms of the total search time and of each stage (embedding,
+    vector scan, keyword scan, hydration, traversal, fusion), recorded for
+    every search since the tenant's instance was loaded, plus the search
+    result cache statistics. Pass profile=true to /search for the breakdown
+    of a single request.
+    """
+    try:
+        return SearchMetricsResponse(
+            histograms=ryumem.search_metrics(),
+            search_cache=ryumem.search_cache_stats(),
+        )
+    except Exception as e:
+        logger.error(f"Error getting search metrics: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error getting search metrics: {str(e)}")
+
+
 @app.get("/entity/{entity_name}", response_model=EntityContextResponse)
 async def get_entity_context(
     entity_name: str,
@@ -2952,7 +3413,7 @@ async def update_settings(
         # Validate all configs before updating
         validation_errors = []
         for key, value in request.updates.items():
-            is_valid, error_msg = service.validate_config_value(key, value)
+            is_valid, error_msg = service.validate_config_value(key, value, request.updates)
             if not is_valid:
                 validation_errors.append(f"{key}: {error_msg}")
 
@@ -3007,7 +3468,7 @@ async def validate_settings(
 
         results = {}
         for key, value in request.updates.items():
-            is_valid, error_msg = service.validate_config_value(key, value)
+            is_valid, error_msg = service.validate_config_value(key, value, request.updates)
             results[key] = {
                 "valid": is_valid,
                 "error": error_msg if not is_valid else None
@@ -0,0 +1,388 @@
+"""
+Change-data-capture feed for Ryumem.
+
+RyugraphDB mutation methods emit ChangeEvents (episode, entity and edge
+upserts and deletes, user deletions, resets) with a monotonic sequence
+number. Events are appended to a ChangeLog node table in the same write
+transaction as the mutation (see RyugraphDB.transaction), so a committed
+write always has its event, and pushed to in-process subscribers after the
+commit, so derived indexes (BM25, caches) can stay in sync without the
+write paths updating them by hand. On startup an index replays the log
+from the last sequence it applied.
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterator, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+ChangeOp = Literal["upsert", "delete", "invalidate", "link", "delete_user", "reset", "resync"]
+ChangeKind = Literal["episode", "entity", "edge", "user", "graph"]
+
+
+class ChangeEvent(BaseModel):
+    """
+    A single change to the graph.
+
+    Attributes:
+        seq: Monotonic sequence number (unique per database)
+        op: upsert / delete / invalidate for documents, link when an
+            episode's links to the graph changed but its text did not
+            (MENTIONS edges, extraction results), delete_user for a user's
+            data, reset for a wiped graph, resync when the change is unknown
+            (e.g. raw Cypher writes) and derived state must be rebuilt
+        kind: Document type the event refers to
+        uuid: Document UUID (None for user/graph-wide events)
+        user_id: Owning user, when known
+        data: Fields derived indexes need (text, filter attributes)
+        created_at: When the event was emitted
+    """
+    seq: int
+    op: ChangeOp
+    kind: ChangeKind
+    uuid: Optional[str] = None
+    user_id: Optional[str] = None
+    data: Dict[str, Any] = Field(default_factory=dict)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+ChangeSubscriber = Callable[[ChangeEvent], None]
+
+
+class ChangeFeed:
+    """
+    Durable, ordered change-event stream backed by the ChangeLog table.
+
+    Sequence numbers are assigned inside the emitting write transaction
+    (ryugraph runs one at a time, so they follow commit order). Subscribers
+    are called after the commit, in sequence order, outside the lock that
+    assigns sequences: a slow subscriber delays the delivery of later
+    events, not the writes producing them. emit() returns once its events
+    have been delivered.
+
+    Example:
+        db.changes.subscribe(lambda event: print(event.seq, event.op, event.kind))
+        for event in db.changes.read_since(last_applied_seq):
+            index.apply_change(event)
+    """
+
+    def __init__(self, db: Any):
+        """
+        Initialize the feed and resume the sequence from the log.
+
+        Args:
+            db: RyugraphDB instance (the ChangeLog table must exist)
+        """
+        self.db = db
+        # Guards sequence assignment and the delivery queue (never held
+        # while subscribers run)
+        self._lock = threading.Lock()
+        self._delivered = threading.Condition(self._lock)
+        # Held while subscribers are called (and by hold())
+        self._delivery = threading.RLock()
+        self._subscribers: List[ChangeSubscriber] = []
+        # Sequences consumers will replay from; prune() keeps the events after them
+        self._retained: List[int] = []
+        # Events of the calling thread's open transaction (see collect())
+        self._local = threading.local()
+
+        result = self.db.execute("MATCH (c:ChangeLog) RETURN max(c.seq) AS seq")
+        last_seq = result[0]["seq"] if result else None
+        # Last assigned sequence
+        self.last_seq: int = int(last_seq) if last_seq is not None else 0
+        # Every sequence up to _resolved_seq is committed or rolled back;
+        # _outcomes holds the finished ones after a gap (committed event, or
+        # None when rolled back)
+        self._resolved_seq = self.last_seq
+        self._outcomes: Dict[int, Optional[ChangeEvent]] = {}
+        self._ready: Deque[ChangeEvent] = deque()
+        self._delivered_seq = self.last_seq
+
+        logger.info(f"Initialized ChangeFeed at sequence {self.last_seq}")
+
+    def subscribe(self, subscriber: ChangeSubscriber) -> None:
+        """
+        Register a callback invoked (in sequence order) for every new event.
+
+        Args:
+            subscriber: Callable receiving a ChangeEvent
+        """
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: ChangeSubscriber) -> None:
+        """Remove a previously registered callback."""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """
+        Block event delivery while held (writers still commit, and wait
+        for their events to be delivered in emit()).
+
+        Lets a consumer catch up with the log and switch over without
+        missing events emitted in between: every event not yet in the log
+        when it reads it is delivered after the block.
+        """
+        with self._delivering():
+            yield
+
+    @contextmanager
+    def _delivering(self) -> Iterator[None]:
+        """Hold the delivery lock, recording that the calling thread holds it."""
+        with self._delivery:
+            depth = getattr(self._local, "delivering", 0)
+            self._local.delivering = depth + 1
+            try:
+                yield
+            finally:
+                self._local.delivering = depth
+
+    @contextmanager
+    def retain(self) -> Iterator[int]:
+        """
+        Keep every event after the current sequence in the log until the
+        block exits (e.g. while an index is rebuilt from the database).
+
+        Yields:
+            The current sequence number: the writes of every event up to it
+            are committed, so a database read in the block reflects them
+        """
+        with self._lock:
+            seq = self._resolved_seq
+            self._retained.append(seq)
+        try:
+            yield seq
+        finally:
+            with self._lock:
+                self._retained.remove(seq)
+
+    def emit(
+        self,
+        op: ChangeOp,
+        kind: ChangeKind,
+        uuid: Optional[str] = None,
+        user_id: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None,
+    ) -> ChangeEvent:
+        """
+        Append an event to the log and notify subscribers.
+
+        Inside a write transaction (see RyugraphDB.transaction) the event is
+        logged in it and delivered after the commit; otherwise it is logged
+        in a transaction of its own. Subscriber errors are logged and do not
+        fail the write that produced the event.
+
+        Returns:
+            The emitted event
+        """
+        return self.emit_many([
+            {"op": op, "kind": kind, "uuid": uuid, "user_id": user_id, "data": data or {}}
+        ])[0]
+
+    def emit_many(self, changes: List[Dict[str, Any]]) -> List[ChangeEvent]:
+        """
+        Append several events with one log write and notify subscribers (see emit).
+
+        Args:
+            changes: emit() arguments (op, kind, uuid, user_id, data) per event
+
+        Returns:
+            The emitted events, in order
+        """
+        if not changes:
+            return []
+        with self.db.transaction():
+            with self._lock:
+                events = [
+                    ChangeEvent(seq=self.last_seq + i, **change)
+                    for i, change in enumerate(changes, start=1)
+                ]
+                self.last_seq = events[-1].seq
+            # Resolved with the transaction, even if the log write fails
+            self._local.events.extend(events)
+            self.db.execute(
+                """
+                UNWIND $events AS event
+                CREATE (:ChangeLog {
+                    seq: event.seq,
+                    op: event.op,
+                    kind: event.kind,
+                    uuid: event.uuid,
+                    user_id: event.user_id,
+                    data: event.data,
+                    created_at: event.created_at
+                })
+                """,
+                {
+                    "events": [
+                        {
+                            "seq": event.seq,
+                            "op": event.op,
+                            "kind": event.kind,
+                            "uuid": event.uuid,
+                            "user_id": event.user_id,
+                            "data": json.dumps(event.data, default=str),
+                            "created_at": event.created_at,
+                        }
+                        for event in events
+                    ],
+                },
+            )
+        return events
+
+    @contextmanager
+    def collect(self) -> Iterator[None]:
+        """
+        Collect the events the calling thread emits in a write transaction
+        (used by RyugraphDB.transaction around BEGIN ... COMMIT).
+
+        When the block exits normally (committed) the events are delivered
+        to subscribers before this returns; when it raises (rolled back)
+        they are dropped.
+        """
+        events: List[ChangeEvent] = []
+        self._local.events = events
+        try:
+            yield
+        except BaseException:
+            self._local.events = None
+            self._finish(events, committed=False)
+            raise
+        self._local.events = None
+        self._finish(events, committed=True)
+
+    def _finish(self, events: List[ChangeEvent], committed: bool) -> None:
+        """Resolve the events of a finished transaction and deliver the events ready."""
+        with self._lock:
+            for event in events:
+                self._outcomes[event.seq] = event if committed else None
+            while self._resolved_seq + 1 in self._outcomes:
+                self._resolved_seq += 1
+                event = self._outcomes.pop(self._resolved_seq)
+                if event is not None:
+                    self._ready.append(event)
+        self._deliver()
+        if committed and events:
+            # An earlier transaction may still be finishing; its deliverer
+            # delivers these events too (unless this thread is delivering)
+            with self._delivered:
+                self._delivered.wait_for(
+                    lambda: self._delivered_seq >= events[-1].seq or getattr(self._local, "delivering", 0)
+                )
+
+    def _deliver(self) -> None:
+        """Call the subscribers for every ready event, in sequence order."""
+        with self._delivering():
+            while True:
+                with self._lock:
+                    if not self._ready:
+                        self._delivered_seq = self._resolved_seq
+                        self._delivered.notify_all()
+                        return
+                    event = self._ready.popleft()
+                    subscribers = list(self._subscribers)
+                for subscriber in subscribers:
+                    try:
+                        subscriber(event)
+                    except Exception as e:
+                        logger.error(f"Change subscriber failed on event {event.seq} ({event.op} {event.kind}): {e}")
+
+    def read_since(self, seq: int, limit: Optional[int] = None) -> List[ChangeEvent]:
+        """
+        Read logged events with a sequence number greater than `seq`.
+
+        Args:
+            seq: Last sequence already applied by the caller
+            limit: Optional maximum number of events
+
+        Returns:
+            Events in sequence order
+        """
+        query = """
+        MATCH (c:ChangeLog)
+        WHERE c.seq > $seq
+        RETURN c.seq AS seq, c.op AS op, c.kind AS kind, c.uuid AS uuid,
+               c.user_id AS user_id, c.data AS data, c.created_at AS created_at
+        ORDER BY c.seq
+        """
+        if limit:
+            query += f"\nLIMIT {int(limit)}"
+
+        events = []
+        for row in self.db.execute(query, {"seq": seq}):
+            created_at = row.get("created_at")
+            if hasattr(created_at, "to_pydatetime"):
+                created_at = created_at.to_pydatetime()
+            events.append(ChangeEvent(
+                seq=row["seq"],
+                op=row["op"],
+                kind=row["kind"],
+                uuid=row.get("uuid"),
+                user_id=row.get("user_id"),
+                data=json.loads(row["data"]) if row.get("data") else {},
+                created_at=created_at or datetime.now(timezone.utc),
+            ))
+        return events
+
+    def first_seq(self) -> Optional[int]:
+        """Lowest sequence number still in the log (None if the log is empty)."""
+        result = self.db.execute("MATCH (c:ChangeLog) RETURN min(c.seq) AS seq")
+        seq = result[0]["seq"] if result else None
+        return int(seq) if seq is not None else None
+
+    def can_replay_from(self, seq: int) -> bool:
+        """
+        Check whether every event after `seq` is still in the log.
+
+        Args:
+            seq: Last sequence applied by a consumer
+
+        Returns:
+            False if the log was pruned past `seq` or `seq` is ahead of the log
+        """
+        if seq > self.last_seq:
+            return False
+        if seq == self.last_seq:
+            return True
+        first = self.first_seq()
+        return first is not None and first <= seq + 1
+
+    def prune(self, before_seq: int) -> int:
+        """
+        Delete events older than `before_seq`.
+
+        The most recent event is always kept so the sequence can be resumed,
+        as are events still retained by a consumer (see retain()).
+
+        Args:
+            before_seq: Events with seq < before_seq are removed
+
+        Returns:
+            Number of events deleted
+        """
+        with self._lock:
+            before_seq = min([before_seq, self._resolved_seq] + [seq + 1 for seq in self._retained])
+        # The newest logged event may precede _resolved_seq (a rolled back
+        # transaction), so it is kept explicitly
+        result = self.db.execute(
+            """
+            MATCH (last:ChangeLog)
+            WITH max(last.seq) AS last_seq
+            MATCH (c:ChangeLog)
+            WHERE c.seq < $seq AND c.seq < last_seq
+            DELETE c
+            RETURN count(c) AS count
+            """,
+            {"seq": before_seq},
+        )
+        return result[0]["count"] if result else 0
@@ -204,6 +204,17 @@ class SearchConfig(BaseSettings):
         ge=1
     )
 
+    traversal_max_nodes: int = Field(
+        default=100,
+        description="Maximum number of entities visited by a graph traversal search",
+        gt=0
+    )
+    traversal_max_edges: int = Field(
+        default=500,
+        description="Maximum number of edges expanded by a graph traversal search",
+        gt=0
+    )
+
     # RRF (Reciprocal Rank Fusion) parameters for hybrid search
     rrf_k: int = Field(
         default=60,
@@ -216,12 +227,104 @@ class SearchConfig(BaseSettings):
         ge=0.0
     )
 
+    # Hybrid search execution
+    hybrid_parallel: bool = Field(
+        default=True,
+        description="Run the hybrid search strategies concurrently (sharing one query embedding)"
+    )
+    hybrid_max_workers: int = Field(
+        default=8,
+        description="Threads shared by concurrently running hybrid search strategies",
+        gt=0
+    )
+    semantic_budget_ms: int = Field(
+        default=3000,
+        description="Time budget for the semantic strategy of a hybrid search, including the query embedding (0 = no limit)",
+        ge=0
+    )
+    bm25_budget_ms: int = Field(
+        default=1000,
+        description="Time budget for the BM25 strategy of a hybrid search (0 = no limit)",
+        ge=0
+    )
+    traversal_budget_ms: int = Field(
+        default=3000,
+        description="Time budget for the traversal strategy of a hybrid search, including the query embedding (0 = no limit)",
+        ge=0
+    )
+
+    # The planner trades recall for latency: with the default confidence,
+    # planned searches returned only about 63% of the unplanned top-k in
+    # benchmarks/bench_hybrid_planner.py, so it is opt-in
+    hybrid_planner_enabled: bool = Field(
+        default=False,
+        description=(
+            "Skip or defer hybrid strategies based on per-user document counts and the query "
+            "(lower latency, lower recall; see benchmarks/bench_hybrid_planner.py)"
+        )
+    )
+    hybrid_planner_confidence: float = Field(
+        default=0.8,
+        description="Best semantic score at which a deferred traversal is skipped (0 = never defer traversal)",
+        ge=0.0
+    )
+    hybrid_planner_short_query_terms: int = Field(
+        default=2,
+        description="Queries with at most this many terms defer traversal until semantic results are known",
+        ge=0
+    )
+
+    # Search result cache
+    result_cache_enabled: bool = Field(
+        default=True,
+        description="Cache search results per user until the user's data changes"
+    )
+    result_cache_size: int = Field(
+        default=1024,
+        description="Maximum number of cached search results",
+        gt=0
+    )
+    result_cache_ttl_seconds: float = Field(
+        default=300.0,
+        description="Maximum age of a cached search result in seconds (0 = no limit)",
+        ge=0.0
+    )
+
     # BM25 keyword search parameters
     min_bm25_score: float = Field(
         default=0.1,
         description="Minimum BM25 score threshold for keyword search",
         ge=0.0
     )
+    keyword_backend: Literal["bm25", "fts"] = Field(
+        default="bm25",
+        description="Keyword search backend: in-process BM25 index ('bm25') or ryugraph full-text search ('fts')"
+    )
+    bm25_shard_by_user: bool = Field(
+        default=False,
+        description="Shard the BM25 index by user_id (lazy-loaded, LRU-evicted shards)"
+    )
+    bm25_max_resident_shards: int = Field(
+        default=32,
+        description="Maximum number of per-user BM25 shards kept in memory",
+        gt=0
+    )
+    bm25_fold_unicode: bool = Field(
+        default=True,
+        description="Fold accents and case when analyzing BM25 text (otherwise lowercase only)"
+    )
+    bm25_remove_stopwords: bool = Field(
+        default=True,
+        description="Drop English stopwords from BM25 documents and queries"
+    )
+    bm25_stemming: bool = Field(
+        default=False,
+        description="Apply a light plural stemmer to BM25 terms"
+    )
+    bm25_background_rebuild: bool = Field(
+        default=True,
+        description="Rebuild a missing or stale BM25 index in a background thread instead of blocking startup"
+    )
 
     model_config = SettingsConfigDict(
         env_prefix="RYUMEM_SEARCH_",
@@ -229,6 +332,149 @@ class SearchConfig(BaseSettings):
     )
 
 
+class IngestionConfig(BaseSettings):
+    """Background ingestion configuration"""
+
+    queue_workers: int = Field(
+        default=2,
+        description="Concurrent background extractions of queued episodes (per tenant database)",
+        gt=0
+    )
+    queue_max_attempts: int = Field(
+        default=3,
+        description="Extraction attempts of a queued episode before its job fails",
+        gt=0
+    )
+    queue_retry_base_seconds: float = Field(
+        default=1.0,
+        description="Delay before retrying a failed extraction job (doubles with each attempt)",
+        ge=0.0
+    )
+    queue_retry_max_seconds: float = Field(
+        default=60.0,
+        description="Longest delay between two attempts of an extraction job",
+        ge=0.0
+    )
+    queue_job_retention_hours: float = Field(
+        default=168.0,
+        description="Age of the oldest finished (done or failed) extraction jobs kept",
+        gt=0.0
+    )
+    batch_extraction_concurrency: int = Field(
+        default=4,
+        description="Episodes of a batch (or chunks of a document) whose entities and "
+                    "relationships are extracted concurrently",
+        gt=0
+    )
+    resolution_index_users: int = Field(
+        default=32,
+        description="Users whose entity and fact vectors are kept in memory for resolution during extraction",
+        gt=0
+    )
+    resolution_index_ttl_seconds: float = Field(
+        default=600.0,
+        description="Maximum age in seconds of a user's in-memory resolution vectors (0 = no limit)",
+        ge=0.0
+    )
+    contradiction_candidates: int = Field(
+        default=5,
+        description="Existing facts (the most similar ones) each new fact is checked against for contradictions",
+        gt=0
+    )
+    contradiction_similarity_threshold: float = Field(
+        default=0.0,
+        description="Minimum similarity of an existing fact to a new fact for a contradiction check (0.0-1.0)",
+        ge=0.0,
+        le=1.0
+    )
+    deferred_summaries: bool = Field(
+        default=True,
+        description="Regenerate entity summaries in the background, coalescing the new context of each entity",
+    )
+    summary_workers: int = Field(
+        default=4,
+        description="Concurrent LLM calls of a background summary regeneration round",
+        gt=0
+    )
+    summary_tick_seconds: float = Field(
+        default=1.0,
+        description="Seconds between two background summary regeneration rounds",
+        gt=0.0
+    )
+    summary_min_interval_seconds: float = Field(
+        default=60.0,
+        description="Minimum seconds between two summary regenerations of the same entity",
+        ge=0.0
+    )
+    summary_max_per_tick: int = Field(
+        default=64,
+        description="Entity summaries regenerated per background round at most",
+        gt=0
+    )
+    backfill_episodes_per_prompt: int = Field(
+        default=8,
+        description="Unextracted episodes packed into one extraction prompt by the extraction backfill",
+        gt=0
+    )
+    backfill_max_prompt_chars: int = Field(
+        default=6000,
+        description="Total episode content of one backfill extraction prompt (longer episodes are extracted alone)",
+        gt=0
+    )
+    backfill_prompts_per_minute: float = Field(
+        default=30.0,
+        description="Extraction prompts the backfill sends per minute at most (0 = unlimited)",
+        ge=0.0
+    )
+    duplicate_index_enabled: bool = Field(
+        default=True,
+        description="Detect duplicate episodes without embeddings with an in-memory "
+                    "content hash and MinHash index instead of BM25 queries"
+    )
+    duplicate_index_retention_hours: float = Field(
+        default=48.0,
+        description="Age of the oldest episodes in the duplicate index (longer "
+                    "deduplication windows query the database)",
+        gt=0.0
+    )
+    duplicate_index_bucket_hours: float = Field(
+        default=1.0,
+        description="Width of the time buckets of the duplicate index",
+        gt=0.0
+    )
+    chunk_max_tokens: int = Field(
+        default=1000,
+        description="Episodes longer than this many tokens are saved as a document "
+                    "episode with chunk episodes of at most this size (0 = no chunking)",
+        ge=0
+    )
+    chunk_overlap_tokens: int = Field(
+        default=100,
+        description="Tokens a chunk repeats from the end of the previous chunk at most",
+        ge=0
+    )
+    chunk_tokenizer: str = Field(
+        default="",
+        description="tiktoken encoding counting chunk tokens, e.g. cl100k_base "
+                    "(empty = estimate from the words)"
+    )
+
+    model_config = SettingsConfigDict(
+        env_prefix="RYUMEM_INGESTION_",
+        env_nested_delimiter="__"
+    )
+
+    @model_validator(mode='after')
+    def validate_chunk_overlap(self) -> 'IngestionConfig':
+        """Chunks must advance: the overlap has to be shorter than a chunk"""
+        if self.chunk_max_tokens > 0 and self.chunk_overlap_tokens >= self.chunk_max_tokens:
+            raise ValueError(
+                f"chunk_overlap_tokens ({self.chunk_overlap_tokens}) must be less than "
+                f"chunk_max_tokens ({self.chunk_max_tokens})"
+            )
+        return self
+
+
 class SystemConfig(BaseSettings):
     """System configuration"""
 
@@ -272,6 +518,7 @@ class RyumemConfig(BaseSettings):
     entity_extraction: EntityExtractionConfig = Field(default_factory=EntityExtractionConfig)
     episode: EpisodeConfig = Field(default_factory=EpisodeConfig)
     search: SearchConfig = Field(default_factory=SearchConfig)
+    ingestion: IngestionConfig = Field(default_factory=IngestionConfig)
     tool_tracking: ToolTrackingConfig = Field(default_factory=ToolTrackingConfig)
     agent: AgentConfig = Field(default_factory=AgentConfig)
     system: SystemConfig = Field(default_factory=SystemConfig)
@@ -9,12 +9,15 @@ import os
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
+from pydantic import ValidationError
+
 from ryumem.core.config import EpisodeConfig
 from ryumem_server.core.config import (
     AgentConfig,
     DatabaseConfig,
     EmbeddingConfig,
     EntityExtractionConfig,
+    IngestionConfig,
     LLMConfig,
     RyumemConfig,
     SearchConfig,
@@ -25,7 +28,6 @@ from ryumem_server.core.graph_db import RyugraphDB
 
 logger = logging.getLogger(__name__)
 
-
 def extract_config_fields(config: RyumemConfig) -> List[Dict[str, Any]]:
     """
     Extract all config fields from a RyumemConfig instance.
@@ -154,12 +156,19 @@ class ConfigService:
         """
         return RyumemConfig()
 
-    def load_config_from_database(self) -> RyumemConfig:
+    def load_config_from_database(self, overrides: Optional[Dict[str, Any]] = None) -> RyumemConfig:
         """
         Load configuration from database and construct a RyumemConfig instance.
 
+        Args:
+            overrides: Values used instead of the stored ones (by key), e.g.
+                to validate updates before saving them
+
         Returns:
             RyumemConfig instance populated from database values
+
+        Raises:
+            ValidationError: If a value violates the bounds of its config model
         """
         # Get all configs from database
         db_configs = self.db.get_all_configs()
@@ -174,6 +183,7 @@ class ConfigService:
             key = cfg["key"]
             value = self._deserialize_value(cfg["value"], cfg["data_type"])
             config_dict[key] = value
+        config_dict.update(overrides or {})
 
         # Build nested config structure
         def get_value(key: str, default: Any = None) -> Any:
@@ -235,6 +245,7 @@ class ConfigService:
             entity_similarity_threshold=get_value("entity_extraction.entity_similarity_threshold", 0.65),
             relationship_similarity_threshold=get_value("entity_extraction.relationship_similarity_threshold", 0.8),
             max_context_episodes=get_value("entity_extraction.max_context_episodes", 5),
+            extraction_mode=get_value("entity_extraction.extraction_mode", "combined"),
         )
 
         episode_config = EpisodeConfig(
@@ -242,6 +253,7 @@ class ConfigService:
             deduplication_enabled=get_value("episode.deduplication_enabled", True),
             similarity_threshold=get_value("episode.similarity_threshold", 0.95),
             bm25_similarity_threshold=get_value("episode.bm25_similarity_threshold", 0.7),
+            near_duplicate_threshold=get_value("episode.near_duplicate_threshold", 0.8),
             time_window_hours=get_value("episode.time_window_hours", 24),
         )
 
@@ -252,6 +264,54 @@ class ConfigService:
             rrf_k=get_value("search.rrf_k", 60),
             min_rrf_score=get_value("search.min_rrf_score", 0.025),
             min_bm25_score=get_value("search.min_bm25_score", 0.1),
+            traversal_max_nodes=get_value("search.traversal_max_nodes", 100),
+            traversal_max_edges=get_value("search.traversal_max_edges", 500),
+            hybrid_parallel=get_value("search.hybrid_parallel", True),
+            hybrid_max_workers=get_value("search.hybrid_max_workers", 8),
+            semantic_budget_ms=get_value("search.semantic_budget_ms", 3000),
+            bm25_budget_ms=get_value("search.bm25_budget_ms", 1000),
+            traversal_budget_ms=get_value("search.traversal_budget_ms", 3000),
+            hybrid_planner_enabled=get_value("search.hybrid_planner_enabled", False),
+            hybrid_planner_confidence=get_value("search.hybrid_planner_confidence", 0.8),
+            hybrid_planner_short_query_terms=get_value("search.hybrid_planner_short_query_terms", 2),
+            result_cache_enabled=get_value("search.result_cache_enabled", True),
+            result_cache_size=get_value("search.result_cache_size", 1024),
+            result_cache_ttl_seconds=get_value("search.result_cache_ttl_seconds", 300.0),
+            keyword_backend=get_value("search.keyword_backend", "bm25"),
+            bm25_shard_by_user=get_value("search.bm25_shard_by_user", False),
+            bm25_max_resident_shards=get_value("search.bm25_max_resident_shards", 32),
+            bm25_fold_unicode=get_value("search.bm25_fold_unicode", True),
+            bm25_remove_stopwords=get_value("search.bm25_remove_stopwords", True),
+            bm25_stemming=get_value("search.bm25_stemming", False),
+            bm25_background_rebuild=get_value("search.bm25_background_rebuild", True),
+        )
+
+        ingestion_config = IngestionConfig(
+            queue_workers=get_value("ingestion.queue_workers", 2),
+            queue_max_attempts=get_value("ingestion.queue_max_attempts", 3),
+            queue_retry_base_seconds=get_value("ingestion.queue_retry_base_seconds", 1.0),
+            queue_retry_max_seconds=get_value("ingestion.queue_retry_max_seconds", 60.0),
+            queue_job_retention_hours=get_value("ingestion.queue_job_retention_hours", 168.0),
+            batch_extraction_concurrency=get_value("ingestion.batch_extraction_concurrency", 4),
+            resolution_index_users=get_value("ingestion.resolution_index_users", 32),
+            resolution_index_ttl_seconds=get_value("ingestion.resolution_index_ttl_seconds", 600.0),
+            contradiction_candidates=get_value("ingestion.contradiction_candidates", 5),
+            contradiction_similarity_threshold=get_value("ingestion.contradiction_similarity_threshold", 0.0),
+            deferred_summaries=get_value("ingestion.deferred_summaries", True),
+            summary_workers=get_value("ingestion.summary_workers", 4),
+            summary_tick_seconds=get_value("ingestion.summary_tick_seconds", 1.0),
+            summary_min_interval_seconds=get_value("ingestion.summary_min_interval_seconds", 60.0),
+            summary_max_per_tick=get_value("ingestion.summary_max_per_tick", 64),
+            backfill_episodes_per_prompt=get_value("ingestion.backfill_episodes_per_prompt", 8),
+            backfill_max_prompt_chars=get_value("ingestion.backfill_max_prompt_chars", 6000),
+            backfill_prompts_per_minute=get_value("ingestion.backfill_prompts_per_minute", 30.0),
+            duplicate_index_enabled=get_value("ingestion.duplicate_index_enabled", True),
+            duplicate_index_retention_hours=get_value("ingestion.duplicate_index_retention_hours", 48.0),
+            duplicate_index_bucket_hours=get_value("ingestion.duplicate_index_bucket_hours", 1.0),
+            chunk_max_tokens=get_value("ingestion.chunk_max_tokens", 1000),
+            chunk_overlap_tokens=get_value("ingestion.chunk_overlap_tokens", 100),
+            # An empty value is stored as "" and read back as None
+            chunk_tokenizer=get_value("ingestion.chunk_tokenizer") or "",
         )
 
         tool_tracking_config = ToolTrackingConfig(
@@ -292,12 +352,14 @@ class ConfigService:
             entity_extraction=entity_extraction_config,
             episode=episode_config,
             search=search_config,
+            ingestion=ingestion_config,
             tool_tracking=tool_tracking_config,
             agent=agent_config,
             system=system_config,
         )
 
-        logger.info("Loaded configuration from database")
+        if overrides is None:
+            logger.info("Loaded configuration from database")
         return config
 
     def ensure_defaults_in_database(self) -> int:
@@ -477,13 +539,21 @@ class ConfigService:
         logger.info(f"Batch update: {success_count} succeeded, {len(failed_keys)} failed")
         return (success_count, failed_keys)
 
-    def validate_config_value(self, key: str, value: Any) -> Tuple[bool, Optional[str]]:
+    def validate_config_value(
+        self,
+        key: str,
+        value: Any,
+        updates: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[bool, Optional[str]]:
         """
         Validate a configuration value without saving.
 
         Args:
             key: Configuration key
             value: Value to validate
+            updates: All values saved together with this one; settings that
+                constrain each other (e.g. ingestion.chunk_max_tokens and
+                ingestion.chunk_overlap_tokens) are checked with their new values
 
         Returns:
             Tuple of (is_valid, error_message)
@@ -516,6 +586,30 @@ class ConfigService:
             return (False, f"Invalid embedding provider: {value}")
         if key == "search.default_strategy" and value not in ["semantic", "traversal", "hybrid"]:
             return (False, f"Invalid search strategy: {value}")
+        if key == "search.keyword_backend" and value not in ["bm25", "fts"]:
+            return (False, f"Invalid keyword backend: {value}")
+
+        # Bounds declared by the config models (the stored config must stay loadable)
+        overrides = {}
+        for other_key, other_value in (updates or {}).items():
+            other = self.db.get_config(other_key)
+            if other_key != key and other:
+                try:
+                    overrides[other_key] = self._deserialize_value(
+                        self._serialize_value(other_value, other["data_type"]), other["data_type"]
+                    )
+                except (ValueError, json.JSONDecodeError):
+                    # Reported when that value itself is validated
+                    continue
+        overrides[key] = self._deserialize_value(self._serialize_value(value, data_type), data_type)
+        try:
+            self.load_config_from_database(overrides=overrides)
+        except ValidationError as e:
+            # Errors of the other updated values are reported for their own keys
+            field_name = key.split(".", 1)[-1]
+            errors = [error for error in e.errors() if not error["loc"] or error["loc"][-1] == field_name]
+            if errors:
+                return (False, f"Invalid value for {key}: {errors[0]['msg']}")
 
         # API key validation when changing providers
         import os
@@ -3,16 +3,22 @@ Ryugraph database layer.
 Ryugraph is a renamed version of kuzu, so the API should be identical.
 """
 
+import hashlib
 import json
 import logging
 import math
 import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from uuid import uuid4
 
 import ryugraph
 
+from ryumem_server.core.changes import ChangeFeed
+from ryumem_server.core.profiling import record_query
 from ryumem_server.core.models import (
     EntityEdge,
     EntityNode,
@@ -23,6 +29,18 @@ from ryumem_server.core.models import (
 
 logger = logging.getLogger(__name__)
 
+# ryugraph runs one write transaction at a time and fails (rather than waits)
+# when another thread's write is in progress; such writes are retried
+WRITE_CONFLICT_MESSAGE = "Only one write transaction at a time"
+# Raised by ryugraph for a write statement inside a read-only transaction
+READ_ONLY_WRITE_MESSAGE = "Can not execute a write query inside a read-only transaction"
+WRITE_RETRY_SECONDS = 30.0
+
+
+def content_hash(content: str) -> str:
+    """SHA-256 hex digest of episode content (the Episode.content_hash column)."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
 
 class RyugraphDB:
     """
@@ -72,9 +90,17 @@ class RyugraphDB:
             else:
                 raise
 
+        # Connections are not shared across threads: each thread gets its own
+        # (e.g. background index rebuilds read while requests keep writing)
+        self._local = threading.local()
+        self._local.conn = self.conn
+
         # Initialize schema
         self.create_schema()
 
+        # Change-data-capture feed for derived indexes
+        self.changes = ChangeFeed(self)
+
         logger.info(f"Initialized RyugraphDB at {db_path} with {embedding_dimensions}D embeddings")
 
     def create_schema(self) -> None:
@@ -98,10 +124,22 @@ class RyugraphDB:
                 user_id STRING,
                 agent_id STRING,
                 metadata STRING,
-                entity_edges STRING[]
+                entity_edges STRING[],
+                extracted BOOLEAN,
+                content_hash STRING
             );
             """
         )
+        # Databases created before the columns existed (their episodes read as NULL)
+        episode_columns = {row["name"] for row in self.execute("CALL table_info('Episode') RETURN *")}
+        self.execute("ALTER TABLE Episode ADD IF NOT EXISTS extracted BOOLEAN")
+        self.execute("ALTER TABLE Episode ADD IF NOT EXISTS content_hash STRING")
+        if "content_hash" not in episode_columns:
+            # Hash the existing episodes once, when the column is added, not on every open
+            self.execute(
+                "MATCH (e:Episode) WHERE e.content_hash IS NULL AND e.content IS NOT NULL "
+                "SET e.content_hash = sha256(e.content)"
+            )
 
         # Agent Instruction nodes (separate from Episodes)
         self.execute(
@@ -211,8 +249,60 @@ class RyugraphDB:
             """
         )
 
+        # HAS_CHUNK edges (Episode -> Episode) from a long document to its chunks
+        self.execute(
+            """
+            CREATE REL TABLE IF NOT EXISTS HAS_CHUNK(
+                FROM Episode TO Episode,
+                uuid STRING,
+                position INT64,
+                created_at TIMESTAMP
+            );
+            """
+        )
+
+        # Change log backing the CDC feed (see ryumem_server.core.changes)
+        self.execute(
+            """
+            CREATE NODE TABLE IF NOT EXISTS ChangeLog(
+                seq INT64 PRIMARY KEY,
+                op STRING,
+                kind STRING,
+                uuid STRING,
+                user_id STRING,
+                data STRING,
+                created_at TIMESTAMP
+            );
+            """
+        )
+
+        # Background extraction jobs (see ryumem_server.ingestion.queue)
+        self.execute(
+            """
+            CREATE NODE TABLE IF NOT EXISTS IngestionJob(
+                id STRING PRIMARY KEY,
+                status STRING,
+                episode_uuid STRING,
+                user_id STRING,
+                session_id STRING,
+                attempts INT64,
+                error STRING,
+                created_at TIMESTAMP,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP
+            );
+            """
+        )
+
         logger.info("Graph schema created successfully")
 
+    def _connection(self) -> "ryugraph.Connection":
+        """Return the calling thread's connection, opening one on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = ryugraph.Connection(self.db)
+        return conn
+
     def execute(
         self,
         query: str,
@@ -229,7 +319,7 @@ class RyugraphDB:
             List of result dictionaries
         """
         try:
-            results = self.conn.execute(query, parameters or {})
+            results = self._execute_with_retry(query, parameters or {})
             records = results.get_as_df().to_dict('records')
             # Convert NaN values to None for JSON compatibility
             cleaned_records = []
@@ -240,6 +330,7 @@ class RyugraphDB:
                         v = None
                     cleaned_row[k] = v
                 cleaned_records.append(cleaned_row)
+            record_query(len(cleaned_records))
             return cleaned_records
         except Exception as e:
             logger.error(f"Query failed: {str(e)}")
@@ -248,6 +339,68 @@ class RyugraphDB:
                 logger.debug(f"Parameters: {parameters}")
             raise
 
+    def _execute_with_retry(self, query: str, parameters: Dict[str, Any]) -> Any:
+        """Execute a query, retrying while another thread holds the write transaction."""
+        conn = self._connection()
+        deadline = time.monotonic() + WRITE_RETRY_SECONDS
+        delay = 0.001
+        while True:
+            try:
+                return conn.execute(query, parameters)
+            except RuntimeError as e:
+                if WRITE_CONFLICT_MESSAGE not in str(e) or time.monotonic() >= deadline:
+                    raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Run the enclosed statements as one write transaction of the calling
+        thread: all of them are committed, or none when the block raises.
+
+        Change events emitted inside are logged in the same transaction and
+        delivered to subscribers after the commit (see ChangeFeed.collect).
+        A nested block joins the enclosing transaction.
+        """
+        if getattr(self._local, "in_transaction", False):
+            yield
+            return
+
+        self._begin_transaction()
+        self._local.in_transaction = True
+        try:
+            with self.changes.collect():
+                try:
+                    yield
+                    self._connection().execute("COMMIT")
+                except BaseException:
+                    try:
+                        self._connection().execute("ROLLBACK")
+                    except RuntimeError:
+                        # A failed statement already rolled the transaction back
+                        pass
+                    raise
+        finally:
+            self._local.in_transaction = False
+
+    def _begin_transaction(self) -> None:
+        """Start a write transaction, waiting while another thread holds one."""
+        deadline = time.monotonic() + WRITE_RETRY_SECONDS
+        delay = 0.001
+        while True:
+            try:
+                self._connection().execute("BEGIN TRANSACTION")
+                return
+            except RuntimeError as e:
+                # ryugraph cannot run anything else on a connection whose
+                # BEGIN failed; the thread continues on a new one
+                self._local.conn = None
+                if WRITE_CONFLICT_MESSAGE not in str(e) or time.monotonic() >= deadline:
+                    raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
     def save_episode(self, episode: EpisodeNode) -> Dict[str, Any]:
         """
         Save an episode node to the database.
@@ -273,7 +426,9 @@ class RyugraphDB:
             e.user_id = $user_id,
             e.agent_id = $agent_id,
             e.metadata = $metadata,
-            e.entity_edges = $entity_edges
+            e.entity_edges = $entity_edges,
+            e.extracted = $extracted,
+            e.content_hash = $content_hash
         ON MATCH SET
             e.entity_edges = $entity_edges,
             e.content_embedding = $content_embedding,
@@ -295,9 +450,109 @@ class RyugraphDB:
             "agent_id": episode.agent_id,
             "metadata": json.dumps(episode.metadata),
             "entity_edges": episode.entity_edges,
+            "extracted": episode.extracted,
+            "content_hash": content_hash(episode.content),
         }
 
-        return self.execute(query, params)
+        with self.transaction():
+            result = self.execute(query, params)
+            self.changes.emit(
+                "upsert", "episode", episode.uuid, episode.user_id,
+                data={
+                    "name": episode.name,
+                    "content": episode.content,
+                    "kind": params["kind"],
+                    "metadata": episode.metadata,
+                    "created_at": episode.created_at.isoformat() if episode.created_at else None,
+                    "content_hash": params["content_hash"],
+                },
+            )
+        return result
+
+    def save_episodes(self, episodes: List[EpisodeNode]) -> List[Dict[str, Any]]:
+        """
+        Save new episode nodes with one UNWIND query (see save_episode).
+
+        Episodes that already exist are left unchanged.
+
+        Args:
+            episodes: EpisodeNodes to save (all with or all without content embeddings)
+
+        Returns:
+            Result dictionaries
+        """
+        if not episodes:
+            return []
+        embedded = [episode.content_embedding is not None for episode in episodes]
+        if any(embedded) and not all(embedded):
+            # One UNWIND cannot mix NULL and FLOAT[] embeddings
+            return (
+                self.save_episodes([e for e, has in zip(episodes, embedded) if has])
+                + self.save_episodes([e for e, has in zip(episodes, embedded) if not has])
+            )
+
+        query = f"""
+        UNWIND $rows AS row
+        MERGE (e:Episode {{uuid: row.uuid}})
+        ON CREATE SET
+            e.name = row.name,
+            e.content = row.content,
+            e.content_embedding = {"row.content_embedding" if embedded[0] else "NULL"},
+            e.source = row.source,
+            e.source_description = row.source_description,
+            e.kind = row.kind,
+            e.created_at = row.created_at,
+            e.valid_at = row.valid_at,
+            e.user_id = row.user_id,
+            e.agent_id = row.agent_id,
+            e.metadata = row.metadata,
+            e.entity_edges = CAST(row.entity_edges, 'STRING[]'),
+            e.extracted = row.extracted,
+            e.content_hash = row.content_hash
+        RETURN e.uuid AS uuid
+        """
+
+        rows = [
+            {
+                "uuid": episode.uuid,
+                "name": episode.name,
+                "content": episode.content,
+                "content_embedding": episode.content_embedding,
+                "source": episode.source.value,
+                "source_description": episode.source_description,
+                "kind": episode.kind.value if hasattr(episode.kind, 'value') else str(episode.kind),
+                "created_at": episode.created_at,
+                "valid_at": episode.valid_at,
+                "user_id": episode.user_id,
+                "agent_id": episode.agent_id,
+                "metadata": json.dumps(episode.metadata),
+                "entity_edges": episode.entity_edges,
+                "extracted": episode.extracted,
+                "content_hash": content_hash(episode.content),
+            }
+            for episode in episodes
+        ]
+
+        with self.transaction():
+            result = self.execute(query, {"rows": rows})
+            self.changes.emit_many([
+                {
+                    "op": "upsert",
+                    "kind": "episode",
+                    "uuid": episode.uuid,
+                    "user_id": episode.user_id,
+                    "data": {
+                        "name": episode.name,
+                        "content": episode.content,
+                        "kind": row["kind"],
+                        "metadata": episode.metadata,
+                        "created_at": episode.created_at.isoformat() if episode.created_at else None,
+                        "content_hash": row["content_hash"],
+                    },
+                }
+                for episode, row in zip(episodes, rows)
+            ])
+        return result
 
     def save_entity(self, entity: EntityNode) -> Dict[str, Any]:
         """
@@ -373,7 +628,59 @@ class RyugraphDB:
             "attributes": json.dumps(entity.attributes),
         }
 
-        return self.execute(query, params)
+        with self.transaction():
+            result = self.execute(query, params)
+            self.changes.emit(
+                "upsert", "entity", entity.uuid, entity.user_id,
+                data={
+                    "name": entity.name,
+                    "entity_type": entity.entity_type,
+                    "summary": entity.summary,
+                },
+            )
+        return result
+
+    def update_entity_summaries(self, summaries: Dict[str, str]) -> List[str]:
+        """
+        Set the summaries of several entities with one statement.
+
+        Unlike save_entity, only the summary is written: mentions and the
+        other properties are left as they are.
+
+        Args:
+            summaries: Dictionary mapping entity UUID to its new summary
+
+        Returns:
+            UUIDs of the entities found and updated
+        """
+        if not summaries:
+            return []
+
+        query = """
+        UNWIND $rows AS row
+        MATCH (e:Entity {uuid: row.uuid})
+        SET e.summary = row.summary
+        RETURN e.uuid AS uuid, e.name AS name, e.entity_type AS entity_type, e.user_id AS user_id
+        """
+
+        rows = [{"uuid": uuid, "summary": summary} for uuid, summary in summaries.items()]
+        with self.transaction():
+            results = self.execute(query, {"rows": rows})
+            self.changes.emit_many([
+                {
+                    "op": "upsert",
+                    "kind": "entity",
+                    "uuid": row["uuid"],
+                    "user_id": row["user_id"],
+                    "data": {
+                        "name": row["name"],
+                        "entity_type": row["entity_type"],
+                        "summary": summaries[row["uuid"]],
+                    },
+                }
+                for row in results
+            ])
+        return [row["uuid"] for row in results]
 
     def save_entity_edge(self, edge: EntityEdge, source_uuid: str, target_uuid: str) -> Dict[str, Any]:
         """
@@ -409,7 +716,7 @@ class RyugraphDB:
             r.fact_embedding = CAST($fact_embedding, 'FLOAT[{self.embedding_dimensions}]'),
             r.episodes = $episodes,
             r.attributes = $attributes
-        RETURN r.uuid AS uuid
+        RETURN r.uuid AS uuid, source.user_id AS user_id
         """
 
         params = {
@@ -428,7 +735,19 @@ class RyugraphDB:
             "attributes": json.dumps(edge.attributes),
         }
 
-        return self.execute(query, params)
+        with self.transaction():
+            result = self.execute(query, params)
+            if result:
+                self.changes.emit(
+                    "upsert", "edge", edge.uuid, result[0].get("user_id"),
+                    data={
+                        "name": edge.name,
+                        "fact": edge.fact,
+                        "source_uuid": source_uuid,
+                        "target_uuid": target_uuid,
+                    },
+                )
+        return result
 
     def save_episodic_edge(self, edge: EpisodicEdge) -> Dict[str, Any]:
         """
@@ -440,23 +759,87 @@ class RyugraphDB:
         Returns:
             Result dictionary
         """
+        return self.save_episodic_edges([edge])
+
+    def save_episodic_edges(self, edges: List[EpisodicEdge]) -> List[Dict[str, Any]]:
+        """
+        Save several MENTIONS edges with one UNWIND query (see save_episodic_edge).
+
+        Emits one link event per episode, so results computed before its
+        entities were linked (e.g. cached searches) are dropped.
+
+        Args:
+            edges: EpisodicEdges to save
+
+        Returns:
+            Result dictionaries
+        """
+        if not edges:
+            return []
         query = """
-        MATCH (episode:Episode {uuid: $episode_uuid})
-        MATCH (entity:Entity {uuid: $entity_uuid})
-        MERGE (episode)-[r:MENTIONS {uuid: $uuid}]->(entity)
+        UNWIND $rows AS row
+        MATCH (episode:Episode {uuid: row.episode_uuid})
+        MATCH (entity:Entity {uuid: row.entity_uuid})
+        MERGE (episode)-[r:MENTIONS {uuid: row.uuid}]->(entity)
         ON CREATE SET
-            r.created_at = $created_at
-        RETURN r.uuid AS uuid
+            r.created_at = row.created_at
+        RETURN r.uuid AS uuid, episode.uuid AS episode_uuid, episode.user_id AS user_id
         """
 
-        params = {
-            "episode_uuid": edge.source_node_uuid,
-            "entity_uuid": edge.target_node_uuid,
-            "uuid": edge.uuid,
-            "created_at": edge.created_at,
-        }
+        rows = [
+            {
+                "episode_uuid": edge.source_node_uuid,
+                "entity_uuid": edge.target_node_uuid,
+                "uuid": edge.uuid,
+                "created_at": edge.created_at,
+            }
+            for edge in edges
+        ]
+        with self.transaction():
+            results = self.execute(query, {"rows": rows})
+            episodes = {row["episode_uuid"]: row["user_id"] for row in results}
+            self.changes.emit_many([
+                {"op": "link", "kind": "episode", "uuid": uuid, "user_id": user_id}
+                for uuid, user_id in episodes.items()
+            ])
+        return results
+
+    def find_episodes_by_content(
+        self,
+        contents: List[str],
+        user_id: str,
+        time_window_hours: int = 24,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Find recent episodes with exactly the given contents (bulk duplicate check).
 
-        return self.execute(query, params)
+        Args:
+            contents: Episode contents to look up
+            user_id: User ID (required)
+            time_window_hours: Look back this many hours
+
+        Returns:
+            Dictionary mapping content to its most recent episode (contents
+            without a match are absent)
+        """
+        if not contents:
+            return {}
+        time_cutoff = datetime.now(timezone.utc) - timedelta(hours=time_window_hours)
+        hashes = {content_hash(content): content for content in contents}
+        results = self.execute(
+            """
+            MATCH (e:Episode)
+            WHERE e.content_hash IN $hashes AND e.user_id = $user_id AND e.created_at > $time_cutoff
+            RETURN e.uuid AS uuid, e.content AS content, e.created_at AS created_at, e.user_id AS user_id,
+                   e.content_hash AS content_hash
+            ORDER BY e.created_at DESC
+            """,
+            {"hashes": list(hashes), "user_id": user_id, "time_cutoff": time_cutoff},
+        )
+        matches: Dict[str, Dict[str, Any]] = {}
+        for row in results:
+            matches.setdefault(hashes[row.pop("content_hash")], row)
+        return matches
 
     def _find_exact_episode_match(
         self,
@@ -464,15 +847,15 @@ class RyugraphDB:
         user_id: str,
         time_cutoff: Any,
     ) -> Optional[Dict[str, Any]]:
-        """Helper to check for exact content match."""
+        """Helper to check for exact content match (by content hash)."""
         exact_results = self.execute(
             """
             MATCH (e:Episode)
-            WHERE e.content = $content AND e.user_id = $user_id AND e.created_at > $time_cutoff
+            WHERE e.content_hash = $content_hash AND e.user_id = $user_id AND e.created_at > $time_cutoff
             RETURN e.uuid AS uuid, e.content AS content, e.created_at AS created_at, e.user_id AS user_id
             ORDER BY e.created_at DESC LIMIT 1
             """,
-            {"content": content, "user_id": user_id, "time_cutoff": time_cutoff}
+            {"content_hash": content_hash(content), "user_id": user_id, "time_cutoff": time_cutoff}
         )
         return exact_results[0] if exact_results else None
 
@@ -568,7 +951,7 @@ class RyugraphDB:
             return None
 
         results = bm25_index.search_episodes(
-            query=content, top_k=10, min_score=similarity_threshold
+            query=content, top_k=10, min_score=similarity_threshold, user_id=user_id
         )
 
         if not results:
@@ -580,6 +963,61 @@ class RyugraphDB:
         # Filter by user_id and time_cutoff in the database query
         return self._filter_episodes_by_time_cutoff(candidate_uuids, time_cutoff, user_id=user_id)
 
+    def link_episode_chunks(self, document_uuid: str, chunk_uuids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Link a document episode to its chunk episodes with HAS_CHUNK edges (one UNWIND).
+
+        Args:
+            document_uuid: UUID of the document episode
+            chunk_uuids: UUIDs of the chunk episodes, in document order
+
+        Returns:
+            Result dictionaries
+        """
+        if not chunk_uuids:
+            return []
+        return self.execute(
+            """
+            UNWIND $rows AS row
+            MATCH (d:Episode {uuid: $document_uuid}), (c:Episode {uuid: row.chunk_uuid})
+            CREATE (d)-[:HAS_CHUNK {uuid: row.uuid, position: row.position, created_at: $created_at}]->(c)
+            RETURN c.uuid AS uuid
+            """,
+            {
+                "document_uuid": document_uuid,
+                "created_at": datetime.utcnow(),
+                "rows": [
+                    {"chunk_uuid": uuid, "uuid": str(uuid4()), "position": position}
+                    for position, uuid in enumerate(chunk_uuids)
+                ],
+            },
+        )
+
+    def get_episode_chunks(self, document_uuid: str) -> List[Dict[str, Any]]:
+        """
+        Get the chunk episodes of a document episode, in document order.
+
+        Args:
+            document_uuid: UUID of the document episode
+
+        Returns:
+            List of chunks (uuid, name, content, position, metadata,
+            created_at, user_id, extracted); empty if the episode was not chunked
+        """
+        chunks = self.execute(
+            """
+            MATCH (:Episode {uuid: $document_uuid})-[r:HAS_CHUNK]->(c:Episode)
+            RETURN c.uuid AS uuid, c.name AS name, c.content AS content, r.position AS position,
+                   c.metadata AS metadata, c.created_at AS created_at, c.user_id AS user_id,
+                   c.extracted AS extracted
+            ORDER BY r.position
+            """,
+            {"document_uuid": document_uuid},
+        )
+        for chunk in chunks:
+            chunk["metadata"] = json.loads(chunk["metadata"]) if chunk["metadata"] else {}
+        return chunks
+
     def get_episode_by_session_id(self, session_id: str) -> Optional[EpisodeNode]:
         """
         Find an episode that contains the given session_id in its metadata.sessions.
@@ -740,6 +1178,7 @@ class RyugraphDB:
         user_id: Optional[str],
         threshold: float = 0.7,
         limit: int = 10,
+        recency: Optional[Any] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search for entities similar to the given embedding.
@@ -749,6 +1188,9 @@ class RyugraphDB:
             user_id: User ID (None for all users)
             threshold: Minimum similarity threshold (0.0-1.0)
             limit: Maximum number of results
+            recency: Optional RecencyScorer; results are then ranked and
+                limited by similarity weighted with its multiplier (returned
+                as "score")
 
         Returns:
             List of similar entities with similarity scores
@@ -762,14 +1204,16 @@ class RyugraphDB:
           {user_filter}
         WITH e, array_cosine_similarity(e.name_embedding, CAST($embedding, 'FLOAT[{self.embedding_dimensions}]')) AS similarity
         WHERE similarity >= $threshold
+        {f"WITH e, similarity, similarity * {recency.cypher('e.created_at')} AS score" if recency else ""}
         RETURN
             e.uuid AS uuid,
             e.name AS name,
             e.entity_type AS entity_type,
             e.summary AS summary,
             e.mentions AS mentions,
-            similarity
-        ORDER BY similarity DESC
+            e.created_at AS created_at,
+            similarity{", score" if recency else ""}
+        ORDER BY {"score" if recency else "similarity"} DESC
         LIMIT $limit
         """
 
@@ -778,6 +1222,7 @@ class RyugraphDB:
             "user_id": user_id,
             "threshold": threshold,
             "limit": limit,
+            **(recency.params() if recency else {}),
         }
 
         return self.execute(query, params)
@@ -792,6 +1237,7 @@ class RyugraphDB:
         time_cutoff: Optional[Any] = None,
         tags: Optional[List[str]] = None,
         tag_match_mode: str = 'any',
+        recency: Optional[Any] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search for episodes similar to the given embedding.
@@ -805,6 +1251,9 @@ class RyugraphDB:
             time_cutoff: Optional datetime cutoff - only return episodes created after this time
             tags: Optional list of tags to filter by
             tag_match_mode: Tag matching mode - 'any' (at least one tag) or 'all' (all tags)
+            recency: Optional RecencyScorer; results are then ranked and
+                limited by similarity weighted with its multiplier (returned
+                as "score")
 
         Returns:
             List of similar episodes with similarity scores
@@ -831,6 +1280,7 @@ class RyugraphDB:
           {time_filter}
         WITH ep, array_cosine_similarity(ep.content_embedding, CAST($embedding, 'FLOAT[{self.embedding_dimensions}]')) AS similarity
         WHERE similarity >= $threshold
+        {f"WITH ep, similarity, similarity * {recency.cypher('ep.created_at')} AS score" if recency else ""}
         RETURN
             ep.uuid AS uuid,
             ep.name AS name,
@@ -843,8 +1293,8 @@ class RyugraphDB:
             ep.user_id AS user_id,
             ep.agent_id AS agent_id,
             ep.metadata AS metadata,
-            similarity
-        ORDER BY similarity DESC, ep.created_at DESC
+            similarity{", score" if recency else ""}
+        ORDER BY {"score" if recency else "similarity"} DESC, ep.created_at DESC
         LIMIT $limit
         """
 
@@ -853,6 +1303,7 @@ class RyugraphDB:
             "user_id": user_id,
             "threshold": threshold,
             "limit": limit,
+            **(recency.params() if recency else {}),
         }
 
         if time_cutoff is not None:
@@ -897,6 +1348,7 @@ class RyugraphDB:
         user_id: Optional[str],
         threshold: float = 0.8,
         limit: int = 10,
+        recency: Optional[Any] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search for entity edges similar to the given embedding.
@@ -906,6 +1358,9 @@ class RyugraphDB:
             user_id: User ID (None for all users)
             threshold: Minimum similarity threshold (0.0-1.0)
             limit: Maximum number of results
+            recency: Optional RecencyScorer; results are then ranked and
+                limited by similarity weighted with its multiplier (returned
+                as "score")
 
         Returns:
             List of similar edges with similarity scores
@@ -921,16 +1376,20 @@ class RyugraphDB:
         WITH source, r, target,
              array_cosine_similarity(r.fact_embedding, CAST($embedding, 'FLOAT[{self.embedding_dimensions}]')) AS similarity
         WHERE similarity >= $threshold
+        {f"WITH source, r, target, similarity, similarity * {recency.cypher('r.created_at', 'r.valid_at', 'r.invalid_at')} AS score" if recency else ""}
         RETURN
             source.uuid AS source_uuid,
             source.name AS source_name,
             r.uuid AS edge_uuid,
             r.name AS relation_type,
             r.fact AS fact,
+            r.created_at AS created_at,
+            r.valid_at AS valid_at,
+            r.invalid_at AS invalid_at,
             target.uuid AS target_uuid,
             target.name AS target_name,
-            similarity
-        ORDER BY similarity DESC
+            similarity{", score" if recency else ""}
+        ORDER BY {"score" if recency else "similarity"} DESC
         LIMIT $limit
         """
 
@@ -939,10 +1398,157 @@ class RyugraphDB:
             "user_id": user_id,
             "threshold": threshold,
             "limit": limit,
+            **(recency.params() if recency else {}),
         }
 
         return self.execute(query, params)
 
+    def get_episode_embeddings(
+        self,
+        user_id: Optional[str],
+        kinds: Optional[List[str]] = None,
+        time_cutoff: Optional[Any] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the content embeddings of the episodes search_similar_episodes
+        would scan, most recent first (for batched client-side scoring).
+
+        Args:
+            user_id: User ID (None for all users)
+            kinds: Filter by episode kinds
+            time_cutoff: Only episodes created after this time
+
+        Returns:
+            List of dicts with uuid, metadata, created_at and embedding
+        """
+        user_filter = "AND ep.user_id = $user_id" if user_id else ""
+        kind_filter = "AND ep.kind IN $kinds" if kinds else ""
+        time_filter = "AND ep.created_at > $time_cutoff" if time_cutoff is not None else ""
+
+        query = f"""
+        MATCH (ep:Episode)
+        WHERE ep.content_embedding IS NOT NULL
+          {user_filter}
+          {kind_filter}
+          {time_filter}
+        RETURN ep.uuid AS uuid, ep.metadata AS metadata, ep.created_at AS created_at,
+               ep.content_embedding AS embedding
+        ORDER BY ep.created_at DESC
+        """
+
+        params: Dict[str, Any] = {}
+        if user_id:
+            params["user_id"] = user_id
+        if kinds:
+            params["kinds"] = list(kinds)
+        if time_cutoff is not None:
+            params["time_cutoff"] = time_cutoff
+        return self.execute(query, params)
+
+    def get_recent_episode_hashes(self, time_cutoff: Any) -> List[Dict[str, Any]]:
+        """
+        Get the episodes created after a time, for the near-duplicate index.
+
+        Args:
+            time_cutoff: Only episodes created after this time
+
+        Returns:
+            List of dicts with uuid, user_id, content, content_hash and created_at
+        """
+        return self.execute(
+            """
+            MATCH (e:Episode)
+            WHERE e.created_at > $time_cutoff AND e.content IS NOT NULL
+            RETURN e.uuid AS uuid, e.user_id AS user_id, e.content AS content,
+                   e.content_hash AS content_hash, e.created_at AS created_at
+            """,
+            {"time_cutoff": time_cutoff},
+        )
+
+    def get_entity_embeddings(self, user_id: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Get the name embeddings of the entities search_similar_entities
+        would scan (for batched client-side scoring).
+
+        Args:
+            user_id: User ID (None for all users)
+
+        Returns:
+            List of dicts with uuid, created_at and embedding
+        """
+        user_filter = "AND e.user_id = $user_id" if user_id else ""
+
+        query = f"""
+        MATCH (e:Entity)
+        WHERE e.name_embedding IS NOT NULL
+          {user_filter}
+        RETURN e.uuid AS uuid, e.created_at AS created_at, e.name_embedding AS embedding
+        """
+
+        return self.execute(query, {"user_id": user_id} if user_id else {})
+
+    def get_edge_embeddings(self, user_id: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Get the fact embeddings of the unexpired edges search_similar_edges
+        would scan (for batched client-side scoring).
+
+        Args:
+            user_id: User ID (None for all users)
+
+        Returns:
+            List of dicts with uuid, created_at, valid_at, invalid_at and embedding
+        """
+        user_filter = "AND source.user_id = $user_id AND target.user_id = $user_id" if user_id else ""
+
+        query = f"""
+        MATCH (source:Entity)-[r:RELATES_TO]->(target:Entity)
+        WHERE r.fact_embedding IS NOT NULL
+          AND (r.expired_at IS NULL OR r.expired_at > current_timestamp())
+          {user_filter}
+        RETURN r.uuid AS uuid, r.created_at AS created_at, r.valid_at AS valid_at,
+               r.invalid_at AS invalid_at, r.fact_embedding AS embedding
+        """
+
+        return self.execute(query, {"user_id": user_id} if user_id else {})
+
+    def count_documents(self, user_id: Optional[str]) -> Dict[str, int]:
+        """
+        Count a user's episodes, entities and relationship edges (for
+        search planning).
+
+        Args:
+            user_id: User ID (None for all users)
+
+        Returns:
+            Dictionary with episodes, entities and edges counts, and embedded:
+            how many of them carry an embedding
+        """
+        params = {"user_id": user_id} if user_id else {}
+        episode_filter = "WHERE ep.user_id = $user_id" if user_id else ""
+        entity_filter = "WHERE e.user_id = $user_id" if user_id else ""
+        edge_filter = "WHERE source.user_id = $user_id AND target.user_id = $user_id" if user_id else ""
+
+        counts = {"episodes": 0, "entities": 0, "edges": 0, "embedded": 0}
+        for name, query in (
+            ("episodes", f"""
+                MATCH (ep:Episode) {episode_filter}
+                RETURN count(ep) AS total, count(ep.content_embedding) AS embedded
+            """),
+            ("entities", f"""
+                MATCH (e:Entity) {entity_filter}
+                RETURN count(e) AS total, count(e.name_embedding) AS embedded
+            """),
+            ("edges", f"""
+                MATCH (source:Entity)-[r:RELATES_TO]->(target:Entity) {edge_filter}
+                RETURN count(r) AS total, count(r.fact_embedding) AS embedded
+            """),
+        ):
+            result = self.execute(query, params)
+            if result:
+                counts[name] = int(result[0]["total"] or 0)
+                counts["embedded"] += int(result[0]["embedded"] or 0)
+        return counts
+
     def get_entity_by_uuid(self, uuid: str) -> Optional[Dict[str, Any]]:
         """Get an entity by its UUID"""
         query = """
@@ -980,6 +1586,64 @@ class RyugraphDB:
         results = self.execute(query, {"uuid": uuid})
         return results[0] if results else None
 
+    def get_entities_by_uuids(self, uuids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several entities in one query.
+
+        Args:
+            uuids: Entity UUIDs
+
+        Returns:
+            Dictionary mapping UUID to entity (unknown UUIDs are absent)
+        """
+        if not uuids:
+            return {}
+        query = """
+        MATCH (e:Entity)
+        WHERE e.uuid IN $uuids
+        RETURN
+            e.uuid AS uuid,
+            e.name AS name,
+            e.entity_type AS entity_type,
+            e.summary AS summary,
+            e.mentions AS mentions,
+            e.created_at AS created_at,
+            e.user_id AS user_id
+        """
+        results = self.execute(query, {"uuids": list(uuids)})
+        return {row["uuid"]: row for row in results}
+
+    def get_edges_by_uuids(self, uuids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several relationship edges in one query.
+
+        Args:
+            uuids: Edge UUIDs
+
+        Returns:
+            Dictionary mapping UUID to edge (unknown UUIDs are absent)
+        """
+        if not uuids:
+            return {}
+        query = """
+        MATCH (s:Entity)-[r:RELATES_TO]->(t:Entity)
+        WHERE r.uuid IN $uuids
+        RETURN
+            r.uuid AS uuid,
+            s.uuid AS source_uuid,
+            t.uuid AS target_uuid,
+            r.fact AS fact,
+            r.name AS relation_type,
+            r.valid_at AS valid_at,
+            r.invalid_at AS invalid_at,
+            r.expired_at AS expired_at,
+            r.created_at AS created_at,
+            r.mentions AS mentions,
+            r.episodes AS episodes
+        """
+        results = self.execute(query, {"uuids": list(uuids)})
+        return {row["uuid"]: row for row in results}
+
     def get_entity_relationships(
         self,
         entity_uuid: str,
@@ -1015,6 +1679,74 @@ class RyugraphDB:
 
         return self.execute(query, {"uuid": entity_uuid})
 
+    def get_relationships_for_entities(
+        self,
+        entity_uuids: List[str],
+        include_expired: bool = False,
+        exclude_edge_uuids: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        include_embeddings: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the relationships of several entities in one query, with full
+        records of both endpoints (one BFS layer of a graph traversal).
+
+        Args:
+            entity_uuids: UUIDs of the entities to expand
+            include_expired: Whether to include expired edges
+            exclude_edge_uuids: Edges to skip (e.g. already visited)
+            limit: Maximum number of edges returned (strongest edges first:
+                most mentioned, then most recent)
+            include_embeddings: Also return each edge's fact_embedding
+
+        Returns:
+            List of edges in stored direction, each with source_* and
+            target_* entity fields
+        """
+        if not entity_uuids:
+            return []
+
+        conditions = ["(s.uuid IN $entity_uuids OR t.uuid IN $entity_uuids)"]
+        params: Dict[str, Any] = {"entity_uuids": list(entity_uuids)}
+        if not include_expired:
+            conditions.append("(r.expired_at IS NULL OR r.expired_at > current_timestamp())")
+        if exclude_edge_uuids:
+            conditions.append("NOT r.uuid IN $exclude_edge_uuids")
+            params["exclude_edge_uuids"] = list(exclude_edge_uuids)
+        embedding_column = "\n            r.fact_embedding AS fact_embedding," if include_embeddings else ""
+
+        query = f"""
+        MATCH (s:Entity)-[r:RELATES_TO]->(t:Entity)
+        WHERE {" AND ".join(conditions)}
+        RETURN
+            r.uuid AS edge_uuid,
+            r.name AS relation_type,
+            r.fact AS fact,
+            r.created_at AS created_at,
+            r.valid_at AS valid_at,
+            r.invalid_at AS invalid_at,
+            r.expired_at AS expired_at,{embedding_column}
+            s.uuid AS source_uuid,
+            s.name AS source_name,
+            s.entity_type AS source_entity_type,
+            s.summary AS source_summary,
+            s.mentions AS source_mentions,
+            s.user_id AS source_user_id,
+            s.created_at AS source_created_at,
+            t.uuid AS target_uuid,
+            t.name AS target_name,
+            t.entity_type AS target_entity_type,
+            t.summary AS target_summary,
+            t.mentions AS target_mentions,
+            t.user_id AS target_user_id,
+            t.created_at AS target_created_at
+        ORDER BY coalesce(r.mentions, 0) DESC, r.created_at DESC
+        """
+        if limit is not None:
+            query += f"LIMIT {int(limit)}\n"
+
+        return self.execute(query, params)
+
     def invalidate_edge(self, edge_uuid: str) -> Dict[str, Any]:
         """
         Mark an edge as expired (invalidated).
@@ -1026,12 +1758,45 @@ class RyugraphDB:
             Result dictionary
         """
         query = """
-        MATCH ()-[r:RELATES_TO {uuid: $uuid}]->()
+        MATCH (source:Entity)-[r:RELATES_TO {uuid: $uuid}]->()
+        SET r.expired_at = current_timestamp()
+        RETURN r.uuid AS uuid, r.expired_at AS expired_at, source.user_id AS user_id
+        """
+
+        with self.transaction():
+            result = self.execute(query, {"uuid": edge_uuid})
+            if result:
+                # The owner scopes the invalidation (e.g. the user's cached results)
+                self.changes.emit("invalidate", "edge", edge_uuid, result[0].get("user_id"))
+        return result
+
+    def invalidate_edges(self, edge_uuids: List[str]) -> List[str]:
+        """
+        Mark several edges as expired (invalidated) with one statement.
+
+        Args:
+            edge_uuids: UUIDs of the edges to invalidate
+
+        Returns:
+            UUIDs of the edges found and invalidated
+        """
+        if not edge_uuids:
+            return []
+
+        query = """
+        MATCH (source:Entity)-[r:RELATES_TO]->()
+        WHERE r.uuid IN $uuids
         SET r.expired_at = current_timestamp()
-        RETURN r.uuid AS uuid, r.expired_at AS expired_at
+        RETURN r.uuid AS uuid, source.user_id AS user_id
         """
 
-        return self.execute(query, {"uuid": edge_uuid})
+        with self.transaction():
+            rows = self.execute(query, {"uuids": list(edge_uuids)})
+            self.changes.emit_many([
+                {"op": "invalidate", "kind": "edge", "uuid": row["uuid"], "user_id": row["user_id"]}
+                for row in rows
+            ])
+        return [row["uuid"] for row in rows]
 
     def delete_by_user_id(self, user_id: str) -> None:
         """
@@ -1040,24 +1805,26 @@ class RyugraphDB:
         Args:
             user_id: User ID to delete
         """
-        # Delete episodes for user
-        self.execute(
-            """
-            MATCH (n:Episode {user_id: $user_id})
-            DETACH DELETE n
-            """,
-            {"user_id": user_id}
-        )
-
-        # Delete entities for user
-        self.execute(
-            """
-            MATCH (n:Entity {user_id: $user_id})
-            DETACH DELETE n
-            """,
-            {"user_id": user_id}
-        )
+        with self.transaction():
+            # Delete episodes for user
+            self.execute(
+                """
+                MATCH (n:Episode {user_id: $user_id})
+                DETACH DELETE n
+                """,
+                {"user_id": user_id}
+            )
+
+            # Delete entities for user
+            self.execute(
+                """
+                MATCH (n:Entity {user_id: $user_id})
+                DETACH DELETE n
+                """,
+                {"user_id": user_id}
+            )
 
+            self.changes.emit("delete_user", "user", user_id=user_id)
         logger.info(f"Deleted all data for user_id: {user_id}")
 
     def get_episode_context(
@@ -1132,6 +1899,41 @@ class RyugraphDB:
         params = {"episode_uuid": episode_uuid}
         return self.execute(query, params)
 
+    def get_entities_for_episodes(
+        self,
+        episode_uuids: List[str],
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the entities mentioned in several episodes in one query.
+
+        Args:
+            episode_uuids: UUIDs of the episodes
+
+        Returns:
+            Dictionary mapping episode UUID to its mentioned entities
+            (episodes without mentions are absent)
+        """
+        if not episode_uuids:
+            return {}
+        query = """
+        MATCH (ep:Episode)-[:MENTIONS]->(e:Entity)
+        WHERE ep.uuid IN $episode_uuids
+        RETURN
+            ep.uuid AS episode_uuid,
+            e.uuid AS uuid,
+            e.name AS name,
+            e.entity_type AS entity_type,
+            e.summary AS summary,
+            e.mentions AS mentions,
+            e.created_at AS created_at,
+            e.user_id AS user_id
+        """
+
+        entities: Dict[str, List[Dict[str, Any]]] = {}
+        for row in self.execute(query, {"episode_uuids": list(episode_uuids)}):
+            entities.setdefault(row.pop("episode_uuid"), []).append(row)
+        return entities
+
     def get_episodes(
         self,
         user_id: Optional[str] = None,
@@ -1248,6 +2050,39 @@ class RyugraphDB:
         result = self.execute(query, {"uuid": episode_uuid})
         return result[0] if result else None
 
+    def get_episodes_by_uuids(self, episode_uuids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several episodes in one query.
+
+        Args:
+            episode_uuids: Episode UUIDs
+
+        Returns:
+            Dictionary mapping UUID to episode (unknown UUIDs are absent)
+        """
+        if not episode_uuids:
+            return {}
+        query = """
+        MATCH (e:Episode)
+        WHERE e.uuid IN $uuids
+        RETURN
+            e.uuid AS uuid,
+            e.name AS name,
+            e.content AS content,
+            e.source AS source,
+            e.source_description AS source_description,
+            e.kind AS kind,
+            e.created_at AS created_at,
+            e.valid_at AS valid_at,
+            e.user_id AS user_id,
+            e.agent_id AS agent_id,
+            e.metadata AS metadata,
+            e.entity_edges AS entity_edges
+        """
+
+        results = self.execute(query, {"uuids": list(episode_uuids)})
+        return {row["uuid"]: row for row in results}
+
     def update_episode_metadata(self, episode_uuid: str, metadata: Dict) -> Dict[str, Any]:
         """
         Update metadata for an existing episode.
@@ -1271,11 +2106,137 @@ class RyugraphDB:
             "metadata": json.dumps(metadata),
         }
 
+        with self.transaction():
+            result = self.execute(query, params)
+            episode = self.get_episode_by_uuid(episode_uuid) if result else None
+            if episode:
+                created_at = episode.get("created_at")
+                self.changes.emit(
+                    "upsert", "episode", episode_uuid, episode.get("user_id"),
+                    data={
+                        "name": episode.get("name"),
+                        "content": episode.get("content"),
+                        "kind": episode.get("kind"),
+                        "metadata": metadata,
+                        "created_at": created_at.isoformat() if created_at is not None else None,
+                    },
+                )
+        return result
+
+    def update_episode_entity_edges(self, episode_uuid: str, entity_edges: List[str]) -> Dict[str, Any]:
+        """
+        Set the relationship edges extracted from an episode.
+
+        Keyword indexes and search results do not carry entity_edges, so no
+        change event is emitted.
+
+        Args:
+            episode_uuid: UUID of the episode
+            entity_edges: UUIDs of the episode's RELATES_TO edges
+
+        Returns:
+            Result dictionary
+        """
+        query = """
+        MATCH (e:Episode {uuid: $uuid})
+        SET e.entity_edges = $entity_edges
+        RETURN e.uuid AS uuid
+        """
+        return self.execute(query, {"uuid": episode_uuid, "entity_edges": entity_edges})
+
+    def mark_episodes_extracted(self, entity_edges: Dict[str, List[str]]) -> List[str]:
+        """
+        Record the extraction of several episodes with one statement: set
+        their relationship edges and their extracted flag.
+
+        Call it only once the extraction of the episodes succeeded: a
+        flagged episode is never extracted again by the backfill.
+
+        Emits a link event per episode (the extraction changed what its
+        searches return).
+
+        Args:
+            entity_edges: Dictionary mapping episode UUID to the UUIDs of
+                the RELATES_TO edges extracted from it
+
+        Returns:
+            UUIDs of the episodes found and updated
+        """
+        if not entity_edges:
+            return []
+
+        query = """
+        UNWIND $rows AS row
+        MATCH (e:Episode {uuid: row.uuid})
+        SET e.entity_edges = CAST(row.entity_edges, 'STRING[]'), e.extracted = true
+        RETURN e.uuid AS uuid, e.user_id AS user_id
+        """
+        rows = [{"uuid": uuid, "entity_edges": list(edges)} for uuid, edges in entity_edges.items()]
+        with self.transaction():
+            updated = self.execute(query, {"rows": rows})
+            self.changes.emit_many([
+                {"op": "link", "kind": "episode", "uuid": row["uuid"], "user_id": row["user_id"]}
+                for row in updated
+            ])
+        return [row["uuid"] for row in updated]
+
+    def get_unextracted_episodes(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = 100,
+        exclude_uuids: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get episodes saved without entity extraction, oldest first.
+
+        Episodes saved before the extracted flag existed (NULL) are not
+        returned: whether they were extracted is unknown.
+
+        Args:
+            user_id: Only episodes of this user
+            limit: Maximum number of episodes
+            exclude_uuids: Episodes to skip (e.g. queued for extraction)
+
+        Returns:
+            List of episodes (uuid, content, user_id, created_at)
+        """
+        conditions = ["e.extracted = false"]
+        params: Dict[str, Any] = {"limit": limit}
+        if user_id is not None:
+            conditions.append("e.user_id = $user_id")
+            params["user_id"] = user_id
+        if exclude_uuids:
+            conditions.append("NOT e.uuid IN $exclude_uuids")
+            params["exclude_uuids"] = list(exclude_uuids)
+
+        query = f"""
+        MATCH (e:Episode)
+        WHERE {" AND ".join(conditions)}
+        RETURN e.uuid AS uuid, e.content AS content, e.user_id AS user_id, e.created_at AS created_at
+        ORDER BY e.created_at, e.uuid
+        LIMIT $limit
+        """
         return self.execute(query, params)
 
+    def count_unextracted_episodes(self, user_id: Optional[str] = None) -> int:
+        """
+        Count the episodes saved without entity extraction (see get_unextracted_episodes).
+
+        Args:
+            user_id: Only episodes of this user
+
+        Returns:
+            Number of episodes
+        """
+        condition = " AND e.user_id = $user_id" if user_id is not None else ""
+        params = {"user_id": user_id} if user_id is not None else {}
+        rows = self.execute(f"MATCH (e:Episode) WHERE e.extracted = false{condition} RETURN count(e) AS n", params)
+        return int(rows[0]["n"]) if rows else 0
+
     def delete_episode(self, episode_uuid: str) -> Dict[str, Any]:
         """
         Delete an episode and all its related data including:
+        - The chunks of a document episode (deleted like episodes)
         - Entities that are only mentioned by this episode (orphaned entities)
         - Relationships/edges where source or target entity would be deleted
         - The episode itself (with its embeddings stored as node properties)
@@ -1286,50 +2247,50 @@ class RyugraphDB:
         Returns:
             Result dictionary with deletion confirmation and counts
         """
-        # First, find entities that are ONLY mentioned by this episode
-        # These will become orphaned after deletion
-        orphaned_entities_query = """
-        MATCH (ep:Episode {uuid: $uuid})-[:MENTIONS]->(e:Entity)
-        WHERE NOT EXISTS {
-            MATCH (other:Episode)-[:MENTIONS]->(e)
-            WHERE other.uuid <> $uuid
-        }
-        RETURN e.uuid AS entity_uuid, e.name AS entity_name
-        """
-        orphaned_entities = self.execute(orphaned_entities_query, {"uuid": episode_uuid})
-        orphaned_entity_uuids = [e["entity_uuid"] for e in orphaned_entities]
-
-        # Delete RELATES_TO edges where source or target is an orphaned entity
+        deleted_entities_count = 0
         deleted_relations_count = 0
-        if orphaned_entity_uuids:
-            delete_relations_query = """
-            MATCH (e1:Entity)-[r:RELATES_TO]->(e2:Entity)
-            WHERE e1.uuid IN $entity_uuids OR e2.uuid IN $entity_uuids
-            DELETE r
-            RETURN count(r) AS count
-            """
-            result = self.execute(delete_relations_query, {"entity_uuids": orphaned_entity_uuids})
-            deleted_relations_count = result[0]["count"] if result else 0
 
-        # Delete orphaned entities
-        deleted_entities_count = 0
-        if orphaned_entity_uuids:
-            delete_entities_query = """
-            MATCH (e:Entity)
-            WHERE e.uuid IN $entity_uuids
+        # The episode, its chunks and their orphaned entities go together
+        with self.transaction():
+            # A document's graph is mentioned by its chunks
+            chunks = self.execute(
+                "MATCH (:Episode {uuid: $uuid})-[:HAS_CHUNK]->(c:Episode) RETURN c.uuid AS uuid",
+                {"uuid": episode_uuid},
+            )
+            for chunk in chunks:
+                counts = self.delete_episode(chunk["uuid"])
+                deleted_entities_count += counts["deleted_entities_count"]
+                deleted_relations_count += counts["deleted_relations_count"]
+
+            # First, find entities that are ONLY mentioned by this episode
+            # These will become orphaned after deletion
+            orphaned_entities_query = """
+            MATCH (ep:Episode {uuid: $uuid})-[:MENTIONS]->(e:Entity)
+            WHERE NOT EXISTS {
+                MATCH (other:Episode)-[:MENTIONS]->(e)
+                WHERE other.uuid <> $uuid
+            }
+            RETURN e.uuid AS entity_uuid, e.name AS entity_name
+            """
+            orphaned_entities = self.execute(orphaned_entities_query, {"uuid": episode_uuid})
+            orphaned_entity_uuids = [e["entity_uuid"] for e in orphaned_entities]
+
+            # Delete orphaned entities together with their RELATES_TO edges
+            if orphaned_entity_uuids:
+                counts = self.delete_entities(orphaned_entity_uuids)
+                deleted_entities_count += counts["entities"]
+                deleted_relations_count += counts["edges"]
+
+            # Finally, delete the episode itself
+            delete_episode_query = """
+            MATCH (e:Episode {uuid: $uuid})
+            WITH e, e.user_id AS user_id
             DETACH DELETE e
-            RETURN count(e) AS count
+            RETURN user_id
             """
-            result = self.execute(delete_entities_query, {"entity_uuids": orphaned_entity_uuids})
-            deleted_entities_count = result[0]["count"] if result else 0
-
-        # Finally, delete the episode itself
-        delete_episode_query = """
-        MATCH (e:Episode {uuid: $uuid})
-        DETACH DELETE e
-        RETURN $uuid AS deleted_uuid
-        """
-        self.execute(delete_episode_query, {"uuid": episode_uuid})
+            result = self.execute(delete_episode_query, {"uuid": episode_uuid})
+            if result:
+                self.changes.emit("delete", "episode", episode_uuid, result[0].get("user_id"))
 
         logger.info(
             f"Deleted episode {episode_uuid}: "
@@ -1344,6 +2305,135 @@ class RyugraphDB:
             "deleted_relations_count": deleted_relations_count,
         }
 
+    def delete_entities(self, entity_uuids: List[str]) -> Dict[str, int]:
+        """
+        Delete entities and every RELATES_TO edge attached to them.
+
+        Args:
+            entity_uuids: UUIDs of entities to delete
+
+        Returns:
+            Dictionary with the number of deleted entities and edges
+        """
+        if not entity_uuids:
+            return {"entities": 0, "edges": 0}
+
+        with self.transaction():
+            edges = self.execute(
+                """
+                MATCH (e1:Entity)-[r:RELATES_TO]->(e2:Entity)
+                WHERE e1.uuid IN $entity_uuids OR e2.uuid IN $entity_uuids
+                RETURN DISTINCT r.uuid AS uuid, e1.user_id AS user_id
+                """,
+                {"entity_uuids": entity_uuids},
+            )
+            deleted_edges = self.delete_edges([edge["uuid"] for edge in edges]) if edges else 0
+
+            entities = self.execute(
+                """
+                MATCH (e:Entity)
+                WHERE e.uuid IN $entity_uuids
+                WITH e, e.uuid AS uuid, e.user_id AS user_id
+                DETACH DELETE e
+                RETURN uuid, user_id
+                """,
+                {"entity_uuids": entity_uuids},
+            )
+            self.changes.emit_many([
+                {"op": "delete", "kind": "entity", "uuid": entity["uuid"], "user_id": entity.get("user_id")}
+                for entity in entities
+            ])
+
+        return {"entities": len(entities), "edges": deleted_edges}
+
+    def delete_edges(self, edge_uuids: List[str]) -> int:
+        """
+        Delete RELATES_TO edges by UUID.
+
+        Args:
+            edge_uuids: UUIDs of edges to delete
+
+        Returns:
+            Number of edges deleted
+        """
+        if not edge_uuids:
+            return 0
+
+        with self.transaction():
+            edges = self.execute(
+                """
+                MATCH (source:Entity)-[r:RELATES_TO]->(:Entity)
+                WHERE r.uuid IN $edge_uuids
+                WITH r, r.uuid AS uuid, source.user_id AS user_id
+                DELETE r
+                RETURN uuid, user_id
+                """,
+                {"edge_uuids": edge_uuids},
+            )
+            self.changes.emit_many([
+                {"op": "delete", "kind": "edge", "uuid": edge["uuid"], "user_id": edge.get("user_id")}
+                for edge in edges
+            ])
+
+        return len(edges)
+
+    def notify_external_write(self, reason: str) -> None:
+        """
+        Record a write made outside the typed mutation methods (e.g. raw Cypher).
+
+        Subscribers cannot know what changed and rebuild their derived state.
+
+        Args:
+            reason: Short description of the write, stored with the event
+        """
+        self.changes.emit("resync", "graph", data={"reason": reason})
+
+    def execute_external(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        reason: str = "cypher",
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute an arbitrary Cypher query (e.g. from the API) and record it as
+        an external write if it modifies the database.
+
+        The query first runs in a read-only transaction; ryugraph rejects a
+        write statement there before executing it, and only then is the
+        query run again in a write transaction together with the resync event.
+
+        Args:
+            query: Cypher query string
+            parameters: Optional query parameters
+            reason: Short description of a write, stored with the event
+
+        Returns:
+            List of result dictionaries
+        """
+        if getattr(self._local, "in_transaction", False):
+            results = self.execute(query, parameters)
+            self.notify_external_write(reason)
+            return results
+
+        conn = self._connection()
+        conn.execute("BEGIN TRANSACTION READ ONLY")
+        try:
+            results = self.execute(query, parameters)
+            conn.execute("COMMIT")
+            return results
+        except RuntimeError as e:
+            try:
+                conn.execute("ROLLBACK")
+            except RuntimeError:
+                pass
+            if READ_ONLY_WRITE_MESSAGE not in str(e):
+                raise
+
+        with self.transaction():
+            results = self.execute(query, parameters)
+            self.notify_external_write(reason)
+        return results
+
     def get_all_entities(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get all entities, optionally filtered by user.
@@ -1403,7 +2493,8 @@ class RyugraphDB:
                 r.fact AS fact,
                 r.valid_at AS valid_at,
                 r.invalid_at AS invalid_at,
-                r.expired_at AS expired_at
+                r.expired_at AS expired_at,
+                source.user_id AS user_id
             """
             return self.execute(query, {"user_id": user_id})
         else:
@@ -1417,7 +2508,8 @@ class RyugraphDB:
                 r.fact AS fact,
                 r.valid_at AS valid_at,
                 r.invalid_at AS invalid_at,
-                r.expired_at AS expired_at
+                r.expired_at AS expired_at,
+                source.user_id AS user_id
             """
             return self.execute(query, {})
 
@@ -1742,5 +2834,8 @@ class RyugraphDB:
         WARNING: This is irreversible!
         """
         logger.warning("Resetting entire graph database...")
-        self.execute("MATCH (n) DETACH DELETE n")
+        # The change log survives so sequence numbers stay monotonic
+        with self.transaction():
+            self.execute("MATCH (n) WHERE label(n) <> 'ChangeLog' DETACH DELETE n")
+            self.changes.emit("reset", "graph")
         logger.info("Graph database reset complete")
@@ -55,6 +55,13 @@ class EpisodeKind(Enum):
         raise ValueError(f'Episode kind: {kind} not implemented')
 
 
+# Metadata keys of long documents saved as chunk episodes: the document
+# episode records how many chunks it has (it is searched through them), each
+# chunk its document and position (see ryumem_server.ingestion.chunking)
+DOCUMENT_CHUNK_COUNT_KEY = "chunk_count"
+CHUNK_METADATA_KEY = "chunk"
+
+
 class EpisodeNode(BaseModel):
     """
     Represents an episode (a discrete unit of ingestion).
@@ -89,6 +96,10 @@ class EpisodeNode(BaseModel):
         default_factory=list,
         description='List of entity edge UUIDs referenced in this episode'
     )
+    extracted: bool = Field(
+        default=False,
+        description='Whether entities and relationships were extracted from the episode'
+    )
 
     class Config:
         json_schema_extra = {
@@ -279,6 +290,11 @@ class SearchConfig(BaseModel):
         default='any',
         description='Tag matching: "any" (at least one tag matches) or "all" (all tags must match)'
     )
+    # Diagnostics
+    profile: bool = Field(
+        default=False,
+        description='Return per-stage timings, query counts and cache hits in metadata["profile"]'
+    )
 
 
 class SearchResult(BaseModel):
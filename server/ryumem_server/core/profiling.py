@@ -0,0 +1,249 @@
+"""
+Per-request profiling and latency histograms.
+
+A SearchProfile collects per-stage wall time, database query counts, rows
+read and cache hits for one request. The active profile lives in a context
+variable, so code anywhere below the request (the database layer, the
+embedding cache) records into it without threading it through every call;
+pool tasks see it when they are submitted with contextvars.copy_context().
+Recording is a no-op when no profile is active.
+
+LatencyHistograms aggregates stage timings across requests for the metrics
+endpoint.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# Histogram bucket upper bounds in milliseconds (plus an implicit +Inf)
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current_profile: ContextVar[Optional["SearchProfile"]] = ContextVar("ryumem_profile", default=None)
+_current_stage: ContextVar[Optional[str]] = ContextVar("ryumem_profile_stage", default=None)
+
+
+class SearchProfile:
+    """
+    Timings and counters of one request, broken down by stage.
+
+    Stages may nest and may run concurrently (parallel hybrid strategies);
+    database queries are attributed to the innermost active stage.
+
+    Example:
+        profile = SearchProfile()
+        with profile.activate():
+            with stage("embed"):
+                embedding = client.embed(query)
+        print(profile.to_dict())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.db_queries = 0
+        self.rows = 0
+        self.cache: Dict[str, Dict[str, int]] = {}
+
+    @contextmanager
+    def activate(self) -> Iterator["SearchProfile"]:
+        """Make this the active profile of the current context."""
+        token = _current_profile.set(self)
+        try:
+            yield self
+        finally:
+            _current_profile.reset(token)
+
+    def _stage(self, name: str) -> Dict[str, float]:
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = self.stages[name] = {"ms": 0.0, "calls": 0, "db_queries": 0, "rows": 0}
+        return entry
+
+    def add_time(self, name: str, ms: float) -> None:
+        """Add one call of a stage taking ms milliseconds."""
+        with self._lock:
+            entry = self._stage(name)
+            entry["ms"] += ms
+            entry["calls"] += 1
+
+    def add_query(self, rows: int, stage_name: Optional[str] = None) -> None:
+        """Count one database query returning rows rows."""
+        with self._lock:
+            self.db_queries += 1
+            self.rows += rows
+            if stage_name is not None:
+                entry = self._stage(stage_name)
+                entry["db_queries"] += 1
+                entry["rows"] += rows
+
+    def add_cache(self, name: str, hits: int = 0, misses: int = 0) -> None:
+        """Count lookups of a cache."""
+        with self._lock:
+            entry = self.cache.setdefault(name, {"hits": 0, "misses": 0})
+            entry["hits"] += hits
+            entry["misses"] += misses
+
+    def finish(self) -> float:
+        """Stop the request clock and return the total milliseconds."""
+        if self._finished is None:
+            self._finished = time.perf_counter()
+        return self.total_ms
+
+    @property
+    def total_ms(self) -> float:
+        end = self._finished if self._finished is not None else time.perf_counter()
+        return (end - self._started) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Profile as a JSON-serializable dictionary.
+
+        Stage times are summed over calls, so stages that ran concurrently
+        can add up to more than total_ms.
+        """
+        with self._lock:
+            return {
+                "total_ms": round(self.total_ms, 3),
+                "db_queries": self.db_queries,
+                "rows": self.rows,
+                "stages": {
+                    name: {**entry, "ms": round(entry["ms"], 3)}
+                    for name, entry in self.stages.items()
+                },
+                "cache": {name: dict(entry) for name, entry in self.cache.items()},
+            }
+
+
+def current_profile() -> Optional[SearchProfile]:
+    """The profile active in the current context, if any."""
+    return _current_profile.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as a stage of the active profile (no-op without one)."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    token = _current_stage.set(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_time(name, (time.perf_counter() - started) * 1000)
+        _current_stage.reset(token)
+
+
+def record_query(rows: int) -> None:
+    """Count a database query in the active profile and stage."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.add_query(rows, _current_stage.get())
+
+
+def record_cache(name: str, hits: int = 0, misses: int = 0) -> None:
+    """Count cache lookups in the active profile."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.add_cache(name, hits, misses)
+
+
+class LatencyHistograms:
+    """
+    Thread-safe cumulative latency histograms keyed by name.
+
+    Example:
+        histograms = LatencyHistograms()
+        histograms.observe("search.total", 12.5)
+        print(histograms.snapshot()["search.total"]["p95_ms"])
+    """
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        """
+        Initialize the histograms.
+
+        Args:
+            buckets_ms: Ascending bucket upper bounds in milliseconds
+        """
+        self.buckets_ms = tuple(sorted(buckets_ms))
+        self._lock = threading.Lock()
+        # name -> [bucket counts (+Inf last)], and name -> [count, sum, max]
+        self._counts: Dict[str, List[int]] = {}
+        self._totals: Dict[str, List[float]] = {}
+
+    def observe(self, name: str, ms: float) -> None:
+        """Record one observation of ms milliseconds."""
+        index = bisect.bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            counts = self._counts.get(name)
+            if counts is None:
+                counts = self._counts[name] = [0] * (len(self.buckets_ms) + 1)
+                self._totals[name] = [0, 0.0, 0.0]
+            counts[index] += 1
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += ms
+            totals[2] = max(totals[2], ms)
+
+    def observe_profile(self, profile: SearchProfile, prefix: str = "search") -> None:
+        """Record the total and per-stage times of a finished profile."""
+        self.observe(f"{prefix}.total", profile.finish())
+        for name, entry in profile.to_dict()["stages"].items():
+            self.observe(f"{prefix}.{name}", entry["ms"])
+
+    def _quantile(self, counts: List[int], total: int, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket containing it."""
+        target = q * total
+        seen = 0
+        for bound, count in zip(self.buckets_ms, counts):
+            seen += count
+            if seen >= target:
+                return float(bound)
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Current histograms.
+
+        Returns:
+            Dictionary mapping name to count, sum_ms, max_ms, mean_ms,
+            estimated p50/p95/p99 (bucket upper bounds) and cumulative
+            bucket counts keyed by upper bound ("+Inf" last)
+        """
+        with self._lock:
+            snapshot = {}
+            for name, counts in self._counts.items():
+                count, total_ms, max_ms = self._totals[name]
+                max_ms = round(max_ms, 3)
+                cumulative: Dict[str, int] = {}
+                seen = 0
+                for bound, bucket_count in zip(list(self.buckets_ms) + ["+Inf"], counts):
+                    seen += bucket_count
+                    cumulative[str(bound)] = seen
+                snapshot[name] = {
+                    "count": int(count),
+                    "sum_ms": round(total_ms, 3),
+                    "max_ms": max_ms,
+                    "mean_ms": round(total_ms / count, 3) if count else 0.0,
+                    "p50_ms": min(self._quantile(counts, count, 0.50), max_ms),
+                    "p95_ms": min(self._quantile(counts, count, 0.95), max_ms),
+                    "p99_ms": min(self._quantile(counts, count, 0.99), max_ms),
+                    "buckets": cumulative,
+                }
+            return snapshot
+
+    def reset(self) -> None:
+        """Drop all observations."""
+        with self._lock:
+            self._counts.clear()
+            self._totals.clear()
+
+    def __repr__(self) -> str:
+        return f"LatencyHistograms(names={len(self._counts)})"
@@ -0,0 +1,298 @@
+"""
+Deferred extraction of episodes saved without it (backfill).
+
+Bulk history imports save the raw episodes with extract_entities=False, so
+the import only pays for embeddings. ExtractionBackfill extracts them later:
+it pages through the episodes whose extracted flag is false (oldest first),
+packs several short episodes of a user into one extraction prompt (see
+EntityExtractor.extract_graph_batch, which attributes the results to each
+episode), and resolves and writes the results of a pack together (see
+EpisodeIngestion.extract_pack). Sending the instructions and the tool
+definition once per pack instead of once per episode cuts the prompt tokens
+of short episodes several times over.
+
+Extraction prompts are throttled to max_prompts_per_minute. Progress is the
+extracted flag itself: a stopped or interrupted backfill resumes where it
+stopped when it is started again. Episodes whose extraction fails are
+skipped for the rest of the run (their flag stays false, so the next run
+tries them again).
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+BackfillState = Literal["idle", "running", "stopping", "stopped", "done", "failed"]
+
+
+class BackfillProgress(BaseModel):
+    """
+    Progress of an extraction backfill.
+
+    Attributes:
+        state: idle, running, stopping, stopped, done or failed
+        user_id: User whose episodes are extracted (None = all users)
+        pending: Episodes waiting for extraction when the run started
+        extracted: Episodes extracted so far
+        failed: Episodes whose extraction failed
+        prompts: Extraction prompts sent (a pack or a single episode each)
+        started_at: When the run started
+        finished_at: When the run ended
+        error: Error that ended the run
+    """
+    state: BackfillState = "idle"
+    user_id: Optional[str] = None
+    pending: int = 0
+    extracted: int = 0
+    failed: int = 0
+    prompts: int = 0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+class ExtractionBackfill:
+    """
+    Extracts the entities and relationships of unextracted episodes in the background.
+
+    Example:
+        backfill = ExtractionBackfill(db, ingestion, max_episodes_per_prompt=8)
+        backfill.start(user_id="user_123")
+        backfill.status().extracted  # episodes extracted so far
+        backfill.stop()  # resumes where it stopped on the next start()
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        ingestion: Any,
+        max_episodes_per_prompt: int = 8,
+        max_prompt_chars: int = 6000,
+        max_prompts_per_minute: float = 30.0,
+        page_size: int = 200,
+    ):
+        """
+        Initialize the backfill.
+
+        Args:
+            db: RyugraphDB instance
+            ingestion: EpisodeIngestion pipeline that resolves and writes the results
+            max_episodes_per_prompt: Episodes packed into one extraction prompt
+            max_prompt_chars: Total content of a pack (longer episodes are
+                extracted alone)
+            max_prompts_per_minute: Extraction prompts sent per minute at
+                most (0 = unlimited)
+            page_size: Episodes read from the database at a time
+        """
+        self.db = db
+        self.ingestion = ingestion
+        self.max_episodes_per_prompt = max_episodes_per_prompt
+        self.max_prompt_chars = max_prompt_chars
+        self.max_prompts_per_minute = max_prompts_per_minute
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        self._progress = BackfillProgress()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_prompt_at: Optional[float] = None
+
+    def start(self, user_id: Optional[str] = None) -> BackfillProgress:
+        """
+        Start a backfill in a background thread (no-op if one is running).
+
+        Args:
+            user_id: Only extract the episodes of this user (None = all users)
+
+        Returns:
+            Progress of the running backfill
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._progress.model_copy()
+            self._begin(user_id)
+            self._thread = threading.Thread(
+                target=self._run, args=(user_id,), name="ryumem-backfill", daemon=True
+            )
+            self._thread.start()
+            return self._progress.model_copy()
+
+    def run(self, user_id: Optional[str] = None) -> BackfillProgress:
+        """
+        Run a backfill in the calling thread until every episode is extracted.
+
+        Args:
+            user_id: Only extract the episodes of this user (None = all users)
+
+        Returns:
+            Final progress
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                raise RuntimeError("A backfill is already running")
+            self._begin(user_id)
+        self._run(user_id)
+        return self.status()
+
+    def stop(self) -> BackfillProgress:
+        """
+        Stop the running backfill after its current pack.
+
+        Returns:
+            Progress when the backfill stopped
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is not None and thread.is_alive():
+                self._progress.state = "stopping"
+        self._stop.set()
+        if thread is not None:
+            thread.join()
+        return self.status()
+
+    def status(self) -> BackfillProgress:
+        """Progress of the running (or last) backfill."""
+        with self._lock:
+            return self._progress.model_copy()
+
+    def close(self) -> None:
+        """Stop the running backfill."""
+        self.stop()
+
+    def _begin(self, user_id: Optional[str]) -> None:
+        """Reset the progress for a new run (caller holds _lock)."""
+        self._stop.clear()
+        self._progress = BackfillProgress(
+            state="running",
+            user_id=user_id,
+            pending=self.db.count_unextracted_episodes(user_id),
+            started_at=datetime.now(timezone.utc),
+        )
+
+    def _run(self, user_id: Optional[str]) -> None:
+        failed: set = set()
+        try:
+            while not self._stop.is_set():
+                page = self.db.get_unextracted_episodes(
+                    user_id=user_id,
+                    limit=self.page_size,
+                    exclude_uuids=list(failed | self._queued_episodes()),
+                )
+                if not page:
+                    break
+
+                # Episodes of a pack share their user (self-references, resolution)
+                by_user: Dict[str, List[Dict[str, Any]]] = {}
+                for episode in page:
+                    by_user.setdefault(episode["user_id"], []).append(episode)
+                for owner, episodes in by_user.items():
+                    for pack in self._packs(episodes):
+                        if self._stop.is_set():
+                            break
+                        failed.update(self._extract(owner, pack))
+        except Exception as e:
+            logger.error(f"Extraction backfill failed: {e}", exc_info=True)
+            self._finish("failed", str(e))
+            return
+
+        self._finish("stopped" if self._stop.is_set() else "done")
+        progress = self.status()
+        logger.info(
+            f"Extraction backfill {progress.state}: {progress.extracted} episodes extracted, "
+            f"{progress.failed} failed, {progress.prompts} prompts"
+        )
+
+    def _packs(self, episodes: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split episodes (in order) into packs within the per-prompt limits."""
+        packs: List[List[Dict[str, Any]]] = []
+        pack: List[Dict[str, Any]] = []
+        chars = 0
+        for episode in episodes:
+            length = len(episode["content"] or "")
+            if pack and (len(pack) >= self.max_episodes_per_prompt or chars + length > self.max_prompt_chars):
+                packs.append(pack)
+                pack, chars = [], 0
+            pack.append(episode)
+            chars += length
+        if pack:
+            packs.append(pack)
+        return packs
+
+    def _extract(self, user_id: str, pack: List[Dict[str, Any]]) -> List[str]:
+        """
+        Extract a pack of episodes.
+
+        Returns:
+            UUIDs of the episodes whose extraction failed
+        """
+        graphs = None
+        if len(pack) > 1:
+            self._throttle()
+            graphs = self.ingestion.entity_extractor.extract_graph_batch(
+                [episode["content"] for episode in pack], user_id
+            )
+            self._count(prompts=1)
+
+        if graphs is not None:
+            try:
+                self.ingestion.extract_pack(pack, user_id, graphs)
+            except Exception as e:
+                # Part of the pack may be written; extracting it again would count mentions twice
+                logger.error(f"Error writing the extraction of {len(pack)} episodes: {e}", exc_info=True)
+                self._count(failed=len(pack))
+                return [episode["uuid"] for episode in pack]
+            self._count(extracted=len(pack))
+            return []
+
+        # A single episode, or the LLM client cannot extract packs
+        failed = []
+        for episode in pack:
+            if self._stop.is_set():
+                break
+            self._throttle()
+            try:
+                self.ingestion.extract(episode_uuid=episode["uuid"], content=episode["content"], user_id=user_id)
+            except Exception as e:
+                logger.error(f"Error extracting episode {episode['uuid']}: {e}", exc_info=True)
+                failed.append(episode["uuid"])
+                self._count(prompts=1, failed=1)
+                continue
+            self._count(prompts=1, extracted=1)
+        return failed
+
+    def _throttle(self) -> None:
+        """Wait until the next extraction prompt is allowed (returns early on stop)."""
+        if self.max_prompts_per_minute > 0 and self._last_prompt_at is not None:
+            delay = self._last_prompt_at + 60.0 / self.max_prompts_per_minute - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+        self._last_prompt_at = time.monotonic()
+
+    def _queued_episodes(self) -> set:
+        """Episodes the ingestion queue is about to extract (not backfilled)."""
+        rows = self.db.execute(
+            "MATCH (j:IngestionJob) WHERE j.status IN ['queued', 'running'] RETURN j.episode_uuid AS uuid"
+        )
+        return {row["uuid"] for row in rows}
+
+    def _count(self, **counts: int) -> None:
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self._progress, name, getattr(self._progress, name) + count)
+
+    def _finish(self, state: BackfillState, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._progress.state = state
+            self._progress.error = error
+            self._progress.finished_at = datetime.now(timezone.utc)
+
+    def __repr__(self) -> str:
+        return (
+            f"ExtractionBackfill(max_episodes_per_prompt={self.max_episodes_per_prompt}, "
+            f"max_prompts_per_minute={self.max_prompts_per_minute})"
+        )
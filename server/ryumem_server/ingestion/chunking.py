@@ -0,0 +1,204 @@
+"""
+Token-aware splitting of long documents into overlapping chunks.
+
+Embedding and extraction calls take the whole content of an episode: a long
+document gets truncated by provider input limits (or pays one slow call) and
+is found by search as a whole, however small the relevant part. Documents
+over max_tokens are saved as a parent episode and chunk episodes instead
+(see EpisodeIngestion.create_episode); TextChunker splits them.
+
+Text is split at paragraph and sentence boundaries, and sentences longer
+than a chunk at word boundaries. The pieces are packed into chunks of at
+most max_tokens, each starting with the last pieces of the previous chunk
+(up to overlap_tokens), so a fact spanning a boundary is whole in one of
+them. Chunks are exact substrings of the document (see TextChunk.start).
+
+Tokens are counted with a tiktoken encoding when one is configured and
+loads, and estimated from the words otherwise (about one token per four
+characters of a word, one per punctuation mark).
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+# Paragraph breaks, line breaks and whitespace after sentence punctuation
+_BOUNDARY = re.compile(r"\n\s*\n\s*|\n\s*|(?<=[.!?])[\"')\]]*\s+")
+_WORD = re.compile(r"\S+\s*")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text without a tokenizer."""
+    return sum((len(piece) + 3) // 4 for piece in _PIECE.findall(text))
+
+
+def load_token_counter(encoding: str) -> Callable[[str], int]:
+    """
+    Token counter of a tiktoken encoding (e.g. "cl100k_base").
+
+    Falls back to estimate_tokens (with a warning) when tiktoken is not
+    installed or the encoding cannot be loaded.
+    """
+    try:
+        import tiktoken
+
+        tokenizer = tiktoken.get_encoding(encoding)
+    except Exception as e:
+        logger.warning(f"Cannot load tokenizer {encoding!r} ({e}); estimating chunk tokens")
+        return estimate_tokens
+    return lambda text: len(tokenizer.encode(text, disallowed_special=()))
+
+
+@dataclass(slots=True)
+class TextChunk:
+    """
+    A chunk of a document.
+
+    Attributes:
+        index: Position of the chunk in the document
+        text: Chunk text (document[start:end])
+        start: Offset of the first character in the document
+        end: Offset after the last character
+        tokens: Token count of the text
+    """
+    index: int
+    text: str
+    start: int
+    end: int
+    tokens: int
+
+
+class TextChunker:
+    """
+    Splits long texts into overlapping chunks of at most max_tokens tokens.
+
+    Example:
+        chunker = TextChunker(max_tokens=1000, overlap_tokens=100)
+        if chunker.splits(document):
+            for chunk in chunker.split(document):
+                print(chunk.index, chunk.tokens, chunk.text[:40])
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 1000,
+        overlap_tokens: int = 100,
+        count_tokens: Optional[Callable[[str], int]] = None,
+    ):
+        """
+        Initialize the chunker.
+
+        Args:
+            max_tokens: Tokens of a chunk at most; longer texts are split
+            overlap_tokens: Tokens a chunk repeats from the end of the
+                previous one at most (less than max_tokens)
+            count_tokens: Token counter (default: estimate_tokens)
+        """
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens must be at least 0 and less than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = count_tokens or estimate_tokens
+
+    def splits(self, text: str) -> bool:
+        """Whether a text is longer than one chunk."""
+        # A token spans at least one UTF-8 byte; skip counting short texts
+        if len(text) <= self.max_tokens and len(text.encode("utf-8")) <= self.max_tokens:
+            return False
+        return self.count_tokens(text) > self.max_tokens
+
+    def split(self, text: str) -> List[TextChunk]:
+        """
+        Split a text into chunks (one chunk if it is not longer than max_tokens).
+
+        Args:
+            text: Text to split
+
+        Returns:
+            Chunks in document order
+        """
+        pieces = self._pieces(text)
+        spans: List[Tuple[int, int]] = []
+        current: List[Tuple[int, int, int]] = []
+        total = 0
+        for piece in pieces:
+            if current and total + piece[2] > self.max_tokens:
+                spans.append((current[0][0], current[-1][1]))
+                # Start the next chunk with the end of this one
+                carried: List[Tuple[int, int, int]] = []
+                carried_tokens = 0
+                for previous in reversed(current):
+                    if carried_tokens + previous[2] > self.overlap_tokens:
+                        if not carried:
+                            # No whole sentence fits: carry the last words
+                            carried = self._tail(text, previous)
+                            carried_tokens = sum(tail[2] for tail in carried)
+                        break
+                    carried.insert(0, previous)
+                    carried_tokens += previous[2]
+                while carried and carried_tokens + piece[2] > self.max_tokens:
+                    carried_tokens -= carried.pop(0)[2]
+                current, total = carried, carried_tokens
+            current.append(piece)
+            total += piece[2]
+        if current:
+            spans.append((current[0][0], current[-1][1]))
+
+        chunks = []
+        for index, (start, end) in enumerate(spans):
+            chunk_text = text[start:end].rstrip()
+            chunks.append(TextChunk(
+                index=index,
+                text=chunk_text,
+                start=start,
+                end=start + len(chunk_text),
+                tokens=self.count_tokens(chunk_text),
+            ))
+        return chunks
+
+    def _pieces(self, text: str) -> List[Tuple[int, int, int]]:
+        """(start, end, tokens) of the sentences, and of the words of sentences longer than a chunk."""
+        pieces: List[Tuple[int, int, int]] = []
+        start = 0
+        for boundary in _BOUNDARY.finditer(text):
+            if boundary.end() > start:
+                self._add_piece(text, start, boundary.end(), pieces)
+                start = boundary.end()
+        if start < len(text):
+            self._add_piece(text, start, len(text), pieces)
+        return pieces
+
+    def _add_piece(self, text: str, start: int, end: int, pieces: List[Tuple[int, int, int]]) -> None:
+        tokens = self.count_tokens(text[start:end])
+        if tokens <= self.max_tokens:
+            if text[start:end].strip():
+                pieces.append((start, end, tokens))
+            return
+        # A sentence longer than a chunk: pack its words instead
+        word_start, word_tokens = start, 0
+        for word in _WORD.finditer(text, start, end):
+            tokens = self.count_tokens(word.group())
+            if word_tokens and word_tokens + tokens > self.max_tokens:
+                pieces.append((word_start, word.start(), word_tokens))
+                word_start, word_tokens = word.start(), 0
+            word_tokens += tokens
+        if word_tokens:
+            pieces.append((word_start, end, word_tokens))
+
+    def _tail(self, text: str, piece: Tuple[int, int, int]) -> List[Tuple[int, int, int]]:
+        """The last words of a piece, up to overlap_tokens (empty if none fit)."""
+        words = list(_WORD.finditer(text, piece[0], piece[1]))
+        start, tokens = piece[1], 0
+        for word in reversed(words):
+            word_tokens = self.count_tokens(word.group())
+            if tokens + word_tokens > self.overlap_tokens:
+                break
+            start, tokens = word.start(), tokens + word_tokens
+        return [(start, piece[1], tokens)] if tokens else []
+
+    def __repr__(self) -> str:
+        return f"TextChunker(max_tokens={self.max_tokens}, overlap_tokens={self.overlap_tokens})"
@@ -5,13 +5,15 @@ Extracts entities from text and resolves them against existing entities in the g
 
 import hashlib
 import logging
-import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
-from uuid import uuid4
 
 from ryumem_server.core.graph_db import RyugraphDB
 from ryumem_server.core.models import EntityNode
+from ryumem_server.ingestion.relation_extractor import normalize_relationships
+from ryumem_server.ingestion.resolution_index import ResolutionIndex
 from ryumem_server.utils.cache import entity_extraction_cache, summary_cache
 from ryumem_server.utils.embeddings import EmbeddingClient
 from ryumem_server.utils.llm import LLMClient
@@ -19,25 +21,6 @@ from ryumem_server.utils.llm import LLMClient
 logger = logging.getLogger(__name__)
 
 
-def _sanitize_user_id(user_id: Any) -> Optional[str]:
-    """
-    Sanitize user_id value from database.
-    Converts nan (float) to None, which can happen when SQLite returns NULL.
-
-    Args:
-        user_id: Raw user_id value from database
-
-    Returns:
-        None if user_id is None or nan, otherwise the string value
-    """
-    if user_id is None:
-        return None
-    # Check if it's a float nan
-    if isinstance(user_id, float) and math.isnan(user_id):
-        return None
-    return user_id
-
-
 class EntityExtractor:
     """
     Handles entity extraction from text and resolution against existing entities.
@@ -49,6 +32,8 @@ class EntityExtractor:
         llm_client: LLMClient,
         embedding_client: EmbeddingClient,
         similarity_threshold: float = 0.7,
+        index_users: int = 32,
+        index_ttl_seconds: float = 600.0,
     ):
         """
         Initialize entity extractor.
@@ -58,11 +43,22 @@ class EntityExtractor:
             llm_client: LLM client for extraction
             embedding_client: Embedding client for similarity search
             similarity_threshold: Threshold for entity deduplication (0.0-1.0)
+            index_users: Users whose entity vectors are kept in memory for
+                resolution (see ResolutionIndex)
+            index_ttl_seconds: Maximum age of a user's cached entity vectors
         """
         self.db = db
         self.llm_client = llm_client
         self.embedding_client = embedding_client
         self.similarity_threshold = similarity_threshold
+        # Resolution reads and writes entities; concurrent extractions (batch
+        # and background ingestion) resolve one at a time so that an entity
+        # new to both is created once
+        self._resolve_lock = threading.Lock()
+        self.index = ResolutionIndex(
+            "entity", db.get_entity_embeddings, max_users=index_users, ttl_seconds=index_ttl_seconds
+        )
+        db.changes.subscribe(self.index.on_change)
 
         logger.info(f"Initialized EntityExtractor with threshold: {similarity_threshold}")
 
@@ -71,6 +67,7 @@ class EntityExtractor:
         content: str,
         user_id: str,
         context: Optional[str] = None,
+        extracted: Optional[List[Dict[str, str]]] = None,
     ) -> Tuple[List[EntityNode], Dict[str, str]]:
         """
         Extract entities from content and resolve them against existing entities.
@@ -86,16 +83,19 @@ class EntityExtractor:
             content: Text content to extract entities from
             user_id: User ID (required)
             context: Optional context from previous episodes
+            extracted: Entities already extracted (see extract_graph); skips
+                the LLM call
 
         Returns:
             Tuple of (resolved_entities, entity_name_to_uuid_map)
         """
         # Step 1: Extract entities using LLM
-        extracted = self._extract_entities_with_llm(
-            content=content,
-            user_id=user_id,
-            context=context
-        )
+        if extracted is None:
+            extracted = self._extract_entities_with_llm(
+                content=content,
+                user_id=user_id,
+                context=context
+            )
 
         if not extracted:
             logger.info("No entities extracted from content")
@@ -111,76 +111,84 @@ class EntityExtractor:
         ]
         embeddings = self.embedding_client.embed_batch(entity_texts)
 
-        # Step 3: Resolve each entity (find existing or create new)
+        # Step 3: Resolve all entities at once (find existing or create new)
         resolved_entities: List[EntityNode] = []
         entity_map: Dict[str, str] = {}  # Maps entity name -> UUID
 
-        for entity_data, embedding in zip(extracted, embeddings):
-            entity_name = entity_data["entity"]
-            entity_type = entity_data["entity_type"]
-
-            # Search for similar existing entities
-            logger.debug(f"Searching for similar entities to '{entity_name}' (threshold: {self.similarity_threshold})")
-            similar = self.db.search_similar_entities(
-                embedding=embedding,
+        with self._resolve_lock:
+            logger.debug(f"Resolving {len(extracted)} entities (threshold: {self.similarity_threshold})")
+            resolutions = self.index.resolve(
                 user_id=user_id,
+                embeddings=embeddings,
                 threshold=self.similarity_threshold,
                 limit=5,  # Get top 5 to see what's available
             )
+            # Matched entities as stored, then as saved by this episode
+            current: Dict[str, Dict[str, Any]] = self.db.get_entities_by_uuids(
+                list({uuid for resolution in resolutions for uuid, _ in resolution.matches})
+            )
 
-            if similar:
-                # Log all similar entities found
-                logger.info(f"📊 Found {len(similar)} similar entities for '{entity_name}':")
-                for idx, sim_entity in enumerate(similar, 1):
-                    logger.info(f"   {idx}. '{sim_entity['name']}' - similarity: {sim_entity['similarity']:.4f}, mentions: {sim_entity.get('mentions', 0)}")
-
-                # Use the most similar entity
-                existing = similar[0]
-                entity_uuid = existing["uuid"]
-
-                logger.info(
-                    f"✅ Deduplicating: '{entity_name}' → existing entity '{existing['name']}' "
-                    f"(UUID: {entity_uuid[:8]}..., similarity: {existing['similarity']:.4f}, mentions: {existing.get('mentions', 0)} → {existing.get('mentions', 0) + 1})"
-                )
-
-                # Create entity node with existing UUID to update mentions
-                entity = EntityNode(
-                    uuid=entity_uuid,
-                    name=existing["name"],  # Use canonical name from DB
-                    entity_type=entity_type,
-                    summary=existing.get("summary", ""),
-                    name_embedding=embedding,
-                    mentions=existing.get("mentions", 0) + 1,
-                    user_id=user_id,
-                )
-
-                # Save to DB (will increment mentions)
-                self.db.save_entity(entity)
-                resolved_entities.append(entity)
-                entity_map[entity_name.lower().replace(" ", "_")] = entity_uuid
-
-            else:
-                # No similar entity found - create new one
-                entity_uuid = str(uuid4())
-                logger.info(f"✨ Creating NEW entity '{entity_name}' (type: {entity_type}, UUID: {entity_uuid[:8]}...)")
-
-                entity = EntityNode(
-                    uuid=entity_uuid,
-                    name=entity_name,
-                    entity_type=entity_type,
-                    summary="",  # Will be updated later with context
-                    name_embedding=embedding,
-                    mentions=1,
-                    created_at=datetime.utcnow(),
-                    user_id=user_id,
-                )
-
-                # Save to DB
-                self.db.save_entity(entity)
-                resolved_entities.append(entity)
-                entity_map[entity_name.lower().replace(" ", "_")] = entity_uuid
-
-                logger.info(f"💾 Saved new entity '{entity_name}' to database")
+            try:
+                for entity_data, embedding, resolution in zip(extracted, embeddings, resolutions):
+                    entity_name = entity_data["entity"]
+                    entity_type = entity_data["entity_type"]
+                    entity_uuid = resolution.uuid
+                    existing = current.get(entity_uuid)
+
+                    if existing is not None:
+                        # Log all similar entities found
+                        logger.info(f"📊 Found {len(resolution.matches)} similar entities for '{entity_name}':")
+                        for idx, (sim_uuid, similarity) in enumerate(resolution.matches, 1):
+                            sim_entity = current.get(sim_uuid, {})
+                            logger.info(f"   {idx}. '{sim_entity.get('name')}' - similarity: {similarity:.4f}, mentions: {sim_entity.get('mentions', 0)}")
+
+                        # Use the most similar entity
+                        similarity = resolution.matches[0][1]
+                        logger.info(
+                            f"✅ Deduplicating: '{entity_name}' → existing entity '{existing['name']}' "
+                            f"(UUID: {entity_uuid[:8]}..., similarity: {similarity:.4f}, mentions: {existing.get('mentions', 0)} → {existing.get('mentions', 0) + 1})"
+                        )
+
+                        # Create entity node with existing UUID to update mentions
+                        entity = EntityNode(
+                            uuid=entity_uuid,
+                            name=existing["name"],  # Use canonical name from DB
+                            entity_type=entity_type,
+                            summary=existing.get("summary") or "",
+                            name_embedding=embedding,
+                            mentions=(existing.get("mentions") or 0) + 1,
+                            user_id=user_id,
+                        )
+
+                        # Save to DB (will increment mentions)
+                        self.db.save_entity(entity)
+
+                    else:
+                        # No similar entity found - create new one
+                        logger.info(f"✨ Creating NEW entity '{entity_name}' (type: {entity_type}, UUID: {entity_uuid[:8]}...)")
+
+                        entity = EntityNode(
+                            uuid=entity_uuid,
+                            name=entity_name,
+                            entity_type=entity_type,
+                            summary="",  # Will be updated later with context
+                            name_embedding=embedding,
+                            mentions=1,
+                            created_at=datetime.utcnow(),
+                            user_id=user_id,
+                        )
+
+                        # Save to DB
+                        self.db.save_entity(entity)
+                        logger.info(f"💾 Saved new entity '{entity_name}' to database")
+
+                    current[entity_uuid] = {"name": entity.name, "summary": entity.summary, "mentions": entity.mentions}
+                    resolved_entities.append(entity)
+                    entity_map[entity_name.lower().replace(" ", "_")] = entity_uuid
+            except Exception:
+                # The index already holds the vectors of the unsaved entities
+                self.index.invalidate(user_id)
+                raise
 
         logger.info(
             f"Resolved {len(resolved_entities)} entities "
@@ -207,6 +215,10 @@ class EntityExtractor:
 
         Returns:
             List of dicts with 'entity' and 'entity_type' keys
+
+        Raises:
+            Exception: If the LLM call fails (the episode must stay
+                unextracted so its extraction is retried)
         """
         # Check cache first
         cache_key = hashlib.sha256(
@@ -226,18 +238,7 @@ class EntityExtractor:
                 context=context,
             )
 
-            # Normalize entity names (lowercase, replace spaces with underscores)
-            normalized = []
-            seen = set()
-
-            for entity in entities:
-                name = entity["entity"].lower().replace(" ", "_")
-                if name not in seen:
-                    normalized.append({
-                        "entity": name,
-                        "entity_type": entity["entity_type"].upper().replace(" ", "_")
-                    })
-                    seen.add(name)
+            normalized = self._normalize_entities(entities)
 
             # Cache the result
             entity_extraction_cache.set(cache_key, normalized)
@@ -246,7 +247,114 @@ class EntityExtractor:
 
         except Exception as e:
             logger.error(f"Error extracting entities with LLM: {e}")
-            return []
+            raise
+
+    def extract_graph(
+        self,
+        content: str,
+        user_id: str,
+        context: Optional[str] = None,
+    ) -> Optional[Tuple[List[Dict[str, str]], List[Dict[str, str]]]]:
+        """
+        Extract entities and relationships with one LLM call (combined
+        extraction mode). Uses cache to avoid redundant API calls.
+
+        Args:
+            content: Text content
+            user_id: User ID for self-reference resolution
+            context: Optional context
+
+        Returns:
+            Tuple of (entities, relationships), normalized like the results
+            of separate extraction, or None if the LLM client has no combined
+            extraction or the call failed (extract entities and relationships
+            separately instead)
+        """
+        extract_graph = getattr(self.llm_client, "extract_graph", None)
+        if extract_graph is None:
+            return None
+
+        # Check cache first
+        cache_key = hashlib.sha256(
+            f"graph_extraction|{content}|{user_id}|{context or ''}".encode()
+        ).hexdigest()
+
+        cached_result = entity_extraction_cache.get(cache_key)
+        if cached_result is not None:
+            logger.debug(f"💾 Cache HIT for graph extraction: '{content[:50]}...'")
+            return cached_result
+
+        try:
+            logger.debug(f"🌐 API call for graph extraction: '{content[:50]}...'")
+            graph = extract_graph(text=content, user_id=user_id, context=context)
+            result = (
+                self._normalize_entities(graph["entities"]),
+                normalize_relationships(graph["relationships"]),
+            )
+        except Exception as e:
+            logger.warning(f"Combined extraction failed, extracting entities and relationships separately: {e}")
+            return None
+
+        # Cache the result
+        entity_extraction_cache.set(cache_key, result)
+        return result
+
+    def extract_graph_batch(
+        self,
+        contents: List[str],
+        user_id: str,
+    ) -> Optional[List[Tuple[List[Dict[str, str]], List[Dict[str, str]]]]]:
+        """
+        Extract the entities and relationships of several episodes with one
+        LLM call (the episodes are packed into one prompt, see
+        ExtractionBackfill).
+
+        Args:
+            contents: Text content of each episode
+            user_id: User ID for self-reference resolution
+
+        Returns:
+            One (entities, relationships) tuple per episode, normalized like
+            extract_graph results, or None if the LLM client has no batch
+            extraction or the call failed (extract the episodes one by one
+            instead)
+        """
+        extract_graph_batch = getattr(self.llm_client, "extract_graph_batch", None)
+        if extract_graph_batch is None:
+            return None
+
+        try:
+            logger.debug(f"🌐 API call for batch graph extraction of {len(contents)} episodes")
+            graphs = extract_graph_batch(texts=contents, user_id=user_id)
+            results = [
+                (self._normalize_entities(graph["entities"]), normalize_relationships(graph["relationships"]))
+                for graph in graphs
+            ]
+        except Exception as e:
+            logger.warning(f"Batch extraction of {len(contents)} episodes failed, extracting them one by one: {e}")
+            return None
+
+        if len(results) != len(contents):
+            logger.warning(f"Batch extraction returned {len(results)} results for {len(contents)} episodes")
+            return None
+        return results
+
+    @staticmethod
+    def _normalize_entities(entities: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Normalize entity names (lowercase, replace spaces with underscores) and drop duplicates."""
+        normalized = []
+        seen = set()
+
+        for entity in entities:
+            name = entity["entity"].lower().replace(" ", "_")
+            if name not in seen:
+                normalized.append({
+                    "entity": name,
+                    "entity_type": entity["entity_type"].upper().replace(" ", "_")
+                })
+                seen.add(name)
+
+        return normalized
 
     def update_entity_summary(
         self,
@@ -261,43 +369,92 @@ class EntityExtractor:
             entity_uuid: UUID of entity to update
             new_context: New contextual information about the entity
         """
-        # Get existing entity
-        entity_data = self.db.get_entity_by_uuid(entity_uuid)
-        if not entity_data:
-            logger.warning(f"Entity {entity_uuid} not found for summary update")
-            return
+        self.update_entity_summaries({entity_uuid: new_context})
 
-        # Get existing relationships for context
-        relationships = self.db.get_entity_relationships(entity_uuid)
+    def update_entity_summaries(
+        self,
+        contexts: Dict[str, str],
+        max_workers: int = 1,
+    ) -> List[str]:
+        """
+        Update the summaries of several entities with new context.
 
-        # Build context from relationships
-        rel_context = []
-        for rel in relationships[:5]:  # Limit to 5 most recent
-            rel_context.append(f"- {rel['relation_type']}: {rel['other_name']}")
+        The entities and their relationships are read with one query each,
+        the summaries are generated with up to max_workers concurrent LLM
+        calls and saved with one statement.
 
-        context_str = "\n".join(rel_context) if rel_context else "No relationships yet."
+        Args:
+            contexts: Dictionary mapping entity UUID to new contextual
+                information about the entity
+            max_workers: Concurrent LLM calls
 
+        Returns:
+            UUIDs of the entities whose summary was updated
+        """
+        entities = self.db.get_entities_by_uuids(list(contexts))
+        for uuid in contexts:
+            if uuid not in entities:
+                logger.warning(f"Entity {uuid} not found for summary update")
+        if not entities:
+            return []
+
+        # Build context from relationships (up to 5 per entity, strongest first)
+        rel_context: Dict[str, List[str]] = {uuid: [] for uuid in entities}
+        for rel in self.db.get_relationships_for_entities(list(entities)):
+            for uuid, other_name in (
+                (rel["source_uuid"], rel["target_name"]),
+                (rel["target_uuid"], rel["source_name"]),
+            ):
+                lines = rel_context.get(uuid)
+                if lines is not None and len(lines) < 5:
+                    lines.append(f"- {rel['relation_type']}: {other_name}")
+
+        def generate(uuid: str) -> Optional[str]:
+            context_str = "\n".join(rel_context[uuid]) if rel_context[uuid] else "No relationships yet."
+            return self._generate_summary(entities[uuid], context_str, contexts[uuid])
+
+        uuids = list(entities)
+        if max_workers > 1 and len(uuids) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(uuids))) as executor:
+                generated = list(executor.map(generate, uuids))
+        else:
+            generated = [generate(uuid) for uuid in uuids]
+
+        updated = self.db.update_entity_summaries({
+            uuid: summary for uuid, summary in zip(uuids, generated) if summary
+        })
+        for uuid in updated:
+            logger.debug(f"Updated summary for entity {entities[uuid]['name']}")
+        return updated
+
+    def _generate_summary(
+        self,
+        entity_data: Dict[str, Any],
+        context_str: str,
+        new_context: str,
+    ) -> Optional[str]:
+        """Updated summary of an entity (cached), or None if generation failed."""
         # Check cache first
         cache_key = hashlib.sha256(
-            f"summary|{entity_uuid}|{entity_data.get('summary', '')}|{context_str}|{new_context}".encode()
+            f"summary|{entity_data['uuid']}|{entity_data.get('summary', '')}|{context_str}|{new_context}".encode()
         ).hexdigest()
 
         cached_summary = summary_cache.get(cache_key)
         if cached_summary is not None:
             logger.debug(f"💾 Cache HIT for summary update: entity {entity_data['name']}")
-            new_summary = cached_summary
-        else:
-            # Generate updated summary using LLM
-            messages = [
-                {
-                    "role": "system",
-                    "content": """You are an expert at creating concise entity summaries.
+            return cached_summary
+
+        # Generate updated summary using LLM
+        messages = [
+            {
+                "role": "system",
+                "content": """You are an expert at creating concise entity summaries.
 Given an entity name, its existing summary, relationships, and new context, create an updated summary.
 The summary should be 1-2 sentences capturing the most important information."""
-                },
-                {
-                    "role": "user",
-                    "content": f"""Entity: {entity_data['name']}
+            },
+            {
+                "role": "user",
+                "content": f"""Entity: {entity_data['name']}
 Type: {entity_data['entity_type']}
 
 Existing summary: {entity_data.get('summary', 'None')}
@@ -308,34 +465,21 @@ Known relationships:
 New context: {new_context}
 
 Create an updated summary:"""
-                }
-            ]
-
-            try:
-                logger.debug(f"🌐 API call for summary update: entity {entity_data['name']}")
-                response = self.llm_client.generate(messages, temperature=0.3)
-                new_summary = response.get("content", "").strip()
-
-                if new_summary:
-                    # Cache the result
-                    summary_cache.set(cache_key, new_summary)
+            }
+        ]
 
-            except Exception as e:
-                logger.error(f"Error updating entity summary: {e}")
-                return
+        try:
+            logger.debug(f"🌐 API call for summary update: entity {entity_data['name']}")
+            response = self.llm_client.generate(messages, temperature=0.3)
+            new_summary = response.get("content", "").strip()
+        except Exception as e:
+            logger.error(f"Error updating entity summary: {e}")
+            return None
 
         if new_summary:
-            # Update entity with new summary
-            entity = EntityNode(
-                uuid=entity_uuid,
-                name=entity_data["name"],
-                entity_type=entity_data["entity_type"],
-                summary=new_summary,
-                mentions=entity_data["mentions"],
-                user_id=_sanitize_user_id(entity_data.get("user_id")),
-            )
-            self.db.save_entity(entity)
-            logger.debug(f"Updated summary for entity {entity_data['name']}")
+            # Cache the result
+            summary_cache.set(cache_key, new_summary)
+        return new_summary or None
 
     def get_entity_by_name(
         self,
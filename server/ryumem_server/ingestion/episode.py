@@ -5,14 +5,27 @@ Orchestrates the entire ingestion process: episodes -> entities -> relationships
 
 import json
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional, TYPE_CHECKING
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 from uuid import uuid4
 
 from ryumem_server.core.graph_db import RyugraphDB
-from ryumem_server.core.models import EpisodeNode, EpisodeType, EpisodeKind, EpisodicEdge
+from ryumem_server.core.models import (
+    CHUNK_METADATA_KEY,
+    DOCUMENT_CHUNK_COUNT_KEY,
+    EpisodeNode,
+    EpisodeType,
+    EpisodeKind,
+    EpisodicEdge,
+)
+from ryumem_server.ingestion.chunking import TextChunker, load_token_counter
 from ryumem_server.ingestion.entity_extractor import EntityExtractor
+from ryumem_server.ingestion.near_duplicates import NearDuplicateIndex
 from ryumem_server.ingestion.relation_extractor import RelationExtractor
+from ryumem_server.ingestion.summaries import SummaryScheduler
+from ryumem_server.retrieval.batch_scoring import top_k_similar
 from ryumem_server.utils.embeddings import EmbeddingClient
 from ryumem_server.utils.llm import LLMClient
 
@@ -36,9 +49,26 @@ class EpisodeIngestion:
         entity_similarity_threshold: float = 0.7,
         relationship_similarity_threshold: float = 0.8,
         max_context_episodes: int = 5,
+        extraction_mode: str = "combined",
         bm25_index: Optional["BM25Index"] = None,
         enable_entity_extraction: bool = False,
         episode_config: Optional["EpisodeConfig"] = None,
+        extraction_concurrency: int = 4,
+        resolution_index_users: int = 32,
+        resolution_index_ttl_seconds: float = 600.0,
+        contradiction_candidates: int = 5,
+        contradiction_similarity_threshold: float = 0.0,
+        deferred_summaries: bool = True,
+        summary_workers: int = 4,
+        summary_tick_seconds: float = 1.0,
+        summary_min_interval_seconds: float = 60.0,
+        summary_max_per_tick: int = 64,
+        duplicate_index: bool = True,
+        duplicate_index_retention_hours: float = 48.0,
+        duplicate_index_bucket_hours: float = 1.0,
+        chunk_max_tokens: int = 1000,
+        chunk_overlap_tokens: int = 100,
+        chunk_tokenizer: Optional[str] = None,
     ):
         """
         Initialize episode ingestion pipeline.
@@ -50,9 +80,40 @@ class EpisodeIngestion:
             entity_similarity_threshold: Threshold for entity deduplication
             relationship_similarity_threshold: Threshold for relationship deduplication
             max_context_episodes: Maximum number of previous episodes to use as context
-            bm25_index: Optional BM25 index for keyword search
+            extraction_mode: "combined" extracts entities and relationships with
+                one LLM call (falling back to separate calls if it fails),
+                "separate" with one call each
+            bm25_index: Optional BM25 index used for keyword duplicate detection
+                (it is kept up to date from the database change feed)
             enable_entity_extraction: Whether to enable entity extraction (default: False)
             episode_config: Episode configuration (default: creates new with defaults)
+            extraction_concurrency: Episodes of a batch (or chunks of a
+                document) extracted concurrently
+            resolution_index_users: Users whose entity and fact vectors are
+                kept in memory for resolution
+            resolution_index_ttl_seconds: Maximum age of a user's cached vectors
+            contradiction_candidates: Most similar existing facts each new fact
+                is checked against for contradictions
+            contradiction_similarity_threshold: Minimum similarity of an
+                existing fact to a new fact for a contradiction check
+            deferred_summaries: Regenerate entity summaries in the background
+                (see SummaryScheduler) instead of before extraction returns
+            summary_workers: Concurrent LLM calls of a summary regeneration round
+            summary_tick_seconds: Time between two summary regeneration rounds
+            summary_min_interval_seconds: Minimum time between two summary
+                regenerations of the same entity
+            summary_max_per_tick: Entity summaries regenerated per round at most
+            duplicate_index: Detect duplicates without embeddings with an
+                in-memory content hash and MinHash index (see
+                NearDuplicateIndex) instead of BM25 queries
+            duplicate_index_retention_hours: Age of the oldest indexed episodes
+            duplicate_index_bucket_hours: Width of the index's time buckets
+            chunk_max_tokens: Episodes longer than this many tokens are saved
+                as a document with chunk episodes of at most this size (see
+                TextChunker; 0 disables chunking)
+            chunk_overlap_tokens: Tokens a chunk repeats from the previous one
+            chunk_tokenizer: tiktoken encoding counting chunk tokens (None
+                estimates them from the words)
         """
         from ryumem.core.config import EpisodeConfig
 
@@ -60,9 +121,11 @@ class EpisodeIngestion:
         self.llm_client = llm_client
         self.embedding_client = embedding_client
         self.max_context_episodes = max_context_episodes
+        self.extraction_mode = extraction_mode
         self.bm25_index = bm25_index
         self.enable_entity_extraction = enable_entity_extraction
         self.episode_config = episode_config if episode_config is not None else EpisodeConfig()
+        self.extraction_concurrency = extraction_concurrency
 
         # Initialize extractors
         self.entity_extractor = EntityExtractor(
@@ -70,6 +133,8 @@ class EpisodeIngestion:
             llm_client=llm_client,
             embedding_client=embedding_client,
             similarity_threshold=entity_similarity_threshold,
+            index_users=resolution_index_users,
+            index_ttl_seconds=resolution_index_ttl_seconds,
         )
 
         self.relation_extractor = RelationExtractor(
@@ -77,8 +142,41 @@ class EpisodeIngestion:
             llm_client=llm_client,
             embedding_client=embedding_client,
             similarity_threshold=relationship_similarity_threshold,
+            index_users=resolution_index_users,
+            index_ttl_seconds=resolution_index_ttl_seconds,
+            contradiction_candidates=contradiction_candidates,
+            contradiction_similarity_threshold=contradiction_similarity_threshold,
         )
 
+        self.summary_scheduler: Optional[SummaryScheduler] = None
+        if deferred_summaries:
+            self.summary_scheduler = SummaryScheduler(
+                self.entity_extractor,
+                max_workers=summary_workers,
+                tick_seconds=summary_tick_seconds,
+                min_interval_seconds=summary_min_interval_seconds,
+                max_per_tick=summary_max_per_tick,
+            )
+            db.changes.subscribe(self.summary_scheduler.on_change)
+
+        self.duplicate_index: Optional[NearDuplicateIndex] = None
+        if duplicate_index:
+            self.duplicate_index = NearDuplicateIndex(
+                db.get_recent_episode_hashes,
+                retention_hours=duplicate_index_retention_hours,
+                bucket_hours=duplicate_index_bucket_hours,
+            )
+            db.changes.subscribe(self.duplicate_index.on_change)
+
+        self.chunker: Optional[TextChunker] = None
+        if chunk_max_tokens > 0:
+            self.chunker = TextChunker(
+                max_tokens=chunk_max_tokens,
+                # Keep the overlap below the chunk size (chunks must advance)
+                overlap_tokens=min(chunk_overlap_tokens, chunk_max_tokens // 2),
+                count_tokens=load_token_counter(chunk_tokenizer) if chunk_tokenizer else None,
+            )
+
         logger.info(f"Initialized EpisodeIngestion pipeline (entity_extraction={'enabled' if enable_entity_extraction else 'disabled'})")
 
     def ingest(
@@ -107,7 +205,11 @@ class EpisodeIngestion:
         4. Extract relationships and resolve against existing (if enabled)
         5. Create MENTIONS edges from episode to entities (if entities extracted)
         6. Detect and invalidate contradicting edges (if enabled)
-        7. Update entity summaries (if enabled)
+        7. Update entity summaries (if enabled; deferred to the summary
+           scheduler when it is enabled)
+
+        Step 1 is create_episode, steps 2-7 are extract (which the ingestion
+        queue runs in the background for asynchronous ingestion).
 
         Args:
             content: Episode content (text, message, or JSON)
@@ -123,13 +225,97 @@ class EpisodeIngestion:
         Returns:
             UUID of the created episode
         """
-        # Determine whether to extract entities for this request
-        # Per-request override takes precedence over instance setting
-        should_extract_entities = extract_entities if extract_entities is not None else self.enable_entity_extraction
+        episode_uuid, created = self.create_episode(
+            content=content,
+            user_id=user_id,
+            agent_id=agent_id,
+            session_id=session_id,
+            source=source,
+            kind=kind,
+            source_description=source_description,
+            metadata=metadata,
+            name=name,
+            episode_config_override=episode_config_override,
+        )
+
+        if created and self.should_extract(extract_entities):
+            try:
+                self.extract(
+                    episode_uuid=episode_uuid,
+                    content=content,
+                    user_id=user_id,
+                    session_id=session_id,
+                )
+            except Exception as e:
+                # The episode is saved; it stays unextracted for the extraction backfill
+                logger.error(f"Error extracting entities of episode {episode_uuid}: {e}", exc_info=True)
+        elif created:
+            logger.info(f"Entity extraction disabled for episode {episode_uuid}, skipping Steps 2-7")
+
+        return episode_uuid
+
+    def should_extract(self, extract_entities: Optional[bool] = None) -> bool:
+        """
+        Whether an episode gets entity extraction.
+
+        Args:
+            extract_entities: Per-request override (None uses instance default)
+        """
+        return extract_entities if extract_entities is not None else self.enable_entity_extraction
+
+    def create_episode(
+        self,
+        content: str,
+        user_id: str,
+        agent_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        source: EpisodeType = EpisodeType.text,
+        kind: 'EpisodeKind' = None,
+        source_description: str = "",
+        metadata: Optional[Dict] = None,
+        name: Optional[str] = None,
+        episode_config_override: Optional["EpisodeConfig"] = None,
+    ) -> Tuple[str, bool]:
+        """
+        Save an episode node with its embedding (pipeline step 1).
 
+        The episode is searchable once this returns. Duplicates of a recent
+        episode are not saved. Content longer than a chunk is saved as a
+        document episode with chunk episodes (see _create_document).
+
+        Args:
+            content: Episode content (text, message, or JSON)
+            user_id: User ID (required)
+            agent_id: Optional agent ID
+            session_id: Optional session ID
+            source: Type of episode (message, json, text)
+            kind: Episode kind (default: query)
+            source_description: Description of the source
+            metadata: Optional metadata dictionary
+            name: Optional name for the episode
+            episode_config_override: Episode config for this request (embeddings, deduplication)
+
+        Returns:
+            Tuple of (episode UUID, created); created is False when the
+            content duplicates an existing episode, whose UUID is returned
+        """
         # Use override config if provided, otherwise use instance config
         config = episode_config_override if episode_config_override is not None else self.episode_config
 
+        if self.chunker is not None and self.chunker.splits(content):
+            return self._create_document(
+                content=content,
+                user_id=user_id,
+                agent_id=agent_id,
+                session_id=session_id,
+                source=source,
+                kind=kind,
+                source_description=source_description,
+                metadata=metadata,
+                name=name,
+                config=config,
+            )
+
         start_time = datetime.utcnow()
 
         # Generate embedding if enabled (for semantic duplicate detection)
@@ -150,6 +336,14 @@ class EpisodeIngestion:
                     time_window_hours=config.time_window_hours,
                     similarity_threshold=config.similarity_threshold,
                 )
+            elif self._indexes_duplicates(config):
+                # Content hash and MinHash lookups in the user's recent episodes
+                existing_episode = self.duplicate_index.find(
+                    content,
+                    user_id,
+                    time_window_hours=config.time_window_hours,
+                    threshold=config.near_duplicate_threshold,
+                )
             else:
                 # Use BM25 keyword similarity
                 existing_episode = self.db.find_similar_episode_bm25(
@@ -166,19 +360,164 @@ class EpisodeIngestion:
                 f"Existing episode: {existing_episode['uuid'][:8]}... "
                 f"created at {existing_episode['created_at']}"
             )
-            return existing_episode["uuid"]
+            return existing_episode["uuid"], False
+
+        episode = self._new_episode(
+            content=content,
+            content_embedding=content_embedding,
+            user_id=user_id,
+            agent_id=agent_id,
+            session_id=session_id,
+            source=source,
+            kind=kind,
+            source_description=source_description,
+            metadata=metadata,
+            name=name,
+            created_at=start_time,
+        )
+        episode_uuid = episode.uuid
+        logger.info(f"Starting ingestion for episode {episode_uuid}")
+
+        # Save episode to database (the BM25 index picks it up from the change feed)
+        self.db.save_episode(episode)
+
+        step_duration = (datetime.utcnow() - start_time).total_seconds()
+        logger.info(f"⏱️  [TIMING] Step 1 - Create episode node with embedding: {step_duration:.2f}s")
+        logger.debug(f"Created episode node: {episode_uuid}")
+
+        return episode_uuid, True
+
+    def _create_document(
+        self,
+        content: str,
+        user_id: str,
+        agent_id: Optional[str],
+        session_id: Optional[str],
+        source: EpisodeType,
+        kind: Optional['EpisodeKind'],
+        source_description: str,
+        metadata: Optional[Dict],
+        name: Optional[str],
+        config: "EpisodeConfig",
+    ) -> Tuple[str, bool]:
+        """
+        Save content longer than a chunk as a document episode and chunk episodes.
+
+        The document episode keeps the whole content, without an embedding,
+        and is left out of keyword search (see DOCUMENT_CHUNK_COUNT_KEY), so
+        search returns the relevant chunks instead. Each chunk is embedded
+        (one embed_batch call) and saved as an episode of its own, with the
+        document's kind, source, agent, tags and creation time, and linked
+        from the document by a HAS_CHUNK edge, in the document's transaction.
+        The document is saved as extracted: its graph is extracted from its
+        chunks (see extract).
+
+        Returns:
+            Tuple of (document UUID, created), like create_episode
+        """
+        start_time = datetime.utcnow()
+
+        # A resent document duplicates the earlier one as a whole (its
+        # chunks overlap each other by design and are not compared)
+        existing_episode = None
+        if config.deduplication_enabled:
+            if self._indexes_duplicates(config):
+                existing_episode = self.duplicate_index.find(
+                    content,
+                    user_id,
+                    time_window_hours=config.time_window_hours,
+                    threshold=config.near_duplicate_threshold,
+                )
+            else:
+                existing_episode = self.db.find_episodes_by_content(
+                    [content], user_id, config.time_window_hours
+                ).get(content)
+        if existing_episode:
+            logger.info(
+                f"Duplicate document detected! Skipping ingestion. "
+                f"Existing episode: {existing_episode['uuid'][:8]}... "
+                f"created at {existing_episode['created_at']}"
+            )
+            return existing_episode["uuid"], False
 
-        step_start = start_time
+        chunks = self.chunker.split(content)
+        embeddings: List[Optional[List[float]]] = [None] * len(chunks)
+        if config.enable_embeddings:
+            embeddings = self.embedding_client.embed_batch([chunk.text for chunk in chunks])
+
+        document = self._new_episode(
+            content=content,
+            content_embedding=None,
+            user_id=user_id,
+            agent_id=agent_id,
+            session_id=session_id,
+            source=source,
+            kind=kind,
+            source_description=source_description,
+            metadata=metadata,
+            name=name,
+            created_at=start_time,
+        )
+        document.metadata[DOCUMENT_CHUNK_COUNT_KEY] = len(chunks)
+        document.extracted = True
+        tags = document.metadata.get("tags")
+        chunk_episodes = [
+            self._new_episode(
+                content=chunk.text,
+                content_embedding=embedding,
+                user_id=user_id,
+                agent_id=agent_id,
+                session_id=None,
+                source=source,
+                kind=kind,
+                source_description=source_description,
+                metadata={
+                    **({"tags": tags} if tags else {}),
+                    CHUNK_METADATA_KEY: {
+                        "document": document.uuid,
+                        "index": chunk.index,
+                        "count": len(chunks),
+                        "start": chunk.start,
+                        "end": chunk.end,
+                    },
+                },
+                name=f"{document.name} ({chunk.index + 1}/{len(chunks)})",
+                created_at=start_time,
+            )
+            for chunk, embedding in zip(chunks, embeddings)
+        ]
 
-        # Generate episode UUID
-        episode_uuid = str(uuid4())
+        # One transaction: a document without its chunks would be extracted
+        # (and deduplicated against) as a whole
+        with self.db.transaction():
+            self.db.save_episode(document)
+            self.db.save_episodes(chunk_episodes)
+            self.db.link_episode_chunks(document.uuid, [episode.uuid for episode in chunk_episodes])
+        logger.info(
+            f"Saved document {document.uuid} as {len(chunks)} chunks "
+            f"({sum(chunk.tokens for chunk in chunks)} tokens)"
+        )
+        return document.uuid, True
 
+    def _new_episode(
+        self,
+        content: str,
+        content_embedding: Optional[List[float]],
+        user_id: str,
+        agent_id: Optional[str],
+        session_id: Optional[str],
+        source: EpisodeType,
+        kind: Optional['EpisodeKind'],
+        source_description: str,
+        metadata: Optional[Dict],
+        name: Optional[str],
+        created_at: datetime,
+    ) -> EpisodeNode:
+        """Build the node of a new episode (not saved)."""
         # Generate episode name if not provided
         if not name:
             name = f"Episode {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}"
 
-        logger.info(f"Starting ingestion for episode {episode_uuid}")
-
         # Ensure metadata includes session_id if provided
         episode_metadata = metadata.copy() if metadata else {}
         if session_id:
@@ -188,74 +527,86 @@ class EpisodeIngestion:
             if session_id not in episode_metadata['sessions']:
                 episode_metadata['sessions'][session_id] = []
 
-        episode = EpisodeNode(
-            uuid=episode_uuid,
+        return EpisodeNode(
+            uuid=str(uuid4()),
             name=name,
             content=content,
             content_embedding=content_embedding,
             source=source,
             source_description=source_description,
             kind=kind if kind is not None else EpisodeKind.query,
-            created_at=start_time,
-            valid_at=start_time,
+            created_at=created_at,
+            valid_at=created_at,
             user_id=user_id,
             agent_id=agent_id,
             metadata=episode_metadata,
         )
 
-        # Save episode to database
-        self.db.save_episode(episode)
+    def extract(
+        self,
+        episode_uuid: str,
+        content: str,
+        user_id: str,
+        session_id: Optional[str] = None,
+    ) -> None:
+        """
+        Extract entities and relationships of a saved episode (pipeline steps 2-7).
 
-        # Add episode to BM25 index for keyword search
-        if self.bm25_index:
-            self.bm25_index.add_episode(episode)
-            logger.debug(f"Added episode to BM25 index")
+        The graph of a document episode is extracted from its chunks (see
+        _extract_document).
 
-        step_duration = (datetime.utcnow() - step_start).total_seconds()
-        logger.info(f"⏱️  [TIMING] Step 1 - Create episode node with embedding: {step_duration:.2f}s")
-        logger.debug(f"Created episode node: {episode_uuid}")
+        Args:
+            episode_uuid: UUID of the episode (see create_episode)
+            content: Episode content
+            user_id: User ID (required)
+            session_id: Optional session ID (scopes the episode context)
 
-        # Step 2: Get context from previous episodes (only if entity extraction is enabled)
-        if should_extract_entities:
-            step_start = datetime.utcnow()
-            context = self._get_episode_context(
-                user_id=user_id,
-                session_id=session_id,
-            )
-            step_duration = (datetime.utcnow() - step_start).total_seconds()
-            logger.info(f"⏱️  [TIMING] Step 2 - Get episode context: {step_duration:.2f}s")
-        else:
-            context = []
-            logger.info(f"Entity extraction disabled for episode {episode_uuid}, skipping context retrieval")
+        Raises:
+            Exception: If an extraction call fails. The episode is only
+                flagged as extracted after a successful extraction, so it can
+                be extracted again (by the ingestion queue or the backfill).
+        """
+        if self.chunker is not None and self.chunker.splits(content):
+            chunks = self.db.get_episode_chunks(episode_uuid)
+            if chunks:
+                self._extract_document(episode_uuid, chunks, user_id, session_id)
+                return
 
-        # Step 3: Extract and resolve entities (OPTIONAL - controlled by flag)
-        if should_extract_entities:
-            step_start = datetime.utcnow()
-            entities, entity_map = self.entity_extractor.extract_and_resolve(
+        start_time = datetime.utcnow()
+
+        # Step 2: Get context from previous episodes
+        step_start = datetime.utcnow()
+        context = self._get_episode_context(
+            user_id=user_id,
+            session_id=session_id,
+        )
+        step_duration = (datetime.utcnow() - step_start).total_seconds()
+        logger.info(f"⏱️  [TIMING] Step 2 - Get episode context: {step_duration:.2f}s")
+
+        # Step 3: Extract and resolve entities (with the relationships, in
+        # combined mode)
+        step_start = datetime.utcnow()
+        graph = None
+        if self.extraction_mode == "combined":
+            graph = self.entity_extractor.extract_graph(
                 content=content,
                 user_id=user_id,
                 context=context,
             )
-            step_duration = (datetime.utcnow() - step_start).total_seconds()
-            logger.info(f"⏱️  [TIMING] Step 3 - Extract and resolve entities: {step_duration:.2f}s ({len(entities)} entities)")
-
-            if not entities:
-                logger.info(f"No entities extracted for episode {episode_uuid}")
-                return episode_uuid
-        else:
-            entities = []
-            entity_map = {}
-            logger.info(f"Entity extraction disabled for episode {episode_uuid}, skipping Steps 3-7")
-            return episode_uuid
+        extracted_entities, extracted_relationships = graph if graph is not None else (None, None)
+        entities, entity_map = self.entity_extractor.extract_and_resolve(
+            content=content,
+            user_id=user_id,
+            context=context,
+            extracted=extracted_entities,
+        )
+        step_duration = (datetime.utcnow() - step_start).total_seconds()
+        logger.info(f"⏱️  [TIMING] Step 3 - Extract and resolve entities: {step_duration:.2f}s ({len(entities)} entities)")
 
-        # Add entities to BM25 index
-        step_start = datetime.utcnow()
-        if self.bm25_index:
-            for entity in entities:
-                self.bm25_index.add_entity(entity)
-            step_duration = (datetime.utcnow() - step_start).total_seconds()
-            logger.info(f"⏱️  [TIMING] Step 3b - Add entities to BM25 index: {step_duration:.2f}s")
-            logger.debug(f"Added {len(entities)} entities to BM25 index")
+        if not entities:
+            logger.info(f"No entities extracted for episode {episode_uuid}")
+            self.db.mark_episodes_extracted({episode_uuid: []})
+            return
 
         # Step 4: Extract and resolve relationships
         step_start = datetime.utcnow()
@@ -266,25 +617,14 @@ class EpisodeIngestion:
             episode_uuid=episode_uuid,
             user_id=user_id,
             context=context,
+            extracted=extracted_relationships,
         )
         step_duration = (datetime.utcnow() - step_start).total_seconds()
         logger.info(f"⏱️  [TIMING] Step 4 - Extract and resolve relationships: {step_duration:.2f}s ({len(edges)} edges)")
 
-        # Add edges to BM25 index
-        step_start = datetime.utcnow()
-        if self.bm25_index and edges:
-            for edge in edges:
-                self.bm25_index.add_edge(edge)
-            step_duration = (datetime.utcnow() - step_start).total_seconds()
-            logger.info(f"⏱️  [TIMING] Step 4b - Add edges to BM25 index: {step_duration:.2f}s")
-            logger.debug(f"Added {len(edges)} edges to BM25 index")
-
         # Step 5: Create MENTIONS edges (episode -> entities)
         step_start = datetime.utcnow()
-        self._create_mentions_edges(
-            episode_uuid=episode_uuid,
-            entity_uuids=[e.uuid for e in entities],
-        )
+        self._create_mentions_edges({episode_uuid: [e.uuid for e in entities]})
         step_duration = (datetime.utcnow() - step_start).total_seconds()
         logger.info(f"⏱️  [TIMING] Step 5 - Create MENTIONS edges: {step_duration:.2f}s")
 
@@ -302,75 +642,470 @@ class EpisodeIngestion:
         step_duration = (datetime.utcnow() - step_start).total_seconds()
         logger.info(f"⏱️  [TIMING] Step 6 - Detect and invalidate contradictions: {step_duration:.2f}s")
 
-        # Step 7: Update entity summaries with new context
+        # Step 7: Update entity summaries with new context (the scheduler
+        # coalesces the contexts of each entity and regenerates in the background)
         step_start = datetime.utcnow()
-        for entity in entities:
+        if self.summary_scheduler is not None:
+            self.summary_scheduler.mark(user_id, [e.uuid for e in entities], content)
+        else:
             try:
-                self.entity_extractor.update_entity_summary(
-                    entity_uuid=entity.uuid,
-                    new_context=content,
-                )
+                self.entity_extractor.update_entity_summaries({e.uuid: content for e in entities})
             except Exception as e:
-                logger.error(f"Error updating summary for entity {entity.uuid}: {e}")
+                logger.error(f"Error updating entity summaries: {e}")
         step_duration = (datetime.utcnow() - step_start).total_seconds()
         logger.info(f"⏱️  [TIMING] Step 7 - Update entity summaries: {step_duration:.2f}s")
 
-        # Update episode with entity edge references
-        episode.entity_edges = [e.uuid for e in edges]
-        self.db.save_episode(episode)
+        # Update episode with entity edge references (and flag it as extracted)
+        self.db.mark_episodes_extracted({episode_uuid: [e.uuid for e in edges]})
 
         # Log completion
         duration = (datetime.utcnow() - start_time).total_seconds()
         logger.info(f"⏱️  [TIMING] ═══════════════════════════════════════════════════")
         logger.info(
-            f"⏱️  [TIMING] TOTAL ingestion time for episode {episode_uuid[:8]}: {duration:.2f}s"
+            f"⏱️  [TIMING] TOTAL extraction time for episode {episode_uuid[:8]}: {duration:.2f}s"
         )
         logger.info(f"⏱️  [TIMING] Results: {len(entities)} entities, {len(edges)} relationships")
         logger.info(f"⏱️  [TIMING] ═══════════════════════════════════════════════════")
 
-        return episode_uuid
+    def _extract_document(
+        self,
+        document_uuid: str,
+        chunks: List[Dict],
+        user_id: str,
+        session_id: Optional[str] = None,
+    ) -> None:
+        """
+        Extract the graph of a document episode from its chunk episodes.
+
+        The chunks are extracted concurrently (extraction_concurrency LLM
+        calls at a time), then their entities and relationships are merged,
+        resolved and written together (see extract_pack): an entity or fact
+        found in several chunks (or their overlaps) is written once. Chunks
+        without a combined extraction (separate extraction mode, or a failed
+        call) are extracted one by one.
+
+        Chunks extracted by an earlier attempt are skipped, so a retry only
+        extracts the chunks that failed.
+
+        Args:
+            document_uuid: UUID of the document episode
+            chunks: Chunk episodes (uuid and content), in document order
+            user_id: User ID (required)
+            session_id: Optional session ID (scopes the episode context)
+        """
+        start_time = datetime.utcnow()
+        episodes = [
+            {"uuid": chunk["uuid"], "content": chunk["content"]}
+            for chunk in chunks if not chunk.get("extracted")
+        ]
+        if not episodes:
+            return
+        context = self._get_episode_context(user_id=user_id, session_id=session_id)
+        workers = min(self.extraction_concurrency, len(episodes))
+
+        graphs: List[Optional[Tuple[List[Dict[str, str]], List[Dict[str, str]]]]] = [None] * len(episodes)
+        if self.extraction_mode == "combined":
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ryumem-chunk-extract") as executor:
+                graphs = list(executor.map(
+                    lambda episode: self.entity_extractor.extract_graph(
+                        content=episode["content"], user_id=user_id, context=context
+                    ),
+                    episodes,
+                ))
+        extracted = [i for i, graph in enumerate(graphs) if graph is not None]
+        if extracted:
+            self.extract_pack([episodes[i] for i in extracted], user_id, [graphs[i] for i in extracted])
+
+        remaining = [episode for episode, graph in zip(episodes, graphs) if graph is None]
+        failed = 0
+        if remaining:
+            def extract(episode: Dict) -> bool:
+                try:
+                    self.extract(episode_uuid=episode["uuid"], content=episode["content"], user_id=user_id)
+                    return True
+                except Exception as e:
+                    logger.error(f"Error extracting chunk {episode['uuid']} of document {document_uuid}: {e}")
+                    return False
+
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ryumem-chunk-extract") as executor:
+                failed = list(executor.map(extract, remaining)).count(False)
+
+        duration = (datetime.utcnow() - start_time).total_seconds()
+        logger.info(
+            f"Extracted document {document_uuid} from {len(episodes)} chunks "
+            f"({len(extracted)} merged) in {duration:.2f}s"
+        )
+        if failed:
+            raise RuntimeError(f"Extraction of {failed} of {len(episodes)} chunks of document {document_uuid} failed")
+
+    def extract_pack(
+        self,
+        episodes: List[Dict[str, str]],
+        user_id: str,
+        graphs: List[Tuple[List[Dict[str, str]], List[Dict[str, str]]]],
+    ) -> Dict[str, List[str]]:
+        """
+        Resolve and write the extraction results of several saved episodes
+        of a user (pipeline steps 3-7, for results of
+        EntityExtractor.extract_graph_batch).
+
+        The entities of all episodes are resolved together (one embedding
+        call and one index lookup), the relationships per episode, then the
+        MENTIONS edges, the contradiction check and the extracted flags are
+        written for all episodes at once. Entities, relationships and
+        contradictions resolve as if the episodes were extracted one after
+        the other, in order.
+
+        Args:
+            episodes: Episodes (uuid and content), oldest first
+            user_id: User ID (required)
+            graphs: (entities, relationships) extracted from each episode
+
+        Returns:
+            Dictionary mapping episode UUID to the UUIDs of its relationship edges
+        """
+        # Step 3: Resolve the entities of all episodes at once
+        extracted_entities = [entity for entities, _ in graphs for entity in entities]
+        entities, _ = self.entity_extractor.extract_and_resolve(
+            content="",
+            user_id=user_id,
+            extracted=extracted_entities,
+        )
+
+        # Step 4: Resolve the relationships of each episode (entities are
+        # resolved in extraction order, so each episode owns a slice)
+        mentions: Dict[str, List[str]] = {}
+        entity_edges: Dict[str, List[str]] = {}
+        new_edges = []
+        groups: List[int] = []
+        offset = 0
+        for position, (episode, (episode_entities, relationships)) in enumerate(zip(episodes, graphs)):
+            resolved = entities[offset:offset + len(episode_entities)]
+            offset += len(episode_entities)
+            mentions[episode["uuid"]] = [e.uuid for e in resolved]
+            edges = self.relation_extractor.extract_and_resolve(
+                content=episode["content"],
+                entities=resolved,
+                entity_map={
+                    data["entity"].lower().replace(" ", "_"): e.uuid
+                    for data, e in zip(episode_entities, resolved)
+                },
+                episode_uuid=episode["uuid"],
+                user_id=user_id,
+                extracted=relationships,
+            ) if resolved else []
+            entity_edges[episode["uuid"]] = [e.uuid for e in edges]
+            new_edges.extend(edges)
+            groups.extend([position] * len(edges))
+
+        # Step 5: MENTIONS edges of all episodes
+        self._create_mentions_edges({uuid: uuids for uuid, uuids in mentions.items() if uuids})
+
+        # Step 6: One contradiction check for the episodes (later episodes
+        # also checked against the edges of earlier ones)
+        if new_edges:
+            contradicting_edges = self.relation_extractor.detect_contradictions(
+                new_edges=new_edges,
+                user_id=user_id,
+                groups=groups,
+            )
+            if contradicting_edges:
+                self.relation_extractor.invalidate_edges(contradicting_edges)
+                logger.info(f"Invalidated {len(contradicting_edges)} contradicting edges")
+
+        # Step 7: Entity summaries
+        if self.summary_scheduler is not None:
+            for episode in episodes:
+                self.summary_scheduler.mark(user_id, mentions[episode["uuid"]], episode["content"])
+        else:
+            contexts: Dict[str, List[str]] = {}
+            for episode in episodes:
+                for uuid in mentions[episode["uuid"]]:
+                    contexts.setdefault(uuid, []).append(episode["content"])
+            try:
+                self.entity_extractor.update_entity_summaries(
+                    {uuid: "\n\n".join(texts) for uuid, texts in contexts.items()}
+                )
+            except Exception as e:
+                logger.error(f"Error updating entity summaries: {e}")
+
+        self.db.mark_episodes_extracted(entity_edges)
+        logger.info(
+            f"Extracted {len(episodes)} episodes: {len(entities)} entities, {len(new_edges)} relationships"
+        )
+        return entity_edges
 
     def ingest_batch(
         self,
         episodes: List[Dict],
         user_id: str,
-    ) -> List[str]:
+        extract_entities: Optional[bool] = None,
+        episode_config_override: Optional["EpisodeConfig"] = None,
+    ) -> List[Dict[str, Optional[str]]]:
         """
         Ingest multiple episodes in batch.
 
+        The pipeline runs in stages over the whole batch instead of once per
+        episode:
+        1. Embed all contents with one embed_batch call
+        2. Detect duplicates in bulk: exact content matches with one query,
+           semantic matches by scoring the batch against the user's recent
+           episode embeddings in one matrix product, and duplicates within
+           the batch itself
+        3. Save the new episodes with one UNWIND write
+        4. Extract entities and relationships of the new episodes
+           concurrently (extraction_concurrency at a time)
+
+        Contents longer than a chunk are saved as documents with chunk
+        episodes first, one at a time (see create_episode), and extracted
+        after the other episodes, one document at a time (each extracts its
+        chunks concurrently).
+
         Args:
             episodes: List of episode dictionaries with keys:
                 - content: Episode content
                 - agent_id: Optional agent ID
                 - session_id: Optional session ID
                 - source: Optional episode type
+                - kind: Optional episode kind
                 - metadata: Optional metadata
+                - name: Optional episode name
             user_id: User ID (required)
+            extract_entities: Override instance setting for entity extraction (None uses instance default)
+            episode_config_override: Episode config for this batch (embeddings, deduplication)
 
         Returns:
-            List of episode UUIDs
+            One result per input episode, in input order, with keys:
+                - episode_id: UUID of the created episode, of the episode it
+                  duplicates, or None if it failed
+                - status: "created", "duplicate" or "failed"
         """
-        episode_uuids = []
+        config = episode_config_override if episode_config_override is not None else self.episode_config
+        if not episodes:
+            return []
+        start_time = datetime.utcnow()
+        contents = [episode_data["content"] for episode_data in episodes]
 
-        for i, episode_data in enumerate(episodes):
+        # Long documents are saved as chunk episodes, one at a time
+        chunked = {
+            i for i, content in enumerate(contents)
+            if self.chunker is not None and self.chunker.splits(content)
+        }
+        documents: Dict[int, Tuple[str, bool]] = {}
+        for i in sorted(chunked):
+            episode_data = episodes[i]
             try:
-                uuid = self.ingest(
+                documents[i] = self._create_document(
                     content=episode_data["content"],
                     user_id=user_id,
                     agent_id=episode_data.get("agent_id"),
                     session_id=episode_data.get("session_id"),
                     source=episode_data.get("source", EpisodeType.text),
+                    kind=episode_data.get("kind"),
+                    source_description=episode_data.get("source_description", ""),
                     metadata=episode_data.get("metadata"),
+                    name=episode_data.get("name"),
+                    config=config,
                 )
-                episode_uuids.append(uuid)
-                logger.info(f"Batch ingestion: {i + 1}/{len(episodes)} completed")
+            except Exception as e:
+                logger.error(f"Error ingesting document {i + 1}: {e}")
+        pending = [i for i in range(len(contents)) if i not in chunked]
+
+        # Stage 1: one embedding call for the whole batch
+        step_start = datetime.utcnow()
+        embeddings: List[Optional[List[float]]] = [None] * len(contents)
+        if config.enable_embeddings and pending:
+            for i, embedding in zip(pending, self.embedding_client.embed_batch([contents[i] for i in pending])):
+                embeddings[i] = embedding
+        step_duration = (datetime.utcnow() - step_start).total_seconds()
+        logger.info(f"⏱️  [TIMING] Batch stage 1 - Embed {len(pending)} episodes: {step_duration:.2f}s")
 
+        # Stage 2: bulk duplicate detection
+        step_start = datetime.utcnow()
+        duplicates: Dict[int, str] = {}
+        repeats: Dict[int, int] = {}
+        if config.deduplication_enabled and pending:
+            found, repeated = self._find_batch_duplicates(
+                [contents[i] for i in pending], [embeddings[i] for i in pending], user_id, config
+            )
+            duplicates = {pending[k]: uuid for k, uuid in found.items()}
+            repeats = {pending[k]: pending[j] for k, j in repeated.items()}
+        step_duration = (datetime.utcnow() - step_start).total_seconds()
+        logger.info(
+            f"⏱️  [TIMING] Batch stage 2 - Detect duplicates: {step_duration:.2f}s "
+            f"({len(duplicates)} of existing episodes, {len(repeats)} within the batch)"
+        )
+
+        # Stage 3: write the new episodes at once
+        step_start = datetime.utcnow()
+        new_episodes: Dict[int, EpisodeNode] = {}
+        for i, episode_data in enumerate(episodes):
+            if i in chunked or i in duplicates or i in repeats:
+                continue
+            try:
+                new_episodes[i] = self._new_episode(
+                    content=episode_data["content"],
+                    content_embedding=embeddings[i],
+                    user_id=user_id,
+                    agent_id=episode_data.get("agent_id"),
+                    session_id=episode_data.get("session_id"),
+                    source=episode_data.get("source", EpisodeType.text),
+                    kind=episode_data.get("kind"),
+                    source_description=episode_data.get("source_description", ""),
+                    metadata=episode_data.get("metadata"),
+                    name=episode_data.get("name"),
+                    created_at=datetime.utcnow(),
+                )
             except Exception as e:
                 logger.error(f"Error ingesting episode {i + 1}: {e}")
+        self.db.save_episodes(list(new_episodes.values()))
+        step_duration = (datetime.utcnow() - step_start).total_seconds()
+        logger.info(f"⏱️  [TIMING] Batch stage 3 - Save {len(new_episodes)} episodes: {step_duration:.2f}s")
+
+        # Stage 4: extraction, a bounded number of episodes at a time
+        if new_episodes and self.should_extract(extract_entities):
+            step_start = datetime.utcnow()
+
+            def extract(i: int) -> None:
+                episode = new_episodes[i]
+                try:
+                    self.extract(
+                        episode_uuid=episode.uuid,
+                        content=episode.content,
+                        user_id=user_id,
+                        session_id=episodes[i].get("session_id"),
+                    )
+                except Exception as e:
+                    logger.error(f"Error extracting entities of batch episode {i + 1}: {e}")
+
+            with ThreadPoolExecutor(
+                max_workers=min(self.extraction_concurrency, len(new_episodes)),
+                thread_name_prefix="ryumem-batch-extract",
+            ) as executor:
+                list(executor.map(extract, new_episodes))
+            step_duration = (datetime.utcnow() - step_start).total_seconds()
+            logger.info(f"⏱️  [TIMING] Batch stage 4 - Extract {len(new_episodes)} episodes: {step_duration:.2f}s")
+
+        # Documents extract their chunks concurrently themselves
+        created_documents = [i for i, (_, created) in sorted(documents.items()) if created]
+        if created_documents and self.should_extract(extract_entities):
+            for i in created_documents:
+                try:
+                    self.extract(
+                        episode_uuid=documents[i][0],
+                        content=contents[i],
+                        user_id=user_id,
+                        session_id=episodes[i].get("session_id"),
+                    )
+                except Exception as e:
+                    logger.error(f"Error extracting entities of batch document {i + 1}: {e}")
+
+        results: List[Dict[str, Optional[str]]] = []
+        for i in range(len(episodes)):
+            if i in documents:
+                document_uuid, created = documents[i]
+                results.append({"episode_id": document_uuid, "status": "created" if created else "duplicate"})
+            elif i in duplicates:
+                results.append({"episode_id": duplicates[i], "status": "duplicate"})
+            elif i in new_episodes:
+                results.append({"episode_id": new_episodes[i].uuid, "status": "created"})
+            elif repeats.get(i) in new_episodes:
+                results.append({"episode_id": new_episodes[repeats[i]].uuid, "status": "duplicate"})
+            else:
+                results.append({"episode_id": None, "status": "failed"})
+        duration = (datetime.utcnow() - start_time).total_seconds()
+        counts = Counter(result["status"] for result in results)
+        logger.info(
+            f"Batch ingestion completed: {counts['created']} new, {counts['duplicate']} duplicates, "
+            f"{counts['failed']} failed in {duration:.2f}s"
+        )
+        return results
+
+    def _find_batch_duplicates(
+        self,
+        contents: List[str],
+        embeddings: List[Optional[List[float]]],
+        user_id: str,
+        config: "EpisodeConfig",
+    ) -> Tuple[Dict[int, str], Dict[int, int]]:
+        """
+        Detect the duplicates of a batch the way create_episode would have,
+        one episode after the other.
+
+        Returns:
+            Tuple of (duplicates, repeats): duplicates maps batch indexes to
+            the UUID of the existing episode they duplicate, repeats maps
+            batch indexes to the earlier index of the batch they duplicate
+        """
+        duplicates: Dict[int, str] = {}
+        repeats: Dict[int, int] = {}
+
+        if self._indexes_duplicates(config):
+            # Exact and near matches against recent episodes, from memory
+            for i, content in enumerate(contents):
+                match = self.duplicate_index.find(
+                    content,
+                    user_id,
+                    time_window_hours=config.time_window_hours,
+                    threshold=config.near_duplicate_threshold,
+                )
+                if match:
+                    duplicates[i] = match["uuid"]
+        else:
+            # Exact content matches against recent episodes, in one query
+            existing = self.db.find_episodes_by_content(contents, user_id, config.time_window_hours)
+            for i, content in enumerate(contents):
+                if content in existing:
+                    duplicates[i] = existing[content]["uuid"]
+
+        if config.enable_embeddings:
+            # Semantic matches against the user's recent episodes, in one matrix product
+            time_cutoff = datetime.now(timezone.utc) - timedelta(hours=config.time_window_hours)
+            candidates = self.db.get_episode_embeddings(user_id, time_cutoff=time_cutoff)
+            pending = [i for i in range(len(contents)) if i not in duplicates]
+            matches = top_k_similar(
+                [embeddings[i] for i in pending],
+                [row["embedding"] for row in candidates],
+                config.similarity_threshold,
+                [1] * len(pending),
+            )
+            for i, hits in zip(pending, matches):
+                if hits:
+                    duplicates[i] = candidates[hits[0][0]]["uuid"]
+        elif not self._indexes_duplicates(config):
+            for i, content in enumerate(contents):
+                if i in duplicates:
+                    continue
+                match = self.db.find_similar_episode_bm25(
+                    content=content,
+                    user_id=user_id,
+                    bm25_index=self.bm25_index,
+                    time_window_hours=config.time_window_hours,
+                    similarity_threshold=config.bm25_similarity_threshold,
+                )
+                if match:
+                    duplicates[i] = match["uuid"]
+
+        # Duplicates within the batch map to the first episode of their group
+        first_by_content: Dict[str, int] = {}
+        for i, content in enumerate(contents):
+            if i in duplicates:
                 continue
+            if content in first_by_content:
+                repeats[i] = first_by_content[content]
+            else:
+                first_by_content[content] = i
+        if config.enable_embeddings:
+            pending = [i for i in range(len(contents)) if i not in duplicates and i not in repeats]
+            vectors = [embeddings[i] for i in pending]
+            matches = top_k_similar(vectors, vectors, config.similarity_threshold, [len(pending)] * len(pending))
+            for position, (i, hits) in enumerate(zip(pending, matches)):
+                # The most similar earlier episode that was itself saved
+                earlier = [pending[j] for j, _, _ in hits if j < position and pending[j] not in repeats]
+                if earlier:
+                    repeats[i] = earlier[0]
 
-        logger.info(f"Batch ingestion completed: {len(episode_uuids)}/{len(episodes)} successful")
-        return episode_uuids
+        return duplicates, repeats
 
     def _get_episode_context(
         self,
@@ -408,30 +1143,45 @@ class EpisodeIngestion:
             logger.error(f"Error getting episode context: {e}")
             return ""
 
-    def _create_mentions_edges(
-        self,
-        episode_uuid: str,
-        entity_uuids: List[str],
-    ) -> None:
+    def _create_mentions_edges(self, mentions: Dict[str, List[str]]) -> None:
         """
-        Create MENTIONS edges from episode to entities.
+        Create MENTIONS edges from episodes to entities (one write).
 
         Args:
-            episode_uuid: UUID of the episode
-            entity_uuids: List of entity UUIDs mentioned in the episode
+            mentions: Dictionary mapping episode UUID to the UUIDs of the
+                entities mentioned in the episode
         """
-        for entity_uuid in entity_uuids:
-            try:
-                edge = EpisodicEdge(
-                    uuid=str(uuid4()),
-                    source_node_uuid=episode_uuid,
-                    target_node_uuid=entity_uuid,
-                    created_at=datetime.utcnow(),
-                )
+        created_at = datetime.utcnow()
+        edges = [
+            EpisodicEdge(
+                uuid=str(uuid4()),
+                source_node_uuid=episode_uuid,
+                target_node_uuid=entity_uuid,
+                created_at=created_at,
+            )
+            for episode_uuid, entity_uuids in mentions.items()
+            for entity_uuid in entity_uuids
+        ]
+        try:
+            self.db.save_episodic_edges(edges)
+        except Exception as e:
+            logger.error(f"Error creating MENTIONS edges from {', '.join(mentions)}: {e}")
 
-                self.db.save_episodic_edge(edge)
+    def _indexes_duplicates(self, config: "EpisodeConfig") -> bool:
+        """Whether duplicates are looked up in the duplicate index (no embeddings, window covered)."""
+        return (
+            not config.enable_embeddings
+            and self.duplicate_index is not None
+            and self.duplicate_index.covers(config.time_window_hours)
+        )
 
-            except Exception as e:
-                logger.error(
-                    f"Error creating MENTIONS edge from {episode_uuid} to {entity_uuid}: {e}"
-                )
+    def close(self) -> None:
+        """
+        Detach the duplicate index and stop the summary scheduler, after it
+        regenerates the pending summaries.
+        """
+        if self.duplicate_index is not None:
+            self.db.changes.unsubscribe(self.duplicate_index.on_change)
+        if self.summary_scheduler is not None:
+            self.db.changes.unsubscribe(self.summary_scheduler.on_change)
+            self.summary_scheduler.close()
@@ -0,0 +1,389 @@
+"""
+In-memory duplicate index for episode deduplication without embeddings.
+
+With embeddings disabled, create_episode checks a new episode against the
+user's episodes of the last time_window_hours: an exact content match, then
+a keyword match. The keyword match ran a BM25 query over every user's
+episodes and filtered the hits by user and time afterwards, so its cost grew
+with the whole corpus (and a user's duplicate could fall out of the top
+hits of other users' episodes).
+
+NearDuplicateIndex keeps the recent episodes of each user in time buckets
+(bucket_hours wide): a map from content hash to episodes for exact
+duplicates, and MinHash signatures of the episodes' word shingles in LSH
+bands for near-duplicates. A lookup only visits the buckets of the user
+that overlap the time window, so its cost depends on the user's recent
+episodes, not on the corpus. Near-duplicate candidates are verified with
+the estimated Jaccard similarity of their shingle sets.
+
+The index covers the last retention_hours; a lookup with a longer window
+falls back to the database (see covers). It is loaded from the database on
+first use and kept in sync through the change feed: episode upserts are
+added, deletes removed, and user deletions and graph-wide changes drop the
+affected episodes (graph-wide changes reload the index on next use).
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ryumem_server.core.changes import ChangeEvent
+from ryumem_server.core.graph_db import content_hash
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+")
+# Largest prime below 2^32, for the (a * x + b) mod p permutations
+_PRIME = 4294967291
+
+
+@dataclass(slots=True)
+class _Entry:
+    """An indexed episode."""
+    user_id: Optional[str]
+    bucket: int
+    created_at: float
+    content_hash: str
+    signature: Optional[np.ndarray]
+    bands: List[int]
+
+
+@dataclass(slots=True)
+class _Bucket:
+    """A user's episodes created within one time bucket."""
+    uuids: Set[str] = field(default_factory=set)
+    hashes: Dict[str, Set[str]] = field(default_factory=dict)
+    bands: Dict[int, Set[str]] = field(default_factory=dict)
+
+
+class NearDuplicateIndex:
+    """
+    Per-user, time-bucketed exact and MinHash LSH index of recent episodes.
+
+    Example:
+        index = NearDuplicateIndex(db.get_recent_episode_hashes)
+        db.changes.subscribe(index.on_change)
+        if index.covers(24):
+            match = index.find(content, "user_123", time_window_hours=24, threshold=0.8)
+    """
+
+    def __init__(
+        self,
+        load: Callable[[Any], List[Dict[str, Any]]],
+        retention_hours: float = 48.0,
+        bucket_hours: float = 1.0,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 2,
+        seed: int = 1,
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            load: Returns the episodes (uuid, user_id, content, content_hash,
+                created_at) created after a time, e.g.
+                RyugraphDB.get_recent_episode_hashes
+            retention_hours: Age of the oldest indexed episodes
+            bucket_hours: Width of a time bucket
+            num_perm: MinHash permutations (signature length)
+            bands: LSH bands (num_perm must be a multiple); more bands find
+                less similar candidates
+            shingle_size: Words per shingle
+            seed: Seed of the permutations
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.load = load
+        self.retention_hours = retention_hours
+        self.bucket_seconds = bucket_hours * 3600.0
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        # a, b < p and x < 2^32 keep a * x + b below 2^64
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._buckets: Dict[Tuple[Optional[str], int], _Bucket] = {}
+        self._loaded = False
+        self._oldest_bucket = 0
+
+    def covers(self, time_window_hours: float) -> bool:
+        """Whether a lookup window is within the indexed period."""
+        return time_window_hours <= self.retention_hours
+
+    def find(
+        self,
+        content: str,
+        user_id: str,
+        time_window_hours: float,
+        threshold: float,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find the user's most similar recent episode.
+
+        An exact content match wins (the most recent one); otherwise the
+        candidates sharing an LSH band are ranked by estimated Jaccard
+        similarity.
+
+        Args:
+            content: Episode content to check
+            user_id: User ID
+            time_window_hours: Look back this many hours (see covers)
+            threshold: Minimum estimated Jaccard similarity of the word
+                shingles for a near-duplicate
+
+        Returns:
+            Dict with uuid, user_id, created_at and similarity, or None
+        """
+        now = time.time()
+        cutoff = now - time_window_hours * 3600.0
+        digest = content_hash(content)
+        signature = self._signature(content)
+
+        with self._lock:
+            self._ensure_loaded(now)
+            buckets = [
+                bucket
+                for number in range(self._bucket(cutoff), self._bucket(now) + 1)
+                if (bucket := self._buckets.get((user_id, number))) is not None
+            ]
+
+            exact = [
+                uuid
+                for bucket in buckets
+                for uuid in bucket.hashes.get(digest, ())
+                if self._entries[uuid].created_at > cutoff
+            ]
+            if exact:
+                uuid = max(exact, key=lambda uuid: self._entries[uuid].created_at)
+                return self._match(uuid, self._entries[uuid], 1.0)
+            if signature is None:
+                return None
+
+            candidates: Set[str] = set()
+            for key in self._band_keys(signature):
+                for bucket in buckets:
+                    candidates.update(bucket.bands.get(key, ()))
+
+            best: Optional[Tuple[float, float, str]] = None
+            for uuid in candidates:
+                entry = self._entries[uuid]
+                if entry.created_at <= cutoff or entry.signature is None:
+                    continue
+                similarity = float(np.count_nonzero(entry.signature == signature)) / self.num_perm
+                if similarity >= threshold and (best is None or (similarity, entry.created_at) > best[:2]):
+                    best = (similarity, entry.created_at, uuid)
+            if best is None:
+                return None
+            return self._match(best[2], self._entries[best[2]], best[0])
+
+    def add(
+        self,
+        uuid: str,
+        user_id: Optional[str],
+        content: str,
+        created_at: Any,
+        digest: Optional[str] = None,
+    ) -> None:
+        """
+        Index an episode (replacing its previous entry).
+
+        Args:
+            uuid: Episode UUID
+            user_id: Owning user
+            content: Episode content
+            created_at: Creation time (datetime, naive = UTC, or ISO string)
+            digest: Content hash, if known (see content_hash)
+        """
+        created = _timestamp(created_at)
+        if created is None:
+            return
+        signature = self._signature(content)
+        entry = _Entry(
+            user_id=user_id,
+            bucket=self._bucket(created),
+            created_at=created,
+            content_hash=digest or content_hash(content),
+            signature=signature,
+            bands=self._band_keys(signature) if signature is not None else [],
+        )
+        with self._lock:
+            if not self._loaded:
+                # Picked up by the load on first use
+                return
+            self._insert(uuid, entry)
+            self._prune(time.time())
+
+    def remove(self, uuid: str) -> None:
+        """Remove an episode from the index."""
+        with self._lock:
+            self._delete(uuid)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """
+        Drop a user's episodes, or reload the whole index on next use.
+
+        Args:
+            user_id: User whose episodes are dropped (None = all users)
+        """
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                self._buckets.clear()
+                self._loaded = False
+                return
+            for uuid in [uuid for uuid, entry in self._entries.items() if entry.user_id == user_id]:
+                self._delete(uuid)
+
+    def on_change(self, event: ChangeEvent) -> None:
+        """Change feed subscriber: keep the index in sync with episode writes."""
+        if event.kind == "graph":
+            self.invalidate()
+        elif event.op == "delete_user":
+            self.invalidate(event.user_id)
+        elif event.kind == "episode" and event.uuid:
+            if event.op == "delete":
+                self.remove(event.uuid)
+            elif event.op == "upsert" and event.data.get("content") is not None:
+                self.add(
+                    event.uuid,
+                    event.user_id,
+                    event.data["content"],
+                    event.data.get("created_at"),
+                    event.data.get("content_hash"),
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        """Indexed episodes and buckets."""
+        with self._lock:
+            return {"episodes": len(self._entries), "buckets": len(self._buckets), "loaded": self._loaded}
+
+    def _ensure_loaded(self, now: float) -> None:
+        """Load the retained episodes from the database (caller holds _lock)."""
+        if self._loaded:
+            self._prune(now)
+            return
+        cutoff = datetime.fromtimestamp(now - self.retention_hours * 3600.0, tz=timezone.utc)
+        started = time.perf_counter()
+        rows = self.load(cutoff)
+        for row in rows:
+            created = _timestamp(row["created_at"])
+            if created is None or row["content"] is None:
+                continue
+            signature = self._signature(row["content"])
+            self._insert(row["uuid"], _Entry(
+                user_id=row["user_id"],
+                bucket=self._bucket(created),
+                created_at=created,
+                content_hash=row["content_hash"] or content_hash(row["content"]),
+                signature=signature,
+                bands=self._band_keys(signature) if signature is not None else [],
+            ))
+        self._loaded = True
+        self._oldest_bucket = self._bucket(now - self.retention_hours * 3600.0)
+        logger.info(
+            f"Loaded {len(self._entries)} episodes into the duplicate index "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    def _insert(self, uuid: str, entry: _Entry) -> None:
+        self._delete(uuid)
+        self._entries[uuid] = entry
+        bucket = self._buckets.setdefault((entry.user_id, entry.bucket), _Bucket())
+        bucket.uuids.add(uuid)
+        bucket.hashes.setdefault(entry.content_hash, set()).add(uuid)
+        for key in entry.bands:
+            bucket.bands.setdefault(key, set()).add(uuid)
+
+    def _delete(self, uuid: str) -> None:
+        entry = self._entries.pop(uuid, None)
+        if entry is None:
+            return
+        key = (entry.user_id, entry.bucket)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return
+        bucket.uuids.discard(uuid)
+        if not bucket.uuids:
+            del self._buckets[key]
+            return
+        _discard(bucket.hashes, entry.content_hash, uuid)
+        for band in entry.bands:
+            _discard(bucket.bands, band, uuid)
+
+    def _prune(self, now: float) -> None:
+        """Drop the buckets older than the retention period."""
+        oldest = self._bucket(now - self.retention_hours * 3600.0)
+        if oldest <= self._oldest_bucket:
+            return
+        self._oldest_bucket = oldest
+        for key in [key for key in self._buckets if key[1] < oldest]:
+            for uuid in self._buckets.pop(key).uuids:
+                self._entries.pop(uuid, None)
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def _signature(self, content: str) -> Optional[np.ndarray]:
+        """MinHash signature of the content's word shingles (None without words)."""
+        words = _TOKEN.findall(content.lower())
+        if not words:
+            return None
+        size = min(self.shingle_size, len(words))
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        # Python's string hash is salted per process; the index never leaves it
+        values = np.fromiter((hash(shingle) & 0xFFFFFFFF for shingle in shingles), dtype=np.uint64)
+        return ((self._a * values + self._b) % np.uint64(_PRIME)).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        return [
+            hash((band, signature[band * self.rows:(band + 1) * self.rows].tobytes()))
+            for band in range(self.bands)
+        ]
+
+    def _match(self, uuid: str, entry: _Entry, similarity: float) -> Dict[str, Any]:
+        return {
+            "uuid": uuid,
+            "user_id": entry.user_id,
+            "created_at": datetime.fromtimestamp(entry.created_at, tz=timezone.utc),
+            "similarity": similarity,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"NearDuplicateIndex(episodes={len(self._entries)}, "
+            f"retention_hours={self.retention_hours}, bands={self.bands}x{self.rows})"
+        )
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    """POSIX timestamp of a datetime or ISO string (naive times are UTC)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if hasattr(value, "to_pydatetime"):
+        value = value.to_pydatetime()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _discard(index: Dict[Any, Set[str]], key: Any, uuid: str) -> None:
+    uuids = index.get(key)
+    if uuids is not None:
+        uuids.discard(uuid)
+        if not uuids:
+            del index[key]
@@ -0,0 +1,380 @@
+"""
+Durable background queue for entity and relationship extraction.
+
+Asynchronous ingestion saves the episode node and its embedding before it
+returns, so the episode is searchable right away, and queues the rest of
+the pipeline (EpisodeIngestion.extract: context, entities, relationships,
+contradictions, summaries) as a job. Jobs are rows of the IngestionJob
+node table in the same database as the data they extract into; jobs that
+were queued or running when the process stopped are queued again by
+recover() when the database is next opened.
+
+A failed attempt is retried after an exponential backoff (retry_base_seconds,
+doubling per attempt up to retry_max_seconds), so a provider outage does not
+use up a job's attempts within seconds. Finished (done or failed) jobs are
+deleted after job_retention_hours (see prune).
+
+Each Ryumem instance (one per tenant) owns its queue, so max_workers bounds
+the concurrent extractions of a tenant.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Literal, Optional
+from uuid import uuid4
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+# Minimum time between two prunes of finished jobs (see IngestionQueue.prune)
+PRUNE_INTERVAL_SECONDS = 3600.0
+
+_JOB_COLUMNS = """
+    j.id AS id,
+    j.status AS status,
+    j.episode_uuid AS episode_uuid,
+    j.user_id AS user_id,
+    j.session_id AS session_id,
+    j.attempts AS attempts,
+    j.error AS error,
+    j.created_at AS created_at,
+    j.started_at AS started_at,
+    j.finished_at AS finished_at
+"""
+
+
+class IngestionJob(BaseModel):
+    """
+    A queued extraction of one episode.
+
+    Attributes:
+        id: Job ID
+        status: queued, running, done or failed
+        episode_uuid: Episode to extract entities and relationships from
+        user_id: Owner of the episode
+        session_id: Session of the episode (scopes the extraction context)
+        attempts: Extraction attempts started so far
+        error: Error of the last failed attempt
+        created_at: When the job was queued
+        started_at: When the last attempt started
+        finished_at: When the job finished (done or failed)
+    """
+    id: str
+    status: JobStatus
+    episode_uuid: str
+    user_id: str
+    session_id: Optional[str] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "IngestionJob":
+        # Missing timestamps arrive as NaT, which compares unequal to itself
+        values = {key: (None if value is None or value != value else value) for key, value in row.items()}
+        values["attempts"] = int(values.get("attempts") or 0)
+        return cls(**values)
+
+
+class IngestionQueue:
+    """
+    Runs episode extraction jobs on a bounded worker pool.
+
+    Example:
+        queue = IngestionQueue(db, ingestion, max_workers=2)
+        queue.recover()
+        episode_uuid, created = ingestion.create_episode(content, user_id)
+        job = queue.submit(episode_uuid, user_id)
+        queue.get(job.id).status  # "queued", "running", "done" or "failed"
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        ingestion: Any,
+        max_workers: int = 2,
+        max_attempts: int = 3,
+        retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 60.0,
+        job_retention_hours: float = 168.0,
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            db: RyugraphDB instance (the IngestionJob table must exist)
+            ingestion: EpisodeIngestion pipeline that runs the extraction
+            max_workers: Concurrent extractions
+            max_attempts: Attempts before a job fails (a job interrupted by a
+                restart counts the interrupted attempt)
+            retry_base_seconds: Delay before the second attempt; each further
+                attempt waits twice as long
+            retry_max_seconds: Longest delay between two attempts
+            job_retention_hours: Age of the oldest finished jobs kept
+        """
+        self.db = db
+        self.ingestion = ingestion
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.job_retention_hours = job_retention_hours
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ryumem-ingest")
+        self._lock = threading.Lock()
+        self._closed = False
+        # Pending delayed retries (cancelled by close; the jobs stay queued)
+        self._timers: Dict[str, threading.Timer] = {}
+        self._pruned_at = time.monotonic()
+
+    def recover(self) -> int:
+        """
+        Queue again the jobs a previous process left queued or running,
+        and delete the expired finished jobs.
+
+        Returns:
+            Number of jobs queued again
+        """
+        self.prune()
+        rows = self.db.execute(
+            f"""
+            MATCH (j:IngestionJob)
+            WHERE j.status IN ['queued', 'running']
+            RETURN {_JOB_COLUMNS}
+            ORDER BY j.created_at
+            """
+        )
+        recovered = 0
+        for job in (IngestionJob.from_row(row) for row in rows):
+            if job.status == "running" and job.attempts >= self.max_attempts:
+                self._finish(job.id, "failed", "Interrupted on the last attempt")
+                continue
+            if job.status == "running":
+                self._update(job.id, status="queued")
+            self._dispatch(job.id)
+            recovered += 1
+        if recovered:
+            logger.info(f"Recovered {recovered} ingestion jobs")
+        return recovered
+
+    def submit(
+        self,
+        episode_uuid: str,
+        user_id: str,
+        session_id: Optional[str] = None,
+    ) -> IngestionJob:
+        """
+        Queue the extraction of a saved episode.
+
+        Args:
+            episode_uuid: Episode to extract (see EpisodeIngestion.create_episode)
+            user_id: Owner of the episode
+            session_id: Session of the episode
+
+        Returns:
+            The queued job
+        """
+        job = IngestionJob(
+            id=str(uuid4()),
+            status="queued",
+            episode_uuid=episode_uuid,
+            user_id=user_id,
+            session_id=session_id,
+            created_at=datetime.now(timezone.utc),
+        )
+        self.db.execute(
+            """
+            CREATE (j:IngestionJob {
+                id: $id,
+                status: $status,
+                episode_uuid: $episode_uuid,
+                user_id: $user_id,
+                session_id: $session_id,
+                attempts: 0,
+                created_at: $created_at
+            })
+            """,
+            {
+                "id": job.id,
+                "status": job.status,
+                "episode_uuid": job.episode_uuid,
+                "user_id": job.user_id,
+                "session_id": job.session_id,
+                "created_at": job.created_at,
+            },
+        )
+        self._dispatch(job.id)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        Get a job by ID.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            The job, or None if not found
+        """
+        rows = self.db.execute(
+            f"MATCH (j:IngestionJob {{id: $id}}) RETURN {_JOB_COLUMNS}",
+            {"id": job_id},
+        )
+        return IngestionJob.from_row(rows[0]) if rows else None
+
+    def list(
+        self,
+        user_id: Optional[str] = None,
+        status: Optional[JobStatus] = None,
+        limit: int = 50,
+    ) -> List[IngestionJob]:
+        """
+        List jobs, newest first.
+
+        Args:
+            user_id: Only jobs of this user
+            status: Only jobs with this status
+            limit: Maximum number of jobs
+
+        Returns:
+            List of jobs
+        """
+        conditions = []
+        params: Dict[str, Any] = {"limit": limit}
+        if user_id is not None:
+            conditions.append("j.user_id = $user_id")
+            params["user_id"] = user_id
+        if status is not None:
+            conditions.append("j.status = $status")
+            params["status"] = status
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.db.execute(
+            f"""
+            MATCH (j:IngestionJob)
+            {where}
+            RETURN {_JOB_COLUMNS}
+            ORDER BY j.created_at DESC
+            LIMIT $limit
+            """,
+            params,
+        )
+        return [IngestionJob.from_row(row) for row in rows]
+
+    def prune(self) -> int:
+        """
+        Delete the done and failed jobs finished more than
+        job_retention_hours ago.
+
+        Returns:
+            Number of jobs deleted
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=self.job_retention_hours)
+        result = self.db.execute(
+            """
+            MATCH (j:IngestionJob)
+            WHERE j.status IN ['done', 'failed'] AND j.finished_at < $cutoff
+            DELETE j
+            RETURN count(j) AS count
+            """,
+            {"cutoff": cutoff},
+        )
+        self._pruned_at = time.monotonic()
+        pruned = result[0]["count"] if result else 0
+        if pruned:
+            logger.info(f"Pruned {pruned} finished ingestion jobs")
+        return pruned
+
+    def close(self) -> None:
+        """
+        Stop the workers.
+
+        Running extractions finish; jobs that have not started (or wait for
+        a retry) stay queued in the database and are recovered when it is
+        next opened.
+        """
+        with self._lock:
+            self._closed = True
+            timers = list(self._timers.values())
+            self._timers.clear()
+        for timer in timers:
+            timer.cancel()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _dispatch(self, job_id: str) -> None:
+        with self._lock:
+            self._timers.pop(job_id, None)
+            if self._closed:
+                return
+            self._executor.submit(self._run, job_id)
+
+    def _dispatch_later(self, job_id: str, attempts: int) -> None:
+        """Dispatch a failed job again after its backoff delay."""
+        delay = min(self.retry_base_seconds * 2 ** (attempts - 1), self.retry_max_seconds)
+        timer = threading.Timer(delay, self._dispatch, args=(job_id,))
+        timer.daemon = True
+        with self._lock:
+            if self._closed:
+                return
+            self._timers[job_id] = timer
+            timer.start()
+        logger.info(f"Retrying ingestion job {job_id} in {delay:.1f}s")
+
+    def _run(self, job_id: str) -> None:
+        if self._closed:
+            return
+        job = self.get(job_id)
+        if job is None or job.status != "queued":
+            return
+
+        attempts = job.attempts + 1
+        self._update(job_id, status="running", attempts=attempts, started_at=datetime.now(timezone.utc))
+
+        try:
+            episode = self.db.get_episode_by_uuid(job.episode_uuid)
+            if episode is None:
+                raise LookupError(f"Episode {job.episode_uuid} not found")
+            self.ingestion.extract(
+                episode_uuid=job.episode_uuid,
+                content=episode["content"],
+                user_id=job.user_id,
+                session_id=job.session_id,
+            )
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed (attempt {attempts}/{self.max_attempts}): {e}", exc_info=True)
+            if isinstance(e, LookupError) or attempts >= self.max_attempts:
+                self._finish(job_id, "failed", str(e))
+            else:
+                self._update(job_id, status="queued", error=str(e))
+                self._dispatch_later(job_id, attempts)
+            return
+
+        self._finish(job_id, "done")
+        logger.info(f"Ingestion job {job_id} done (episode {job.episode_uuid[:8]})")
+
+    def _finish(self, job_id: str, status: JobStatus, error: Optional[str] = None) -> None:
+        self._update(job_id, status=status, error=error, finished_at=datetime.now(timezone.utc))
+        if time.monotonic() - self._pruned_at >= PRUNE_INTERVAL_SECONDS:
+            try:
+                self.prune()
+            except Exception as e:
+                logger.warning(f"Pruning finished ingestion jobs failed: {e}")
+
+    def _update(self, job_id: str, **values: Any) -> None:
+        assignments = ", ".join(f"j.{column} = ${column}" for column in values)
+        self.db.execute(
+            f"MATCH (j:IngestionJob {{id: $id}}) SET {assignments}",
+            {"id": job_id, **values},
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"IngestionQueue(max_workers={self.max_workers}, max_attempts={self.max_attempts}, "
+            f"retry_base_seconds={self.retry_base_seconds}, retry_max_seconds={self.retry_max_seconds})"
+        )
@@ -5,12 +5,14 @@ Extracts relationships between entities and resolves them against existing relat
 
 import hashlib
 import logging
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional
-from uuid import uuid4
+from typing import Any, Dict, List, Optional
 
 from ryumem_server.core.graph_db import RyugraphDB
 from ryumem_server.core.models import EntityEdge, EntityNode
+from ryumem_server.ingestion.resolution_index import ResolutionIndex
+from ryumem_server.retrieval.batch_scoring import top_k_similar
 from ryumem_server.utils.cache import relation_extraction_cache
 from ryumem_server.utils.embeddings import EmbeddingClient
 from ryumem_server.utils.llm import LLMClient
@@ -18,6 +20,30 @@ from ryumem_server.utils.llm import LLMClient
 logger = logging.getLogger(__name__)
 
 
+def normalize_relationships(relationships: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Normalize relationships returned by an LLM client.
+
+    Entity names are lowercased with underscores (as entity extraction
+    normalizes them) and relationship types uppercased with underscores.
+
+    Args:
+        relationships: Dicts with 'source', 'relationship', 'destination', 'fact' keys
+
+    Returns:
+        Normalized relationships
+    """
+    return [
+        {
+            "source": rel["source"].lower().replace(" ", "_"),
+            "relationship": rel["relationship"].upper().replace(" ", "_"),
+            "destination": rel["destination"].lower().replace(" ", "_"),
+            "fact": rel["fact"],
+        }
+        for rel in relationships
+    ]
+
+
 class RelationExtractor:
     """
     Handles relationship extraction and resolution.
@@ -29,6 +55,10 @@ class RelationExtractor:
         llm_client: LLMClient,
         embedding_client: EmbeddingClient,
         similarity_threshold: float = 0.8,
+        index_users: int = 32,
+        index_ttl_seconds: float = 600.0,
+        contradiction_candidates: int = 5,
+        contradiction_similarity_threshold: float = 0.0,
     ):
         """
         Initialize relation extractor.
@@ -38,11 +68,26 @@ class RelationExtractor:
             llm_client: LLM client for extraction
             embedding_client: Embedding client for similarity search
             similarity_threshold: Threshold for relationship deduplication (0.0-1.0)
+            index_users: Users whose fact vectors are kept in memory for
+                resolution (see ResolutionIndex)
+            index_ttl_seconds: Maximum age of a user's cached fact vectors
+            contradiction_candidates: Existing facts (the most similar ones)
+                each new fact is checked against for contradictions
+            contradiction_similarity_threshold: Minimum similarity of an
+                existing fact to a new fact for a contradiction check
         """
         self.db = db
         self.llm_client = llm_client
         self.embedding_client = embedding_client
         self.similarity_threshold = similarity_threshold
+        self.contradiction_candidates = contradiction_candidates
+        self.contradiction_similarity_threshold = contradiction_similarity_threshold
+        # Concurrent extractions resolve one at a time (see EntityExtractor)
+        self._resolve_lock = threading.Lock()
+        self.index = ResolutionIndex(
+            "edge", db.get_edge_embeddings, max_users=index_users, ttl_seconds=index_ttl_seconds
+        )
+        db.changes.subscribe(self.index.on_change)
 
         logger.info(f"Initialized RelationExtractor with threshold: {similarity_threshold}")
 
@@ -54,6 +99,7 @@ class RelationExtractor:
         episode_uuid: str,
         user_id: str,
         context: Optional[str] = None,
+        extracted: Optional[List[Dict[str, str]]] = None,
     ) -> List[EntityEdge]:
         """
         Extract relationships from content and resolve them against existing relationships.
@@ -65,6 +111,8 @@ class RelationExtractor:
             episode_uuid: UUID of the current episode
             user_id: User ID (required)
             context: Optional context from previous episodes
+            extracted: Relationships already extracted with the entities
+                (see EntityExtractor.extract_graph); skips the LLM call
 
         Returns:
             List of resolved entity edges
@@ -74,13 +122,14 @@ class RelationExtractor:
             return []
 
         # Step 1: Extract relationships using LLM
-        entity_names = [e.name for e in entities]
-        extracted = self._extract_relationships_with_llm(
-            content=content,
-            entities=entity_names,
-            user_id=user_id,
-            context=context,
-        )
+        if extracted is None:
+            entity_names = [e.name for e in entities]
+            extracted = self._extract_relationships_with_llm(
+                content=content,
+                entities=entity_names,
+                user_id=user_id,
+                context=context,
+            )
 
         if not extracted:
             logger.info("No relationships extracted from content")
@@ -92,14 +141,14 @@ class RelationExtractor:
         facts = [r["fact"] for r in extracted]
         embeddings = self.embedding_client.embed_batch(facts)
 
-        # Step 3: Resolve each relationship
+        # Step 3: Resolve all relationships at once
         resolved_edges: List[EntityEdge] = []
 
+        # Only relationships between resolved entities are saved
+        resolvable = []
         for rel_data, embedding in zip(extracted, embeddings):
             source_name = rel_data["source"].lower().replace(" ", "_")
             dest_name = rel_data["destination"].lower().replace(" ", "_")
-            relation_type = rel_data["relationship"].upper().replace(" ", "_")
-            fact = rel_data["fact"]
 
             # Get UUIDs for source and destination
             source_uuid = entity_map.get(source_name)
@@ -111,63 +160,65 @@ class RelationExtractor:
                     f"{source_name} -> {dest_name}"
                 )
                 continue
+            resolvable.append((rel_data, embedding, source_uuid, dest_uuid))
 
-            # Search for similar existing relationships
-            similar = self.db.search_similar_edges(
-                embedding=embedding,
+        with self._resolve_lock:
+            resolutions = self.index.resolve(
                 user_id=user_id,
+                embeddings=[embedding for _, embedding, _, _ in resolvable],
                 threshold=self.similarity_threshold,
-                limit=1,
             )
 
-            if similar:
-                # Found similar edge - update it
-                existing = similar[0]
-                edge_uuid = existing["edge_uuid"]
-
-                logger.debug(
-                    f"Resolved relationship to existing edge "
-                    f"(similarity: {existing['similarity']:.3f})"
-                )
+            try:
+                for (rel_data, embedding, source_uuid, dest_uuid), resolution in zip(resolvable, resolutions):
+                    relation_type = rel_data["relationship"].upper().replace(" ", "_")
+                    fact = rel_data["fact"]
+                    edge_uuid = resolution.uuid
+
+                    if not resolution.is_new:
+                        # Found similar edge - update it
+                        logger.debug(
+                            f"Resolved relationship to existing edge "
+                            f"(similarity: {resolution.matches[0][1]:.3f})"
+                        )
 
-                # Get existing edge data
-                existing_episodes = []  # Would need to fetch from DB
-
-                edge = EntityEdge(
-                    uuid=edge_uuid,
-                    source_node_uuid=source_uuid,
-                    target_node_uuid=dest_uuid,
-                    name=relation_type,
-                    fact=fact,
-                    fact_embedding=embedding,
-                    episodes=[episode_uuid],  # Add current episode
-                    mentions=1,  # Will be incremented in DB
-                )
+                        edge = EntityEdge(
+                            uuid=edge_uuid,
+                            source_node_uuid=source_uuid,
+                            target_node_uuid=dest_uuid,
+                            name=relation_type,
+                            fact=fact,
+                            fact_embedding=embedding,
+                            episodes=[episode_uuid],  # Add current episode
+                            mentions=1,  # Will be incremented in DB
+                        )
 
-            else:
-                # No similar edge found - create new one
-                edge_uuid = str(uuid4())
-
-                edge = EntityEdge(
-                    uuid=edge_uuid,
-                    source_node_uuid=source_uuid,
-                    target_node_uuid=dest_uuid,
-                    name=relation_type,
-                    fact=fact,
-                    fact_embedding=embedding,
-                    created_at=datetime.utcnow(),
-                    valid_at=datetime.utcnow(),  # Assume valid from now
-                    episodes=[episode_uuid],
-                    mentions=1,
-                )
+                    else:
+                        # No similar edge found - create new one
+                        edge = EntityEdge(
+                            uuid=edge_uuid,
+                            source_node_uuid=source_uuid,
+                            target_node_uuid=dest_uuid,
+                            name=relation_type,
+                            fact=fact,
+                            fact_embedding=embedding,
+                            created_at=datetime.utcnow(),
+                            valid_at=datetime.utcnow(),  # Assume valid from now
+                            episodes=[episode_uuid],
+                            mentions=1,
+                        )
 
-                logger.debug(
-                    f"Created new relationship: {source_name} --[{relation_type}]--> {dest_name}"
-                )
+                        logger.debug(
+                            f"Created new relationship: {rel_data['source']} --[{relation_type}]--> {rel_data['destination']}"
+                        )
 
-            # Save edge to database
-            self.db.save_entity_edge(edge, source_uuid, dest_uuid)
-            resolved_edges.append(edge)
+                    # Save edge to database
+                    self.db.save_entity_edge(edge, source_uuid, dest_uuid)
+                    resolved_edges.append(edge)
+            except Exception:
+                # The index already holds the vectors of the unsaved edges
+                self.index.invalidate(user_id)
+                raise
 
         logger.info(
             f"Resolved {len(resolved_edges)} relationships "
@@ -196,6 +247,9 @@ class RelationExtractor:
 
         Returns:
             List of dicts with 'source', 'relationship', 'destination', 'fact' keys
+
+        Raises:
+            Exception: If the LLM call fails (see EntityExtractor._extract_entities_with_llm)
         """
         # Check cache first
         entities_str = "|".join(sorted(entities))  # Sort for consistent cache keys
@@ -218,14 +272,7 @@ class RelationExtractor:
             )
 
             # Normalize relationship data
-            normalized = []
-            for rel in relationships:
-                normalized.append({
-                    "source": rel["source"].lower().replace(" ", "_"),
-                    "relationship": rel["relationship"].upper().replace(" ", "_"),
-                    "destination": rel["destination"].lower().replace(" ", "_"),
-                    "fact": rel["fact"],
-                })
+            normalized = normalize_relationships(relationships)
 
             # Cache the result
             relation_extraction_cache.set(cache_key, normalized)
@@ -234,19 +281,33 @@ class RelationExtractor:
 
         except Exception as e:
             logger.error(f"Error extracting relationships with LLM: {e}")
-            return []
+            raise
 
     def detect_contradictions(
         self,
         new_edges: List[EntityEdge],
         user_id: str,
+        groups: Optional[List[int]] = None,
     ) -> List[str]:
         """
         Detect contradicting edges that should be invalidated.
 
+        The candidates of a new edge are the unexpired edges of its source
+        entity with the same relation type, narrowed to the
+        contradiction_candidates facts most similar to the new fact. All new
+        facts of the episode are then checked against their candidates with
+        one LLM call; a contradiction is only accepted between a new fact and
+        one of its own candidates.
+
+        When the new edges come from several episodes (groups), the edges of
+        earlier episodes are candidates of the later ones, as if the
+        episodes had been checked one after the other.
+
         Args:
             new_edges: List of newly extracted edges
             user_id: User ID (required)
+            groups: Position of the episode of each new edge (default: all
+                from one episode)
 
         Returns:
             List of edge UUIDs to invalidate
@@ -254,63 +315,114 @@ class RelationExtractor:
         if not new_edges:
             return []
 
-        to_invalidate: List[str] = []
-
-        # For each new edge, check if it contradicts existing edges
-        for new_edge in new_edges:
-            # Get existing relationships for the source entity
-            existing_rels = self.db.get_entity_relationships(
-                entity_uuid=new_edge.source_node_uuid,
-                include_expired=False,
-            )
+        # Existing relationships of every source entity, in one query
+        existing_rels = self.db.get_relationships_for_entities(
+            entity_uuids=list({edge.source_node_uuid for edge in new_edges}),
+            include_expired=False,
+            exclude_edge_uuids=[edge.uuid for edge in new_edges],
+            include_embeddings=True,
+        )
+        if groups is not None:
+            existing_rels = existing_rels + [
+                {
+                    "edge_uuid": edge.uuid,
+                    "relation_type": edge.name,
+                    "fact": edge.fact,
+                    "fact_embedding": edge.fact_embedding,
+                    "source_uuid": edge.source_node_uuid,
+                    "target_uuid": edge.target_node_uuid,
+                    "group": group,
+                }
+                for edge, group in zip(new_edges, groups)
+            ]
 
-            # Filter to same relation type
+        # Candidate facts per new fact, each listed once for the LLM
+        candidates: Dict[int, List[int]] = {}
+        existing_facts: List[str] = []
+        existing_uuids: List[str] = []
+        fact_index: Dict[str, int] = {}
+        for i, new_edge in enumerate(new_edges):
             same_type_rels = [
                 r for r in existing_rels
                 if r["relation_type"] == new_edge.name
+                and new_edge.source_node_uuid in (r["source_uuid"], r["target_uuid"])
+                and ("group" not in r or (r["group"] < groups[i] and r["edge_uuid"] != new_edge.uuid))
             ]
+            for rel in self._most_similar(new_edge, same_type_rels):
+                if rel["edge_uuid"] not in fact_index:
+                    fact_index[rel["edge_uuid"]] = len(existing_facts)
+                    existing_facts.append(rel["fact"])
+                    existing_uuids.append(rel["edge_uuid"])
+                candidates.setdefault(i, []).append(fact_index[rel["edge_uuid"]])
+
+        if not candidates:
+            return []
 
-            if not same_type_rels:
-                continue
-
-            # Build fact lists for comparison
-            new_facts = [new_edge.fact]
-            existing_facts = [r["fact"] for r in same_type_rels]
-
-            try:
-                # Use LLM to detect contradictions
-                contradictions = self.llm_client.detect_contradictions(
-                    new_facts=new_facts,
-                    existing_facts=existing_facts,
-                )
-
-                # Mark contradicting edges for invalidation
-                for contradiction in contradictions:
-                    existing_idx = contradiction["existing_fact_index"]
-                    if 0 <= existing_idx < len(same_type_rels):
-                        edge_uuid = same_type_rels[existing_idx]["edge_uuid"]
-                        to_invalidate.append(edge_uuid)
-                        logger.info(
-                            f"Detected contradiction - will invalidate edge {edge_uuid}: "
-                            f"{contradiction['reason']}"
-                        )
+        try:
+            # Use LLM to detect contradictions
+            contradictions = self.llm_client.detect_contradictions(
+                new_facts=[edge.fact for edge in new_edges],
+                existing_facts=existing_facts,
+            )
+        except Exception as e:
+            logger.error(f"Error detecting contradictions: {e}")
+            return []
 
-            except Exception as e:
-                logger.error(f"Error detecting contradictions: {e}")
+        # Mark contradicting edges for invalidation
+        to_invalidate: List[str] = []
+        for contradiction in contradictions:
+            new_idx = contradiction.get("new_fact_index")
+            existing_idx = contradiction.get("existing_fact_index")
+            if existing_idx not in candidates.get(new_idx, []):
                 continue
+            edge_uuid = existing_uuids[existing_idx]
+            if edge_uuid not in to_invalidate:
+                to_invalidate.append(edge_uuid)
+                logger.info(
+                    f"Detected contradiction - will invalidate edge {edge_uuid}: "
+                    f"{contradiction.get('reason', '')}"
+                )
 
         return to_invalidate
 
+    def _most_similar(self, new_edge: EntityEdge, rels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        The existing relationships whose facts are most similar to a new
+        edge's fact (at most contradiction_candidates, at or above
+        contradiction_similarity_threshold). Relationships without an
+        embedding only fill the remaining places.
+        """
+        if len(rels) <= self.contradiction_candidates and not self.contradiction_similarity_threshold:
+            return rels
+
+        comparable = new_edge.fact_embedding is not None
+        embedded = [r for r in rels if comparable and r.get("fact_embedding") is not None]
+        selected: List[Dict[str, Any]] = []
+        if embedded:
+            matches = top_k_similar(
+                [new_edge.fact_embedding],
+                [r["fact_embedding"] for r in embedded],
+                self.contradiction_similarity_threshold,
+                [self.contradiction_candidates],
+            )[0]
+            selected = [embedded[index] for index, _, _ in matches]
+
+        # Facts that cannot be compared fill the remaining places
+        others = [r for r in rels if not comparable or r.get("fact_embedding") is None]
+        return selected + others[:self.contradiction_candidates - len(selected)]
+
     def invalidate_edges(self, edge_uuids: List[str]) -> None:
         """
-        Invalidate (expire) a list of edges.
+        Invalidate (expire) a list of edges with one statement.
 
         Args:
             edge_uuids: List of edge UUIDs to invalidate
         """
-        for uuid in edge_uuids:
-            try:
-                self.db.invalidate_edge(uuid)
+        if not edge_uuids:
+            return
+        try:
+            invalidated = self.db.invalidate_edges(edge_uuids)
+            for uuid in invalidated:
                 logger.info(f"Invalidated edge {uuid}")
-            except Exception as e:
-                logger.error(f"Error invalidating edge {uuid}: {e}")
+        except Exception as e:
+            logger.error(f"Error invalidating edges {edge_uuids}: {e}")
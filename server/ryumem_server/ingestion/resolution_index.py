@@ -0,0 +1,279 @@
+"""
+In-memory vector index for entity and relationship resolution.
+
+Resolving the entities (or facts) of an episode compares every extracted
+item with the user's existing vectors. Issuing one database vector scan per
+item makes the cost of an episode grow with the number of items it
+mentions; loading the user's vectors for every episode instead costs more
+than the scans it saves. ResolutionIndex keeps a normalized copy of the
+vectors of recently active users in memory, so an episode is resolved with
+one matrix product against them.
+
+The copy stays in sync with the database through the change feed: the
+resolver records the vectors it writes itself (see resolve), deletions and
+invalidations remove rows, and any other write to a user's documents of the
+indexed kind (or a graph-wide change) drops that user's copy, which is
+loaded again on the next resolution. Copies also expire after a TTL, which
+bounds the drift from writes that bypass the feed.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+import numpy as np
+
+from ryumem_server.core.changes import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+@dataclass(slots=True)
+class Resolution:
+    """
+    Outcome of resolving one item.
+
+    Attributes:
+        uuid: Document the item resolves to (a new UUID if nothing matched)
+        matches: (uuid, similarity) of the documents at or above the
+            threshold, best first; empty if the item is new
+    """
+    uuid: str
+    matches: List[Tuple[str, float]] = field(default_factory=list)
+
+    @property
+    def is_new(self) -> bool:
+        """Whether nothing matched (the item creates a new document)."""
+        return not self.matches
+
+
+@dataclass(slots=True)
+class _UserVectors:
+    """A user's vectors: normalized rows and the UUID of each (None = removed)."""
+    uuids: List[Optional[str]]
+    matrix: np.ndarray
+    rows: Dict[str, int]
+    loaded_at: float
+
+
+class ResolutionIndex:
+    """
+    Per-user in-memory copy of the vectors resolution matches against.
+
+    Example:
+        index = ResolutionIndex("entity", db.get_entity_embeddings)
+        db.changes.subscribe(index.on_change)
+        with resolve_lock:
+            resolutions = index.resolve(user_id, embeddings, threshold=0.7)
+            for resolution in resolutions:
+                save(resolution.uuid, ...)
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        load: Callable[[Optional[str]], List[Dict[str, Any]]],
+        max_users: int = 32,
+        ttl_seconds: float = 600.0,
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            kind: Change feed kind of the indexed documents ("entity" or "edge")
+            load: Returns the rows (uuid, embedding) a user's resolution
+                scans, e.g. RyugraphDB.get_entity_embeddings
+            max_users: Users whose vectors are kept (least recently resolved
+                are evicted)
+            ttl_seconds: Maximum age of a user's copy (0 = no limit)
+        """
+        self.kind = kind
+        self.load = load
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._users: "OrderedDict[Optional[str], _UserVectors]" = OrderedDict()
+        # Bumped on every change that drops a copy, so a load racing a write is not kept
+        self._generations: Dict[Optional[str], int] = {}
+        self._global_generation = 0
+
+    def resolve(
+        self,
+        user_id: Optional[str],
+        embeddings: Sequence[Sequence[float]],
+        threshold: float,
+        limit: int = 1,
+    ) -> List[Resolution]:
+        """
+        Resolve a set of items against the user's vectors and each other.
+
+        The result is the same as matching and saving the items one at a
+        time: an item can resolve to a document an earlier item created,
+        and a document an earlier item resolved to is compared with that
+        item's vector (saving a match replaces the stored vector). The
+        items' vectors are recorded under the UUIDs they resolve to, so the
+        caller must save every resolution (call invalidate if saving fails).
+
+        Args:
+            user_id: User ID (None for all users)
+            embeddings: Item embeddings, in resolution order
+            threshold: Minimum cosine similarity of a match
+            limit: Maximum number of matches reported per item
+
+        Returns:
+            One Resolution per item
+        """
+        if len(embeddings) == 0:
+            return []
+
+        queries = _normalize(np.asarray(embeddings, dtype=np.float32))
+        vectors = self._vectors(user_id)
+        existing = queries @ vectors.matrix.T if len(vectors.uuids) else np.empty((len(queries), 0), np.float32)
+        among_items = queries @ queries.T
+
+        resolutions: List[Resolution] = []
+        # UUID -> item whose vector the document holds after that item is saved
+        written: Dict[str, int] = {}
+        for i, similarities in enumerate(existing):
+            candidates: Dict[str, float] = {
+                uuid: float(among_items[i, j]) for uuid, j in written.items() if among_items[i, j] >= threshold
+            }
+            # Rows replaced by earlier items are compared with their new vectors above
+            above = np.nonzero(similarities >= threshold)[0]
+            wanted = limit + len(written)
+            if len(above) > wanted:
+                above = above[np.argpartition(-similarities[above], wanted - 1)[:wanted]]
+            for row in above:
+                uuid = vectors.uuids[row]
+                if uuid is not None and uuid not in written:
+                    candidates[uuid] = float(similarities[row])
+
+            matches = sorted(candidates.items(), key=lambda match: match[1], reverse=True)[:limit]
+            resolution = Resolution(uuid=matches[0][0] if matches else str(uuid4()), matches=matches)
+            written[resolution.uuid] = i
+            resolutions.append(resolution)
+
+        self._record(user_id, vectors, {uuid: queries[i] for uuid, i in written.items()})
+        return resolutions
+
+    def _vectors(self, user_id: Optional[str]) -> _UserVectors:
+        """The user's vectors, loaded from the database if not cached."""
+        with self._lock:
+            vectors = self._users.get(user_id)
+            if vectors is not None and self.ttl_seconds and time.monotonic() - vectors.loaded_at > self.ttl_seconds:
+                del self._users[user_id]
+                vectors = None
+            if vectors is not None:
+                self._users.move_to_end(user_id)
+                return vectors
+            generation = self._generation(user_id)
+
+        rows = self.load(user_id)
+        uuids: List[Optional[str]] = [row["uuid"] for row in rows]
+        matrix = (
+            _normalize(np.asarray([row["embedding"] for row in rows], dtype=np.float32))
+            if rows else np.empty((0, 0), dtype=np.float32)
+        )
+        vectors = _UserVectors(
+            uuids=uuids,
+            matrix=matrix,
+            rows={uuid: row for row, uuid in enumerate(uuids)},
+            loaded_at=time.monotonic(),
+        )
+        logger.debug(f"Loaded {len(uuids)} {self.kind} vectors for user {user_id}")
+
+        with self._lock:
+            if generation == self._generation(user_id):
+                self._users[user_id] = vectors
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+        return vectors
+
+    def _record(self, user_id: Optional[str], vectors: _UserVectors, written: Dict[str, np.ndarray]) -> None:
+        """Store the vectors the caller is about to save in the user's copy."""
+        with self._lock:
+            if self._users.get(user_id) is not vectors:
+                return  # Not cached (evicted, or dropped by a concurrent change)
+            appended = []
+            for uuid, vector in written.items():
+                row = vectors.rows.get(uuid)
+                if row is not None:
+                    vectors.matrix[row] = vector
+                else:
+                    vectors.rows[uuid] = len(vectors.uuids)
+                    vectors.uuids.append(uuid)
+                    appended.append(vector)
+            if appended:
+                new_rows = np.stack(appended)
+                vectors.matrix = np.vstack([vectors.matrix, new_rows]) if vectors.matrix.size else new_rows
+
+    def _generation(self, user_id: Optional[str]) -> Tuple[int, int]:
+        return self._generations.get(user_id, 0), self._global_generation
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """
+        Drop the cached vectors of a user (or of every user when None).
+
+        Args:
+            user_id: User whose documents changed (None = all users)
+        """
+        with self._lock:
+            if user_id is None:
+                self._global_generation += 1
+                self._users.clear()
+                return
+            # The copy over all users (user_id=None) includes this user's vectors
+            for key in (user_id, None):
+                self._generations[key] = self._generations.get(key, 0) + 1
+                self._users.pop(key, None)
+
+    def _remove(self, uuid: str) -> None:
+        """Remove a document from every cached copy that holds it."""
+        with self._lock:
+            for vectors in self._users.values():
+                row = vectors.rows.pop(uuid, None)
+                if row is not None:
+                    vectors.uuids[row] = None
+                    vectors.matrix[row] = 0.0
+
+    def on_change(self, event: ChangeEvent) -> None:
+        """Change feed subscriber: keep the cached vectors in sync with writes."""
+        if event.kind == "graph":
+            self.invalidate()
+        elif event.op == "delete_user":
+            self.invalidate(event.user_id)
+        elif event.kind == self.kind:
+            if event.op in ("delete", "invalidate") and event.uuid:
+                self._remove(event.uuid)
+            elif event.op == "upsert":
+                self._drop_unless_held(event.user_id, event.uuid)
+        elif event.kind == "entity" and event.op == "delete":
+            # Deleting an entity deletes its edges too
+            self.invalidate(event.user_id)
+
+    def _drop_unless_held(self, user_id: Optional[str], uuid: Optional[str]) -> None:
+        """Drop the copies a written document belongs to, unless resolution recorded it."""
+        if user_id is None:
+            self.invalidate()
+            return
+        with self._lock:
+            for key in (user_id, None):
+                vectors = self._users.get(key)
+                if vectors is None or uuid not in vectors.rows:
+                    # Written outside resolution; its vector is unknown
+                    self._generations[key] = self._generations.get(key, 0) + 1
+                    self._users.pop(key, None)
+
+    def __repr__(self) -> str:
+        return f"ResolutionIndex(kind={self.kind!r}, users={len(self._users)}, max_users={self.max_users})"
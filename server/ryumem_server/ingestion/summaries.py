@@ -0,0 +1,231 @@
+"""
+Deferred, coalesced regeneration of entity summaries.
+
+Ingestion used to regenerate the summary of every entity an episode
+mentions before returning: one LLM call per entity per episode, and an
+entity mentioned by ten episodes in a row was summarized ten times.
+SummaryScheduler instead marks the entities dirty and collects the new
+context of each one; a background thread regenerates the dirty summaries
+once per tick. Each tick takes at most max_per_tick entities (oldest marks
+first), reads them and their relationships in bulk, runs up to max_workers
+LLM calls concurrently and saves the summaries with one statement.
+
+An entity is regenerated at most once per min_interval_seconds: contexts
+that arrive meanwhile are coalesced into its next regeneration. Pending
+marks are not persisted: close() regenerates them before it returns, and
+marks of a process that stops without closing are lost (the entity is
+marked again the next time an episode mentions it).
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from ryumem_server.core.changes import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _Dirty:
+    """Pending regeneration of one entity: its owner and new contexts, oldest first."""
+    user_id: Optional[str]
+    contexts: List[str] = field(default_factory=list)
+
+
+class SummaryScheduler:
+    """
+    Regenerates the summaries of dirty entities in the background.
+
+    Example:
+        scheduler = SummaryScheduler(entity_extractor, max_workers=4)
+        db.changes.subscribe(scheduler.on_change)
+        scheduler.mark(user_id, [entity.uuid for entity in entities], content)
+        scheduler.flush()  # regenerate everything pending now
+        scheduler.close()  # flushes what is still pending
+    """
+
+    def __init__(
+        self,
+        entity_extractor: Any,
+        max_workers: int = 4,
+        tick_seconds: float = 1.0,
+        min_interval_seconds: float = 60.0,
+        max_per_tick: int = 64,
+        max_context_chars: int = 4000,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            entity_extractor: EntityExtractor that regenerates the summaries
+                (see EntityExtractor.update_entity_summaries)
+            max_workers: Concurrent LLM calls of a tick
+            tick_seconds: Time between two regeneration rounds
+            min_interval_seconds: Minimum time between two regenerations of
+                the same entity
+            max_per_tick: Entities regenerated per tick at most
+            max_context_chars: New context kept per entity (the most recent
+                contexts are kept)
+        """
+        self.entity_extractor = entity_extractor
+        self.max_workers = max_workers
+        self.tick_seconds = tick_seconds
+        self.min_interval_seconds = min_interval_seconds
+        self.max_per_tick = max_per_tick
+        self.max_context_chars = max_context_chars
+        self._lock = threading.Lock()
+        self._dirty: "OrderedDict[str, _Dirty]" = OrderedDict()
+        # Entity UUID -> time.monotonic() of its last regeneration
+        self._regenerated_at: Dict[str, float] = {}
+        # Serializes rounds (the background tick and flush)
+        self._round_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._regenerated = 0
+
+    def mark(self, user_id: Optional[str], entity_uuids: Iterable[str], context: str) -> None:
+        """
+        Mark entities dirty with new context about them.
+
+        Args:
+            user_id: Owner of the entities
+            entity_uuids: Entities the context mentions
+            context: New contextual information (e.g. the episode content)
+        """
+        with self._lock:
+            if self._closed:
+                return
+            for uuid in entity_uuids:
+                dirty = self._dirty.get(uuid)
+                if dirty is None:
+                    dirty = self._dirty[uuid] = _Dirty(user_id=user_id)
+                if context and context not in dirty.contexts:
+                    dirty.contexts.append(context)
+                    self._trim(dirty)
+            self._start()
+
+    def _trim(self, dirty: _Dirty) -> None:
+        """Drop the oldest contexts beyond max_context_chars (the newest is always kept)."""
+        while len(dirty.contexts) > 1 and sum(len(c) for c in dirty.contexts) > self.max_context_chars:
+            dirty.contexts.pop(0)
+
+    def _start(self) -> None:
+        """Start the background thread on the first mark (caller holds _lock)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ryumem-summaries", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Background thread: one round per tick until closed."""
+        while not self._wake.wait(self.tick_seconds):
+            try:
+                self._round(force=False)
+            except Exception as e:
+                logger.error(f"Summary regeneration round failed: {e}", exc_info=True)
+
+    def flush(self) -> int:
+        """
+        Regenerate every pending summary now, ignoring the per-entity
+        interval and the per-tick budget.
+
+        Returns:
+            Number of summaries regenerated
+        """
+        regenerated = 0
+        while True:
+            count = self._round(force=True)
+            if count is None:
+                return regenerated
+            regenerated += count
+
+    def _round(self, force: bool) -> Optional[int]:
+        """
+        Regenerate the due dirty entities (all of them when forced).
+
+        Returns:
+            Number of summaries regenerated, or None if nothing was due
+        """
+        with self._round_lock:
+            now = time.monotonic()
+            with self._lock:
+                # Forget regenerations older than the interval
+                self._regenerated_at = {
+                    uuid: at for uuid, at in self._regenerated_at.items()
+                    if now - at < self.min_interval_seconds
+                }
+                due = [
+                    uuid for uuid in self._dirty
+                    if force or uuid not in self._regenerated_at
+                ]
+                if not force:
+                    due = due[:self.max_per_tick]
+                if not due:
+                    return None
+                contexts = {uuid: "\n\n".join(self._dirty.pop(uuid).contexts) for uuid in due}
+
+            try:
+                updated = self.entity_extractor.update_entity_summaries(contexts, max_workers=self.max_workers)
+            except Exception as e:
+                # Not marked dirty again: a failure that repeats would retry forever
+                logger.error(f"Error regenerating {len(contexts)} entity summaries: {e}", exc_info=True)
+                updated = []
+
+            with self._lock:
+                finished = time.monotonic()
+                for uuid in contexts:
+                    self._regenerated_at[uuid] = finished
+                self._regenerated += len(updated)
+            logger.debug(f"Regenerated {len(updated)}/{len(contexts)} entity summaries")
+            return len(updated)
+
+    def on_change(self, event: ChangeEvent) -> None:
+        """Change feed subscriber: forget the marks of deleted entities."""
+        if event.kind == "graph":
+            with self._lock:
+                self._dirty.clear()
+        elif event.op == "delete_user":
+            with self._lock:
+                for uuid in [uuid for uuid, dirty in self._dirty.items() if dirty.user_id == event.user_id]:
+                    del self._dirty[uuid]
+        elif event.kind == "entity" and event.op == "delete" and event.uuid:
+            with self._lock:
+                self._dirty.pop(event.uuid, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Pending (dirty) entities and summaries regenerated so far."""
+        with self._lock:
+            return {"pending": len(self._dirty), "regenerated": self._regenerated}
+
+    def close(self, flush: bool = True) -> None:
+        """
+        Stop the background thread.
+
+        A running round finishes; further marks are ignored.
+
+        Args:
+            flush: Regenerate the pending summaries before returning
+                (otherwise they are dropped)
+        """
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        self._wake.set()
+        if thread is not None:
+            thread.join()
+        if flush:
+            self.flush()
+        with self._lock:
+            if self._dirty:
+                logger.info(f"Dropped {len(self._dirty)} pending entity summary updates")
+            self._dirty.clear()
+
+    def __repr__(self) -> str:
+        return (
+            f"SummaryScheduler(max_workers={self.max_workers}, tick_seconds={self.tick_seconds}, "
+            f"min_interval_seconds={self.min_interval_seconds}, max_per_tick={self.max_per_tick})"
+        )
@@ -4,15 +4,29 @@ Main class providing the public API.
 """
 
 import logging
+import shutil
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
+from ryumem.core.config import EpisodeConfig
+from ryumem_server.core.changes import ChangeEvent
 from ryumem_server.core.config import RyumemConfig
 from ryumem_server.core.graph_db import RyugraphDB
 from ryumem_server.core.models import EpisodeNode, EpisodeType, EntityNode, EntityEdge, SearchConfig, SearchResult
+from ryumem_server.ingestion.backfill import BackfillProgress, ExtractionBackfill
 from ryumem_server.ingestion.episode import EpisodeIngestion
+from ryumem_server.ingestion.queue import IngestionJob, IngestionQueue, JobStatus
 from ryumem_server.maintenance.pruner import MemoryPruner
+from ryumem_server.retrieval.analyzer import Analyzer
+from ryumem_server.retrieval.bm25 import BM25Index
+from ryumem_server.retrieval.db_keyword import DBKeywordIndex
+from ryumem_server.retrieval.fts import FTSKeywordIndex
+from ryumem_server.retrieval.planner import StrategyPlanner
+from ryumem_server.retrieval.result_cache import SearchResultCache
 from ryumem_server.retrieval.search import SearchEngine
+from ryumem_server.retrieval.sharded_bm25 import ShardedBM25Index
 from ryumem_server.utils.embeddings import EmbeddingClient
 from ryumem_server.utils.llm import LLMClient
 from ryumem_server.utils.llm_ollama import OllamaClient
@@ -180,29 +194,86 @@ class Ryumem:
                 timeout=self.config.embedding.timeout_seconds,
             )
 
-        # Initialize search engine first (creates BM25 index)
+        # Create the BM25 index (optionally sharded by user_id)
+        if self.config.search.bm25_shard_by_user:
+            self._bm25_path = str(db_path_obj.parent / f"{db_path_obj.stem}_bm25_shards")
+        else:
+            self._bm25_path = str(db_path_obj.parent / f"{db_path_obj.stem}_bm25.pkl")
+        bm25_index = self._new_keyword_index()
+
+        # BM25 rebuild state (see bm25_index_status)
+        self._bm25_lock = threading.Lock()
+        self._bm25_save_lock = threading.Lock()
+        self._bm25_deferred_lock = threading.Lock()
+        self._bm25_state = "ready"
+        self._bm25_rebuild_thread: Optional[threading.Thread] = None
+        self._bm25_rebuild_pending = False
+        self._bm25_last_error: Optional[str] = None
+        self._bm25_rebuilt_at: Optional[datetime] = None
+        self._closed = False
+
+        # Search results are cached until the user's data changes (see _on_change)
+        result_cache = None
+        if self.config.search.result_cache_enabled:
+            result_cache = SearchResultCache(
+                max_entries=self.config.search.result_cache_size,
+                ttl_seconds=self.config.search.result_cache_ttl_seconds,
+            )
+
+        # Hybrid searches skip the strategies a user's data cannot answer
+        planner = None
+        if self.config.search.hybrid_planner_enabled:
+            planner = StrategyPlanner(
+                self.db,
+                confidence_score=self.config.search.hybrid_planner_confidence,
+                short_query_terms=self.config.search.hybrid_planner_short_query_terms,
+            )
+
+        # Initialize search engine
         self.search_engine = SearchEngine(
             db=self.db,
             embedding_client=self.embedding_client,
+            bm25_index=bm25_index,
             episode_config=self.config.episode,
+            parallel_hybrid=self.config.search.hybrid_parallel,
+            max_workers=self.config.search.hybrid_max_workers,
+            strategy_budgets={
+                "semantic": self.config.search.semantic_budget_ms / 1000,
+                "bm25": self.config.search.bm25_budget_ms / 1000,
+                "traversal": self.config.search.traversal_budget_ms / 1000,
+            },
+            traversal_max_nodes=self.config.search.traversal_max_nodes,
+            traversal_max_edges=self.config.search.traversal_max_edges,
+            result_cache=result_cache,
+            planner=planner,
         )
 
-        # Try to load existing BM25 index from disk
-        bm25_path = str(db_path_obj.parent / f"{db_path_obj.stem}_bm25.pkl")
-        if self.search_engine.bm25_index.load(bm25_path):
-            logger.info(f"Loaded BM25 index from {bm25_path}")
-            # Check if index is empty but database has data - rebuild if needed
-            stats = self.search_engine.bm25_index.stats()
-            if stats["entity_count"] == 0 and stats["edge_count"] == 0 and stats["episode_count"] == 0:
-                logger.info("BM25 index is empty, rebuilding from database...")
-                self._rebuild_bm25_index()
-            # Check if episode_map is incomplete (old pickle file format) - rebuild if needed
-            elif stats["episode_count"] > 0 and len(self.search_engine.bm25_index.episode_map) == 0:
-                logger.info("BM25 index episode_map is empty (old format), rebuilding from database...")
-                self._rebuild_bm25_index()
+        # Try to load existing BM25 index from disk and catch up with the change feed
+        if isinstance(bm25_index, FTSKeywordIndex):
+            # Maintained by the database itself
+            needs_rebuild = False
+        elif self.search_engine.bm25_index.load(self._bm25_path):
+            logger.info(f"Loaded BM25 index from {self._bm25_path}")
+            needs_rebuild = not self._replay_bm25_changes()
         else:
-            logger.info("No existing BM25 index found, rebuilding from database...")
-            self._rebuild_bm25_index()
+            logger.info("No usable BM25 index found, rebuilding from database...")
+            needs_rebuild = True
+            if self.config.search.bm25_background_rebuild:
+                # Serve keyword queries from the database until the index is built
+                self.search_engine.bm25_index = DBKeywordIndex(
+                    self.db,
+                    analyzer=Analyzer(
+                        fold_unicode=self.config.search.bm25_fold_unicode,
+                        remove_stopwords=self.config.search.bm25_remove_stopwords,
+                    ),
+                )
+
+        # Keep the BM25 index and the result cache in sync with every database write
+        self.db.changes.subscribe(self._on_change)
+        if result_cache is not None:
+            self.db.changes.subscribe(result_cache.on_change)
+        if planner is not None:
+            self.db.changes.subscribe(planner.on_change)
 
         # Initialize ingestion pipeline with BM25 index
         self.ingestion = EpisodeIngestion(
@@ -212,14 +283,57 @@ class Ryumem:
             entity_similarity_threshold=self.config.entity_extraction.entity_similarity_threshold,
             relationship_similarity_threshold=self.config.entity_extraction.relationship_similarity_threshold,
             max_context_episodes=self.config.entity_extraction.max_context_episodes,
+            extraction_mode=self.config.entity_extraction.extraction_mode,
             bm25_index=self.search_engine.bm25_index,
             enable_entity_extraction=self.config.entity_extraction.enabled,
             episode_config=self.config.episode,
+            extraction_concurrency=self.config.ingestion.batch_extraction_concurrency,
+            resolution_index_users=self.config.ingestion.resolution_index_users,
+            resolution_index_ttl_seconds=self.config.ingestion.resolution_index_ttl_seconds,
+            contradiction_candidates=self.config.ingestion.contradiction_candidates,
+            contradiction_similarity_threshold=self.config.ingestion.contradiction_similarity_threshold,
+            deferred_summaries=self.config.ingestion.deferred_summaries,
+            summary_workers=self.config.ingestion.summary_workers,
+            summary_tick_seconds=self.config.ingestion.summary_tick_seconds,
+            summary_min_interval_seconds=self.config.ingestion.summary_min_interval_seconds,
+            summary_max_per_tick=self.config.ingestion.summary_max_per_tick,
+            duplicate_index=self.config.ingestion.duplicate_index_enabled,
+            duplicate_index_retention_hours=self.config.ingestion.duplicate_index_retention_hours,
+            duplicate_index_bucket_hours=self.config.ingestion.duplicate_index_bucket_hours,
+            chunk_max_tokens=self.config.ingestion.chunk_max_tokens,
+            chunk_overlap_tokens=self.config.ingestion.chunk_overlap_tokens,
+            chunk_tokenizer=self.config.ingestion.chunk_tokenizer,
+        )
+
+        # Extraction of asynchronously added episodes runs in the background;
+        # resume the jobs a previous process left behind
+        self.ingestion_queue = IngestionQueue(
+            self.db,
+            self.ingestion,
+            max_workers=self.config.ingestion.queue_workers,
+            max_attempts=self.config.ingestion.queue_max_attempts,
+            retry_base_seconds=self.config.ingestion.queue_retry_base_seconds,
+            retry_max_seconds=self.config.ingestion.queue_retry_max_seconds,
+            job_retention_hours=self.config.ingestion.queue_job_retention_hours,
+        )
+        self.ingestion_queue.recover()
+
+        # Extraction of episodes saved without it runs on demand (see start_extraction_backfill)
+        self.extraction_backfill = ExtractionBackfill(
+            self.db,
+            self.ingestion,
+            max_episodes_per_prompt=self.config.ingestion.backfill_episodes_per_prompt,
+            max_prompt_chars=self.config.ingestion.backfill_max_prompt_chars,
+            max_prompts_per_minute=self.config.ingestion.backfill_prompts_per_minute,
         )
 
         # Initialize memory pruner
         self.memory_pruner = MemoryPruner(db=self.db)
 
+        if needs_rebuild:
+            self._schedule_bm25_rebuild()
+            self._run_deferred_bm25_rebuild()
+
         logger.info(f"Ryumem initialized successfully (db: {self.config.database.db_path})")
 
     def add_episode(
@@ -273,19 +387,6 @@ class Ryumem:
         from ryumem_server.core.models import EpisodeKind
         kind_enum = EpisodeKind.from_str(kind)
 
-        # Apply user overrides to episode config if provided
-        episode_config = self.config.episode
-        if enable_embeddings is not None or deduplication_enabled is not None:
-            from ryumem.core.config import EpisodeConfig
-            # Create temporary config with overrides
-            episode_config = EpisodeConfig(
-                enable_embeddings=enable_embeddings if enable_embeddings is not None else self.config.episode.enable_embeddings,
-                deduplication_enabled=deduplication_enabled if deduplication_enabled is not None else self.config.episode.deduplication_enabled,
-                similarity_threshold=self.config.episode.similarity_threshold,
-                bm25_similarity_threshold=self.config.episode.bm25_similarity_threshold,
-                time_window_hours=self.config.episode.time_window_hours,
-            )
-
         episode_id = self.ingestion.ingest(
             content=content,
             user_id=user_id,
@@ -295,49 +396,223 @@ class Ryumem:
             kind=kind_enum,
             metadata=metadata,
             extract_entities=extract_entities,
-            episode_config_override=episode_config,
+            episode_config_override=self._episode_config(enable_embeddings, deduplication_enabled),
         )
 
         # Persist BM25 index to disk after ingestion
-        bm25_path = str(Path(self.config.database.db_path).parent / f"{Path(self.config.database.db_path).stem}_bm25.pkl")
-        self.search_engine.bm25_index.save(bm25_path)
+        self._save_bm25_index()
 
         return episode_id
 
+    def queue_episode(
+        self,
+        content: str,
+        user_id: str,
+        agent_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        source: str = "text",
+        kind: str = "query",
+        metadata: Optional[Dict] = None,
+        extract_entities: Optional[bool] = None,
+        enable_embeddings: Optional[bool] = None,
+        deduplication_enabled: Optional[bool] = None,
+    ) -> Tuple[str, Optional[IngestionJob]]:
+        """
+        Add a new episode, extracting entities and relationships in the background.
+
+        The episode node and its embedding are saved before this returns
+        (so the episode is searchable right away); steps 2-6 of add_episode
+        run as a job of the ingestion queue. Jobs are stored in the database
+        and survive restarts.
+
+        Args:
+            Same as add_episode
+
+        Returns:
+            Tuple of (episode UUID, queued job). The job is None when there is
+            nothing to extract: the episode duplicates an existing one, or
+            entity extraction is disabled.
+
+        Example:
+            episode_id, job = ryumem.queue_episode(
+                content="Alice works at Google in Mountain View",
+                user_id="user_123",
+                extract_entities=True,
+            )
+            ryumem.get_ingestion_job(job.id).status  # "queued" ... "done"
+        """
+        from ryumem_server.core.models import EpisodeKind
+
+        episode_id, created = self.ingestion.create_episode(
+            content=content,
+            user_id=user_id,
+            agent_id=agent_id,
+            session_id=session_id,
+            source=EpisodeType.from_str(source),
+            kind=EpisodeKind.from_str(kind),
+            metadata=metadata,
+            episode_config_override=self._episode_config(enable_embeddings, deduplication_enabled),
+        )
+
+        # Persist BM25 index to disk after ingestion
+        self._save_bm25_index()
+
+        job = None
+        if created and self.ingestion.should_extract(extract_entities):
+            job = self.ingestion_queue.submit(episode_id, user_id, session_id=session_id)
+        return episode_id, job
+
+    def get_ingestion_job(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        Get a background extraction job (see queue_episode).
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            The job, or None if not found
+        """
+        return self.ingestion_queue.get(job_id)
+
+    def list_ingestion_jobs(
+        self,
+        user_id: Optional[str] = None,
+        status: Optional[JobStatus] = None,
+        limit: int = 50,
+    ) -> List[IngestionJob]:
+        """
+        List background extraction jobs, newest first.
+
+        Args:
+            user_id: Only jobs of this user
+            status: Only jobs with this status (queued, running, done, failed)
+            limit: Maximum number of jobs
+
+        Returns:
+            List of jobs
+        """
+        return self.ingestion_queue.list(user_id=user_id, status=status, limit=limit)
+
+    def start_extraction_backfill(self, user_id: Optional[str] = None) -> BackfillProgress:
+        """
+        Extract the entities and relationships of episodes saved without
+        extraction (e.g. a history import with extract_entities=False), in
+        the background. Several short episodes are extracted per prompt.
+
+        Starting it again after stop_extraction_backfill (or a restart)
+        resumes with the episodes not extracted yet.
+
+        Args:
+            user_id: Only extract the episodes of this user (None = all users)
+
+        Returns:
+            Progress of the backfill (the running one if already started)
+
+        Example:
+            ryumem.start_extraction_backfill(user_id="user_123")
+            ryumem.extraction_backfill_status().extracted
+        """
+        return self.extraction_backfill.start(user_id=user_id)
+
+    def stop_extraction_backfill(self) -> BackfillProgress:
+        """
+        Stop the running extraction backfill after its current prompt.
+
+        Returns:
+            Progress when the backfill stopped
+        """
+        return self.extraction_backfill.stop()
+
+    def extraction_backfill_status(self) -> BackfillProgress:
+        """
+        Progress of the running (or last) extraction backfill.
+
+        Returns:
+            Backfill progress
+        """
+        return self.extraction_backfill.status()
+
+    def _episode_config(
+        self,
+        enable_embeddings: Optional[bool],
+        deduplication_enabled: Optional[bool],
+    ) -> EpisodeConfig:
+        """Episode config with per-request overrides applied."""
+        episode_config = self.config.episode
+        if enable_embeddings is not None or deduplication_enabled is not None:
+            # Create temporary config with overrides
+            episode_config = EpisodeConfig(
+                enable_embeddings=enable_embeddings if enable_embeddings is not None else self.config.episode.enable_embeddings,
+                deduplication_enabled=deduplication_enabled if deduplication_enabled is not None else self.config.episode.deduplication_enabled,
+                similarity_threshold=self.config.episode.similarity_threshold,
+                bm25_similarity_threshold=self.config.episode.bm25_similarity_threshold,
+                near_duplicate_threshold=self.config.episode.near_duplicate_threshold,
+                time_window_hours=self.config.episode.time_window_hours,
+            )
+        return episode_config
+
     def add_episodes_batch(
         self,
         episodes: List[Dict],
         user_id: str,
-    ) -> List[str]:
+        extract_entities: Optional[bool] = None,
+        enable_embeddings: Optional[bool] = None,
+        deduplication_enabled: Optional[bool] = None,
+    ) -> List[Dict[str, Optional[str]]]:
         """
         Add multiple episodes in batch.
 
+        Contents are embedded with one call, deduplicated in bulk and saved
+        with one write; entity extraction then runs for several episodes at
+        a time (ingestion.batch_extraction_concurrency).
+
         Args:
             episodes: List of episode dictionaries with keys:
                 - content: Episode content (required)
                 - agent_id: Optional agent ID
                 - session_id: Optional session ID
-                - source: Optional source type
+                - source: Optional source type ("text", "message" or "json")
+                - kind: Optional episode kind ("query" or "memory")
                 - metadata: Optional metadata
             user_id: User ID (required)
+            extract_entities: Override config setting for entity extraction (None uses config default)
+            enable_embeddings: Override config setting for episode embeddings
+            deduplication_enabled: Override config setting for episode deduplication
 
         Returns:
-            List of episode UUIDs
+            One result per input episode, in input order, with keys
+            episode_id (a duplicate maps to the episode it duplicates, a
+            failed episode to None) and status ("created", "duplicate" or
+            "failed")
 
         Example:
             episodes = [
                 {"content": "Alice works at Google"},
                 {"content": "Bob lives in San Francisco"},
             ]
-            episode_ids = ryumem.add_episodes_batch(episodes, user_id="user_123")
+            results = ryumem.add_episodes_batch(episodes, user_id="user_123")
         """
-        episode_ids = self.ingestion.ingest_batch(episodes, user_id)
+        from ryumem_server.core.models import EpisodeKind
+
+        episodes = [
+            {
+                **episode,
+                **({"source": EpisodeType.from_str(episode["source"])} if isinstance(episode.get("source"), str) else {}),
+                **({"kind": EpisodeKind.from_str(episode["kind"])} if isinstance(episode.get("kind"), str) else {}),
+            }
+            for episode in episodes
+        ]
+        results = self.ingestion.ingest_batch(
+            episodes,
+            user_id,
+            extract_entities=extract_entities,
+            episode_config_override=self._episode_config(enable_embeddings, deduplication_enabled),
+        )
 
         # Persist BM25 index to disk after batch ingestion
-        bm25_path = str(Path(self.config.database.db_path).parent / f"{Path(self.config.database.db_path).stem}_bm25.pkl")
-        self.search_engine.bm25_index.save(bm25_path)
+        self._save_bm25_index()
 
-        return episode_ids
+        return results
 
     def get_episode_by_uuid(self, episode_uuid: str) -> Optional[Dict]:
         """
@@ -394,6 +669,22 @@ class Ryumem:
         """
         return self.db.get_triggered_episodes(source_uuid, source_type, limit)
 
+    def get_episode_chunks(self, episode_uuid: str) -> List[Dict[str, Any]]:
+        """
+        Get the chunks of a long document episode, in document order.
+
+        Documents longer than ingestion.chunk_max_tokens are saved with one
+        chunk episode per part; search and extraction use the chunks.
+
+        Args:
+            episode_uuid: UUID of the document episode
+
+        Returns:
+            List of chunks (uuid, name, content, position, metadata,
+            created_at, user_id); empty if the episode was not chunked
+        """
+        return self.db.get_episode_chunks(episode_uuid)
+
     def search(
         self,
         user_id: str,
@@ -408,6 +699,7 @@ class Ryumem:
         kinds: Optional[List[str]] = None,
         tags: Optional[List[str]] = None,
         tag_match_mode: str = 'any',
+        profile: bool = False,
     ) -> SearchResult:
         """
         Search the memory system.
@@ -422,6 +714,8 @@ class Ryumem:
             min_rrf_score: Minimum RRF score threshold for hybrid search (default: 0.025)
             min_bm25_score: Minimum BM25 score threshold for keyword search (default: 0.1)
             rrf_k: RRF constant for hybrid search (default: 60)
+            profile: Return per-stage timings, database query counts and
+                cache hits in results.metadata["profile"]
 
         Returns:
             SearchResult with entities, edges, and scores
@@ -438,6 +732,125 @@ class Ryumem:
                 print(f"Entity: {entity.name} ({entity.entity_type})")
                 print(f"Score: {results.scores.get(entity.uuid, 0.0):.3f}")
         """
+        config = self._search_config(
+            user_id, query, limit, strategy, similarity_threshold, max_depth,
+            min_rrf_score, min_bm25_score, rrf_k, kinds, tags, tag_match_mode,
+        )
+        config.profile = profile
+        self._run_deferred_bm25_rebuild()
+        return self.search_engine.search(config)
+
+    def search_stream(
+        self,
+        user_id: str,
+        query: Optional[str] = None,
+        limit: int = 10,
+        strategy: Optional[str] = None,
+        similarity_threshold: Optional[float] = None,
+        max_depth: int = 2,
+        min_rrf_score: Optional[float] = None,
+        min_bm25_score: Optional[float] = None,
+        rrf_k: Optional[int] = None,
+        kinds: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+        tag_match_mode: str = 'any',
+        profile: bool = False,
+    ) -> Iterator[Tuple[str, SearchResult]]:
+        """
+        Search the memory system, yielding partial results as they arrive.
+
+        A hybrid search yields each strategy's result ("bm25", "semantic",
+        "traversal") as soon as it finishes, then the fused result as
+        "final" (see SearchEngine.search_stream). Arguments are as in search().
+
+        Yields:
+            Tuples of (event name, SearchResult)
+
+        Example:
+            for event, results in ryumem.search_stream(user_id="user_123", query="Alice"):
+                print(event, [entity.name for entity in results.entities])
+        """
+        config = self._search_config(
+            user_id, query, limit, strategy, similarity_threshold, max_depth,
+            min_rrf_score, min_bm25_score, rrf_k, kinds, tags, tag_match_mode,
+        )
+        config.profile = profile
+        self._run_deferred_bm25_rebuild()
+        return self.search_engine.search_stream(config)
+
+    def search_batch(
+        self,
+        user_id: str,
+        queries: List[str],
+        limit: int = 10,
+        strategy: Optional[str] = None,
+        similarity_threshold: Optional[float] = None,
+        max_depth: int = 2,
+        min_rrf_score: Optional[float] = None,
+        min_bm25_score: Optional[float] = None,
+        rrf_k: Optional[int] = None,
+        kinds: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+        tag_match_mode: str = 'any',
+        fuse: bool = False,
+    ) -> Tuple[List[SearchResult], Optional[SearchResult]]:
+        """
+        Run several searches with shared user and filter options.
+
+        The queries are embedded with one batch call and scored against the
+        stored vectors together (see SearchEngine.search_batch).
+
+        Args:
+            user_id: User ID (required)
+            queries: Search query texts
+            fuse: Also fuse the per-query results into one with RRF
+            (other arguments as in search())
+
+        Returns:
+            Tuple of (per-query results in query order, fused result or None)
+
+        Example:
+            results, fused = ryumem.search_batch(
+                user_id="user_123",
+                queries=["Where does Alice work?", "Alice's employer"],
+                fuse=True,
+            )
+        """
+        configs = [
+            self._search_config(
+                user_id, query, limit, strategy, similarity_threshold, max_depth,
+                min_rrf_score, min_bm25_score, rrf_k, kinds, tags, tag_match_mode,
+            )
+            for query in queries
+        ]
+        self._run_deferred_bm25_rebuild()
+        results = self.search_engine.search_batch(configs)
+
+        fused = None
+        if fuse:
+            fused = self.search_engine.fuse_results(
+                results,
+                limit=limit,
+                k=configs[0].rrf_k if configs else 60,
+            )
+        return results, fused
+
+    def _search_config(
+        self,
+        user_id: str,
+        query: Optional[str],
+        limit: int,
+        strategy: Optional[str],
+        similarity_threshold: Optional[float],
+        max_depth: int,
+        min_rrf_score: Optional[float],
+        min_bm25_score: Optional[float],
+        rrf_k: Optional[int],
+        kinds: Optional[List[str]],
+        tags: Optional[List[str]],
+        tag_match_mode: str,
+    ) -> SearchConfig:
+        """Build a SearchConfig from search() arguments and configured defaults."""
         # Use default threshold from config if not provided
         if similarity_threshold is None:
             similarity_threshold = self.config.entity_extraction.entity_similarity_threshold
@@ -463,7 +876,7 @@ class Ryumem:
         if rrf_k is not None:
             config.rrf_k = rrf_k
 
-        return self.search_engine.search(config)
+        return config
 
     def get_entity_context(
         self,
@@ -1045,6 +1458,159 @@ class Ryumem:
         self.db.reset()
         logger.info("Database reset complete")
 
+    def _new_keyword_index(self) -> Union[BM25Index, ShardedBM25Index, FTSKeywordIndex]:
+        """
+        Create the keyword index for the configured backend.
+
+        Falls back to the in-process BM25 index when the ryugraph FTS
+        extension cannot be loaded.
+        """
+        if self.config.search.keyword_backend == "fts":
+            fts_index = FTSKeywordIndex(
+                self.db,
+                stem=self.config.search.bm25_stemming,
+                analyzer=Analyzer(
+                    fold_unicode=self.config.search.bm25_fold_unicode,
+                    remove_stopwords=self.config.search.bm25_remove_stopwords,
+                ),
+            )
+            try:
+                fts_index.ensure_indexes()
+                logger.info("Using ryugraph full-text search for keyword retrieval")
+                return fts_index
+            except RuntimeError as e:
+                logger.warning(f"{e}; falling back to the in-process BM25 index")
+        return self._new_bm25_index()
+
+    def _new_bm25_index(self, staging: bool = False) -> Union[BM25Index, ShardedBM25Index]:
+        """
+        Create an empty BM25 index of the configured kind.
+
+        Args:
+            staging: Sharded indexes built for a rebuild write their shards to a
+                separate directory until they are swapped in
+        """
+        analyzer = Analyzer(
+            fold_unicode=self.config.search.bm25_fold_unicode,
+            remove_stopwords=self.config.search.bm25_remove_stopwords,
+            stem=self.config.search.bm25_stemming,
+        )
+        if self.config.search.bm25_shard_by_user:
+            shard_dir = f"{self._bm25_path}.rebuild" if staging else self._bm25_path
+            if staging:
+                shutil.rmtree(shard_dir, ignore_errors=True)
+            return ShardedBM25Index(
+                shard_dir=shard_dir,
+                max_resident_shards=self.config.search.bm25_max_resident_shards,
+                analyzer=analyzer,
+            )
+        return BM25Index(analyzer=analyzer)
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        """Apply a database change event to the BM25 index."""
+        if not self.search_engine.bm25_index.apply_change(event):
+            logger.info(f"Change {event.seq} ({event.op} {event.kind}) requires a BM25 rebuild")
+            self._schedule_bm25_rebuild()
+
+    def _replay_bm25_changes(self) -> bool:
+        """
+        Bring a BM25 index loaded from disk up to date with the change feed.
+
+        Returns:
+            False if the index must be rebuilt (the log no longer covers the
+            index's last applied sequence or an event cannot be applied)
+        """
+        bm25_index = self.search_engine.bm25_index
+        changes = self.db.changes
+        if not changes.can_replay_from(bm25_index.last_applied_seq):
+            logger.info(
+                f"BM25 index at sequence {bm25_index.last_applied_seq} cannot be replayed "
+                f"(change feed at {changes.last_seq}), rebuilding from database..."
+            )
+            return False
+
+        events = changes.read_since(bm25_index.last_applied_seq)
+        for event in events:
+            if not bm25_index.apply_change(event):
+                logger.info(f"Change {event.seq} ({event.op} {event.kind}) requires a BM25 rebuild")
+                return False
+
+        if events:
+            logger.info(f"Replayed {len(events)} changes into BM25 index")
+            self._save_bm25_index()
+        return True
+
+    def _save_bm25_index(self) -> None:
+        """Persist the BM25 index and prune change events it already reflects."""
+        with self._bm25_save_lock:
+            bm25_index = self.search_engine.bm25_index
+            bm25_index.save(self._bm25_path)
+        self.db.changes.prune(bm25_index.last_applied_seq)
+
+    def _schedule_bm25_rebuild(self) -> None:
+        """
+        Rebuild the BM25 index, in a background thread if configured.
+
+        While a background rebuild runs, the current index (or the database
+        fallback when there is none) keeps serving queries and receiving
+        changes. A rebuild requested meanwhile runs once the current one ends.
+
+        Without background rebuilds, the rebuild is deferred to the next
+        search (see _run_deferred_bm25_rebuild): this is called while a change
+        is delivered, and the writer waits for the delivery.
+        """
+        if not self.config.search.bm25_background_rebuild:
+            with self._bm25_lock:
+                self._bm25_rebuild_pending = True
+                self._bm25_state = "lagging"
+            return
+
+        with self._bm25_lock:
+            if self._closed:
+                return
+            if self._bm25_rebuild_thread is not None:
+                self._bm25_rebuild_pending = True
+                return
+            serving_fallback = isinstance(self.search_engine.bm25_index, DBKeywordIndex)
+            self._bm25_state = "building" if serving_fallback else "lagging"
+            self._bm25_rebuild_thread = threading.Thread(
+                target=self._bm25_rebuild_worker,
+                name=f"bm25-rebuild-{Path(self.config.database.db_path).stem}",
+                daemon=True,
+            )
+            self._bm25_rebuild_thread.start()
+
+    def _run_deferred_bm25_rebuild(self) -> None:
+        """Run a rebuild deferred by _schedule_bm25_rebuild before the index is used."""
+        if self.config.search.bm25_background_rebuild or not self._bm25_rebuild_pending:
+            return
+        # Concurrent searches wait for the one rebuild rather than read the stale index
+        with self._bm25_deferred_lock:
+            with self._bm25_lock:
+                if not self._bm25_rebuild_pending or self._closed:
+                    return
+                self._bm25_rebuild_pending = False
+            try:
+                self._rebuild_bm25_index()
+            except Exception as e:
+                self._bm25_last_error = str(e)
+                logger.error(f"Deferred BM25 rebuild failed: {e}", exc_info=True)
+
+    def _bm25_rebuild_worker(self) -> None:
+        """Background thread running rebuilds until none is pending."""
+        while True:
+            try:
+                self._rebuild_bm25_index()
+            except Exception as e:
+                self._bm25_last_error = str(e)
+                logger.error(f"Background BM25 rebuild failed: {e}", exc_info=True)
+
+            with self._bm25_lock:
+                if not self._bm25_rebuild_pending or self._closed:
+                    self._bm25_rebuild_thread = None
+                    return
+                self._bm25_rebuild_pending = False
+
     def _rebuild_bm25_index(self) -> None:
         """
         Rebuild BM25 index from existing database data.
@@ -1053,34 +1619,101 @@ class Ryumem:
         - BM25 index file was lost or corrupted
         - Database was populated before BM25 persistence was added
         - Need to ensure BM25 index is in sync with database
+
+        A fresh index is built next to the serving one, caught up with the
+        changes emitted during the build, and swapped in atomically.
         """
-        # Clear existing index
-        self.search_engine.bm25_index.clear()
+        swapped = False
+        while not swapped and not self._closed:
+            # Changes emitted from here on are replayed on top before the swap
+            with self.db.changes.retain() as start_seq:
+                bm25_index = self._new_bm25_index(staging=True)
+                bm25_index.last_applied_seq = start_seq
+                self._populate_bm25_index(bm25_index)
+
+                with self.db.changes.hold():
+                    if self._closed:
+                        break
+                    events = self.db.changes.read_since(start_seq)
+                    if all(bm25_index.apply_change(event) for event in events):
+                        self._swap_bm25_index(bm25_index)
+                        swapped = True
+                    else:
+                        logger.info("Database changed during the BM25 rebuild in a way that needs a new one")
 
+        # Save rebuilt index
+        if swapped:
+            self._save_bm25_index()
+
+    def _swap_bm25_index(self, bm25_index: Union[BM25Index, ShardedBM25Index]) -> None:
+        """Make a freshly built index the serving one (change feed is held)."""
+        with self._bm25_save_lock:
+            old_index = self.search_engine.bm25_index
+            if isinstance(bm25_index, ShardedBM25Index):
+                # The retiring index must not load or write shards while the
+                # staged shard directory replaces its own
+                if isinstance(old_index, ShardedBM25Index):
+                    old_index.detach()
+                staging_dir = bm25_index.shard_dir
+                bm25_index.save(str(staging_dir))
+                shutil.rmtree(self._bm25_path, ignore_errors=True)
+                staging_dir.rename(self._bm25_path)
+                bm25_index.shard_dir = Path(self._bm25_path)
+
+            self.search_engine.bm25_index = bm25_index
+            if hasattr(self, "ingestion"):
+                self.ingestion.bm25_index = bm25_index
+            if self.search_engine.result_cache is not None:
+                # Keyword results change with the index even though no data changed
+                self.search_engine.result_cache.invalidate()
+
+        self._bm25_state = "ready"
+        self._bm25_last_error = None
+        self._bm25_rebuilt_at = datetime.now(timezone.utc)
+
+    def _populate_bm25_index(self, bm25_index: Union[BM25Index, ShardedBM25Index]) -> None:
+        """Load every entity, edge and episode from the database into an index."""
         # Get all entities from database
         all_entities_data = self.db.get_all_entities()
         all_entities = [EntityNode(**e) for e in all_entities_data]
         logger.info(f"Loaded {len(all_entities)} entities for BM25 index")
 
+        if self._closed:
+            return
+
         # Get all edges from database
         all_edges_data = self.db.get_all_edges()
-        all_edges = [EntityEdge(**e) for e in all_edges_data]
+        all_edges = [
+            (
+                EntityEdge(
+                    uuid=e["uuid"],
+                    source_node_uuid=e["source_uuid"],
+                    target_node_uuid=e["target_uuid"],
+                    name=e["relation_type"],
+                    fact=e["fact"],
+                ),
+                e.get("user_id"),
+            )
+            for e in all_edges_data
+        ]
         logger.info(f"Loaded {len(all_edges)} edges for BM25 index")
 
+        if self._closed:
+            return
+
         # Get all episodes from database (use get_episodes with very high limit to get all)
         all_episodes_result = self.db.get_episodes(limit=1000000)
         all_episodes_data = all_episodes_result["episodes"]
 
         # Add entities and edges to BM25 index
         for entity in all_entities:
-            self.search_engine.bm25_index.add_entity(entity)
+            bm25_index.add_entity(entity)
         
-        for edge in all_edges:
-            self.search_engine.bm25_index.add_edge(edge)
+        for edge, edge_user_id in all_edges:
+            bm25_index.add_edge(edge, user_id=edge_user_id)
 
         # Rebuild episode index
         import json
-        from datetime import datetime
         from ryumem_server.core.models import EpisodeNode, EpisodeType, EpisodeKind
         for episode_data in all_episodes_data:
             try:
@@ -1115,19 +1748,75 @@ class Ryumem:
                         episode_kwargs["created_at"] = created_at_str.to_pydatetime() if hasattr(created_at_str, 'to_pydatetime') else created_at_str
 
                 episode = EpisodeNode(**episode_kwargs)
-                self.search_engine.bm25_index.add_episode(episode)
+                bm25_index.add_episode(episode)
             except Exception as e:
                 logger.warning(f"Failed to add episode {episode_data.get('uuid', 'unknown')} to BM25 index: {e}")
                 continue
 
-        # Save rebuilt index
-        bm25_path = str(Path(self.config.database.db_path).parent / f"{Path(self.config.database.db_path).stem}_bm25.pkl")
-        self.search_engine.bm25_index.save(bm25_path)
-
         logger.info(
             f"Rebuilt BM25 index: {len(all_entities)} entities, {len(all_edges)} edges, {len(all_episodes_data)} episodes"
         )
 
+    def bm25_index_status(self) -> Dict[str, Any]:
+        """
+        Report the state of the BM25 keyword index.
+
+        States:
+        - ready: the index is built and in sync with the change feed
+        - building: no index yet; keyword queries are served from the database
+        - lagging: a rebuild is running while a stale index keeps serving
+
+        Returns:
+            Dictionary with state, sequence numbers and index statistics
+        """
+        bm25_index = self.search_engine.bm25_index
+        change_seq = self.db.changes.last_seq
+        return {
+            "state": self._bm25_state,
+            "index_type": type(bm25_index).__name__,
+            "applied_seq": bm25_index.last_applied_seq,
+            "change_seq": change_seq,
+            "lag": max(change_seq - bm25_index.last_applied_seq, 0),
+            "rebuilding": self._bm25_rebuild_thread is not None,
+            "rebuilt_at": self._bm25_rebuilt_at.isoformat() if self._bm25_rebuilt_at else None,
+            "last_error": self._bm25_last_error,
+            "stats": bm25_index.stats(),
+        }
+
+    def search_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the hit/miss statistics of the search result cache.
+
+        Returns:
+            Cache statistics, or None if the result cache is disabled
+
+        Example:
+            stats = ryumem.search_cache_stats()
+            print(f"Hit rate: {stats['hit_rate']:.0%}")
+        """
+        if self.search_engine.result_cache is None:
+            return None
+        return self.search_engine.result_cache.stats()
+
+    def search_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the latency histograms of searches run by this instance.
+
+        Every search records its total time ("search.total") and the time of
+        each stage ("search.embed", "search.vector_scan", "search.keyword_scan",
+        "search.hydrate", "search.traverse", "search.fuse"); batched searches
+        record under "search_batch.*".
+
+        Returns:
+            Dictionary mapping histogram name to count, sum, max, estimated
+            percentiles and cumulative bucket counts (milliseconds)
+
+        Example:
+            metrics = ryumem.search_metrics()
+            print(f"p95: {metrics['search.total']['p95_ms']}ms")
+        """
+        return self.search_engine.metrics.snapshot()
+
     def close(self) -> None:
         """
         Close the database connection.
@@ -1135,6 +1824,22 @@ class Ryumem:
         Example:
             ryumem.close()
         """
+        with self._bm25_lock:
+            self._closed = True
+            rebuild_thread = self._bm25_rebuild_thread
+        if rebuild_thread is not None:
+            rebuild_thread.join()
+
+        self.extraction_backfill.close()
+        self.ingestion_queue.close()
+        self.ingestion.close()
+        self.search_engine.close()
+        self.db.changes.unsubscribe(self._on_change)
+        if self.search_engine.result_cache is not None:
+            self.db.changes.unsubscribe(self.search_engine.result_cache.on_change)
+        if self.search_engine.planner is not None:
+            self.db.changes.unsubscribe(self.search_engine.planner.on_change)
+        self._save_bm25_index()
         self.db.close()
         logger.info("Ryumem connection closed")
 
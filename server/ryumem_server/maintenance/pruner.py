@@ -69,15 +69,15 @@ class MemoryPruner:
         MATCH ()-[e:RELATES_TO]->()
         WHERE e.expired_at IS NOT NULL
           AND e.expired_at < $cutoff_date
-        DELETE e
-        RETURN COUNT(e) AS deleted_count
+        RETURN e.uuid AS uuid
         """
 
         result = self.db.execute(query, {
             "cutoff_date": cutoff_date,
         })
 
-        deleted_count = result[0]["deleted_count"] if result else 0
+        # Delete through the DB layer so derived indexes see the change
+        deleted_count = self.db.delete_edges([row["uuid"] for row in result])
         logger.info(f"Deleted {deleted_count} expired edges for user {user_id}")
         return deleted_count
 
@@ -114,8 +114,7 @@ class MemoryPruner:
         MATCH (e:Entity)
         WHERE e.mentions < $min_mentions
           AND e.created_at < $cutoff_date
-        DETACH DELETE e
-        RETURN COUNT(e) AS deleted_count
+        RETURN e.uuid AS uuid
         """
 
         result = self.db.execute(query, {
@@ -123,7 +122,8 @@ class MemoryPruner:
             "cutoff_date": cutoff_date,
         })
 
-        deleted_count = result[0]["deleted_count"] if result else 0
+        # Delete through the DB layer so derived indexes see the change
+        deleted_count = self.db.delete_entities([row["uuid"] for row in result])["entities"]
         logger.info(
             f"Deleted {deleted_count} low-mention entities for user {user_id} "
             f"(min_mentions={min_mentions}, min_age_days={min_age_days})"
@@ -286,13 +286,7 @@ class MemoryPruner:
         })
 
         # Delete edge2
-        query = """
-        MATCH ()-[e:RELATES_TO]->()
-        WHERE e.uuid = $uuid
-        DELETE e
-        """
-
-        self.db.execute(query, {"uuid": edge2["uuid"]})
+        self.db.delete_edges([edge2["uuid"]])
 
         logger.debug(f"Merged edge {edge2['uuid']} into {edge1['uuid']}")
 
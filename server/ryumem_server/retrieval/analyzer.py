@@ -0,0 +1,161 @@
+"""
+Text analysis for the BM25 keyword index.
+
+Turns document and query text into index terms:
+
+1. Unicode folding (NFKD decomposition, combining marks dropped, casefold)
+2. Regex word splitting, so punctuation never sticks to a term
+   ("Google," and "google" are the same term)
+3. English stopword removal
+4. Optional light stemming (Harman's S-stemmer: plural suffixes only)
+
+Short query strings are analyzed through a memoized cache, since the same
+hot queries are re-analyzed on every search.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+# Word characters (letters, digits, underscore) in any script
+WORD_PATTERN = re.compile(r"\w+")
+
+ENGLISH_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no
+nor not now of off on once only or other our ours ourselves out over own same
+she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours yourself
+yourselves
+""".split())
+
+# Longer query strings (e.g. whole episodes checked for duplicates) bypass the cache
+MAX_CACHED_QUERY_LENGTH = 256
+
+
+def fold(text: str) -> str:
+    """
+    Fold text to a case- and accent-insensitive form.
+
+    Args:
+        text: Text to fold
+
+    Returns:
+        Casefolded text with diacritics removed ("Café" -> "cafe")
+    """
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def light_stem(token: str) -> str:
+    """
+    Strip English plural suffixes (Harman's S-stemmer).
+
+    Args:
+        token: Lowercase token
+
+    Returns:
+        Stemmed token ("companies" -> "company", "works" -> "work")
+    """
+    if len(token) <= 3:
+        return token
+    if token.endswith("ies") and not token.endswith(("eies", "aies")):
+        return token[:-3] + "y"
+    if token.endswith("es") and not token.endswith(("aes", "ees", "oes")):
+        return token[:-1]
+    if token.endswith("s") and not token.endswith(("us", "ss")):
+        return token[:-1]
+    return token
+
+
+class Analyzer:
+    """
+    Configurable analyzer shared by a BM25 index for documents and queries.
+
+    Example:
+        analyzer = Analyzer(stem=True)
+        analyzer.analyze("Alice works at Google, Inc.")
+        # ['alice', 'work', 'google', 'inc']
+    """
+
+    def __init__(
+        self,
+        fold_unicode: bool = True,
+        remove_stopwords: bool = True,
+        stem: bool = False,
+        query_cache_size: int = 4096,
+    ):
+        """
+        Initialize the analyzer.
+
+        Args:
+            fold_unicode: Fold accents and case (otherwise lowercase only)
+            remove_stopwords: Drop English stopwords
+            stem: Apply the light plural stemmer
+            query_cache_size: Number of query strings whose terms are memoized
+        """
+        self.fold_unicode = fold_unicode
+        self.remove_stopwords = remove_stopwords
+        self.stem = stem
+        self._query_terms = lru_cache(maxsize=query_cache_size)(self._analyze_query)
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """Settings that determine the produced terms (persisted with an index)."""
+        return {
+            "fold_unicode": self.fold_unicode,
+            "remove_stopwords": self.remove_stopwords,
+            "stem": self.stem,
+        }
+
+    def analyze(self, text: str) -> List[str]:
+        """
+        Analyze document text into index terms.
+
+        Args:
+            text: Text to analyze
+
+        Returns:
+            List of terms in document order (duplicates kept)
+        """
+        text = fold(text) if self.fold_unicode else text.lower()
+        tokens = WORD_PATTERN.findall(text)
+        if self.remove_stopwords:
+            tokens = [token for token in tokens if token not in ENGLISH_STOPWORDS]
+        if self.stem:
+            tokens = [light_stem(token) for token in tokens]
+        return tokens
+
+    def _analyze_query(self, text: str) -> Tuple[str, ...]:
+        return tuple(self.analyze(text))
+
+    def analyze_query(self, text: str) -> Tuple[str, ...]:
+        """
+        Analyze a query string, memoizing the result for short queries.
+
+        Args:
+            text: Query text
+
+        Returns:
+            Tuple of query terms
+        """
+        if len(text) > MAX_CACHED_QUERY_LENGTH:
+            return self._analyze_query(text)
+        return self._query_terms(text)
+
+    def cache_info(self) -> Dict[str, int]:
+        """Hit/miss counters of the query term cache."""
+        info = self._query_terms.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+
+    def __repr__(self) -> str:
+        return (
+            f"Analyzer(fold_unicode={self.fold_unicode}, "
+            f"remove_stopwords={self.remove_stopwords}, stem={self.stem})"
+        )
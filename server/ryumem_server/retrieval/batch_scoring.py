@@ -0,0 +1,69 @@
+"""
+Vectorized similarity scoring for batched searches.
+
+Scores several query embeddings against one candidate matrix with a single
+matrix-matrix product, instead of one database vector scan per query.
+Optional per-candidate weights (recency) are applied before the top-k cut.
+"""
+
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_similar(
+    queries: Sequence[Sequence[float]],
+    candidates: Sequence[Sequence[float]],
+    threshold: float,
+    limits: Sequence[int],
+    weights: Optional[Sequence[float]] = None,
+) -> List[List[Tuple[int, float, float]]]:
+    """
+    Find the best candidates for every query by (weighted) cosine similarity.
+
+    Ties keep candidate order, so callers can pre-sort candidates by a
+    secondary key (e.g. most recent first).
+
+    Args:
+        queries: Query embeddings (n x d)
+        candidates: Candidate embeddings (m x d)
+        threshold: Minimum cosine similarity (applied before weighting)
+        limits: Maximum number of matches per query
+        weights: Per-candidate score multipliers (e.g. recency); candidates
+            are ranked by similarity * weight
+
+    Returns:
+        For each query, a list of (candidate index, similarity, score)
+        tuples sorted by score descending
+    """
+    if len(queries) == 0:
+        return []
+    if len(candidates) == 0:
+        return [[] for _ in queries]
+
+    query_matrix = _normalize(np.asarray(queries, dtype=np.float32))
+    candidate_matrix = _normalize(np.asarray(candidates, dtype=np.float32))
+    similarities = query_matrix @ candidate_matrix.T
+    scores = similarities if weights is None else similarities * np.asarray(weights, dtype=np.float32)
+
+    matches: List[List[Tuple[int, float, float]]] = []
+    for row, score_row, limit in zip(similarities, scores, limits):
+        if limit <= 0:
+            matches.append([])
+            continue
+        indices = np.nonzero(row >= threshold)[0]
+        if len(indices) > limit:
+            indices = np.sort(indices[np.argpartition(-score_row[indices], limit - 1)[:limit]])
+        order = indices[np.argsort(-score_row[indices], kind="stable")]
+        matches.append([(int(i), float(row[i]), float(score_row[i])) for i in order])
+    return matches
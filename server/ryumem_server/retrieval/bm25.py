@@ -2,35 +2,440 @@
 BM25 keyword search index for Ryumem.
 
 Provides keyword-based search complementing vector search.
-Uses rank_bm25 for efficient BM25 scoring.
+
+The index is a compact columnar store: terms are interned to integer ids,
+each document type keeps array-backed postings lists, and the episode
+attributes used for pre-filtering (kind, user, created_at, tags) live in
+parallel NumPy columns instead of full EpisodeNode objects. Scoring follows
+the Okapi BM25 variant of rank_bm25 (k1=1.5, b=0.75, epsilon=0.25).
+
+Text is turned into terms by an Analyzer (see analyzer.py); its settings
+are stored with the index so a configuration change triggers a rebuild.
 """
 
+import json
 import logging
 import pickle
+import threading
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-from rank_bm25 import BM25Okapi
+import numpy as np
 
-from ryumem_server.core.models import EntityEdge, EntityNode, EpisodeNode
+from ryumem_server.core.changes import ChangeEvent
+from ryumem_server.core.models import (
+    DOCUMENT_CHUNK_COUNT_KEY,
+    EntityEdge,
+    EntityNode,
+    EpisodeKind,
+    EpisodeNode,
+    EpisodeType,
+)
+from ryumem_server.retrieval.analyzer import Analyzer
 
 logger = logging.getLogger(__name__)
 
+# Okapi BM25 parameters (same defaults as rank_bm25.BM25Okapi)
+K1 = 1.5
+B = 0.75
+EPSILON = 0.25
 
-def tokenize(text: str) -> List[str]:
-    """
-    Simple tokenization for BM25.
+# Version of the on-disk pickle layout written by BM25Index.save()
+INDEX_FORMAT_VERSION = 5
+
+# Tombstoned rows are reclaimed once they exceed this share of an index
+COMPACT_DEAD_RATIO = 0.2
+COMPACT_MIN_DEAD = 64
+
+
+def _grow(column: np.ndarray, capacity: int) -> np.ndarray:
+    """Return a zero-padded copy of column with at least `capacity` rows."""
+    grown = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+    grown[: len(column)] = column
+    return grown
 
-    Converts to lowercase and splits on whitespace.
-    Could be enhanced with proper NLP tokenization.
+
+def _to_epoch(value: Any) -> float:
+    """Convert a datetime (naive values are treated as UTC) to epoch seconds."""
+    if not isinstance(value, datetime):
+        return 0.0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def apply_change(index: Any, event: ChangeEvent) -> bool:
+    """
+    Apply a change-feed event to a BM25 index (plain or sharded).
 
     Args:
-        text: Text to tokenize
+        index: Index exposing the BM25Index interface
+        event: Event emitted by RyugraphDB
 
     Returns:
-        List of tokens
+        False if the event cannot be applied incrementally (resync) and the
+        index must be rebuilt from the database, True otherwise
+    """
+    if event.seq <= index.last_applied_seq:
+        # Already applied (a rebuild replays the log before taking over delivery)
+        return True
+
+    data = event.data
+    if event.op == "resync":
+        return False
+
+    if event.op == "reset":
+        index.clear()
+    elif event.op == "delete_user":
+        index.remove_user(event.user_id)
+    elif event.op == "delete":
+        if event.kind == "episode":
+            index.remove_episode(event.uuid, user_id=event.user_id)
+        elif event.kind == "entity":
+            index.remove_entity(event.uuid, user_id=event.user_id)
+        elif event.kind == "edge":
+            index.remove_edge(event.uuid, user_id=event.user_id)
+    elif event.op == "upsert":
+        if event.kind == "episode":
+            created_at = data.get("created_at")
+            index.add_episode(EpisodeNode(
+                uuid=event.uuid,
+                name=data.get("name") or "",
+                content=data.get("content") or "",
+                source=EpisodeType.text,
+                kind=EpisodeKind.from_str(data.get("kind") or "query"),
+                user_id=event.user_id,
+                metadata=data.get("metadata") or {},
+                created_at=datetime.fromisoformat(created_at) if created_at else event.created_at,
+            ))
+        elif event.kind == "entity":
+            index.add_entity(EntityNode(
+                uuid=event.uuid,
+                name=data.get("name") or "",
+                entity_type=data.get("entity_type") or "",
+                summary=data.get("summary") or "",
+                user_id=event.user_id,
+            ))
+        elif event.kind == "edge":
+            index.add_edge(
+                EntityEdge(
+                    uuid=event.uuid,
+                    source_node_uuid=data.get("source_uuid") or "",
+                    target_node_uuid=data.get("target_uuid") or "",
+                    name=data.get("name") or "",
+                    fact=data.get("fact") or "",
+                ),
+                user_id=event.user_id,
+            )
+    # "invalidate" and "link" do not change indexed text
+
+    index.last_applied_seq = event.seq
+    return True
+
+
+class _Vocabulary:
+    """Bidirectional mapping between strings and dense integer ids."""
+
+    def __init__(self, names: Optional[List[str]] = None):
+        self.names: List[str] = list(names or [])
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self.ids
+
+    def get(self, value: str) -> Optional[int]:
+        """Return the id of value, or None if unknown."""
+        return self.ids.get(value)
+
+    def add(self, value: str) -> int:
+        """Return the id of value, assigning the next id if it is new."""
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = len(self.names)
+            self.ids[value] = value_id
+            self.names.append(value)
+        return value_id
+
+
+class _PostingsIndex:
     """
-    return text.lower().split()
+    Inverted index over one document type.
+
+    Documents are addressed by dense row numbers. Every term id maps to a
+    pair of ``array('I')`` buffers holding the rows that contain the term and
+    the term frequency in each of those rows. Extra per-row attributes can be
+    registered as NumPy columns which grow and compact together with the rows.
+
+    Removing a document only tombstones its row; document frequencies are
+    corrected when the tombstones are reclaimed by ``compact()``.
+    """
+
+    def __init__(self, columns: Optional[Dict[str, Tuple[Any, Tuple[int, ...]]]] = None):
+        """
+        Initialize an empty postings index.
+
+        Args:
+            columns: Optional mapping of column name to (dtype, trailing shape)
+        """
+        self.uuids: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.doc_len = np.zeros(0, dtype=np.uint32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.df = np.zeros(0, dtype=np.uint32)
+        self.postings: Dict[int, Tuple[array, array]] = {}
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.zeros((0,) + shape, dtype=dtype)
+            for name, (dtype, shape) in (columns or {}).items()
+        }
+        self.live_count = 0
+        self.total_len = 0
+        self._idf: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self.live_count
+
+    @property
+    def row_count(self) -> int:
+        """Number of allocated rows, including tombstones."""
+        return len(self.uuids)
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= len(self.alive):
+            return
+        capacity = max(rows, 2 * len(self.alive), 16)
+        self.doc_len = _grow(self.doc_len, capacity)
+        self.alive = _grow(self.alive, capacity)
+        for name, column in self.columns.items():
+            self.columns[name] = _grow(column, capacity)
+
+    def add(self, uuid: str, term_ids: List[int]) -> int:
+        """
+        Add (or replace) a document and return its row.
+
+        Args:
+            uuid: Document UUID
+            term_ids: Term ids of the document tokens
+
+        Returns:
+            Row number assigned to the document
+        """
+        if uuid in self.rows:
+            self.remove(uuid)
+
+        row = len(self.uuids)
+        self._ensure_capacity(row + 1)
+
+        counts = Counter(term_ids)
+        if counts:
+            max_term = max(counts)
+            if max_term >= len(self.df):
+                self.df = _grow(self.df, max(max_term + 1, 2 * len(self.df)))
+        for term_id, tf in counts.items():
+            postings = self.postings.get(term_id)
+            if postings is None:
+                postings = (array("I"), array("I"))
+                self.postings[term_id] = postings
+            postings[0].append(row)
+            postings[1].append(tf)
+            self.df[term_id] += 1
+
+        self.uuids.append(uuid)
+        self.rows[uuid] = row
+        self.doc_len[row] = len(term_ids)
+        self.alive[row] = True
+        self.live_count += 1
+        self.total_len += len(term_ids)
+        self._idf = None
+        return row
+
+    def remove(self, uuid: str) -> bool:
+        """
+        Tombstone a document.
+
+        Args:
+            uuid: Document UUID
+
+        Returns:
+            True if the document was present
+        """
+        row = self.rows.pop(uuid, None)
+        if row is None:
+            return False
+
+        self.uuids[row] = None
+        self.alive[row] = False
+        self.live_count -= 1
+        self.total_len -= int(self.doc_len[row])
+        self._idf = None
+
+        dead = self.row_count - self.live_count
+        if dead >= COMPACT_MIN_DEAD and dead > COMPACT_DEAD_RATIO * self.row_count:
+            self.compact()
+        return True
+
+    def compact(self) -> None:
+        """Reclaim tombstoned rows and recompute document frequencies."""
+        n = self.row_count
+        if n == self.live_count:
+            return
+
+        keep = np.flatnonzero(self.alive[:n])
+        remap = np.full(n, -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+
+        self.df[:] = 0
+        for term_id in list(self.postings):
+            rows_buf, tf_buf = self.postings[term_id]
+            rows = np.frombuffer(rows_buf, dtype=np.uint32)
+            live = self.alive[rows]
+            if not live.any():
+                del self.postings[term_id]
+                continue
+            new_rows = array("I")
+            new_rows.frombytes(remap[rows[live]].astype(np.uint32).tobytes())
+            new_tfs = array("I")
+            new_tfs.frombytes(np.frombuffer(tf_buf, dtype=np.uint32)[live].tobytes())
+            self.postings[term_id] = (new_rows, new_tfs)
+            self.df[term_id] = len(new_rows)
+
+        self.uuids = [self.uuids[row] for row in keep]
+        self.rows = {uuid: row for row, uuid in enumerate(self.uuids)}
+        self.doc_len = self.doc_len[keep].copy()
+        self.alive = np.ones(len(keep), dtype=bool)
+        for name, column in self.columns.items():
+            self.columns[name] = column[keep].copy()
+        self._idf = None
+
+    def _idf_vector(self) -> np.ndarray:
+        """IDF per term id, following rank_bm25's epsilon floor for common terms."""
+        if self._idf is not None:
+            return self._idf
+
+        corpus_size = self.live_count
+        df = np.minimum(self.df.astype(np.float64), corpus_size)
+        present = self.df > 0
+        idf = np.zeros(len(df), dtype=np.float64)
+        if present.any():
+            idf[present] = np.log(corpus_size - df[present] + 0.5) - np.log(df[present] + 0.5)
+            eps = EPSILON * idf[present].sum() / present.sum()
+            idf[present & (idf < 0)] = eps
+        self._idf = idf
+        return idf
+
+    def scores(self, term_ids: List[int]) -> np.ndarray:
+        """
+        Compute BM25 scores of every row for a tokenized query.
+
+        Args:
+            term_ids: Query term ids (unknown terms already dropped)
+
+        Returns:
+            Array of scores indexed by row (tombstoned rows are not zeroed)
+        """
+        n = self.row_count
+        scores = np.zeros(n, dtype=np.float64)
+        if not self.live_count or not term_ids:
+            return scores
+
+        idf = self._idf_vector()
+        avgdl = self.total_len / self.live_count if self.total_len else 1.0
+        norm = K1 * (1 - B + B * self.doc_len[:n] / avgdl)
+
+        for term_id in term_ids:
+            postings = self.postings.get(term_id)
+            if postings is None:
+                continue
+            rows = np.frombuffer(postings[0], dtype=np.uint32)
+            tf = np.frombuffer(postings[1], dtype=np.uint32).astype(np.float64)
+            scores[rows] += idf[term_id] * (tf * (K1 + 1)) / (tf + norm[rows])
+
+        return scores
+
+    def top_k(
+        self,
+        scores: np.ndarray,
+        top_k: int,
+        min_score: float,
+        mask: Optional[np.ndarray] = None,
+        secondary: Optional[np.ndarray] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Select the best live rows.
+
+        Rows are ordered by score descending, then by `secondary` descending,
+        then by insertion order.
+
+        Args:
+            scores: Scores indexed by row
+            top_k: Maximum number of results
+            min_score: Minimum score threshold
+            mask: Optional boolean row filter
+            secondary: Optional tie-break column indexed by row
+
+        Returns:
+            List of (uuid, score) tuples
+        """
+        n = self.row_count
+        keep = self.alive[:n] & (scores >= min_score)
+        if mask is not None:
+            keep &= mask
+        candidates = np.flatnonzero(keep)
+        if top_k <= 0 or not len(candidates):
+            return []
+
+        candidate_scores = scores[candidates]
+        if len(candidates) > top_k:
+            kth = np.partition(candidate_scores, len(candidates) - top_k)[len(candidates) - top_k]
+            selected = candidate_scores >= kth
+            candidates = candidates[selected]
+            candidate_scores = candidate_scores[selected]
+
+        if secondary is not None:
+            order = np.lexsort((candidates, -secondary[candidates], -candidate_scores))
+        else:
+            order = np.lexsort((candidates, -candidate_scores))
+
+        return [
+            (self.uuids[candidates[i]], float(candidate_scores[i]))
+            for i in order[:top_k]
+        ]
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serialize the index (tombstones are compacted away first)."""
+        self.compact()
+        n = self.row_count
+        return {
+            "uuids": list(self.uuids),
+            "doc_len": self.doc_len[:n].copy(),
+            "postings": self.postings,
+            "columns": {name: column[:n].copy() for name, column in self.columns.items()},
+        }
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """Restore the index from `to_state()` output."""
+        self.uuids = list(state["uuids"])
+        self.rows = {uuid: row for row, uuid in enumerate(self.uuids)}
+        self.doc_len = np.asarray(state["doc_len"], dtype=np.uint32)
+        self.alive = np.ones(len(self.uuids), dtype=bool)
+        self.postings = state["postings"]
+        for name, column in state.get("columns", {}).items():
+            if name in self.columns:
+                self.columns[name] = column
+
+        max_term = max(self.postings, default=-1)
+        self.df = np.zeros(max_term + 1, dtype=np.uint32)
+        for term_id, (rows, _) in self.postings.items():
+            self.df[term_id] = len(rows)
+
+        self.live_count = len(self.uuids)
+        self.total_len = int(self.doc_len.sum())
+        self._idf = None
 
 
 class BM25Index:
@@ -40,38 +445,112 @@ class BM25Index:
     Maintains separate BM25 indices for:
     - Entity documents (name + summary)
     - Edge documents (fact descriptions)
+    - Episode documents (content + saved memories)
 
     Features:
     - Efficient keyword matching
     - Complement to vector similarity search
+    - Compact storage: integer term ids, array postings, NumPy filter columns
+    - Configurable text analysis with memoized query terms
     - Persistent storage (pickle)
     """
 
-    def __init__(self):
-        """Initialize empty BM25 indices."""
-        # Entity index
-        self.entity_uuids: List[str] = []
-        self.entity_corpus: List[List[str]] = []
-        self.entity_bm25: Optional[BM25Okapi] = None
-
-        # Edge index
-        self.edge_uuids: List[str] = []
-        self.edge_corpus: List[List[str]] = []
-        self.edge_bm25: Optional[BM25Okapi] = None
-
-        # Episode index
-        self.episode_uuids: List[str] = []
-        self.episode_corpus: List[List[str]] = []
-        self.episode_bm25: Optional[BM25Okapi] = None
-        self.episode_tags: Dict[str, set] = {}  # uuid → set of tags
-        self.episode_map: Dict[str, EpisodeNode] = {}  # uuid → full episode object
+    def __init__(self, analyzer: Optional[Analyzer] = None):
+        """
+        Initialize empty BM25 indices.
+
+        Args:
+            analyzer: Analyzer for documents and queries (default: Analyzer())
+        """
+        self._lock = threading.RLock()
+        self.analyzer = analyzer or Analyzer()
+
+        # Shared term vocabulary plus dictionaries backing the filter columns
+        self._terms = _Vocabulary()
+        self._kinds = _Vocabulary()  # kind column stores id + 1 (0 = unknown)
+        self._users = _Vocabulary()  # user column stores id (-1 = no user)
+        self._tags = _Vocabulary()  # tag id == bit position in the tags column
+
+        # Per document type postings
+        self._entities = self._new_index()
+        self._edges = self._new_index()
+        self._episodes = self._new_episode_index()
+
+        # Sequence number of the last change-feed event reflected in the index
+        self.last_applied_seq = 0
 
         logger.info("BM25Index initialized")
 
+    @staticmethod
+    def _new_index() -> _PostingsIndex:
+        return _PostingsIndex(columns={"user": (np.int32, ())})
+
+    @staticmethod
+    def _new_episode_index() -> _PostingsIndex:
+        return _PostingsIndex(columns={
+            "user": (np.int32, ()),
+            "kind": (np.uint8, ()),
+            "created_at": (np.float64, ()),  # epoch seconds
+            "tags": (np.uint64, (1,)),  # widened as the tag vocabulary grows
+        })
+
+    def _intern(self, tokens: List[str]) -> List[int]:
+        """Map tokens to term ids, growing the vocabulary as needed."""
+        return [self._terms.add(token) for token in tokens]
+
+    def _lookup(self, text: str) -> List[int]:
+        """Map query tokens to known term ids (unknown terms cannot score)."""
+        term_ids = (self._terms.get(token) for token in self.analyzer.analyze_query(text))
+        return [term_id for term_id in term_ids if term_id is not None]
+
+    def _user_mask(self, index: _PostingsIndex, user_id: Optional[str]) -> Optional[np.ndarray]:
+        """Row mask selecting documents owned by user_id (None when not filtering)."""
+        if not user_id:
+            return None
+        user_code = self._users.get(user_id)
+        if user_code is None:
+            return np.zeros(index.row_count, dtype=bool)
+        return index.columns["user"][: index.row_count] == user_code
+
+    def _set_user(self, index: _PostingsIndex, row: int, user_id: Optional[str]) -> None:
+        index.columns["user"][row] = self._users.add(user_id) if user_id else -1
+
+    def _tag_mask(self, tag_ids: List[int]) -> np.ndarray:
+        """Build a tag bitset row, widening the tags column if needed."""
+        column = self._episodes.columns["tags"]
+        words = max(column.shape[1], (len(self._tags) + 63) // 64)
+        if words > column.shape[1]:
+            widened = np.zeros((column.shape[0], words), dtype=np.uint64)
+            widened[:, : column.shape[1]] = column
+            self._episodes.columns["tags"] = widened
+
+        mask = np.zeros(words, dtype=np.uint64)
+        for bit in tag_ids:
+            mask[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+        return mask
+
+    def _set_episode_columns(
+        self,
+        row: int,
+        kind: str,
+        user_id: Optional[str],
+        created_at: Any,
+        tags: set,
+    ) -> None:
+        """Write the filter attributes of an episode row."""
+        tag_mask = self._tag_mask([self._tags.add(tag) for tag in tags])
+        columns = self._episodes.columns
+        columns["kind"][row] = self._kinds.add(kind.lower()) + 1 if kind else 0
+        self._set_user(self._episodes, row, user_id)
+        columns["created_at"][row] = _to_epoch(created_at)
+        columns["tags"][row] = tag_mask
+
     def add_entity(self, entity: EntityNode) -> None:
         """
         Add an entity to the BM25 index.
 
+        Re-adding an entity with the same UUID replaces the indexed document.
+
         Args:
             entity: Entity node to index
 
@@ -85,22 +564,22 @@ class BM25Index:
         """
         # Create document from entity name + summary
         doc_text = f"{entity.name} {entity.summary}"
-        tokens = tokenize(doc_text)
 
-        self.entity_uuids.append(entity.uuid)
-        self.entity_corpus.append(tokens)
-
-        # Rebuild BM25 index
-        self._rebuild_entity_index()
+        with self._lock:
+            row = self._entities.add(entity.uuid, self._intern(self.analyzer.analyze(doc_text)))
+            self._set_user(self._entities, row, entity.user_id)
 
         logger.debug(f"Added entity to BM25: {entity.name}")
 
-    def add_edge(self, edge: EntityEdge) -> None:
+    def add_edge(self, edge: EntityEdge, user_id: Optional[str] = None) -> None:
         """
         Add a relationship edge to the BM25 index.
 
+        Re-adding an edge with the same UUID replaces the indexed document.
+
         Args:
             edge: Entity edge to index
+            user_id: Owner of the edge (edges do not carry a user_id themselves)
 
         Example:
             index.add_edge(EntityEdge(
@@ -110,13 +589,9 @@ class BM25Index:
             ))
         """
         # Use the fact description as the document
-        tokens = tokenize(edge.fact)
-
-        self.edge_uuids.append(edge.uuid)
-        self.edge_corpus.append(tokens)
-
-        # Rebuild BM25 index
-        self._rebuild_edge_index()
+        with self._lock:
+            row = self._edges.add(edge.uuid, self._intern(self.analyzer.analyze(edge.fact)))
+            self._set_user(self._edges, row, user_id)
 
         logger.debug(f"Added edge to BM25: {edge.fact[:50]}...")
 
@@ -124,7 +599,9 @@ class BM25Index:
         """
         Add an episode to the BM25 index.
 
-        Indexes both episode content and memories from metadata.
+        Indexes both episode content and memories from metadata. Only the
+        attributes needed for filtering (kind, user_id, created_at, tags) are
+        kept; the episode object itself is not retained.
 
         Args:
             episode: Episode node to index
@@ -136,14 +613,18 @@ class BM25Index:
                 ...
             ))
         """
+        metadata_dict = {}
+        if episode.metadata:
+            metadata_dict = episode.metadata if isinstance(episode.metadata, dict) else json.loads(episode.metadata)
+
         # Collect text to index: episode content + memories from metadata
-        texts_to_index = [episode.content]
+        # (the content of long documents is searched through their chunk episodes)
+        document = DOCUMENT_CHUNK_COUNT_KEY in metadata_dict
+        texts_to_index = [] if document else [episode.content]
         tags: set = set()
 
         # Extract memories and tags from episode metadata if present
-        if episode.metadata:
-            import json
-            metadata_dict = episode.metadata if isinstance(episode.metadata, dict) else json.loads(episode.metadata)
+        if metadata_dict:
 
             # Extract tags for filtering
             if 'tags' in metadata_dict and isinstance(metadata_dict['tags'], list):
@@ -159,25 +640,26 @@ class BM25Index:
                             if isinstance(run, dict) and 'llm_saved_memory' in run and run['llm_saved_memory']:
                                 texts_to_index.append(run['llm_saved_memory'])
 
+        if not texts_to_index:
+            return
+
         # Combine all texts and tokenize
         combined_text = " ".join(texts_to_index)
-        tokens = tokenize(combined_text)
-
-        self.episode_tags[episode.uuid] = tags
-        self.episode_map[episode.uuid] = episode  # Store full episode object
-        self.episode_uuids.append(episode.uuid)
-        self.episode_corpus.append(tokens)
+        kind = episode.kind.value if hasattr(episode.kind, 'value') else str(episode.kind or "")
 
-        # Rebuild BM25 index
-        self._rebuild_episode_index()
+        with self._lock:
+            row = self._episodes.add(episode.uuid, self._intern(self.analyzer.analyze(combined_text)))
+            self._set_episode_columns(row, kind, episode.user_id, episode.created_at, tags)
 
-        logger.debug(f"Added episode to BM25: {episode.content[:50]}... (with {len(texts_to_index)-1} memories, tags: {tags})")
+        memories = len(texts_to_index) if document else len(texts_to_index) - 1
+        logger.debug(f"Added episode to BM25: {episode.content[:50]}... (with {memories} memories, tags: {tags})")
 
     def search_entities(
         self,
         query: str,
         top_k: int = 10,
         min_score: float = 0.0,
+        user_id: Optional[str] = None,
     ) -> List[Tuple[str, float]]:
         """
         Search entities using BM25 keyword matching.
@@ -186,6 +668,7 @@ class BM25Index:
             query: Search query
             top_k: Maximum number of results
             min_score: Minimum BM25 score threshold
+            user_id: Optional user ID to filter by
 
         Returns:
             List of (entity_uuid, score) tuples, sorted by score descending
@@ -195,34 +678,21 @@ class BM25Index:
             for entity_uuid, score in results:
                 print(f"{entity_uuid}: {score:.3f}")
         """
-        if not self.entity_bm25 or not self.entity_corpus:
-            logger.warning("Entity BM25 index is empty")
-            return []
-
-        # Tokenize query
-        query_tokens = tokenize(query)
-
-        # Get BM25 scores
-        scores = self.entity_bm25.get_scores(query_tokens)
-
-        # Create (uuid, score) pairs
-        results = [
-            (uuid, score)
-            for uuid, score in zip(self.entity_uuids, scores)
-            if score >= min_score
-        ]
-
-        # Sort by score descending
-        results.sort(key=lambda x: x[1], reverse=True)
+        with self._lock:
+            if not len(self._entities):
+                logger.warning("Entity BM25 index is empty")
+                return []
 
-        # Return top_k
-        return results[:top_k]
+            scores = self._entities.scores(self._lookup(query))
+            mask = self._user_mask(self._entities, user_id)
+            return self._entities.top_k(scores, top_k, min_score, mask=mask)
 
     def search_edges(
         self,
         query: str,
         top_k: int = 10,
         min_score: float = 0.0,
+        user_id: Optional[str] = None,
     ) -> List[Tuple[str, float]]:
         """
         Search relationship edges using BM25 keyword matching.
@@ -231,6 +701,7 @@ class BM25Index:
             query: Search query
             top_k: Maximum number of results
             min_score: Minimum BM25 score threshold
+            user_id: Optional user ID to filter by
 
         Returns:
             List of (edge_uuid, score) tuples, sorted by score descending
@@ -240,28 +711,59 @@ class BM25Index:
             for edge_uuid, score in results:
                 print(f"{edge_uuid}: {score:.3f}")
         """
-        if not self.edge_bm25 or not self.edge_corpus:
-            logger.warning("Edge BM25 index is empty")
-            return []
+        with self._lock:
+            if not len(self._edges):
+                logger.warning("Edge BM25 index is empty")
+                return []
 
-        # Tokenize query
-        query_tokens = tokenize(query)
+            scores = self._edges.scores(self._lookup(query))
+            mask = self._user_mask(self._edges, user_id)
+            return self._edges.top_k(scores, top_k, min_score, mask=mask)
 
-        # Get BM25 scores
-        scores = self.edge_bm25.get_scores(query_tokens)
+    def _episode_filter(
+        self,
+        tags: Optional[List[str]],
+        tag_match_mode: str,
+        kinds: Optional[List[str]],
+        user_id: Optional[str],
+    ) -> Optional[np.ndarray]:
+        """
+        Build the boolean row mask for episode pre-filtering.
 
-        # Create (uuid, score) pairs
-        results = [
-            (uuid, score)
-            for uuid, score in zip(self.edge_uuids, scores)
-            if score >= min_score
-        ]
+        Returns None when no filter applies, or an all-False mask when a
+        filter value is unknown to the index.
+        """
+        n = self._episodes.row_count
+        columns = self._episodes.columns
+        mask: Optional[np.ndarray] = None
 
-        # Sort by score descending
-        results.sort(key=lambda x: x[1], reverse=True)
+        if tags:
+            # Normalize query tags to lowercase; unknown tags match no episode
+            tag_ids = [self._tags.get(tag.lower()) for tag in tags]
+            known = [tag_id for tag_id in tag_ids if tag_id is not None]
+            if not known or (tag_match_mode == 'all' and len(known) < len(tag_ids)):
+                return np.zeros(n, dtype=bool)
+            query_mask = self._tag_mask(known)
+            hits = columns["tags"][:n] & query_mask
+            if tag_match_mode == 'all':
+                mask = (hits == query_mask).all(axis=1)
+            else:
+                mask = hits.any(axis=1)
 
-        # Return top_k
-        return results[:top_k]
+        if kinds:
+            codes = [
+                self._kinds.get(kind.lower()) + 1
+                for kind in kinds
+                if kind.lower() in self._kinds
+            ]
+            kind_mask = np.isin(columns["kind"][:n], codes)
+            mask = kind_mask if mask is None else mask & kind_mask
+
+        user_mask = self._user_mask(self._episodes, user_id)
+        if user_mask is not None:
+            mask = user_mask if mask is None else mask & user_mask
+
+        return mask
 
     def search_episodes(
         self,
@@ -274,7 +776,7 @@ class BM25Index:
         user_id: Optional[str] = None,
     ) -> List[Tuple[str, float]]:
         """
-        Search episodes using BM25 keyword matching with optional tag pre-filtering.
+        Search episodes using BM25 keyword matching with optional pre-filtering.
 
         Args:
             query: Search query
@@ -282,9 +784,12 @@ class BM25Index:
             min_score: Minimum BM25 score threshold
             tags: Optional list of tags to filter by
             tag_match_mode: Tag matching mode - 'any' (at least one tag matches) or 'all' (all tags must match)
+            kinds: Optional list of episode kinds to filter by
+            user_id: Optional user ID to filter by
 
         Returns:
             List of (episode_uuid, score) tuples, sorted by score descending
+            (most recent first on ties)
 
         Example:
             # Search with tag filtering
@@ -297,162 +802,131 @@ class BM25Index:
             for episode_uuid, score in results:
                 print(f"{episode_uuid}: {score:.3f}")
         """
-        if not self.episode_bm25 or not self.episode_corpus:
-            logger.warning("Episode BM25 index is empty")
-            return []
-
-        # PRE-FILTERING: Filter indices by tags BEFORE BM25 scoring
-        valid_indices = []
-        if tags:
-            # Normalize query tags to lowercase
-            query_tags = {tag.lower() for tag in tags}
-
-            for idx, episode_uuid in enumerate(self.episode_uuids):
-                episode_tag_set = self.episode_tags.get(episode_uuid, set())
-                if tag_match_mode == 'all':
-                    # All query tags must be present in episode tags
-                    if query_tags.issubset(episode_tag_set):
-                        valid_indices.append(idx)
-                else:  # 'any' mode (default)
-                    # At least one query tag must match
-                    if query_tags & episode_tag_set:  # set intersection
-                        valid_indices.append(idx)
-        else:
-            # No tag filtering - all indices valid
-            valid_indices = list(range(len(self.episode_uuids)))
-
-        # If no episodes match tag filter, return empty
-        if not valid_indices:
-            logger.debug(f"No episodes match tag filter: {tags} (mode: {tag_match_mode})")
-            return []
-
-        # KINDS FILTERING: Further filter by episode kind if specified
-        if kinds:
-            # Normalize kinds to lowercase
-            query_kinds = {kind.lower() for kind in kinds}
-            logger.info(f"[KINDS-DEBUG] Filtering by kinds: {query_kinds}, valid_indices before filter: {len(valid_indices)}")
-
-            # Filter valid_indices to only include episodes with matching kinds
-            kinds_filtered_indices = []
-            for idx in valid_indices:
-                episode_uuid = self.episode_uuids[idx]
-                episode = self.episode_map.get(episode_uuid)
-                if episode and hasattr(episode, 'kind'):
-                    episode_kind = episode.kind.value if hasattr(episode.kind, 'value') else str(episode.kind)
-                    if idx < 3:  # Log first 3 for debugging
-                        logger.info(f"[KINDS-DEBUG]   Episode {idx} ({episode_uuid[:8]}): kind={episode_kind}, matches={episode_kind.lower() in query_kinds}")
-                    if episode_kind.lower() in query_kinds:
-                        kinds_filtered_indices.append(idx)
-                else:
-                    if idx < 3:
-                        logger.info(f"[KINDS-DEBUG]   Episode {idx} ({episode_uuid[:8]}): NO KIND ATTRIBUTE")
-
-            valid_indices = kinds_filtered_indices
-            logger.info(f"[KINDS-DEBUG] After kinds filter: {len(valid_indices)} episodes remain")
-
-            if not valid_indices:
-                logger.info(f"No episodes match kinds filter: {kinds}")
+        with self._lock:
+            if not len(self._episodes):
+                logger.warning("Episode BM25 index is empty")
                 return []
 
-        # USER_ID FILTERING: Filter by user_id if specified
-        if user_id:
-            logger.info(f"[USER-DEBUG] Filtering by user_id: {user_id}, valid_indices before filter: {len(valid_indices)}")
-
-            user_filtered_indices = []
-            for idx in valid_indices:
-                episode_uuid = self.episode_uuids[idx]
-                episode = self.episode_map.get(episode_uuid)
-                if episode and hasattr(episode, 'user_id') and episode.user_id == user_id:
-                    user_filtered_indices.append(idx)
-
-            valid_indices = user_filtered_indices
-            logger.info(f"[USER-DEBUG] After user_id filter: {len(valid_indices)} episodes remain")
-
-            if not valid_indices:
-                logger.info(f"No episodes match user_id filter: {user_id}")
+            # PRE-FILTERING: tags, kinds and user_id are evaluated on the columns
+            mask = self._episode_filter(tags, tag_match_mode, kinds, user_id)
+            if mask is not None and not mask.any():
+                logger.debug(
+                    f"No episodes match filters: tags={tags} (mode: {tag_match_mode}), "
+                    f"kinds={kinds}, user_id={user_id}"
+                )
                 return []
 
-        # Tokenize query
-        query_tokens = tokenize(query)
-
-        # Get BM25 scores for ALL documents
-        all_scores = self.episode_bm25.get_scores(query_tokens)
-
-        # Create (uuid, score) pairs ONLY for pre-filtered indices
-        results = [
-            (self.episode_uuids[idx], all_scores[idx])
-            for idx in valid_indices
-            if all_scores[idx] >= min_score
-        ]
-
-        # Sort by score descending, then by recency (created_at) descending for tie-breaking
-        results.sort(key=lambda x: (x[1], self.episode_map[x[0]].created_at), reverse=True)
-
-        # Return top_k
-        return results[:top_k]
+            scores = self._episodes.scores(self._lookup(query))
+            return self._episodes.top_k(
+                scores,
+                top_k,
+                min_score,
+                mask=mask,
+                secondary=self._episodes.columns["created_at"],
+            )
 
-    def remove_entity(self, entity_uuid: str) -> bool:
+    def remove_entity(self, entity_uuid: str, user_id: Optional[str] = None) -> bool:
         """
         Remove an entity from the BM25 index.
 
         Args:
             entity_uuid: UUID of entity to remove
+            user_id: Owner of the entity (only used by ShardedBM25Index)
 
         Returns:
             True if entity was found and removed, False otherwise
         """
-        try:
-            idx = self.entity_uuids.index(entity_uuid)
-            del self.entity_uuids[idx]
-            del self.entity_corpus[idx]
-            self._rebuild_entity_index()
+        with self._lock:
+            removed = self._entities.remove(entity_uuid)
+        if removed:
             logger.debug(f"Removed entity from BM25: {entity_uuid}")
-            return True
-        except ValueError:
+        else:
             logger.warning(f"Entity not found in BM25: {entity_uuid}")
-            return False
+        return removed
 
-    def remove_edge(self, edge_uuid: str) -> bool:
+    def remove_edge(self, edge_uuid: str, user_id: Optional[str] = None) -> bool:
         """
         Remove an edge from the BM25 index.
 
         Args:
             edge_uuid: UUID of edge to remove
+            user_id: Owner of the edge (only used by ShardedBM25Index)
 
         Returns:
             True if edge was found and removed, False otherwise
         """
-        try:
-            idx = self.edge_uuids.index(edge_uuid)
-            del self.edge_uuids[idx]
-            del self.edge_corpus[idx]
-            self._rebuild_edge_index()
+        with self._lock:
+            removed = self._edges.remove(edge_uuid)
+        if removed:
             logger.debug(f"Removed edge from BM25: {edge_uuid}")
-            return True
-        except ValueError:
+        else:
             logger.warning(f"Edge not found in BM25: {edge_uuid}")
-            return False
+        return removed
 
-    def _rebuild_entity_index(self) -> None:
-        """Rebuild the entity BM25 index."""
-        if self.entity_corpus:
-            self.entity_bm25 = BM25Okapi(self.entity_corpus)
-        else:
-            self.entity_bm25 = None
+    def remove_episode(self, episode_uuid: str, user_id: Optional[str] = None) -> bool:
+        """
+        Remove an episode from the BM25 index.
 
-    def _rebuild_edge_index(self) -> None:
-        """Rebuild the edge BM25 index."""
-        if self.edge_corpus:
-            self.edge_bm25 = BM25Okapi(self.edge_corpus)
-        else:
-            self.edge_bm25 = None
+        Args:
+            episode_uuid: UUID of episode to remove
+            user_id: Owner of the episode (only used by ShardedBM25Index)
 
-    def _rebuild_episode_index(self) -> None:
-        """Rebuild the episode BM25 index."""
-        if self.episode_corpus:
-            self.episode_bm25 = BM25Okapi(self.episode_corpus)
+        Returns:
+            True if episode was found and removed, False otherwise
+        """
+        with self._lock:
+            removed = self._episodes.remove(episode_uuid)
+        if removed:
+            logger.debug(f"Removed episode from BM25: {episode_uuid}")
         else:
-            self.episode_bm25 = None
+            logger.warning(f"Episode not found in BM25: {episode_uuid}")
+        return removed
+
+    def remove_user(self, user_id: Optional[str]) -> int:
+        """
+        Remove every entity, edge and episode owned by a user.
+
+        Args:
+            user_id: User whose documents are removed
+
+        Returns:
+            Number of documents removed
+        """
+        with self._lock:
+            removed = 0
+            for index in (self._entities, self._edges, self._episodes):
+                mask = self._user_mask(index, user_id)
+                if mask is None:
+                    continue
+                uuids = [index.uuids[row] for row in np.flatnonzero(mask & index.alive[: index.row_count])]
+                for uuid in uuids:
+                    index.remove(uuid)
+                removed += len(uuids)
+
+        logger.debug(f"Removed {removed} documents of user {user_id} from BM25")
+        return removed
+
+    def apply_change(self, event: ChangeEvent) -> bool:
+        """
+        Apply a change-feed event (see `apply_change`).
+
+        Returns:
+            False if the index must be rebuilt from the database
+        """
+        with self._lock:
+            return apply_change(self, event)
+
+    def contains(self, uuid: str) -> bool:
+        """
+        Check whether a document with this UUID is indexed.
+
+        Args:
+            uuid: Entity, edge or episode UUID
+
+        Returns:
+            True if any of the indices holds the UUID
+        """
+        return uuid in self._entities.rows or uuid in self._edges.rows or uuid in self._episodes.rows
 
     def save(self, path: str) -> None:
         """
@@ -467,19 +941,25 @@ class BM25Index:
         path_obj = Path(path)
         path_obj.parent.mkdir(parents=True, exist_ok=True)
 
-        data = {
-            "entity_uuids": self.entity_uuids,
-            "entity_corpus": self.entity_corpus,
-            "edge_uuids": self.edge_uuids,
-            "edge_corpus": self.edge_corpus,
-            "episode_uuids": self.episode_uuids,
-            "episode_corpus": self.episode_corpus,
-            "episode_tags": {uuid: list(tags) for uuid, tags in self.episode_tags.items()},
-            "episode_map": self.episode_map,
-        }
-
-        with open(path, "wb") as f:
-            pickle.dump(data, f)
+        with self._lock:
+            data = {
+                "format_version": INDEX_FORMAT_VERSION,
+                "last_applied_seq": self.last_applied_seq,
+                "analyzer": self.analyzer.settings,
+                "terms": self._terms.names,
+                "kinds": self._kinds.names,
+                "users": self._users.names,
+                "tags": self._tags.names,
+                "entities": self._entities.to_state(),
+                "edges": self._edges.to_state(),
+                "episodes": self._episodes.to_state(),
+            }
+
+            # Readers loading the file meanwhile see the old or the new index, never a partial one
+            tmp_path = path_obj.with_name(path_obj.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(path_obj)
 
         logger.info(f"BM25 index saved to {path}")
 
@@ -487,6 +967,10 @@ class BM25Index:
         """
         Load the BM25 index from disk.
 
+        Pickles written in an older layout or with different analyzer
+        settings are reported as not loaded so the caller rebuilds the index
+        from the database.
+
         Args:
             path: File path to load from
 
@@ -506,52 +990,49 @@ class BM25Index:
             with open(path, "rb") as f:
                 data = pickle.load(f)
 
-            self.entity_uuids = data["entity_uuids"]
-            self.entity_corpus = data["entity_corpus"]
-            self.edge_uuids = data["edge_uuids"]
-            self.edge_corpus = data["edge_corpus"]
-
-            # Load episode data (with backward compatibility for old pickle files)
-            self.episode_uuids = data.get("episode_uuids", [])
-            self.episode_corpus = data.get("episode_corpus", [])
-
-            # Load episode tags (with backward compatibility)
-            episode_tags_data = data.get("episode_tags", {})
-            self.episode_tags = {uuid: set(tags) for uuid, tags in episode_tags_data.items()}
-
-            # Load episode map (with backward compatibility - will be empty for old pickle files)
-            self.episode_map = data.get("episode_map", {})
-
-            # Rebuild BM25 indices
-            self._rebuild_entity_index()
-            self._rebuild_edge_index()
-            self._rebuild_episode_index()
+            with self._lock:
+                self.clear()
+                if data.get("format_version") != INDEX_FORMAT_VERSION:
+                    logger.info(f"BM25 index at {path} uses an old format, ignoring it")
+                    return False
+                if data.get("analyzer") != self.analyzer.settings:
+                    logger.info(f"BM25 index at {path} was built with other analyzer settings, ignoring it")
+                    return False
+
+                self._terms = _Vocabulary(data["terms"])
+                self._kinds = _Vocabulary(data["kinds"])
+                self._users = _Vocabulary(data["users"])
+                self._tags = _Vocabulary(data["tags"])
+                self._entities.load_state(data["entities"])
+                self._edges.load_state(data["edges"])
+                self._episodes.load_state(data["episodes"])
+                self.last_applied_seq = data.get("last_applied_seq", 0)
+
+                stats = self.stats()
 
             logger.info(
                 f"BM25 index loaded from {path} "
-                f"({len(self.entity_uuids)} entities, {len(self.edge_uuids)} edges, {len(self.episode_uuids)} episodes)"
+                f"({stats['entity_count']} entities, {stats['edge_count']} edges, {stats['episode_count']} episodes)"
             )
             return True
 
         except Exception as e:
             logger.error(f"Failed to load BM25 index: {e}")
+            self.clear()
             return False
 
     def clear(self) -> None:
         """Clear all data from the BM25 index."""
-        self.entity_uuids = []
-        self.entity_corpus = []
-        self.entity_bm25 = None
-
-        self.edge_uuids = []
-        self.edge_corpus = []
-        self.edge_bm25 = None
-
-        self.episode_uuids = []
-        self.episode_corpus = []
-        self.episode_bm25 = None
-        self.episode_tags = {}
-        self.episode_map = {}
+        with self._lock:
+            self._terms = _Vocabulary()
+            self._kinds = _Vocabulary()
+            self._users = _Vocabulary()
+            self._tags = _Vocabulary()
+            self._entities = self._new_index()
+            self._edges = self._new_index()
+            self._episodes = self._new_episode_index()
+            # An empty index reflects no change; replay starts over
+            self.last_applied_seq = 0
 
         logger.info("BM25 index cleared")
 
@@ -560,12 +1041,13 @@ class BM25Index:
         Get index statistics.
 
         Returns:
-            Dictionary with entity_count, edge_count, and episode_count
+            Dictionary with entity_count, edge_count, episode_count and term_count
         """
         return {
-            "entity_count": len(self.entity_uuids),
-            "edge_count": len(self.edge_uuids),
-            "episode_count": len(self.episode_uuids),
+            "entity_count": len(self._entities),
+            "edge_count": len(self._edges),
+            "episode_count": len(self._episodes),
+            "term_count": len(self._terms),
         }
 
     def __repr__(self) -> str:
@@ -0,0 +1,240 @@
+"""
+Database-backed keyword search fallback for Ryumem.
+
+Serves keyword queries straight from the graph with substring matching while
+no BM25 index is available yet (e.g. during the first background rebuild of
+a tenant). It exposes the read side of the BM25Index interface; writes are
+ignored because the data is read from the database on every query.
+
+Scores are the fraction of distinct query terms found in the document
+(0-1), a coarse stand-in for BM25 relevance.
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from ryumem_server.core.changes import ChangeEvent
+from ryumem_server.core.models import DOCUMENT_CHUNK_COUNT_KEY
+from ryumem_server.retrieval.analyzer import Analyzer
+
+logger = logging.getLogger(__name__)
+
+# Only the first query terms are matched (dedup queries pass whole episodes)
+MAX_QUERY_TERMS = 32
+
+# Maximum number of candidate rows fetched per query
+MAX_CANDIDATES = 1000
+
+
+class DBKeywordIndex:
+    """
+    Keyword search over the database with the BM25Index search interface.
+
+    Example:
+        index = DBKeywordIndex(db)
+        results = index.search_entities("alice google", top_k=5, user_id="user_123")
+    """
+
+    def __init__(self, db: Any, analyzer: Optional[Analyzer] = None):
+        """
+        Initialize the fallback index.
+
+        Args:
+            db: RyugraphDB instance
+            analyzer: Analyzer for query strings (stemming is not useful for
+                substring matching; default: Analyzer())
+        """
+        self.db = db
+        self.analyzer = analyzer or Analyzer()
+        self.last_applied_seq = 0
+
+    def _match(
+        self,
+        match: str,
+        fields: List[str],
+        returns: str,
+        query: str,
+        conditions: Optional[List[str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Fetch rows whose fields contain at least one query term.
+
+        Returns:
+            Tuple of (query terms, matching rows)
+        """
+        terms = list(dict.fromkeys(self.analyzer.analyze_query(query or "")))[:MAX_QUERY_TERMS]
+        params = dict(params or {})
+        where = list(conditions or [])
+
+        if terms:
+            haystack = " + ' ' + ".join(f"coalesce({field}, '')" for field in fields)
+            clauses = []
+            for i, term in enumerate(terms):
+                params[f"term{i}"] = term
+                clauses.append(f"lower({haystack}) CONTAINS $term{i}")
+            where.append("(" + " OR ".join(clauses) + ")")
+
+        cypher = match
+        if where:
+            cypher += "\nWHERE " + "\n  AND ".join(where)
+        cypher += f"\nRETURN {returns}\nLIMIT {MAX_CANDIDATES}"
+        return terms, self.db.execute(cypher, params)
+
+    @staticmethod
+    def _score(terms: List[str], text: str) -> float:
+        """Fraction of query terms contained in text."""
+        if not terms:
+            return 0.0
+        text = text.lower()
+        return sum(1 for term in terms if term in text) / len(terms)
+
+    def _rank(
+        self,
+        terms: List[str],
+        rows: List[Dict[str, Any]],
+        top_k: int,
+        min_score: float,
+    ) -> List[Tuple[str, float]]:
+        results = [(row["uuid"], self._score(terms, row["text"] or "")) for row in rows]
+        results = [(uuid, score) for uuid, score in results if score > 0 and score >= min_score]
+        results.sort(key=lambda x: x[1], reverse=True)
+        return results[:top_k]
+
+    def search_entities(
+        self,
+        query: str,
+        top_k: int = 10,
+        min_score: float = 0.0,
+        user_id: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Search entity names and summaries for the query terms.
+
+        Returns:
+            List of (entity_uuid, score) tuples, sorted by score descending
+        """
+        terms, rows = self._match(
+            "MATCH (e:Entity)",
+            ["e.name", "e.summary"],
+            "e.uuid AS uuid, coalesce(e.name, '') + ' ' + coalesce(e.summary, '') AS text",
+            query,
+            conditions=["e.user_id = $user_id"] if user_id else None,
+            params={"user_id": user_id} if user_id else None,
+        )
+        return self._rank(terms, rows, top_k, min_score)
+
+    def search_edges(
+        self,
+        query: str,
+        top_k: int = 10,
+        min_score: float = 0.0,
+        user_id: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Search relationship names and facts for the query terms.
+
+        Returns:
+            List of (edge_uuid, score) tuples, sorted by score descending
+        """
+        terms, rows = self._match(
+            "MATCH (source:Entity)-[r:RELATES_TO]->(:Entity)",
+            ["r.name", "r.fact"],
+            "r.uuid AS uuid, coalesce(r.name, '') + ' ' + coalesce(r.fact, '') AS text",
+            query,
+            conditions=["source.user_id = $user_id"] if user_id else None,
+            params={"user_id": user_id} if user_id else None,
+        )
+        return self._rank(terms, rows, top_k, min_score)
+
+    def search_episodes(
+        self,
+        query: str,
+        top_k: int = 10,
+        min_score: float = 0.0,
+        tags: Optional[List[str]] = None,
+        tag_match_mode: str = 'any',
+        kinds: Optional[List[str]] = None,
+        user_id: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Search episode content for the query terms, with the same
+        tag/kind/user filters as BM25Index.search_episodes.
+
+        Returns:
+            List of (episode_uuid, score) tuples, sorted by score descending
+            (most recent first on ties)
+        """
+        params: Dict[str, Any] = {}
+        conditions = [self._not_document("e", params)]
+        if user_id:
+            conditions.append("e.user_id = $user_id")
+            params["user_id"] = user_id
+        if kinds:
+            conditions.append("e.kind IN $kinds")
+            params["kinds"] = [kind.lower() for kind in kinds]
+
+        terms, rows = self._match(
+            "MATCH (e:Episode)",
+            ["e.name", "e.content"],
+            "e.uuid AS uuid, coalesce(e.name, '') + ' ' + coalesce(e.content, '') AS text, "
+            "e.metadata AS metadata, e.created_at AS created_at",
+            query,
+            conditions=conditions,
+            params=params,
+        )
+
+        if tags:
+            wanted = {tag.lower() for tag in tags}
+            rows = [row for row in rows if self._tags_match(row.get("metadata"), wanted, tag_match_mode)]
+
+        # Most recent first, so the stable score sort breaks ties by recency
+        rows.sort(key=lambda row: str(row.get("created_at") or ""), reverse=True)
+
+        if not terms:
+            # Tag-only search: every filtered episode matches with score 0
+            return [(row["uuid"], 0.0) for row in rows[:top_k]] if tags else []
+        return self._rank(terms, rows, top_k, min_score)
+
+    @staticmethod
+    def _not_document(alias: str, params: Dict[str, Any]) -> str:
+        """Condition leaving out long documents (searched through their chunk episodes)."""
+        params["document_marker"] = f'"{DOCUMENT_CHUNK_COUNT_KEY}":'
+        return f"NOT coalesce({alias}.metadata, '') CONTAINS $document_marker"
+
+    @staticmethod
+    def _tags_match(metadata: Any, wanted: set, tag_match_mode: str) -> bool:
+        if isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata)
+            except (json.JSONDecodeError, TypeError):
+                metadata = {}
+        episode_tags = {str(tag).lower() for tag in (metadata or {}).get("tags", [])}
+        if tag_match_mode == 'all':
+            return wanted <= episode_tags
+        return bool(wanted & episode_tags)
+
+    def apply_change(self, event: ChangeEvent) -> bool:
+        """Changes are read from the database directly; nothing to apply."""
+        self.last_applied_seq = event.seq
+        return True
+
+    def add_entity(self, entity) -> None:
+        pass
+
+    def add_edge(self, edge, user_id: Optional[str] = None) -> None:
+        pass
+
+    def add_episode(self, episode) -> None:
+        pass
+
+    def save(self, path: str) -> bool:
+        """Nothing to persist."""
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        return {"entity_count": 0, "edge_count": 0, "episode_count": 0, "term_count": 0}
+
+    def __repr__(self) -> str:
+        return "DBKeywordIndex()"
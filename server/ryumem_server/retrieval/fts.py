@@ -0,0 +1,184 @@
+"""
+Native full-text search backend for keyword retrieval.
+
+Uses the ryugraph (kuzu) FTS extension instead of an in-process BM25Index:
+the full-text indexes live in the database next to the graph, are updated
+by the same transactions that write the data, and take no Python heap.
+
+Indexed properties:
+- Episode.content and Episode.metadata (so saved memories are searchable)
+- Entity.name and Entity.summary
+
+The FTS extension only indexes node tables, so RELATES_TO facts are matched
+with the database substring search of DBKeywordIndex.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from ryumem_server.retrieval.analyzer import Analyzer
+from ryumem_server.retrieval.db_keyword import DBKeywordIndex
+
+logger = logging.getLogger(__name__)
+
+EPISODE_FTS_INDEX = "episode_fts"
+ENTITY_FTS_INDEX = "entity_fts"
+
+
+class FTSKeywordIndex(DBKeywordIndex):
+    """
+    Keyword index backed by the database's full-text search indexes.
+
+    Exposes the BM25Index search interface, so it can be handed to
+    SearchEngine and find_similar_episode_bm25 unchanged. Writes and change
+    events are no-ops: the database maintains the indexes itself.
+
+    Example:
+        index = FTSKeywordIndex(db)
+        index.ensure_indexes()
+        results = index.search_episodes("python tutorial", top_k=5, user_id="user_123")
+    """
+
+    def __init__(self, db: Any, stem: bool = False, analyzer: Optional[Analyzer] = None):
+        """
+        Initialize the FTS backend.
+
+        Args:
+            db: RyugraphDB instance
+            stem: Use the extension's English stemmer (otherwise no stemming)
+            analyzer: Analyzer for the substring-matched edge search
+        """
+        super().__init__(db, analyzer=analyzer)
+        self.stemmer = "english" if stem else "none"
+
+    def ensure_indexes(self) -> None:
+        """
+        Load the FTS extension and create the full-text indexes if missing.
+
+        Raises:
+            RuntimeError: If the extension cannot be installed or loaded
+        """
+        try:
+            self.db.execute("LOAD EXTENSION FTS")
+        except Exception:
+            # Not installed yet (installing downloads the extension once)
+            try:
+                self.db.execute("INSTALL FTS")
+                self.db.execute("LOAD EXTENSION FTS")
+            except Exception as e:
+                raise RuntimeError(f"ryugraph FTS extension is not available: {e}") from e
+
+        for table, index_name, properties in (
+            ("Episode", EPISODE_FTS_INDEX, ["content", "metadata"]),
+            ("Entity", ENTITY_FTS_INDEX, ["name", "summary"]),
+        ):
+            try:
+                self.db.execute(
+                    f"CALL CREATE_FTS_INDEX('{table}', '{index_name}', {properties!r}, "
+                    f"stemmer := '{self.stemmer}')"
+                )
+                logger.info(f"Created FTS index {index_name} on {table}({', '.join(properties)})")
+            except Exception as e:
+                if "already exists" not in str(e).lower():
+                    raise
+
+    def _query(
+        self,
+        table: str,
+        index_name: str,
+        query: str,
+        returns: str,
+        conditions: Optional[List[str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Run QUERY_FTS_INDEX with optional filters on the matched node."""
+        cypher = f"CALL QUERY_FTS_INDEX('{table}', '{index_name}', $query)"
+        if conditions:
+            cypher += "\nWHERE " + "\n  AND ".join(conditions)
+        cypher += f"\nRETURN {returns}\nORDER BY score DESC"
+        if limit:
+            cypher += f"\nLIMIT {int(limit)}"
+        return self.db.execute(cypher, {"query": query, **(params or {})})
+
+    def search_entities(
+        self,
+        query: str,
+        top_k: int = 10,
+        min_score: float = 0.0,
+        user_id: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Search entities with the entity FTS index.
+
+        Returns:
+            List of (entity_uuid, score) tuples, sorted by score descending
+        """
+        if not query or not query.strip():
+            return []
+        rows = self._query(
+            "Entity",
+            ENTITY_FTS_INDEX,
+            query,
+            "node.uuid AS uuid, score",
+            conditions=["node.user_id = $user_id"] if user_id else None,
+            params={"user_id": user_id} if user_id else None,
+            limit=top_k,
+        )
+        return [(row["uuid"], float(row["score"])) for row in rows if row["score"] >= min_score]
+
+    def search_episodes(
+        self,
+        query: str,
+        top_k: int = 10,
+        min_score: float = 0.0,
+        tags: Optional[List[str]] = None,
+        tag_match_mode: str = 'any',
+        kinds: Optional[List[str]] = None,
+        user_id: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Search episodes with the episode FTS index, with the same
+        tag/kind/user filters as BM25Index.search_episodes.
+
+        Returns:
+            List of (episode_uuid, score) tuples, sorted by score descending
+            (most recent first on ties)
+        """
+        if not query or not query.strip():
+            # Tag-only searches have no terms to match; filter in the database
+            return super().search_episodes(query, top_k, min_score, tags, tag_match_mode, kinds, user_id)
+
+        params: Dict[str, Any] = {}
+        conditions = [self._not_document("node", params)]
+        if user_id:
+            conditions.append("node.user_id = $user_id")
+            params["user_id"] = user_id
+        if kinds:
+            conditions.append("node.kind IN $kinds")
+            params["kinds"] = [kind.lower() for kind in kinds]
+
+        rows = self._query(
+            "Episode",
+            EPISODE_FTS_INDEX,
+            query,
+            "node.uuid AS uuid, score, node.metadata AS metadata, node.created_at AS created_at",
+            conditions=conditions,
+            params=params,
+            # Tags live in the metadata JSON and are filtered afterwards
+            limit=None if tags else top_k,
+        )
+
+        if tags:
+            wanted = {tag.lower() for tag in tags}
+            rows = [row for row in rows if self._tags_match(row.get("metadata"), wanted, tag_match_mode)]
+
+        rows.sort(key=lambda row: (float(row["score"]), str(row.get("created_at") or "")), reverse=True)
+        return [
+            (row["uuid"], float(row["score"]))
+            for row in rows[:top_k]
+            if row["score"] >= min_score
+        ]
+
+    def __repr__(self) -> str:
+        return f"FTSKeywordIndex(stemmer={self.stemmer!r})"
@@ -0,0 +1,224 @@
+"""
+Cost-based strategy planner for hybrid search.
+
+A hybrid search runs BM25, semantic and traversal search and fuses them.
+The strategies differ a lot in cost: BM25 is an in-memory lookup, semantic
+search embeds the query and scans vectors, and traversal scans vectors and
+then expands the graph one query per BFS layer. The planner decides, from
+cheap statistics, which of them a search actually needs:
+
+- A user with no documents at all gets BM25 only: nothing can match, so
+  the query is not embedded.
+- A user without entities (entity extraction never ran, or found nothing)
+  skips traversal: it has no starting points.
+- A user without episodes, entities or edges that carry embeddings skips
+  semantic search (and traversal, which starts from semantic matches).
+- Short queries (entity-name lookups) defer traversal: it runs after
+  semantic search, and only if the best semantic score is below the
+  confidence threshold.
+
+Only the deferral can change results; the skips drop strategies that could
+not have returned anything. The statistics are per-user document counts,
+cached until the user's data changes (delivered through the database change
+feed).
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from ryumem_server.core.changes import ChangeEvent
+from ryumem_server.core.models import SearchConfig
+from ryumem_server.retrieval.records import SearchHits
+
+logger = logging.getLogger(__name__)
+
+
+class SearchPlan:
+    """
+    Strategies a hybrid search runs, defers and skips, with the reasons.
+
+    Attributes:
+        run: Strategies started up front
+        deferred: Strategies started only if semantic search is not
+            confident (see StrategyPlanner.confident)
+        skipped: Reason by strategy for every strategy the plan leaves out
+        stats: Statistics the plan was made from
+    """
+
+    def __init__(
+        self,
+        run: List[str],
+        deferred: Optional[List[str]] = None,
+        skipped: Optional[Dict[str, str]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+    ):
+        self.run = list(run)
+        self.deferred = list(deferred or [])
+        self.skipped = dict(skipped or {})
+        self.stats = dict(stats or {})
+
+    @classmethod
+    def full(cls) -> "SearchPlan":
+        """Plan that runs every strategy (the planner disabled)."""
+        return cls(run=["semantic", "bm25", "traversal"])
+
+    def needs_embedding(self) -> bool:
+        """Whether any planned strategy uses the query embedding."""
+        return any(name in ("semantic", "traversal") for name in self.run + self.deferred)
+
+    def resolve(self, name: str, reason: Optional[str] = None) -> None:
+        """
+        Record the outcome of a deferred strategy.
+
+        Args:
+            name: Deferred strategy
+            reason: Why it was skipped (None if it ran)
+        """
+        if name in self.deferred:
+            self.deferred.remove(name)
+        if reason is None:
+            self.run.append(name)
+        else:
+            self.skipped[name] = reason
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plan as reported in the search result metadata."""
+        return {
+            "run": list(self.run),
+            "deferred": list(self.deferred),
+            "skipped": dict(self.skipped),
+            "stats": dict(self.stats),
+        }
+
+    def __repr__(self) -> str:
+        return f"SearchPlan(run={self.run}, deferred={self.deferred}, skipped={list(self.skipped)})"
+
+
+class StrategyPlanner:
+    """
+    Plans hybrid searches from per-user document counts and the query.
+
+    Example:
+        planner = StrategyPlanner(db, confidence_score=0.8)
+        db.changes.subscribe(planner.on_change)
+        plan = planner.plan(config)
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        confidence_score: float = 0.8,
+        short_query_terms: int = 2,
+    ):
+        """
+        Initialize the planner.
+
+        Args:
+            db: RyugraphDB instance (provides count_documents)
+            confidence_score: Best semantic score at or above which a
+                deferred traversal is skipped (0 = never defer)
+            short_query_terms: Queries with at most this many terms defer
+                traversal
+        """
+        self.db = db
+        self.confidence_score = confidence_score
+        self.short_query_terms = short_query_terms
+        self._lock = threading.Lock()
+        # user_id -> (generation when counted, counts)
+        self._stats: Dict[Optional[str], Tuple[int, Dict[str, int]]] = {}
+        self._generations: Dict[Optional[str], int] = {}
+        self._global_generation = 0
+
+    def _generation(self, user_id: Optional[str]) -> Tuple[int, int]:
+        return self._generations.get(user_id, 0), self._global_generation
+
+    def stats(self, user_id: Optional[str]) -> Dict[str, int]:
+        """
+        Document counts of a user (all users when None), cached until the
+        user's data changes.
+
+        Returns:
+            Dictionary with episodes, entities, edges and embedded counts
+        """
+        with self._lock:
+            entry = self._stats.get(user_id)
+            generation = self._generation(user_id)
+            if entry is not None and entry[0] == generation:
+                return entry[1]
+
+        counts = self.db.count_documents(user_id)
+
+        with self._lock:
+            # A write while counting makes the counts stale before they are stored
+            if generation == self._generation(user_id):
+                self._stats[user_id] = (generation, counts)
+        return counts
+
+    def plan(self, config: SearchConfig) -> SearchPlan:
+        """
+        Plan a hybrid search.
+
+        Args:
+            config: Search configuration
+
+        Returns:
+            SearchPlan
+        """
+        stats = self.stats(config.user_id)
+        run = ["semantic", "bm25", "traversal"]
+        deferred: List[str] = []
+        skipped: Dict[str, str] = {}
+
+        def skip(name: str, reason: str) -> None:
+            if name in run:
+                run.remove(name)
+                skipped[name] = reason
+
+        if not (stats["episodes"] or stats["entities"] or stats["edges"]):
+            skip("semantic", "no documents")
+            skip("traversal", "no documents")
+        else:
+            if not stats["embedded"]:
+                skip("semantic", "no embeddings")
+                skip("traversal", "no embeddings")
+            if not stats["entities"]:
+                skip("traversal", "no entities")
+
+        terms = len((config.query or "").split())
+        if "traversal" in run and self.confidence_score and terms <= self.short_query_terms:
+            run.remove("traversal")
+            deferred.append("traversal")
+
+        plan = SearchPlan(run=run, deferred=deferred, skipped=skipped, stats={**stats, "query_terms": terms})
+        logger.debug(f"Hybrid search plan: {plan}")
+        return plan
+
+    def confident(self, result: SearchHits) -> bool:
+        """Whether a semantic result's best score makes a deferred traversal unnecessary."""
+        return bool(result.scores) and max(result.scores.values()) >= self.confidence_score
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """
+        Drop the cached counts of a user (or of every user when None).
+
+        Args:
+            user_id: User whose data changed (None = all users)
+        """
+        with self._lock:
+            if user_id is None:
+                self._global_generation += 1
+                self._stats.clear()
+            else:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                # Counts over all users include this user's documents
+                self._generations[None] = self._generations.get(None, 0) + 1
+                self._stats.pop(user_id, None)
+                self._stats.pop(None, None)
+
+    def on_change(self, event: ChangeEvent) -> None:
+        """Change feed subscriber: recount the written user on their next search."""
+        self.invalidate(event.user_id)
+
+    def __repr__(self) -> str:
+        return f"StrategyPlanner(confidence_score={self.confidence_score}, short_query_terms={self.short_query_terms})"
@@ -0,0 +1,196 @@
+"""
+Recency weighting of search scores.
+
+Combines temporal decay (recent facts score higher) and the update boost
+(recently created or invalidated facts get a multiplier) into one score
+multiplier:
+
+    multiplier = decay_factor ^ days_old * boost
+
+The same formula is available as a Python function, a vectorized numpy
+function and a Cypher expression, so every retrieval path applies it while
+scoring candidates, before results are ranked and truncated.
+"""
+
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from ryumem_server.core.models import SearchConfig
+
+MS_PER_DAY = 86_400_000
+
+# Recently invalidated facts get a smaller boost than recently created ones
+INVALIDATED_BOOST_RATIO = 0.8
+
+
+def to_epoch_ms(value: Any) -> Optional[float]:
+    """Convert a timestamp (naive timestamps are UTC) to epoch milliseconds."""
+    # Missing timestamps come back from queries as None, NaN or NaT
+    if value is None or value != value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp() * 1000
+
+
+def epoch_ms_array(values: Iterable[Any]) -> np.ndarray:
+    """Convert timestamps to an epoch-millisecond array (NaN for missing ones)."""
+    epochs = [to_epoch_ms(value) for value in values]
+    return np.array([np.nan if ms is None else ms for ms in epochs], dtype=np.float64)
+
+
+class RecencyScorer:
+    """
+    Score multiplier for temporal decay and the update boost.
+
+    Example:
+        recency = RecencyScorer.from_config(config)
+        score = similarity * recency.multiplier(created_at)
+    """
+
+    def __init__(
+        self,
+        decay_factor: float = 1.0,
+        boost_factor: float = 1.0,
+        recent_threshold_days: int = 7,
+        reference_time: Optional[datetime] = None,
+    ):
+        """
+        Initialize the scorer.
+
+        Args:
+            decay_factor: Decay rate per day (0-1; 1.0 = no decay)
+            boost_factor: Multiplier for recent facts (1.0 = no boost)
+            recent_threshold_days: Days to consider a fact "recent"
+            reference_time: Reference time (default: now)
+        """
+        if reference_time is None:
+            reference_time = datetime.now(timezone.utc)
+        elif reference_time.tzinfo is None:
+            reference_time = reference_time.replace(tzinfo=timezone.utc)
+
+        self.decay_factor = decay_factor
+        self.boost_factor = boost_factor
+        self.now_ms = reference_time.timestamp() * 1000
+        self.cutoff_ms = (reference_time - timedelta(days=recent_threshold_days)).timestamp() * 1000
+
+    @classmethod
+    def from_config(cls, config: SearchConfig) -> Optional["RecencyScorer"]:
+        """
+        Create the scorer for a search.
+
+        Returns:
+            RecencyScorer, or None if neither decay nor boost is enabled
+        """
+        if not config.apply_temporal_decay and not config.apply_update_boost:
+            return None
+        return cls(
+            decay_factor=config.temporal_decay_factor if config.apply_temporal_decay else 1.0,
+            boost_factor=config.update_boost_factor if config.apply_update_boost else 1.0,
+            recent_threshold_days=config.recent_threshold_days,
+        )
+
+    def multiplier(
+        self,
+        created_at: Any,
+        valid_at: Any = None,
+        invalid_at: Any = None,
+    ) -> float:
+        """
+        Score multiplier of one item.
+
+        Args:
+            created_at: When the item was created
+            valid_at: When a fact became true (decays from here if set)
+            invalid_at: When a fact stopped being true (edges only)
+
+        Returns:
+            Multiplier for the item's relevance score
+        """
+        created_ms = to_epoch_ms(created_at)
+        decay_ms = to_epoch_ms(valid_at)
+        if decay_ms is None:
+            decay_ms = created_ms
+
+        multiplier = 1.0
+        if decay_ms is not None and self.decay_factor != 1.0:
+            days_old = max(0, math.floor((self.now_ms - decay_ms) / MS_PER_DAY))
+            multiplier = self.decay_factor ** days_old
+
+        if created_ms is not None and created_ms >= self.cutoff_ms:
+            multiplier *= self.boost_factor
+        else:
+            invalid_ms = to_epoch_ms(invalid_at)
+            if invalid_ms is not None and invalid_ms >= self.cutoff_ms:
+                multiplier *= self.boost_factor * INVALIDATED_BOOST_RATIO
+        return multiplier
+
+    def multipliers(
+        self,
+        created_ms: np.ndarray,
+        valid_ms: Optional[np.ndarray] = None,
+        invalid_ms: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Vectorized multiplier() over epoch-millisecond arrays (NaN = missing).
+
+        Returns:
+            Array of multipliers
+        """
+        decay_ms = created_ms if valid_ms is None else np.where(np.isnan(valid_ms), created_ms, valid_ms)
+        days_old = np.maximum(np.floor((self.now_ms - decay_ms) / MS_PER_DAY), 0)
+        multipliers = np.where(np.isnan(days_old), 1.0, np.power(self.decay_factor, np.nan_to_num(days_old)))
+
+        with np.errstate(invalid="ignore"):
+            recent = created_ms >= self.cutoff_ms
+            boost = np.where(recent, self.boost_factor, 1.0)
+            if invalid_ms is not None:
+                recently_invalidated = ~recent & (invalid_ms >= self.cutoff_ms)
+                boost = np.where(recently_invalidated, self.boost_factor * INVALIDATED_BOOST_RATIO, boost)
+        return multipliers * boost
+
+    def cypher(self, created_at: str, valid_at: Optional[str] = None, invalid_at: Optional[str] = None) -> str:
+        """
+        Cypher expression of multiplier() over the given property expressions.
+
+        Uses the parameters from params().
+
+        Args:
+            created_at: Expression of the creation timestamp (e.g. "e.created_at")
+            valid_at: Expression of the validity timestamp, if any
+            invalid_at: Expression of the invalidation timestamp, if any
+
+        Returns:
+            Cypher expression evaluating to the multiplier
+        """
+        decay_at = f"coalesce({valid_at}, {created_at})" if valid_at else created_at
+        days_old = (
+            f"floor(CASE WHEN to_epoch_ms({decay_at}) >= $recency_now_ms THEN 0 "
+            f"ELSE ($recency_now_ms - to_epoch_ms({decay_at})) / {float(MS_PER_DAY)} END)"
+        )
+        decay = f"coalesce(pow($recency_decay, {days_old}), 1.0)"
+
+        boost = f"WHEN to_epoch_ms({created_at}) >= $recency_cutoff_ms THEN $recency_boost "
+        if invalid_at:
+            boost += (
+                f"WHEN to_epoch_ms({invalid_at}) >= $recency_cutoff_ms "
+                f"THEN $recency_boost * {INVALIDATED_BOOST_RATIO} "
+            )
+        return f"({decay} * CASE {boost}ELSE 1.0 END)"
+
+    def params(self) -> Dict[str, Any]:
+        """Query parameters used by cypher()."""
+        return {
+            "recency_now_ms": int(self.now_ms),
+            "recency_cutoff_ms": int(self.cutoff_ms),
+            "recency_decay": float(self.decay_factor),
+            "recency_boost": float(self.boost_factor),
+        }
+
+    def __repr__(self) -> str:
+        return f"RecencyScorer(decay_factor={self.decay_factor}, boost_factor={self.boost_factor})"
@@ -0,0 +1,221 @@
+"""
+Lightweight result records for the search hot path.
+
+Search strategies turn every candidate row into a record: a slotted
+dataclass holding only the fields a search result carries. Records skip the
+validation and default factories of the Pydantic models, so candidates that
+fusion, thresholds or limits drop later cost little. SearchHits.to_result
+converts the records that survive into EntityNode, EntityEdge and
+EpisodeNode models once, at the edge of the engine.
+"""
+
+import json
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from ryumem_server.core.models import (
+    EntityEdge,
+    EntityNode,
+    EpisodeKind,
+    EpisodeNode,
+    EpisodeType,
+    SearchResult,
+)
+
+
+def _value(value: Any) -> Any:
+    """Database value with None, NaN and NaT mapped to None."""
+    if value is None or value != value:  # NaN and NaT compare unequal to themselves
+        return None
+    return value
+
+
+def _user_id(value: Any) -> Optional[str]:
+    """user_id from a database row (SQLite NULLs arrive as NaN)."""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+@dataclass(slots=True)
+class EntityRecord:
+    """An entity in a search result."""
+    uuid: str
+    name: str
+    entity_type: str
+    summary: str
+    mentions: int
+    user_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any], prefix: str = "") -> "EntityRecord":
+        """
+        Build a record from an entity row.
+
+        Args:
+            row: Database row
+            prefix: Column prefix (e.g. "target_" for traversal rows)
+        """
+        return cls(
+            uuid=row[f"{prefix}uuid"],
+            name=row[f"{prefix}name"],
+            entity_type=row[f"{prefix}entity_type"],
+            summary=row.get(f"{prefix}summary") or "",
+            mentions=row.get(f"{prefix}mentions") or 1,
+            user_id=_user_id(row.get(f"{prefix}user_id")),
+            created_at=_value(row.get(f"{prefix}created_at")),
+        )
+
+    def to_model(self) -> EntityNode:
+        """Convert to an EntityNode."""
+        values: Dict[str, Any] = {"created_at": self.created_at} if self.created_at is not None else {}
+        return EntityNode(
+            uuid=self.uuid,
+            name=self.name,
+            entity_type=self.entity_type,
+            summary=self.summary,
+            mentions=self.mentions,
+            user_id=self.user_id,
+            **values,
+        )
+
+
+@dataclass(slots=True)
+class EdgeRecord:
+    """A relationship edge in a search result."""
+    uuid: str
+    source_node_uuid: str
+    target_node_uuid: str
+    name: str
+    fact: str
+    created_at: Optional[datetime] = None
+    valid_at: Optional[datetime] = None
+    invalid_at: Optional[datetime] = None
+    expired_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any], uuid_column: str = "uuid") -> "EdgeRecord":
+        """
+        Build a record from an edge row.
+
+        Args:
+            row: Database row
+            uuid_column: Column holding the edge UUID ("edge_uuid" in
+                similarity and traversal rows)
+        """
+        return cls(
+            uuid=row[uuid_column],
+            source_node_uuid=row["source_uuid"],
+            target_node_uuid=row["target_uuid"],
+            name=row["relation_type"],
+            fact=row["fact"],
+            created_at=_value(row.get("created_at")),
+            valid_at=_value(row.get("valid_at")),
+            invalid_at=_value(row.get("invalid_at")),
+            expired_at=_value(row.get("expired_at")),
+        )
+
+    def to_model(self) -> EntityEdge:
+        """Convert to an EntityEdge."""
+        values: Dict[str, Any] = {"created_at": self.created_at} if self.created_at is not None else {}
+        return EntityEdge(
+            uuid=self.uuid,
+            source_node_uuid=self.source_node_uuid,
+            target_node_uuid=self.target_node_uuid,
+            name=self.name,
+            fact=self.fact,
+            valid_at=self.valid_at,
+            invalid_at=self.invalid_at,
+            expired_at=self.expired_at,
+            **values,
+        )
+
+
+@dataclass(slots=True)
+class EpisodeRecord:
+    """An episode in a search result."""
+    uuid: str
+    name: str
+    content: str
+    source: EpisodeType
+    source_description: str
+    kind: EpisodeKind
+    user_id: Optional[str] = None
+    agent_id: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "EpisodeRecord":
+        """
+        Build a record from an episode row.
+
+        Raises:
+            ValueError: The row has an unknown source or kind
+        """
+        metadata = row.get("metadata") or {}
+        if isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata)
+            except (json.JSONDecodeError, TypeError):
+                metadata = {}
+        return cls(
+            uuid=row["uuid"],
+            name=row.get("name") or "",
+            content=row["content"],
+            source=EpisodeType.from_str(row.get("source") or "text"),
+            source_description=row.get("source_description") or "",
+            kind=EpisodeKind.from_str(row.get("kind") or "query"),
+            user_id=_value(row.get("user_id")),
+            agent_id=_value(row.get("agent_id")),
+            metadata=metadata,
+            created_at=_value(row.get("created_at")),
+        )
+
+    def to_model(self) -> EpisodeNode:
+        """Convert to an EpisodeNode."""
+        values: Dict[str, Any] = {"created_at": self.created_at} if self.created_at is not None else {}
+        return EpisodeNode(
+            uuid=self.uuid,
+            name=self.name,
+            content=self.content,
+            source=self.source,
+            source_description=self.source_description,
+            kind=self.kind,
+            user_id=self.user_id,
+            agent_id=self.agent_id,
+            metadata=self.metadata,
+            **values,
+        )
+
+
+@dataclass(slots=True)
+class SearchHits:
+    """
+    Records found by a search strategy, ranked, with their scores.
+
+    Attributes:
+        entities: Entity records, best first
+        edges: Edge records, best first
+        episodes: Episode records, best first
+        scores: Score by UUID (may include candidates cut by the limit)
+        metadata: Strategy details, as in SearchResult.metadata
+    """
+    entities: List[EntityRecord] = field(default_factory=list)
+    edges: List[EdgeRecord] = field(default_factory=list)
+    episodes: List[EpisodeRecord] = field(default_factory=list)
+    scores: Dict[str, float] = field(default_factory=dict)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def to_result(self) -> SearchResult:
+        """Convert to a SearchResult of models."""
+        return SearchResult(
+            entities=[record.to_model() for record in self.entities],
+            edges=[record.to_model() for record in self.edges],
+            episodes=[record.to_model() for record in self.episodes],
+            scores=self.scores,
+            metadata=self.metadata,
+        )
@@ -0,0 +1,192 @@
+"""
+Search result cache for Ryumem.
+
+Caches complete SearchResults keyed on (user_id, normalized query, search
+settings). Every entry records the write generation of its user at the time
+the search started; any write to that user's data (ingestion, metadata
+updates, deletions — delivered through the database change feed) bumps the
+generation, so a cached result is never served after the data it was
+computed from changed. Writes without a user (e.g. raw Cypher, resets) bump a
+global generation that invalidates every user.
+
+Concurrent identical searches are coalesced: the first caller runs the
+search, the others wait for its result.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ryumem_server.core.changes import ChangeEvent
+from ryumem_server.core.models import SearchConfig, SearchResult
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[Optional[str], str, str]
+
+
+def normalize_query(query: Optional[str]) -> str:
+    """Collapse whitespace and case so near-identical queries share an entry."""
+    return " ".join((query or "").split()).lower()
+
+
+class SearchResultCache:
+    """
+    LRU cache of search results with per-user write-generation invalidation.
+
+    Example:
+        cache = SearchResultCache(max_entries=1024, ttl_seconds=300)
+        db.changes.subscribe(cache.on_change)
+        result = cache.get_or_compute(config, lambda: run_search(config))
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached results (least recently
+                used are evicted)
+            ttl_seconds: Maximum age of a cached result (0 = no limit);
+                bounds the drift of time-dependent scores such as temporal decay
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (user generation, global generation, stored at, result)
+        self._entries: "OrderedDict[CacheKey, Tuple[int, int, float, SearchResult]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, Future] = {}
+        self._generations: Dict[Optional[str], int] = {}
+        self._global_generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._invalidations = 0
+        self._evictions = 0
+
+    @staticmethod
+    def make_key(config: SearchConfig) -> CacheKey:
+        """Cache key of a search: user, normalized query and a hash of the other settings."""
+        # profile only changes what is reported, not the result
+        settings = config.model_dump(exclude={"query", "user_id", "profile"})
+        digest = hashlib.sha1(
+            json.dumps(settings, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return (config.user_id, normalize_query(config.query), digest)
+
+    def _current(self, user_id: Optional[str]) -> Tuple[int, int]:
+        return self._generations.get(user_id, 0), self._global_generation
+
+    def get_or_compute(
+        self,
+        config: SearchConfig,
+        compute: Callable[[], SearchResult],
+    ) -> SearchResult:
+        """
+        Return the cached result of a search, or run it (once for all
+        concurrent identical callers) and cache the result.
+
+        Args:
+            config: Search configuration
+            compute: Function that runs the search
+
+        Returns:
+            A copy of the search result (callers may modify it freely)
+        """
+        key = self.make_key(config)
+        user_id = config.user_id
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                user_generation, global_generation, stored_at, result = entry
+                fresh = (user_generation, global_generation) == self._current(user_id)
+                if fresh and (not self.ttl_seconds or time.monotonic() - stored_at < self.ttl_seconds):
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return result.model_copy(deep=True)
+                del self._entries[key]
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self._coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                self._misses += 1
+                leader = True
+            generation = self._current(user_id)
+
+        if not leader:
+            return future.result().model_copy(deep=True)
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            # A write during the search makes the result stale before it is stored
+            if generation == self._current(user_id):
+                self._entries[key] = (generation[0], generation[1], time.monotonic(), result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        future.set_result(result)
+        return result.model_copy(deep=True)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """
+        Bump the write generation of a user (or of every user when user_id
+        is None), so results cached before the write are no longer served.
+
+        Args:
+            user_id: User whose data changed (None = all users)
+        """
+        with self._lock:
+            self._invalidations += 1
+            if user_id is None:
+                self._global_generation += 1
+                self._entries.clear()
+            else:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                # Results for all users (user_id=None) may include this user's data
+                self._generations[None] = self._generations.get(None, 0) + 1
+
+    def on_change(self, event: ChangeEvent) -> None:
+        """Change feed subscriber: invalidate the results of the written user."""
+        self.invalidate(event.user_id)
+
+    def clear(self) -> None:
+        """Drop every cached result (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "hit_rate": (self._hits + self._coalesced) / lookups if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "evictions": self._evictions,
+            }
+
+    def __repr__(self) -> str:
+        return f"SearchResultCache(entries={len(self._entries)}, max_entries={self.max_entries})"
@@ -5,36 +5,53 @@ Implements semantic search, graph traversal, BM25, and hybrid search strategies.
 
 import json
 import logging
-import math
+import threading
+import time
 from collections import defaultdict
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Set, Tuple
+from contextvars import copy_context
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
 
 from ryumem_server.core.graph_db import RyugraphDB
-from ryumem_server.core.models import EntityEdge, EntityNode, EpisodeNode, EpisodeType, SearchConfig, SearchResult
+from ryumem_server.core.models import SearchConfig, SearchResult
+from ryumem_server.core.profiling import LatencyHistograms, SearchProfile, record_cache, stage
+from ryumem_server.retrieval.batch_scoring import top_k_similar
 from ryumem_server.retrieval.bm25 import BM25Index
+from ryumem_server.retrieval.planner import SearchPlan, StrategyPlanner
+from ryumem_server.retrieval.recency import RecencyScorer, epoch_ms_array
+from ryumem_server.retrieval.records import EdgeRecord, EntityRecord, EpisodeRecord, SearchHits
+from ryumem_server.retrieval.result_cache import SearchResultCache
+from ryumem_server.retrieval.sharded_bm25 import ShardedBM25Index
 from ryumem_server.utils.embeddings import EmbeddingClient
 
 logger = logging.getLogger(__name__)
 
+# Hybrid strategies in fusion order
+HYBRID_STRATEGIES = ("semantic", "bm25", "traversal")
 
-def _sanitize_user_id(user_id: Any) -> Optional[str]:
+
+def _tags_match(metadata: Any, wanted: Set[str], tag_match_mode: str) -> bool:
     """
-    Sanitize user_id value from database.
-    Converts nan (float) to None, which can happen when SQLite returns NULL.
+    Check episode metadata against a tag filter, like search_similar_episodes.
 
     Args:
-        user_id: Raw user_id value from database
+        metadata: Episode metadata (dict or JSON string)
+        wanted: Lowercased tags to match
+        tag_match_mode: 'any' (at least one tag) or 'all' (all tags)
 
     Returns:
-        None if user_id is None or nan, otherwise the string value
+        True if the episode passes the filter
     """
-    if user_id is None:
-        return None
-    # Check if it's a float nan
-    if isinstance(user_id, float) and math.isnan(user_id):
-        return None
-    return user_id
+    if not metadata:
+        return False
+    try:
+        metadata_dict = metadata if isinstance(metadata, dict) else json.loads(metadata)
+        episode_tags = {str(tag).lower() for tag in metadata_dict.get("tags", []) if tag}
+    except (json.JSONDecodeError, TypeError, AttributeError):
+        return False
+    if tag_match_mode == 'all':
+        return wanted.issubset(episode_tags)
+    return bool(wanted & episode_tags)
 
 
 class SearchEngine:
@@ -46,8 +63,16 @@ class SearchEngine:
         self,
         db: RyugraphDB,
         embedding_client: EmbeddingClient,
-        bm25_index: Optional[BM25Index] = None,
+        bm25_index: Optional[Union[BM25Index, ShardedBM25Index]] = None,
         episode_config: Optional[Any] = None,
+        parallel_hybrid: bool = True,
+        max_workers: int = 8,
+        strategy_budgets: Optional[Dict[str, float]] = None,
+        traversal_max_nodes: int = 100,
+        traversal_max_edges: int = 500,
+        result_cache: Optional[SearchResultCache] = None,
+        metrics: Optional[LatencyHistograms] = None,
+        planner: Optional[StrategyPlanner] = None,
     ):
         """
         Initialize search engine.
@@ -55,8 +80,20 @@ class SearchEngine:
         Args:
             db: Ryugraph database instance
             embedding_client: Embedding client for semantic search
-            bm25_index: Optional BM25 index (created if not provided)
+            bm25_index: Optional BM25 index, plain or sharded by user (created if not provided)
             episode_config: Episode configuration for embeddings settings
+            parallel_hybrid: Run the hybrid search strategies concurrently
+            max_workers: Size of the thread pool shared by concurrent strategies
+            strategy_budgets: Time budget in seconds per hybrid strategy
+                ("semantic", "bm25", "traversal"); strategies without a
+                budget are waited for until they finish
+            traversal_max_nodes: Maximum number of entities a traversal visits
+            traversal_max_edges: Maximum number of edges a traversal expands
+            result_cache: Optional cache of complete search results
+            metrics: Histograms every search records its stage timings into
+                (created if not provided)
+            planner: Optional planner that decides which hybrid strategies
+                a search runs (all of them when not provided)
         """
         from ryumem.core.config import EpisodeConfig
 
@@ -64,6 +101,16 @@ class SearchEngine:
         self.embedding_client = embedding_client
         self.episode_config = episode_config if episode_config is not None else EpisodeConfig()
         self.bm25_index = bm25_index or BM25Index()
+        self.parallel_hybrid = parallel_hybrid
+        self.strategy_budgets = dict(strategy_budgets or {})
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.traversal_max_nodes = traversal_max_nodes
+        self.traversal_max_edges = traversal_max_edges
+        self.result_cache = result_cache
+        self.metrics = metrics if metrics is not None else LatencyHistograms()
+        self.planner = planner
 
         logger.info("Initialized SearchEngine")
 
@@ -71,19 +118,257 @@ class SearchEngine:
         """
         Perform search using the specified strategy.
 
+        Results are served from the result cache when one is configured and
+        the user's data has not changed since the cached search ran.
+
+        Every search is profiled into the metrics histograms; with
+        config.profile the profile (per-stage wall time, database queries,
+        rows read, cache hits) is also returned in metadata["profile"].
+
         Args:
             config: Search configuration
 
         Returns:
             SearchResult with entities, edges, and scores
         """
-        logger.info(
-            f"Starting search: strategy={config.strategy}, "
-            f"query='{config.query[:50]}...', limit={config.limit}"
-        )
+        profile = SearchProfile()
+        with profile.activate():
+            if self.result_cache is not None:
+                computed = []
+
+                def compute() -> SearchResult:
+                    computed.append(True)
+                    return self._run_search(config)
+
+                results = self.result_cache.get_or_compute(config, compute)
+                record_cache("search_results", hits=0 if computed else 1, misses=1 if computed else 0)
+            else:
+                results = self._run_search(config)
+
+        self.metrics.observe_profile(profile)
+        if config.profile:
+            results.metadata["profile"] = profile.to_dict()
+        return results
 
-        # Auto-fallback to BM25 if semantic/hybrid requested but embeddings disabled
+    def search_stream(self, config: SearchConfig) -> Iterator[Tuple[str, SearchResult]]:
+        """
+        Perform a search, yielding partial results as the strategies finish.
+
+        A hybrid search yields the result of each strategy ("bm25",
+        "semantic", "traversal") as soon as it is available, so callers can
+        show the cheapest matches first, then the RRF-fused result as
+        "final". Other strategies only yield "final". Strategies left out of
+        the fusion (budget exceeded or failed) are not yielded; the final
+        result lists them in metadata["skipped_strategies"], and the ones the
+        planner skipped in metadata["plan"].
+
+        Streamed searches bypass the result cache. They are profiled into
+        the metrics histograms under "search_stream.*"; with config.profile
+        the final result carries the profile.
+
+        Args:
+            config: Search configuration
+
+        Yields:
+            Tuples of (event name, SearchResult)
+        """
+        profile = SearchProfile()
+
+        def step(work: Callable[[], Any]) -> Any:
+            # Activate the profile only while working: the caller may resume
+            # this generator from another thread or context
+            with profile.activate():
+                return work()
+
+        if self._effective_strategy(config) != "hybrid":
+            result = step(lambda: self._run_search(config))
+        else:
+            plan = step(lambda: self._plan(config))
+            strategies = self._iter_hybrid_strategies(config, plan=plan)
+            results: Dict[str, SearchHits] = {}
+            timings: Dict[str, float] = {}
+            skipped: List[str] = []
+            while True:
+                item = step(lambda: next(strategies, None))
+                if item is None:
+                    break
+                name, partial, elapsed_ms = item
+                if partial is None:
+                    skipped.append(name)
+                    continue
+                results[name], timings[name] = partial, elapsed_ms
+                yield name, step(partial.to_result)
+            skipped.sort(key=HYBRID_STRATEGIES.index)
+            result = step(lambda: self._fuse_hybrid(config, results, timings, skipped, plan).to_result())
+
+        self.metrics.observe_profile(profile, prefix="search_stream")
+        if config.profile:
+            result.metadata["profile"] = profile.to_dict()
+        yield "final", result
+
+    def search_batch(self, configs: List[SearchConfig]) -> List[SearchResult]:
+        """
+        Run several searches, sharing the vector work between them.
+
+        All queries that need embeddings are embedded with one embed_batch
+        call. Queries with the same user and filters are scored against one
+        candidate matrix per kind (episodes, entities, edges) with a single
+        matrix-matrix product, instead of one database vector scan per
+        query. Recency weighting is applied to the candidate scores before
+        the top-k cut, as in the database searches. The rest of each search
+        (BM25, traversal, fusion) runs as in search().
+
+        Args:
+            configs: Search configurations, one per query
+
+        Returns:
+            SearchResults in the order of configs (results of configs with
+            profile set carry the profile of the whole batch)
+        """
+        profile = SearchProfile()
+        with profile.activate():
+            results = self._run_batch(configs)
+
+        self.metrics.observe_profile(profile, prefix="search_batch")
+        if any(config.profile for config in configs):
+            batch_profile = profile.to_dict()
+            for config, result in zip(configs, results):
+                if config.profile:
+                    result.metadata["profile"] = {**batch_profile, "batch_size": len(configs)}
+        return results
+
+    def _run_batch(self, configs: List[SearchConfig]) -> List[SearchResult]:
+        """Run search_batch within its profile."""
+        vector_indices = [
+            i for i, config in enumerate(configs)
+            if self._effective_strategy(config) in ("semantic", "traversal", "hybrid")
+        ]
+        neighbours: Dict[int, Dict[str, Any]] = {}
+        if vector_indices:
+            with stage("embed"):
+                embeddings = self.embedding_client.embed_batch([configs[i].query for i in vector_indices])
+            groups: Dict[Tuple, List[int]] = defaultdict(list)
+            for i in vector_indices:
+                config = configs[i]
+                groups[(
+                    config.user_id,
+                    tuple(config.kinds or ()),
+                    tuple(config.tags or ()),
+                    config.tag_match_mode,
+                    config.similarity_threshold,
+                    # Recency weighting changes which candidates make the cut
+                    config.apply_temporal_decay and config.temporal_decay_factor,
+                    config.apply_update_boost and config.update_boost_factor,
+                    config.recent_threshold_days,
+                )].append(i)
+            embedding_by_index = dict(zip(vector_indices, embeddings))
+            for indices in groups.values():
+                neighbours.update(self._batch_neighbours(
+                    [configs[i] for i in indices],
+                    [embedding_by_index[i] for i in indices],
+                    indices,
+                ))
+
+        logger.info(f"Batch search: {len(configs)} queries, {len(vector_indices)} scored in one batch")
+        return [self._run_search(config, neighbours.get(i)) for i, config in enumerate(configs)]
+
+    def _batch_neighbours(
+        self,
+        configs: List[SearchConfig],
+        embeddings: List[List[float]],
+        indices: List[int],
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Score a group of queries that share user and filters against the
+        candidate vectors, and load the matches with one multi-get per kind.
+
+        Returns:
+            Dictionary mapping query index to its neighbours: the query
+            embedding and the episode, entity and edge rows that
+            search_similar_episodes/entities/edges would have returned
+        """
+        config = configs[0]
+        threshold = config.similarity_threshold
+        limits = [c.limit for c in configs]
+        recency = RecencyScorer.from_config(config)
+
+        def weights(candidates: List[Dict[str, Any]]) -> Optional[Any]:
+            if recency is None or not candidates:
+                return None
+            return recency.multipliers(
+                epoch_ms_array(row.get("created_at") for row in candidates),
+                epoch_ms_array(row.get("valid_at") for row in candidates) if "valid_at" in candidates[0] else None,
+                epoch_ms_array(row.get("invalid_at") for row in candidates) if "invalid_at" in candidates[0] else None,
+            )
+
+        with stage("vector_scan"):
+            episode_candidates = self.db.get_episode_embeddings(config.user_id, kinds=config.kinds)
+            if config.tags:
+                wanted = {tag.lower() for tag in config.tags}
+                episode_candidates = [
+                    row for row in episode_candidates
+                    if _tags_match(row.get("metadata"), wanted, config.tag_match_mode)
+                ]
+            entity_candidates = self.db.get_entity_embeddings(config.user_id)
+            edge_candidates = self.db.get_edge_embeddings(config.user_id)
+            matches = {
+                kind: (
+                    candidates,
+                    top_k_similar(
+                        embeddings,
+                        [row["embedding"] for row in candidates],
+                        threshold,
+                        limits,
+                        weights=weights(candidates),
+                    ),
+                )
+                for kind, candidates in (
+                    ("episodes", episode_candidates),
+                    ("entities", entity_candidates),
+                    ("edges", edge_candidates),
+                )
+            }
+
+        def matched_uuids(kind: str) -> List[str]:
+            candidates, per_query = matches[kind]
+            return list(dict.fromkeys(candidates[i]["uuid"] for hits in per_query for i, _, _ in hits))
+
+        with stage("hydrate"):
+            rows = {
+                "episodes": self.db.get_episodes_by_uuids(matched_uuids("episodes")),
+                "entities": self.db.get_entities_by_uuids(matched_uuids("entities")),
+                "edges": {
+                    uuid: {
+                        "edge_uuid": edge["uuid"],
+                        "source_uuid": edge["source_uuid"],
+                        "target_uuid": edge["target_uuid"],
+                        "relation_type": edge["relation_type"],
+                        "fact": edge["fact"],
+                        "created_at": edge.get("created_at"),
+                        "valid_at": edge.get("valid_at"),
+                        "invalid_at": edge.get("invalid_at"),
+                    }
+                    for uuid, edge in self.db.get_edges_by_uuids(matched_uuids("edges")).items()
+                },
+            }
+
+        neighbours: Dict[int, Dict[str, Any]] = {}
+        for position, index in enumerate(indices):
+            result: Dict[str, Any] = {"embedding": embeddings[position]}
+            for kind, (candidates, per_query) in matches.items():
+                result[kind] = [
+                    {**rows[kind][candidates[i]["uuid"]], "similarity": similarity, "score": score}
+                    for i, similarity, score in per_query[position]
+                    if candidates[i]["uuid"] in rows[kind]
+                ]
+            neighbours[index] = result
+        return neighbours
+
+    def _effective_strategy(self, config: SearchConfig) -> str:
+        """Strategy a search actually runs, after the BM25 fallbacks."""
         strategy = config.strategy
+
+        # Auto-fallback to BM25 if semantic/hybrid requested but embeddings disabled
         if strategy in ["semantic", "hybrid"] and not self.episode_config.enable_embeddings:
             logger.warning(
                 f"Episode embeddings disabled, falling back to BM25 for query: {config.query[:50]}"
@@ -95,36 +380,55 @@ class SearchEngine:
             logger.info("Tag-only search detected, using BM25 strategy")
             strategy = "bm25"
 
+        return strategy
+
+    def _run_search(
+        self,
+        config: SearchConfig,
+        neighbours: Optional[Dict[str, Any]] = None,
+    ) -> SearchResult:
+        """
+        Run a search without the result cache.
+
+        Args:
+            config: Search configuration
+            neighbours: Precomputed query embedding and vector matches
+                (batched searches; see search_batch)
+
+        Returns:
+            SearchResult
+        """
+        logger.info(
+            f"Starting search: strategy={config.strategy}, "
+            f"query='{config.query[:50]}...', limit={config.limit}"
+        )
+        strategy = self._effective_strategy(config)
+        query_embedding = neighbours["embedding"] if neighbours else None
+
         # Run base search strategy
         if strategy == "semantic":
-            results = self._semantic_search(config)
+            results = self._semantic_search(config, query_embedding, neighbours)
         elif strategy == "traversal":
-            results = self._traversal_search(config)
+            results = self._traversal_search(config, query_embedding, neighbours)
         elif strategy == "bm25":
             results = self._bm25_search(config)
         elif strategy == "hybrid":
-            results = self._hybrid_search(config)
+            results = self._hybrid_search(config, neighbours)
         else:
             raise ValueError(f"Unknown search strategy: {config.strategy}")
 
-        # Apply temporal decay if enabled
-        if config.apply_temporal_decay:
-            results = self._apply_temporal_decay(
-                results,
-                decay_factor=config.temporal_decay_factor,
-            )
-
-        # Apply update-awareness boost if enabled
-        if config.apply_update_boost:
-            results = self._apply_update_boost(
-                results,
-                boost_factor=config.update_boost_factor,
-                recent_threshold_days=config.recent_threshold_days,
-            )
-
-        return results
+        # Temporal decay and the update boost are applied inside each
+        # strategy, before its results are ranked and limited. Only the
+        # records that made the cut become models.
+        with stage("convert"):
+            return results.to_result()
 
-    def _semantic_search(self, config: SearchConfig) -> SearchResult:
+    def _semantic_search(
+        self,
+        config: SearchConfig,
+        query_embedding: Optional[List[float]] = None,
+        neighbours: Optional[Dict[str, Any]] = None,
+    ) -> SearchHits:
         """
         Semantic search using embedding similarity.
 
@@ -136,155 +440,134 @@ class SearchEngine:
 
         Args:
             config: Search configuration
+            query_embedding: Precomputed query embedding (generated if not provided)
+            neighbours: Precomputed vector matches from search_batch (replace
+                the database similarity searches)
 
         Returns:
-            SearchResult
+            SearchHits
         """
         # Generate query embedding
-        logger.debug(f"🔍 Generating embedding for query: '{config.query}'")
-        query_embedding = self.embedding_client.embed(config.query)
+        if query_embedding is None:
+            logger.debug(f"🔍 Generating embedding for query: '{config.query}'")
+            with stage("embed"):
+                query_embedding = self.embedding_client.embed(config.query)
         logger.debug(f"✅ Generated embedding: {len(query_embedding)} dimensions")
         logger.debug(f"🔍 Query embedding: {query_embedding}")
+        recency = RecencyScorer.from_config(config)
 
         # Step 1: Search similar episodes (NEW)
         logger.debug(f"🎬 Searching for similar episodes (threshold: {config.similarity_threshold}, limit: {config.limit}, kinds: {config.kinds})")
-        episode_results = self.db.search_similar_episodes(
-            embedding=query_embedding,
-            user_id=config.user_id,
-            threshold=config.similarity_threshold,
-            limit=config.limit,
-            kinds=config.kinds,
-            tags=config.tags,
-            tag_match_mode=config.tag_match_mode,
-        )
+        if neighbours is not None:
+            episode_results = neighbours["episodes"]
+        else:
+            with stage("vector_scan"):
+                episode_results = self.db.search_similar_episodes(
+                    embedding=query_embedding,
+                    user_id=config.user_id,
+                    threshold=config.similarity_threshold,
+                    limit=config.limit,
+                    kinds=config.kinds,
+                    tags=config.tags,
+                    tag_match_mode=config.tag_match_mode,
+                    recency=recency,
+                )
         logger.debug(f"📊 Found {len(episode_results)} similar episodes")
 
-        # Step 2: Get entities from matched episodes
-        episode_entity_uuids = set()
+        # Step 2: Get entities from matched episodes (MENTIONS edges, one query for all episodes)
+        with stage("hydrate"):
+            mentioned_entities = self.db.get_entities_for_episodes([episode["uuid"] for episode in episode_results])
+        episode_entities: Dict[str, Dict[str, Any]] = {}
         for episode in episode_results:
-            # Get entities mentioned in this episode via MENTIONS edges
-            mentioned_entities = self.db.get_episode_entities(episode["uuid"])
-            episode_entity_uuids.update([e["uuid"] for e in mentioned_entities])
+            for entity_data in mentioned_entities.get(episode["uuid"], []):
+                episode_entities.setdefault(entity_data["uuid"], entity_data)
+        episode_entity_uuids = set(episode_entities)
 
         logger.debug(f"📊 Found {len(episode_entity_uuids)} entities from episodes")
 
         # Step 3: Search similar entities (direct semantic search)
         logger.debug(f"🔎 Searching for similar entities (threshold: {config.similarity_threshold}, limit: {config.limit})")
-        entity_results = self.db.search_similar_entities(
-            embedding=query_embedding,
-            user_id=config.user_id,
-            threshold=config.similarity_threshold,
-            limit=config.limit,
-        )
+        if neighbours is not None:
+            entity_results = neighbours["entities"]
+        else:
+            with stage("vector_scan"):
+                entity_results = self.db.search_similar_entities(
+                    embedding=query_embedding,
+                    user_id=config.user_id,
+                    threshold=config.similarity_threshold,
+                    limit=config.limit,
+                    recency=recency,
+                )
         logger.debug(f"📊 Found {len(entity_results)} similar entities")
 
         # Step 4: Search similar edges
         logger.debug(f"🔎 Searching for similar edges (threshold: {config.similarity_threshold}, limit: {config.limit})")
-        edge_results = self.db.search_similar_edges(
-            embedding=query_embedding,
-            user_id=config.user_id,
-            threshold=config.similarity_threshold,
-            limit=config.limit,
-        )
+        if neighbours is not None:
+            edge_results = neighbours["edges"]
+        else:
+            with stage("vector_scan"):
+                edge_results = self.db.search_similar_edges(
+                    embedding=query_embedding,
+                    user_id=config.user_id,
+                    threshold=config.similarity_threshold,
+                    limit=config.limit,
+                    recency=recency,
+                )
         logger.debug(f"📊 Found {len(edge_results)} similar edges")
 
-        # Convert to models
-        entities: List[EntityNode] = []
+        # Convert to records
+        entities: List[EntityRecord] = []
         scores: Dict[str, float] = {}
         seen_entity_uuids = set()
 
         # Add entities from directly-searched entity results with their similarity scores
         for result in entity_results:
-            entity = EntityNode(
-                uuid=result["uuid"],
-                name=result["name"],
-                entity_type=result["entity_type"],
-                summary=result.get("summary", ""),
-                mentions=result["mentions"],
-                user_id=_sanitize_user_id(result.get("user_id")),
-            )
+            entity = EntityRecord.from_row(result)
             entities.append(entity)
-            scores[entity.uuid] = result["similarity"]
+            scores[entity.uuid] = result.get("score", result["similarity"])
             seen_entity_uuids.add(entity.uuid)
 
         # Add entities from episodes (if not already included)
-        for entity_uuid in episode_entity_uuids:
+        for entity_uuid, entity_data in episode_entities.items():
             if entity_uuid not in seen_entity_uuids:
-                # Fetch full entity data
-                entity_data = self.db.get_entity_by_uuid(entity_uuid)
-                if entity_data:
-                    entity = EntityNode(
-                        uuid=entity_data["uuid"],
-                        name=entity_data["name"],
-                        entity_type=entity_data["entity_type"],
-                        summary=entity_data.get("summary", ""),
-                        mentions=entity_data["mentions"],
-                        user_id=_sanitize_user_id(entity_data.get("user_id")),
-                    )
-                    entities.append(entity)
-                    # Give these entities a slightly lower score since they came from episode association
-                    scores[entity.uuid] = config.similarity_threshold * 0.9
-                    seen_entity_uuids.add(entity_uuid)
-
-        edges: List[EntityEdge] = []
+                entity = EntityRecord.from_row(entity_data)
+                entities.append(entity)
+                # Give these entities a slightly lower score since they came from episode association
+                scores[entity.uuid] = config.similarity_threshold * 0.9
+                if recency:
+                    scores[entity.uuid] *= recency.multiplier(entity_data.get("created_at"))
+                seen_entity_uuids.add(entity_uuid)
+
+        edges: List[EdgeRecord] = []
         for result in edge_results:
-            edge = EntityEdge(
-                uuid=result["edge_uuid"],
-                source_node_uuid=result["source_uuid"],
-                target_node_uuid=result["target_uuid"],
-                name=result["relation_type"],
-                fact=result["fact"],
-            )
+            edge = EdgeRecord.from_row(result, "edge_uuid")
             edges.append(edge)
-            scores[edge.uuid] = result["similarity"]
+            scores[edge.uuid] = result.get("score", result["similarity"])
 
-        # Convert episode results to EpisodeNode objects
-        episodes: List[EpisodeNode] = []
+        # Convert episode results to records
+        episodes: List[EpisodeRecord] = []
         for result in episode_results:
             try:
-                # Handle nan values for optional string fields
-                def safe_str_or_none(value):
-                    if value is None or (isinstance(value, float) and math.isnan(value)):
-                        return None
-                    return value
-                
-                # Handle metadata deserialization
-                metadata = result.get("metadata", {})
-                if isinstance(metadata, str):
-                    try:
-                        metadata = json.loads(metadata)
-                    except (json.JSONDecodeError, TypeError):
-                        metadata = {}
-                
-                from ryumem_server.core.models import EpisodeKind
-                episode = EpisodeNode(
-                    uuid=result["uuid"],
-                    name=result.get("name", ""),
-                    content=result["content"],
-                    source=EpisodeType.from_str(result.get("source", "text")),
-                    source_description=result.get("source_description", ""),
-                    kind=EpisodeKind.from_str(result.get("kind", "query")),
-                    user_id=safe_str_or_none(result.get("user_id")),
-                    agent_id=safe_str_or_none(result.get("agent_id")),
-                    session_id=safe_str_or_none(result.get("session_id")),
-                    metadata=metadata,
-                )
+                episode = EpisodeRecord.from_row(result)
                 episodes.append(episode)
-                scores[episode.uuid] = result["similarity"]
+                scores[episode.uuid] = result.get("score", result["similarity"])
             except Exception as e:
-                logger.warning(f"Failed to convert episode result to EpisodeNode: {e}, skipping episode {result.get('uuid', 'unknown')}")
+                logger.warning(f"Failed to convert episode result: {e}, skipping episode {result.get('uuid', 'unknown')}")
                 continue
 
+        if recency:
+            entities.sort(key=lambda e: scores[e.uuid], reverse=True)
+
         logger.info(
             f"Semantic search found {len(episode_results)} episodes, "
             f"{len(entities)} entities ({len(episode_entity_uuids)} from episodes), "
             f"{len(edges)} edges"
         )
 
-        return SearchResult(
+        return SearchHits(
             entities=entities,
             edges=edges,
-            episodes=episodes,  # Add episodes to the result!
+            episodes=episodes,
             scores=scores,
             metadata={
                 "strategy": "semantic",
@@ -295,35 +578,52 @@ class SearchEngine:
             }
         )
 
-    def _traversal_search(self, config: SearchConfig) -> SearchResult:
+    def _traversal_search(
+        self,
+        config: SearchConfig,
+        query_embedding: Optional[List[float]] = None,
+        neighbours: Optional[Dict[str, Any]] = None,
+    ) -> SearchHits:
         """
         Graph traversal search starting from query-matched entities.
 
         Args:
             config: Search configuration
+            query_embedding: Precomputed query embedding (generated if not provided)
+            neighbours: Precomputed vector matches from search_batch (replace
+                the database similarity search for starting entities)
 
         Returns:
-            SearchResult
+            SearchHits
         """
-        # First, find starting entities using semantic search
-        query_embedding = self.embedding_client.embed(config.query)
+        recency = RecencyScorer.from_config(config)
 
-        starting_entities = self.db.search_similar_entities(
-            embedding=query_embedding,
-            user_id=config.user_id,
-            threshold=config.similarity_threshold,
-            limit=min(config.limit, 5),  # Limit starting points
-        )
+        # First, find starting entities using semantic search
+        if neighbours is not None:
+            starting_entities = neighbours["entities"][:min(config.limit, 5)]
+        else:
+            if query_embedding is None:
+                with stage("embed"):
+                    query_embedding = self.embedding_client.embed(config.query)
+
+            with stage("vector_scan"):
+                starting_entities = self.db.search_similar_entities(
+                    embedding=query_embedding,
+                    user_id=config.user_id,
+                    threshold=config.similarity_threshold,
+                    limit=min(config.limit, 5),  # Limit starting points
+                    recency=recency,
+                )
 
         if not starting_entities:
             logger.info("No starting entities found for traversal")
-            return SearchResult(entities=[], edges=[], scores={})
+            return SearchHits()
 
         # Traverse graph from starting entities
         visited_entities: Set[str] = set()
         visited_edges: Set[str] = set()
-        entities: List[EntityNode] = []
-        edges: List[EntityEdge] = []
+        entities: List[EntityRecord] = []
+        edges: List[EdgeRecord] = []
         scores: Dict[str, float] = {}
 
         # Add starting entities
@@ -331,79 +631,81 @@ class SearchEngine:
             entity_uuid = result["uuid"]
             visited_entities.add(entity_uuid)
 
-            entity = EntityNode(
-                uuid=entity_uuid,
-                name=result["name"],
-                entity_type=result["entity_type"],
-                summary=result.get("summary", ""),
-                mentions=result["mentions"],
-                user_id=_sanitize_user_id(result.get("user_id")),
-            )
-            entities.append(entity)
-            scores[entity_uuid] = result["similarity"]
+            entities.append(EntityRecord.from_row(result))
+            scores[entity_uuid] = result.get("score", result["similarity"])
 
-        # BFS traversal
+        # BFS traversal: one query per layer expands the whole frontier
+        max_nodes = min(config.limit, self.traversal_max_nodes)
         current_depth = 0
         current_layer = [e["uuid"] for e in starting_entities]
 
-        while current_depth < config.max_depth and current_layer:
-            next_layer: List[str] = []
+        while current_depth < config.max_depth and current_layer and len(entities) < max_nodes:
+            edge_budget = self.traversal_max_edges - len(visited_edges)
+            if edge_budget <= 0:
+                break
 
-            for entity_uuid in current_layer:
-                # Get relationships for this entity
-                relationships = self.db.get_entity_relationships(
-                    entity_uuid=entity_uuid,
+            frontier_index = {uuid: i for i, uuid in enumerate(current_layer)}
+            with stage("traverse"):
+                relationships = self.db.get_relationships_for_entities(
+                    current_layer,
                     include_expired=config.include_expired,
+                    exclude_edge_uuids=list(visited_edges),
+                    limit=edge_budget,
+                )
+            # Expand in frontier order, strongest edges first within a node
+            relationships.sort(
+                key=lambda rel: min(
+                    frontier_index.get(rel["source_uuid"], len(frontier_index)),
+                    frontier_index.get(rel["target_uuid"], len(frontier_index)),
                 )
+            )
 
-                for rel in relationships:
-                    # Add edge if not visited
-                    edge_uuid = rel["edge_uuid"]
-                    if edge_uuid not in visited_edges:
-                        visited_edges.add(edge_uuid)
-
-                        edge = EntityEdge(
-                            uuid=edge_uuid,
-                            source_node_uuid=rel["entity_uuid"],
-                            target_node_uuid=rel["other_uuid"],
-                            name=rel["relation_type"],
-                            fact=rel["fact"],
-                            valid_at=rel.get("valid_at"),
-                            invalid_at=rel.get("invalid_at"),
-                            expired_at=rel.get("expired_at"),
-                        )
-                        edges.append(edge)
-                        # Decay score by depth
-                        scores[edge_uuid] = 1.0 / (current_depth + 1)
-
-                    # Add connected entity if not visited
-                    other_uuid = rel["other_uuid"]
-                    if other_uuid not in visited_entities:
-                        visited_entities.add(other_uuid)
-
-                        entity = EntityNode(
-                            uuid=other_uuid,
-                            name=rel["other_name"],
-                            entity_type="ENTITY",  # Would need to fetch full details
-                        )
-                        entities.append(entity)
-                        next_layer.append(other_uuid)
-                        # Decay score by depth
-                        scores[other_uuid] = 1.0 / (current_depth + 2)
-
-                # Stop if we've reached the limit
-                if len(entities) >= config.limit:
-                    break
+            next_layer: List[str] = []
+            for rel in relationships:
+                if rel["source_uuid"] in frontier_index:
+                    other = "target"
+                else:
+                    other = "source"
+                other_uuid = rel[f"{other}_uuid"]
+
+                # Add connected entity if not visited (within the node budget)
+                if other_uuid not in visited_entities:
+                    if len(entities) >= max_nodes:
+                        continue
+                    visited_entities.add(other_uuid)
+
+                    entities.append(EntityRecord.from_row(rel, f"{other}_"))
+                    next_layer.append(other_uuid)
+                    # Decay score by depth
+                    scores[other_uuid] = 1.0 / (current_depth + 2)
+                    if recency:
+                        scores[other_uuid] *= recency.multiplier(rel.get(f"{other}_created_at"))
+
+                edge_uuid = rel["edge_uuid"]
+                visited_edges.add(edge_uuid)
+                edges.append(EdgeRecord.from_row(rel, "edge_uuid"))
+                # Decay score by depth
+                scores[edge_uuid] = 1.0 / (current_depth + 1)
+                if recency:
+                    scores[edge_uuid] *= recency.multiplier(
+                        rel.get("created_at"), rel.get("valid_at"), rel.get("invalid_at")
+                    )
 
             current_layer = next_layer
             current_depth += 1
 
+        if recency:
+            # Rank by recency-weighted score before the limit cut (stable,
+            # so equal scores keep traversal order)
+            entities.sort(key=lambda e: scores[e.uuid], reverse=True)
+            edges.sort(key=lambda e: scores[e.uuid], reverse=True)
+
         logger.info(
             f"Traversal search found {len(entities)} entities, {len(edges)} edges "
             f"(depth: {current_depth})"
         )
 
-        return SearchResult(
+        return SearchHits(
             entities=entities[:config.limit],
             edges=edges[:config.limit],
             scores=scores,
@@ -415,7 +717,7 @@ class SearchEngine:
             }
         )
 
-    def _bm25_search(self, config: SearchConfig) -> SearchResult:
+    def _bm25_search(self, config: SearchConfig) -> SearchHits:
         """
         BM25 keyword-based search.
 
@@ -423,131 +725,99 @@ class SearchEngine:
             config: Search configuration
 
         Returns:
-            SearchResult
+            SearchHits
         """
-        # Search entities using BM25
-        entity_results = self.bm25_index.search_entities(
-            query=config.query,
-            top_k=config.limit,
-        )
+        with stage("keyword_scan"):
+            # Search entities using BM25
+            entity_results = self.bm25_index.search_entities(
+                query=config.query,
+                top_k=config.limit,
+                user_id=config.user_id,
+            )
 
-        # Search edges using BM25
-        edge_results = self.bm25_index.search_edges(
-            query=config.query,
-            top_k=config.limit,
-        )
+            # Search edges using BM25
+            edge_results = self.bm25_index.search_edges(
+                query=config.query,
+                top_k=config.limit,
+                user_id=config.user_id,
+            )
 
-        # Search episodes using BM25
-        episode_results = self.bm25_index.search_episodes(
-            query=config.query,
-            top_k=config.limit,
-            tags=config.tags,
-            tag_match_mode=config.tag_match_mode,
-            kinds=config.kinds,
-            user_id=config.user_id,
-        )
+            # Search episodes using BM25
+            episode_results = self.bm25_index.search_episodes(
+                query=config.query,
+                top_k=config.limit,
+                tags=config.tags,
+                tag_match_mode=config.tag_match_mode,
+                kinds=config.kinds,
+                user_id=config.user_id,
+            )
 
-        # Fetch full entity objects from database
-        entities: List[EntityNode] = []
+        # Apply BM25 score threshold (skip for tag-only episode search)
+        entity_results = [(uuid, score) for uuid, score in entity_results if score >= config.min_bm25_score]
+        edge_results = [(uuid, score) for uuid, score in edge_results if score >= config.min_bm25_score]
+        if config.query:
+            episode_results = [(uuid, score) for uuid, score in episode_results if score >= config.min_bm25_score]
+
+        # Fetch full objects from database, one query per kind
+        with stage("hydrate"):
+            entity_rows = self.db.get_entities_by_uuids([uuid for uuid, _ in entity_results])
+            edge_rows = self.db.get_edges_by_uuids([uuid for uuid, _ in edge_results])
+            episode_rows = self.db.get_episodes_by_uuids([uuid for uuid, _ in episode_results])
+
+        recency = RecencyScorer.from_config(config)
+        entities: List[EntityRecord] = []
         scores: Dict[str, float] = {}
 
         for entity_uuid, score in entity_results:
-            # Apply BM25 score threshold
-            if score < config.min_bm25_score:
-                continue
-
-            # Get entity from DB
-            entity_data = self.db.get_entity_by_uuid(entity_uuid)
+            entity_data = entity_rows.get(entity_uuid)
             if entity_data:
                 # Apply user_id filter if specified (None or empty string means all users)
                 if not config.user_id or entity_data.get("user_id") == config.user_id:
-                    entity = EntityNode(
-                        uuid=entity_data["uuid"],
-                        name=entity_data["name"],
-                        entity_type=entity_data["entity_type"],
-                        summary=entity_data.get("summary", ""),
-                        mentions=entity_data["mentions"],
-                        user_id=_sanitize_user_id(entity_data.get("user_id")),
-                    )
+                    entity = EntityRecord.from_row(entity_data)
                     entities.append(entity)
                     scores[entity.uuid] = score
+                    if recency:
+                        scores[entity.uuid] *= recency.multiplier(entity_data.get("created_at"))
 
-        # Fetch full edge objects from database
-        edges: List[EntityEdge] = []
+        edges: List[EdgeRecord] = []
 
         for edge_uuid, score in edge_results:
-            # Apply BM25 score threshold
-            if score < config.min_bm25_score:
-                continue
-
-            # Get edge from DB
-            edge_data = self.db.get_edge_by_uuid(edge_uuid)
+            edge_data = edge_rows.get(edge_uuid)
             if edge_data:
-                edge = EntityEdge(
-                    uuid=edge_data["uuid"],
-                    source_node_uuid=edge_data["source_uuid"],
-                    target_node_uuid=edge_data["target_uuid"],
-                    name=edge_data["relation_type"],
-                    fact=edge_data["fact"],
-                    valid_at=edge_data.get("valid_at"),
-                    invalid_at=edge_data.get("invalid_at"),
-                    expired_at=edge_data.get("expired_at"),
-                )
+                edge = EdgeRecord.from_row(edge_data)
                 edges.append(edge)
                 scores[edge.uuid] = score
+                if recency:
+                    scores[edge.uuid] *= recency.multiplier(
+                        edge_data.get("created_at"), edge_data.get("valid_at"), edge_data.get("invalid_at")
+                    )
 
-        # Fetch full episode objects from database
-        episodes: List[EpisodeNode] = []
+        episodes: List[EpisodeRecord] = []
 
         for episode_uuid, score in episode_results:
-            # Apply BM25 score threshold (skip for tag-only search)
-            if config.query and score < config.min_bm25_score:
-                continue
-
-            # Get episode from DB
-            episode_data = self.db.get_episode_by_uuid(episode_uuid)
+            episode_data = episode_rows.get(episode_uuid)
             if episode_data:
                 # Apply user_id filter if specified (None or empty string means all users)
                 if not config.user_id or episode_data.get("user_id") == config.user_id:
                     try:
-                        # Handle nan values for optional string fields
-                        def safe_str_or_none(value):
-                            if value is None or (isinstance(value, float) and math.isnan(value)):
-                                return None
-                            return value
-
-                        # Handle metadata deserialization
-                        metadata = episode_data.get("metadata", {})
-                        if isinstance(metadata, str):
-                            try:
-                                metadata = json.loads(metadata)
-                            except (json.JSONDecodeError, TypeError):
-                                metadata = {}
-
-                        from ryumem_server.core.models import EpisodeKind
-                        episode = EpisodeNode(
-                            uuid=episode_data["uuid"],
-                            name=episode_data.get("name", ""),
-                            content=episode_data["content"],
-                            source=EpisodeType.from_str(episode_data.get("source", "text")),
-                            source_description=episode_data.get("source_description", ""),
-                            kind=EpisodeKind.from_str(episode_data.get("kind", "query")),
-                            user_id=safe_str_or_none(episode_data.get("user_id")),
-                            agent_id=safe_str_or_none(episode_data.get("agent_id")),
-                            session_id=safe_str_or_none(episode_data.get("session_id")),
-                            metadata=metadata,
-                        )
+                        episode = EpisodeRecord.from_row(episode_data)
                         episodes.append(episode)
                         scores[episode.uuid] = score
+                        if recency:
+                            scores[episode.uuid] *= recency.multiplier(episode_data.get("created_at"))
                     except Exception as e:
-                        logger.warning(f"Failed to convert episode {episode_uuid} to EpisodeNode: {e}, skipping")
+                        logger.warning(f"Failed to convert episode {episode_uuid}: {e}, skipping")
                         continue
 
-        # BM25 index already returns results in the correct order (score + recency)
-        # No need to re-sort here as it can disrupt the intended ranking
+        # BM25 index already returns results in the correct order (score + recency);
+        # only recency weighting can change it (stable sort keeps ties in index order)
+        if recency:
+            entities.sort(key=lambda e: scores[e.uuid], reverse=True)
+            edges.sort(key=lambda e: scores[e.uuid], reverse=True)
+            episodes.sort(key=lambda e: scores[e.uuid], reverse=True)
         logger.info(f"BM25 search found {len(entities)} entities, {len(edges)} edges, {len(episodes)} episodes (threshold: {config.min_bm25_score})")
 
-        return SearchResult(
+        return SearchHits(
             entities=entities[:config.limit],
             edges=edges[:config.limit],
             episodes=episodes[:config.limit],
@@ -558,70 +828,110 @@ class SearchEngine:
             }
         )
 
-    def _hybrid_search(self, config: SearchConfig) -> SearchResult:
+    def _hybrid_search(
+        self,
+        config: SearchConfig,
+        neighbours: Optional[Dict[str, Any]] = None,
+    ) -> SearchHits:
         """
         Hybrid search combining semantic, BM25, and traversal approaches.
         Uses Reciprocal Rank Fusion (RRF) to merge results.
 
         Args:
             config: Search configuration
+            neighbours: Precomputed query embedding and vector matches
+                (batched searches)
 
         Returns:
-            SearchResult
+            SearchHits
         """
-        # Run all three search strategies
-        semantic_result = self._semantic_search(config)
-        bm25_result = self._bm25_search(config)
-        traversal_result = self._traversal_search(config)
+        # Run the strategies the planner picked (all three without a planner)
+        plan = self._plan(config)
+        strategy_results, timings, skipped = self._run_hybrid_strategies(config, neighbours, plan)
+        return self._fuse_hybrid(config, strategy_results, timings, skipped, plan)
+
+    def _plan(self, config: SearchConfig) -> Optional[SearchPlan]:
+        """Plan a hybrid search (None without a planner: every strategy runs)."""
+        if self.planner is None:
+            return None
+        with stage("plan"):
+            return self.planner.plan(config)
+
+    def _fuse_hybrid(
+        self,
+        config: SearchConfig,
+        strategy_results: Dict[str, SearchHits],
+        timings: Dict[str, float],
+        skipped: List[str],
+        plan: Optional[SearchPlan] = None,
+    ) -> SearchHits:
+        """
+        Fuse the results of the hybrid strategies that finished with RRF.
 
-        # Merge results using RRF (3-way fusion)
-        merged_entities, merged_edges, merged_episodes, merged_scores = self._reciprocal_rank_fusion(
-            results=[semantic_result, bm25_result, traversal_result],
-            k=config.rrf_k,  # Use configurable RRF constant
-        )
+        Args:
+            config: Search configuration
+            strategy_results: Results by strategy name
+            timings: Elapsed milliseconds by strategy name
+            skipped: Names of the strategies left out (budget exceeded or failed)
+            plan: Plan the strategies ran under, reported in metadata["plan"]
 
-        # Filter by minimum RRF score threshold
-        filtered_entities = [
-            e for e in merged_entities
-            if merged_scores.get(e.uuid, 0.0) >= config.min_rrf_score
-        ]
-        filtered_edges = [
-            e for e in merged_edges
-            if merged_scores.get(e.uuid, 0.0) >= config.min_rrf_score
-        ]
-        filtered_episodes = [
-            e for e in merged_episodes
-            if merged_scores.get(e.uuid, 0.0) >= config.min_rrf_score
-        ]
+        Returns:
+            SearchHits ranked by RRF score
+        """
+        empty = SearchHits()
+        semantic_result = strategy_results.get("semantic", empty)
+        bm25_result = strategy_results.get("bm25", empty)
+        traversal_result = strategy_results.get("traversal", empty)
+
+        with stage("fuse"):
+            # Merge results using RRF (fusion of the strategies that finished)
+            merged_entities, merged_edges, merged_episodes, merged_scores = self._reciprocal_rank_fusion(
+                results=[strategy_results[name] for name in HYBRID_STRATEGIES if name in strategy_results],
+                k=config.rrf_k,  # Use configurable RRF constant
+            )
 
-        # Sort by score and limit
-        sorted_entities = sorted(
-            filtered_entities,
-            key=lambda e: merged_scores.get(e.uuid, 0.0),
-            reverse=True
-        )[:config.limit]
-
-        sorted_edges = sorted(
-            filtered_edges,
-            key=lambda e: merged_scores.get(e.uuid, 0.0),
-            reverse=True
-        )[:config.limit]
-
-        sorted_episodes = sorted(
-            filtered_episodes,
-            key=lambda e: merged_scores.get(e.uuid, 0.0),
-            reverse=True
-        )[:config.limit]
+            # Filter by minimum RRF score threshold
+            filtered_entities = [
+                e for e in merged_entities
+                if merged_scores.get(e.uuid, 0.0) >= config.min_rrf_score
+            ]
+            filtered_edges = [
+                e for e in merged_edges
+                if merged_scores.get(e.uuid, 0.0) >= config.min_rrf_score
+            ]
+            filtered_episodes = [
+                e for e in merged_episodes
+                if merged_scores.get(e.uuid, 0.0) >= config.min_rrf_score
+            ]
+
+            # Sort by score and limit
+            sorted_entities = sorted(
+                filtered_entities,
+                key=lambda e: merged_scores.get(e.uuid, 0.0),
+                reverse=True
+            )[:config.limit]
+
+            sorted_edges = sorted(
+                filtered_edges,
+                key=lambda e: merged_scores.get(e.uuid, 0.0),
+                reverse=True
+            )[:config.limit]
+
+            sorted_episodes = sorted(
+                filtered_episodes,
+                key=lambda e: merged_scores.get(e.uuid, 0.0),
+                reverse=True
+            )[:config.limit]
 
         logger.info(
             f"Hybrid search found {len(sorted_entities)} entities, {len(sorted_edges)} edges, "
             f"{len(sorted_episodes)} episodes (RRF threshold: {config.min_rrf_score}, k={config.rrf_k})"
         )
 
-        return SearchResult(
+        return SearchHits(
             entities=sorted_entities,
             edges=sorted_edges,
-            episodes=sorted_episodes,  # Add episodes to the result!
+            episodes=sorted_episodes,
             scores=merged_scores,
             metadata={
                 "strategy": "hybrid",
@@ -631,30 +941,279 @@ class SearchEngine:
                 "traversal_entities": len(traversal_result.entities),
                 "episodes_found": semantic_result.metadata.get("episodes_found", 0),
                 "entities_from_episodes": semantic_result.metadata.get("entities_from_episodes", 0),
+                "strategy_ms": timings,
+                "skipped_strategies": skipped,
+                "plan": plan.to_dict() if plan is not None else None,
             }
         )
 
+    def _run_hybrid_strategies(
+        self,
+        config: SearchConfig,
+        neighbours: Optional[Dict[str, Any]] = None,
+        plan: Optional[SearchPlan] = None,
+    ) -> Tuple[Dict[str, SearchHits], Dict[str, float], List[str]]:
+        """
+        Run the semantic, BM25 and traversal strategies for a hybrid search
+        (see _iter_hybrid_strategies).
+
+        Returns:
+            Tuple of (results by strategy name, elapsed milliseconds by
+            strategy name, names of the strategies left out)
+        """
+        results: Dict[str, SearchHits] = {}
+        timings: Dict[str, float] = {}
+        skipped: List[str] = []
+        for name, result, elapsed_ms in self._iter_hybrid_strategies(config, neighbours, plan):
+            if result is None:
+                skipped.append(name)
+            else:
+                results[name], timings[name] = result, elapsed_ms
+        skipped.sort(key=HYBRID_STRATEGIES.index)
+        return results, timings, skipped
+
+    def _iter_hybrid_strategies(
+        self,
+        config: SearchConfig,
+        neighbours: Optional[Dict[str, Any]] = None,
+        plan: Optional[SearchPlan] = None,
+    ) -> Iterator[Tuple[str, Optional[SearchHits], float]]:
+        """
+        Run the semantic, BM25 and traversal strategies for a hybrid search,
+        yielding each result as soon as its strategy finishes.
+
+        The query is embedded once and shared by the semantic and traversal
+        strategies. With parallel_hybrid enabled, BM25 runs on the thread pool
+        while the query is embedded, then semantic and traversal run
+        concurrently, and results are yielded in completion order. Otherwise
+        the strategies run one after another, BM25 first. A strategy that
+        exceeds its budget (measured from the start of the search) or fails
+        is left out of the fusion; it cannot be interrupted, so it finishes
+        in the background and its result is discarded.
+
+        Only the strategies the plan runs are started. A deferred strategy
+        starts once semantic search has finished, unless the planner finds
+        the semantic result confident; the plan records the outcome.
+
+        Args:
+            config: Search configuration
+            neighbours: Precomputed query embedding and vector matches
+                (the query is not embedded again)
+            plan: Strategies to run and defer (all run when not provided)
+
+        Yields:
+            Tuples of (strategy name, result or None if the strategy was
+            left out, elapsed milliseconds)
+
+        Raises:
+            Exception: The first strategy error, if every strategy failed
+        """
+        started = time.perf_counter()
+        plan = plan if plan is not None else SearchPlan.full()
+        errors: Dict[str, Exception] = {}
+        succeeded = 0
+        searches = {
+            "semantic": self._semantic_search,
+            "bm25": self._bm25_search,
+            "traversal": self._traversal_search,
+        }
+
+        def timed(search, *args) -> Tuple[SearchHits, float]:
+            strategy_started = time.perf_counter()
+            result = search(config, *args)
+            return result, (time.perf_counter() - strategy_started) * 1000
+
+        def resolve_deferred(semantic_result: Optional[SearchHits]) -> List[str]:
+            # Deferred strategies to start now that semantic search is done
+            starting = []
+            for name in list(plan.deferred):
+                if semantic_result is not None and self.planner is not None and self.planner.confident(semantic_result):
+                    plan.resolve(name, "semantic results confident")
+                else:
+                    plan.resolve(name)
+                    starting.append(name)
+            return starting
+
+        if not self.parallel_hybrid:
+            if "bm25" in plan.run:
+                result, elapsed_ms = timed(self._bm25_search)
+                yield "bm25", result, elapsed_ms
+            if not plan.needs_embedding():
+                return
+            if neighbours is not None:
+                query_embedding = neighbours["embedding"]
+            else:
+                with stage("embed"):
+                    query_embedding = self.embedding_client.embed(config.query)
+            semantic_result = None
+            for name in ("semantic", "traversal"):
+                if name not in plan.run:
+                    continue
+                result, elapsed_ms = timed(searches[name], query_embedding, neighbours)
+                if name == "semantic":
+                    semantic_result = result
+                yield name, result, elapsed_ms
+            for name in resolve_deferred(semantic_result):
+                result, elapsed_ms = timed(searches[name], query_embedding, neighbours)
+                yield name, result, elapsed_ms
+            return
+
+        executor = self._get_executor()
+        futures: Dict[Future, str] = {}
+        deadlines: Dict[Future, float] = {}
+
+        def submit(name: str, *args) -> Future:
+            # Each task runs in a copy of this context, so it records into the active profile
+            future = executor.submit(copy_context().run, timed, searches[name], *args)
+            futures[future] = name
+            if self.strategy_budgets.get(name):
+                deadlines[future] = started + self.strategy_budgets[name]
+            return future
+
+        if "bm25" in plan.run:
+            submit("bm25")
+
+        # Embed in the calling thread: pool tasks never wait on each other
+        query_embedding = None
+        if plan.needs_embedding():
+            try:
+                if neighbours is not None:
+                    query_embedding = neighbours["embedding"]
+                else:
+                    with stage("embed"):
+                        query_embedding = self.embedding_client.embed(config.query)
+            except Exception as e:
+                logger.warning(f"Query embedding failed, hybrid search continues with BM25 only: {e}")
+                for name in ("semantic", "traversal"):
+                    if name in plan.run or name in plan.deferred:
+                        plan.resolve(name)
+                        errors[name] = e
+                        yield name, None, 0.0
+            else:
+                for name in ("semantic", "traversal"):
+                    if name in plan.run:
+                        submit(name, query_embedding, neighbours)
+                if "semantic" not in plan.run:
+                    for name in resolve_deferred(None):
+                        submit(name, query_embedding, neighbours)
+
+        pending = set(futures)
+        while pending:
+            waiting = [deadlines[future] for future in pending if future in deadlines]
+            timeout = max(min(waiting) - time.perf_counter(), 0.0) if waiting else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in sorted(done, key=lambda f: HYBRID_STRATEGIES.index(futures[f])):
+                pending.discard(future)
+                name = futures[future]
+                try:
+                    result, elapsed_ms = future.result()
+                except Exception as e:
+                    errors[name] = e
+                    logger.warning(f"Hybrid search: {name} strategy failed: {e}")
+                    result = None
+                    yield name, None, 0.0
+                else:
+                    succeeded += 1
+                    yield name, result, elapsed_ms
+                if name == "semantic":
+                    for deferred_name in resolve_deferred(result):
+                        pending.add(submit(deferred_name, query_embedding, neighbours))
+
+            now = time.perf_counter()
+            for future in [f for f in pending if f in deadlines and deadlines[f] <= now]:
+                pending.discard(future)
+                future.cancel()
+                name = futures[future]
+                logger.warning(
+                    f"Hybrid search: {name} strategy exceeded its "
+                    f"{self.strategy_budgets[name] * 1000:.0f}ms budget"
+                )
+                if name == "semantic":
+                    for deferred_name in resolve_deferred(None):
+                        pending.add(submit(deferred_name, query_embedding, neighbours))
+                yield name, None, 0.0
+
+        if not succeeded and errors:
+            # Nothing to fuse: surface the failure instead of an empty result
+            raise next(iter(errors.values()))
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Thread pool for concurrent hybrid strategies (created on first use)."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="ryumem-search",
+                )
+            return self._executor
+
+    def close(self) -> None:
+        """Shut down the strategy thread pool without waiting for running strategies."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def fuse_results(self, results: List[SearchResult], limit: int, k: int = 60) -> SearchResult:
+        """
+        Fuse several search results (e.g. of a batch) with Reciprocal Rank Fusion.
+
+        Args:
+            results: Results to fuse, each ranked by its own scores
+            limit: Maximum number of entities, edges and episodes
+            k: RRF constant
+
+        Returns:
+            SearchResult ranked by fused RRF score
+        """
+        def ranked(items, item_scores, top=None):
+            return sorted(items, key=lambda item: item_scores.get(item.uuid, 0.0), reverse=True)[:top]
+
+        # RRF ranks by list position: order every input by its own scores first
+        entities, edges, episodes, scores = self._reciprocal_rank_fusion(
+            [
+                SearchResult(
+                    entities=ranked(r.entities, r.scores),
+                    edges=ranked(r.edges, r.scores),
+                    episodes=ranked(r.episodes, r.scores),
+                    scores=r.scores,
+                )
+                for r in results
+            ],
+            k=k,
+        )
+
+        return SearchResult(
+            entities=ranked(entities, scores, limit),
+            edges=ranked(edges, scores, limit),
+            episodes=ranked(episodes, scores, limit),
+            scores=scores,
+            metadata={"strategy": "fused", "queries": [r.metadata.get("query") for r in results]},
+        )
+
     def _reciprocal_rank_fusion(
         self,
-        results: List[SearchResult],
+        results: Sequence[Union[SearchResult, SearchHits]],
         k: int = 60,
-    ) -> Tuple[List[EntityNode], List[EntityEdge], List[EpisodeNode], Dict[str, float]]:
+    ) -> Tuple[List[Any], List[Any], List[Any], Dict[str, float]]:
         """
         Merge multiple search results using Reciprocal Rank Fusion.
 
         RRF formula: score(item) = sum(1 / (k + rank(item)))
 
         Args:
-            results: List of SearchResult objects to merge
+            results: SearchResults (models) or SearchHits (records) to merge
             k: RRF constant (typically 60)
 
         Returns:
-            Tuple of (merged_entities, merged_edges, merged_episodes, merged_scores)
+            Tuple of (merged_entities, merged_edges, merged_episodes,
+            merged_scores); the items are those of the inputs
         """
         # Track entities, edges, and episodes by UUID
-        entity_map: Dict[str, EntityNode] = {}
-        edge_map: Dict[str, EntityEdge] = {}
-        episode_map: Dict[str, EpisodeNode] = {}
+        entity_map: Dict[str, Any] = {}
+        edge_map: Dict[str, Any] = {}
+        episode_map: Dict[str, Any] = {}
         rrf_scores: Dict[str, float] = defaultdict(float)
 
         for result in results:
@@ -715,144 +1274,3 @@ class SearchEngine:
         }
 
         return context
-
-    def _apply_temporal_decay(
-        self,
-        results: SearchResult,
-        decay_factor: float = 0.95,
-        reference_time: Optional[datetime] = None,
-    ) -> SearchResult:
-        """
-        Apply temporal decay to search scores.
-
-        More recent facts score higher than older facts using exponential decay.
-
-        Formula: final_score = base_score * (decay_factor ^ days_old)
-
-        Args:
-            results: Original search results
-            decay_factor: Decay rate per day (0-1, default 0.95 = 5% decay per day)
-            reference_time: Reference time (default: now)
-
-        Returns:
-            SearchResult with updated scores
-        """
-        from datetime import datetime, timezone
-
-        if reference_time is None:
-            reference_time = datetime.now(timezone.utc)
-
-        # Make timezone-aware if not already
-        if reference_time.tzinfo is None:
-            reference_time = reference_time.replace(tzinfo=timezone.utc)
-
-        new_scores = {}
-
-        # Apply to entities
-        for entity in results.entities:
-            base_score = results.scores.get(entity.uuid, 0.0)
-
-            # Make created_at timezone-aware if needed
-            entity_time = entity.created_at
-            if entity_time.tzinfo is None:
-                entity_time = entity_time.replace(tzinfo=timezone.utc)
-
-            # Calculate days since creation
-            days_old = (reference_time - entity_time).days
-            days_old = max(0, days_old)  # Ensure non-negative
-
-            # Apply exponential decay
-            decay_multiplier = decay_factor ** days_old
-
-            new_scores[entity.uuid] = base_score * decay_multiplier
-
-        # Apply to edges
-        for edge in results.edges:
-            base_score = results.scores.get(edge.uuid, 0.0)
-
-            # Use valid_at if available, else created_at
-            edge_time = edge.valid_at or edge.created_at
-            if edge_time.tzinfo is None:
-                edge_time = edge_time.replace(tzinfo=timezone.utc)
-
-            # Calculate days since fact became valid
-            days_old = (reference_time - edge_time).days
-            days_old = max(0, days_old)
-
-            # Apply exponential decay
-            decay_multiplier = decay_factor ** days_old
-
-            new_scores[edge.uuid] = base_score * decay_multiplier
-
-        # Re-sort by new scores
-        results.entities.sort(key=lambda e: new_scores.get(e.uuid, 0.0), reverse=True)
-        results.edges.sort(key=lambda e: new_scores.get(e.uuid, 0.0), reverse=True)
-        results.scores = new_scores
-
-        return results
-
-    def _apply_update_boost(
-        self,
-        results: SearchResult,
-        boost_factor: float = 1.2,
-        recent_threshold_days: int = 7,
-        reference_time: Optional[datetime] = None,
-    ) -> SearchResult:
-        """
-        Boost entities/edges that have been recently created or updated.
-
-        This makes the system "update-aware" - recently modified facts
-        are more likely to be relevant.
-
-        Args:
-            results: Search results
-            boost_factor: Boost multiplier for recent facts (default: 1.2 = 20% boost)
-            recent_threshold_days: Days to consider "recent" (default: 7)
-            reference_time: Reference time (default: now)
-
-        Returns:
-            SearchResult with updated scores
-        """
-        from datetime import datetime, timedelta, timezone
-
-        if reference_time is None:
-            reference_time = datetime.now(timezone.utc)
-
-        # Make timezone-aware if not already
-        if reference_time.tzinfo is None:
-            reference_time = reference_time.replace(tzinfo=timezone.utc)
-
-        cutoff = reference_time - timedelta(days=recent_threshold_days)
-
-        # Boost recently created entities
-        for entity in results.entities:
-            entity_time = entity.created_at
-            if entity_time.tzinfo is None:
-                entity_time = entity_time.replace(tzinfo=timezone.utc)
-
-            if entity_time >= cutoff:
-                results.scores[entity.uuid] *= boost_factor
-
-        # Boost recently created or modified edges
-        for edge in results.edges:
-            # Check creation time
-            edge_time = edge.created_at
-            if edge_time.tzinfo is None:
-                edge_time = edge_time.replace(tzinfo=timezone.utc)
-
-            if edge_time >= cutoff:
-                results.scores[edge.uuid] *= boost_factor
-            # Also check if recently invalidated (may still be contextually relevant)
-            elif edge.invalid_at:
-                invalid_time = edge.invalid_at
-                if invalid_time.tzinfo is None:
-                    invalid_time = invalid_time.replace(tzinfo=timezone.utc)
-                if invalid_time >= cutoff:
-                    # Smaller boost for recently invalidated facts
-                    results.scores[edge.uuid] *= (boost_factor * 0.8)
-
-        # Re-sort by new scores
-        results.entities.sort(key=lambda e: results.scores.get(e.uuid, 0.0), reverse=True)
-        results.edges.sort(key=lambda e: results.scores.get(e.uuid, 0.0), reverse=True)
-
-        return results
@@ -0,0 +1,543 @@
+"""
+Per-user sharded BM25 keyword index for Ryumem.
+
+Splits the keyword index into one BM25Index per user_id so a user-scoped
+search only touches that user's postings and IDF statistics. Shards are
+persisted as separate pickles, loaded lazily on first access and evicted
+least-recently-used once more than `max_resident_shards` are in memory, so
+resident memory follows the set of active users rather than every user the
+tenant has ever seen.
+"""
+
+import hashlib
+import logging
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ryumem_server.core.changes import ChangeEvent
+from ryumem_server.core.models import EntityEdge, EntityNode, EpisodeNode
+from ryumem_server.retrieval.analyzer import Analyzer
+from ryumem_server.retrieval.bm25 import BM25Index, apply_change
+
+logger = logging.getLogger(__name__)
+
+# Version of the shard manifest written by ShardedBM25Index.save()
+MANIFEST_FORMAT_VERSION = 3
+MANIFEST_FILE = "manifest.pkl"
+
+# Shard key for documents without a user_id
+UNOWNED_SHARD = ""
+
+
+def _shard_file(shard_key: str) -> str:
+    """File name of a shard (user ids are hashed to stay filesystem safe)."""
+    return f"{hashlib.sha1(shard_key.encode('utf-8')).hexdigest()}.pkl"
+
+
+class ShardedBM25Index:
+    """
+    BM25 keyword index sharded by user_id.
+
+    Exposes the same interface as BM25Index, so it can be handed to
+    SearchEngine and EpisodeIngestion unchanged.
+
+    Features:
+    - Per-user IDF statistics and postings
+    - Lazy shard loading from `shard_dir`
+    - LRU eviction of cold shards (dirty shards are written before eviction)
+
+    Searches without a user_id visit every shard in turn; their scores come
+    from per-shard statistics and are merged by score only.
+
+    The index-wide lock only guards shard bookkeeping: searches resolve their
+    shards under it and run outside it (each shard has its own lock), and a
+    search over every shard reads cold shards from disk without making them
+    resident, so it neither blocks writers nor evicts active users' shards.
+    """
+
+    def __init__(
+        self,
+        shard_dir: Optional[str] = None,
+        max_resident_shards: int = 32,
+        analyzer: Optional[Analyzer] = None,
+    ):
+        """
+        Initialize an empty sharded index.
+
+        Args:
+            shard_dir: Directory holding the shard pickles. Without it shards
+                cannot be evicted and stay resident.
+            max_resident_shards: Maximum number of shards kept in memory
+            analyzer: Analyzer shared by every shard (default: Analyzer())
+        """
+        self._lock = threading.RLock()
+        self.analyzer = analyzer or Analyzer()
+        self.shard_dir: Optional[Path] = Path(shard_dir) if shard_dir else None
+        self.max_resident_shards = max_resident_shards
+
+        self._resident: "OrderedDict[str, BM25Index]" = OrderedDict()
+        self._dirty: set = set()
+        # Every shard ever seen → stats at last save/evict (for non-resident shards)
+        self._shard_stats: Dict[str, Dict[str, int]] = {}
+
+        # Sequence number of the last change-feed event reflected in the index
+        self.last_applied_seq = 0
+
+        logger.info(f"ShardedBM25Index initialized (max_resident_shards={max_resident_shards})")
+
+    def _shard(self, user_id: Optional[str], create: bool = False) -> Optional[BM25Index]:
+        """
+        Return the shard of a user, loading it from disk if needed.
+
+        Args:
+            user_id: Owner of the shard (None or empty means unowned)
+            create: Create an empty shard if the user has none
+
+        Returns:
+            The shard, or None if it does not exist and `create` is False
+        """
+        key = user_id or UNOWNED_SHARD
+        shard = self._resident.get(key)
+        if shard is not None:
+            self._resident.move_to_end(key)
+            return shard
+
+        shard = BM25Index(analyzer=self.analyzer)
+        if key in self._shard_stats and self.shard_dir:
+            if not shard.load(str(self.shard_dir / _shard_file(key))):
+                logger.warning(f"BM25 shard for user '{key}' could not be loaded, starting empty")
+        elif not create:
+            return None
+
+        self._shard_stats.setdefault(key, shard.stats())
+        self._resident[key] = shard
+        self._evict()
+        return shard
+
+    def _evict(self) -> None:
+        """Evict least recently used shards beyond the residency limit."""
+        if not self.shard_dir:
+            return
+        while len(self._resident) > self.max_resident_shards:
+            key, shard = self._resident.popitem(last=False)
+            if key in self._dirty:
+                self._write_shard(key, shard)
+            logger.debug(f"Evicted BM25 shard for user '{key}'")
+
+    def _write_shard(self, key: str, shard: BM25Index) -> None:
+        shard.save(str(self.shard_dir / _shard_file(key)))
+        self._shard_stats[key] = shard.stats()
+        self._dirty.discard(key)
+
+    def _mark_dirty(self, user_id: Optional[str]) -> None:
+        self._dirty.add(user_id or UNOWNED_SHARD)
+
+    def _read_shard(self, key: str, shard_dir: Path) -> Optional[BM25Index]:
+        """Load a cold shard for one search without making it resident."""
+        shard = BM25Index(analyzer=self.analyzer)
+        if not shard.load(str(shard_dir / _shard_file(key))):
+            logger.warning(f"BM25 shard for user '{key}' could not be loaded, skipping it")
+            return None
+        return shard
+
+    def _search_shards(self):
+        """Iterate over every shard for a search (see class docstring)."""
+        with self._lock:
+            resident = list(self._resident.values())
+            cold = [key for key in self._shard_stats if key not in self._resident]
+            shard_dir = self.shard_dir
+
+        yield from resident
+        if shard_dir:
+            for key in cold:
+                shard = self._read_shard(key, shard_dir)
+                if shard is not None:
+                    yield shard
+
+    def _all_shards(self):
+        """Iterate over every shard, loading (and evicting) as needed."""
+        for key in list(self._shard_stats):
+            shard = self._shard(key or None)
+            if shard is not None:
+                yield key, shard
+
+    def add_entity(self, entity: EntityNode) -> None:
+        """
+        Add an entity to its user's shard.
+
+        Args:
+            entity: Entity node to index
+        """
+        with self._lock:
+            self._shard(entity.user_id, create=True).add_entity(entity)
+            self._mark_dirty(entity.user_id)
+
+    def add_edge(self, edge: EntityEdge, user_id: Optional[str] = None) -> None:
+        """
+        Add a relationship edge to its user's shard.
+
+        Args:
+            edge: Entity edge to index
+            user_id: Owner of the edge
+        """
+        with self._lock:
+            self._shard(user_id, create=True).add_edge(edge, user_id=user_id)
+            self._mark_dirty(user_id)
+
+    def add_episode(self, episode: EpisodeNode) -> None:
+        """
+        Add an episode to its user's shard.
+
+        Args:
+            episode: Episode node to index
+        """
+        with self._lock:
+            self._shard(episode.user_id, create=True).add_episode(episode)
+            self._mark_dirty(episode.user_id)
+
+    def _search(self, user_id: Optional[str], top_k: int, search) -> List[Tuple[str, float]]:
+        """Run `search(shard)` on the user's shard, or on every shard if no user is given."""
+        if user_id:
+            with self._lock:
+                shard = self._shard(user_id)
+            return search(shard) if shard is not None else []
+
+        results: List[Tuple[str, float]] = []
+        for shard in self._search_shards():
+            results.extend(search(shard))
+        results.sort(key=lambda x: x[1], reverse=True)
+        return results[:top_k]
+
+    def search_entities(
+        self,
+        query: str,
+        top_k: int = 10,
+        min_score: float = 0.0,
+        user_id: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Search entities using BM25 keyword matching.
+
+        Args:
+            query: Search query
+            top_k: Maximum number of results
+            min_score: Minimum BM25 score threshold
+            user_id: Optional user ID; restricts the search to that user's shard
+
+        Returns:
+            List of (entity_uuid, score) tuples, sorted by score descending
+        """
+        return self._search(
+            user_id, top_k,
+            lambda shard: shard.search_entities(query, top_k=top_k, min_score=min_score, user_id=user_id),
+        )
+
+    def search_edges(
+        self,
+        query: str,
+        top_k: int = 10,
+        min_score: float = 0.0,
+        user_id: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Search relationship edges using BM25 keyword matching.
+
+        Args:
+            query: Search query
+            top_k: Maximum number of results
+            min_score: Minimum BM25 score threshold
+            user_id: Optional user ID; restricts the search to that user's shard
+
+        Returns:
+            List of (edge_uuid, score) tuples, sorted by score descending
+        """
+        return self._search(
+            user_id, top_k,
+            lambda shard: shard.search_edges(query, top_k=top_k, min_score=min_score, user_id=user_id),
+        )
+
+    def search_episodes(
+        self,
+        query: str,
+        top_k: int = 10,
+        min_score: float = 0.0,
+        tags: Optional[List[str]] = None,
+        tag_match_mode: str = 'any',
+        kinds: Optional[List[str]] = None,
+        user_id: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Search episodes using BM25 keyword matching with optional pre-filtering.
+
+        Args:
+            query: Search query
+            top_k: Maximum number of results
+            min_score: Minimum BM25 score threshold
+            tags: Optional list of tags to filter by
+            tag_match_mode: Tag matching mode - 'any' or 'all'
+            kinds: Optional list of episode kinds to filter by
+            user_id: Optional user ID; restricts the search to that user's shard
+
+        Returns:
+            List of (episode_uuid, score) tuples, sorted by score descending
+        """
+        return self._search(
+            user_id, top_k,
+            lambda shard: shard.search_episodes(
+                query,
+                top_k=top_k,
+                min_score=min_score,
+                tags=tags,
+                tag_match_mode=tag_match_mode,
+                kinds=kinds,
+                user_id=user_id,
+            ),
+        )
+
+    def _remove(self, uuid: str, user_id: Optional[str], remove) -> bool:
+        """Remove a document from the user's shard, or find its shard if no user is given."""
+        if user_id:
+            shard = self._shard(user_id)
+            candidates = [(user_id, shard)] if shard is not None else []
+        else:
+            candidates = self._all_shards()
+
+        for key, shard in candidates:
+            if shard.contains(uuid):
+                remove(shard)
+                self._mark_dirty(key or None)
+                return True
+        return False
+
+    def remove_entity(self, entity_uuid: str, user_id: Optional[str] = None) -> bool:
+        """
+        Remove an entity from the index.
+
+        Args:
+            entity_uuid: UUID of entity to remove
+            user_id: Owner of the entity; without it every shard is probed
+
+        Returns:
+            True if entity was found and removed, False otherwise
+        """
+        with self._lock:
+            return self._remove(entity_uuid, user_id, lambda shard: shard.remove_entity(entity_uuid))
+
+    def remove_edge(self, edge_uuid: str, user_id: Optional[str] = None) -> bool:
+        """
+        Remove an edge from the index.
+
+        Args:
+            edge_uuid: UUID of edge to remove
+            user_id: Owner of the edge; without it every shard is probed
+
+        Returns:
+            True if edge was found and removed, False otherwise
+        """
+        with self._lock:
+            return self._remove(edge_uuid, user_id, lambda shard: shard.remove_edge(edge_uuid))
+
+    def remove_episode(self, episode_uuid: str, user_id: Optional[str] = None) -> bool:
+        """
+        Remove an episode from the index.
+
+        Args:
+            episode_uuid: UUID of episode to remove
+            user_id: Owner of the episode; without it every shard is probed
+
+        Returns:
+            True if episode was found and removed, False otherwise
+        """
+        with self._lock:
+            return self._remove(episode_uuid, user_id, lambda shard: shard.remove_episode(episode_uuid))
+
+    def remove_user(self, user_id: Optional[str]) -> int:
+        """
+        Drop a user's shard.
+
+        Args:
+            user_id: User whose shard is removed
+
+        Returns:
+            Number of documents removed
+        """
+        key = user_id or UNOWNED_SHARD
+        with self._lock:
+            shard = self._resident.pop(key, None)
+            stats = shard.stats() if shard is not None else self._shard_stats.get(key, {})
+            self._shard_stats.pop(key, None)
+            self._dirty.discard(key)
+            if self.shard_dir:
+                (self.shard_dir / _shard_file(key)).unlink(missing_ok=True)
+
+        return stats.get("entity_count", 0) + stats.get("edge_count", 0) + stats.get("episode_count", 0)
+
+    def apply_change(self, event: ChangeEvent) -> bool:
+        """
+        Apply a change-feed event (see `ryumem_server.retrieval.bm25.apply_change`).
+
+        Returns:
+            False if the index must be rebuilt from the database
+        """
+        with self._lock:
+            return apply_change(self, event)
+
+    def contains(self, uuid: str) -> bool:
+        """
+        Check whether a document with this UUID is indexed in any shard.
+
+        Args:
+            uuid: Entity, edge or episode UUID
+
+        Returns:
+            True if any shard holds the UUID
+        """
+        with self._lock:
+            return any(shard.contains(uuid) for _, shard in self._all_shards())
+
+    def detach(self) -> None:
+        """
+        Stop reading and writing shard files.
+
+        Used when a rebuilt index takes over the shard directory; shards
+        already in memory stay searchable.
+        """
+        with self._lock:
+            self.shard_dir = None
+
+    def save(self, path: str) -> None:
+        """
+        Save dirty shards and the shard manifest.
+
+        Args:
+            path: Shard directory (becomes the directory used for lazy loading)
+
+        Example:
+            index.save("./data/bm25_shards")
+        """
+        with self._lock:
+            self.shard_dir = Path(path)
+            self.shard_dir.mkdir(parents=True, exist_ok=True)
+
+            for key, shard in self._resident.items():
+                if key in self._dirty:
+                    self._write_shard(key, shard)
+
+            manifest = {
+                "format_version": MANIFEST_FORMAT_VERSION,
+                "last_applied_seq": self.last_applied_seq,
+                "analyzer": self.analyzer.settings,
+                "shards": self._shard_stats,
+            }
+            with open(self.shard_dir / MANIFEST_FILE, "wb") as f:
+                pickle.dump(manifest, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        logger.info(f"BM25 shards saved to {path} ({len(self._shard_stats)} shards)")
+
+    def load(self, path: str) -> bool:
+        """
+        Load the shard manifest. Shards themselves are loaded on first use.
+
+        Args:
+            path: Shard directory
+
+        Returns:
+            True if the manifest was loaded, False otherwise
+        """
+        manifest_path = Path(path) / MANIFEST_FILE
+        if not manifest_path.exists():
+            logger.warning(f"BM25 shard manifest not found: {manifest_path}")
+            return False
+
+        try:
+            with open(manifest_path, "rb") as f:
+                manifest = pickle.load(f)
+
+            if manifest.get("format_version") != MANIFEST_FORMAT_VERSION:
+                logger.info(f"BM25 shard manifest at {path} uses an old format, ignoring it")
+                return False
+            if manifest.get("analyzer") != self.analyzer.settings:
+                logger.info(f"BM25 shards at {path} were built with other analyzer settings, ignoring them")
+                return False
+
+            with self._lock:
+                self.shard_dir = Path(path)
+                self._resident.clear()
+                self._dirty.clear()
+                self._shard_stats = dict(manifest["shards"])
+                self.last_applied_seq = manifest.get("last_applied_seq", 0)
+
+            logger.info(f"BM25 shard manifest loaded from {path} ({len(self._shard_stats)} shards)")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to load BM25 shard manifest: {e}")
+            return False
+
+    def clear(self) -> None:
+        """Clear all shards (shard files are overwritten on the next save)."""
+        with self._lock:
+            if self.shard_dir:
+                for key in self._shard_stats:
+                    (self.shard_dir / _shard_file(key)).unlink(missing_ok=True)
+            self._resident.clear()
+            self._dirty.clear()
+            self._shard_stats = {}
+            self.last_applied_seq = 0
+
+        logger.info("Sharded BM25 index cleared")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get index statistics without loading cold shards.
+
+        Returns:
+            Dictionary with entity_count, edge_count, episode_count,
+            shard_count and resident_shards
+        """
+        with self._lock:
+            totals = {"entity_count": 0, "edge_count": 0, "episode_count": 0}
+            for key, shard_stats in self._shard_stats.items():
+                resident = self._resident.get(key)
+                current = resident.stats() if resident is not None else shard_stats
+                for name in totals:
+                    totals[name] += current.get(name, 0)
+            totals["shard_count"] = len(self._shard_stats)
+            totals["resident_shards"] = len(self._resident)
+            return totals
+
+    def __repr__(self) -> str:
+        """String representation."""
+        stats = self.stats()
+        return (
+            f"ShardedBM25Index(shards={stats['shard_count']}, resident={stats['resident_shards']}, "
+            f"entities={stats['entity_count']}, edges={stats['edge_count']}, episodes={stats['episode_count']})"
+        )
+
+    def build_from_data(
+        self,
+        episodes: List[EpisodeNode] = None,
+        entities: List[EntityNode] = None,
+        edges: List[EntityEdge] = None,
+    ) -> None:
+        """
+        Build the sharded index from episodes, entities, and edges.
+
+        Edges carry no user_id and are indexed in the unowned shard.
+
+        Args:
+            episodes: List of episode nodes to index
+            entities: List of entity nodes to index
+            edges: List of entity edges to index
+        """
+        for episode in episodes or []:
+            self.add_episode(episode)
+        for entity in entities or []:
+            self.add_entity(entity)
+        for edge in edges or []:
+            self.add_edge(edge)
+
+        logger.info(f"Sharded BM25 index built: {self}")
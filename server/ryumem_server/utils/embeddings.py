@@ -10,6 +10,7 @@ from typing import List
 from openai import OpenAI
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from ryumem_server.core.profiling import record_cache
 from ryumem_server.utils.cache import embedding_cache
 
 logger = logging.getLogger(__name__)
@@ -76,7 +77,9 @@ class EmbeddingClient:
             cached_embedding = embedding_cache.get(cache_key)
             if cached_embedding is not None:
                 logger.debug(f"💾 Cache HIT for embedding: '{text[:50]}...'")
+                record_cache("embedding", hits=1)
                 return cached_embedding
+            record_cache("embedding", misses=1)
 
             # Call OpenAI API
             logger.debug(f"🌐 API call for embedding: '{text[:50]}...'")
@@ -139,6 +142,7 @@ class EmbeddingClient:
                     all_embeddings.append(None)  # Placeholder
 
             logger.info(f"💾 Cache: {len(texts) - len(uncached_texts)}/{len(texts)} embeddings cached")
+            record_cache("embedding", hits=len(texts) - len(uncached_texts), misses=len(uncached_texts))
 
             # If all were cached, return early
             if not uncached_texts:
@@ -364,6 +364,253 @@ Rules:
         logger.info(f"Extracted {len(relationships)} relationships from text")
         return relationships
 
+    def extract_graph(
+        self,
+        text: str,
+        user_id: str,
+        context: Optional[str] = None,
+    ) -> Dict[str, List[Dict[str, str]]]:
+        """
+        Extract entities and the relationships between them in one call using function calling.
+
+        Replaces an extract_entities call followed by an extract_relationships
+        call that sends the same text again.
+
+        Args:
+            text: Input text
+            user_id: User ID for self-reference resolution
+            context: Optional context for better extraction
+
+        Returns:
+            Dictionary with 'entities' (dicts with 'entity' and 'entity_type')
+            and 'relationships' (dicts with 'source', 'relationship',
+            'destination' and 'fact')
+        """
+        system_prompt = f"""You are a smart assistant who understands entities, their types and the relationships between them in a given text.
+If user message contains self reference such as 'I', 'me', 'my' etc. then use {user_id} as the source entity.
+Extract all the entities from the text, then the relationships between them. DO NOT answer the question itself if the given text is a question.
+
+Rules for relationships:
+1. Only extract relationships that are explicitly or implicitly mentioned in the text
+2. Use clear, concise relationship names (e.g., WORKS_AT, KNOWS, LOCATED_IN)
+3. Source and destination must be extracted entities, named exactly as in the entity list
+4. If you detect temporal information (when something started or ended), include it"""
+
+        if context:
+            system_prompt += f"\n\nContext from previous messages:\n{context}"
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text},
+        ]
+
+        tools = [
+            {
+                "type": "function",
+                "function": {
+                    "name": "extract_graph",
+                    "description": "Extract entities with their types, and the relationships between them, from the text",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "entities": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "entity": {
+                                            "type": "string",
+                                            "description": "The entity name"
+                                        },
+                                        "entity_type": {
+                                            "type": "string",
+                                            "description": "The type of entity (e.g., PERSON, ORGANIZATION, CONCEPT)"
+                                        }
+                                    },
+                                    "required": ["entity", "entity_type"]
+                                }
+                            },
+                            "relationships": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "source": {
+                                            "type": "string",
+                                            "description": "Source entity"
+                                        },
+                                        "relationship": {
+                                            "type": "string",
+                                            "description": "Relationship type"
+                                        },
+                                        "destination": {
+                                            "type": "string",
+                                            "description": "Destination entity"
+                                        },
+                                        "fact": {
+                                            "type": "string",
+                                            "description": "Natural language description of the relationship"
+                                        }
+                                    },
+                                    "required": ["source", "relationship", "destination", "fact"]
+                                }
+                            }
+                        },
+                        "required": ["entities", "relationships"]
+                    }
+                }
+            }
+        ]
+
+        response = self.generate(messages, tools=tools)
+
+        # Extract entities and relationships from tool calls
+        graph: Dict[str, List[Dict[str, str]]] = {"entities": [], "relationships": []}
+        if "tool_calls" in response:
+            for tool_call in response["tool_calls"]:
+                if tool_call["name"] == "extract_graph":
+                    graph["entities"] = tool_call["arguments"].get("entities", [])
+                    graph["relationships"] = tool_call["arguments"].get("relationships", [])
+
+        logger.info(
+            f"Extracted {len(graph['entities'])} entities and "
+            f"{len(graph['relationships'])} relationships from text"
+        )
+        return graph
+
+    def extract_graph_batch(
+        self,
+        texts: List[str],
+        user_id: str,
+        context: Optional[str] = None,
+    ) -> List[Dict[str, List[Dict[str, str]]]]:
+        """
+        Extract the entities and relationships of several texts (episodes) in one call using function calling.
+
+        The texts are sent in one message, each under an "[Episode N]"
+        header, and the model attributes every entity and relationship to
+        the episode it comes from. Packing short episodes into one prompt
+        sends the instructions and the tool definition once for all of them.
+
+        Args:
+            texts: Input texts, one per episode
+            user_id: User ID for self-reference resolution
+            context: Optional context for better extraction
+
+        Returns:
+            One dictionary per text, like extract_graph returns
+        """
+        system_prompt = f"""You are a smart assistant who understands entities, their types and the relationships between them in a given text.
+If user message contains self reference such as 'I', 'me', 'my' etc. then use {user_id} as the source entity.
+The text contains several episodes, each starting with a line "[Episode N]". Extract the entities of each episode, then the relationships between them, and attribute them to the episode with its number N. An entity mentioned by several episodes is listed once for each of them. DO NOT answer the question itself if an episode is a question.
+
+Rules for relationships:
+1. Only extract relationships that are explicitly or implicitly mentioned in the episode
+2. Use clear, concise relationship names (e.g., WORKS_AT, KNOWS, LOCATED_IN)
+3. Source and destination must be entities extracted from the same episode, named exactly as in its entity list
+4. If you detect temporal information (when something started or ended), include it"""
+
+        if context:
+            system_prompt += f"\n\nContext from previous messages:\n{context}"
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": "\n\n".join(f"[Episode {i}]\n{text}" for i, text in enumerate(texts, 1))},
+        ]
+
+        tools = [
+            {
+                "type": "function",
+                "function": {
+                    "name": "extract_graph_batch",
+                    "description": "Extract the entities and relationships of each episode of the text",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "episodes": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "episode": {
+                                            "type": "integer",
+                                            "description": "The episode number N"
+                                        },
+                                        "entities": {
+                                            "type": "array",
+                                            "items": {
+                                                "type": "object",
+                                                "properties": {
+                                                    "entity": {
+                                                        "type": "string",
+                                                        "description": "The entity name"
+                                                    },
+                                                    "entity_type": {
+                                                        "type": "string",
+                                                        "description": "The type of entity (e.g., PERSON, ORGANIZATION, CONCEPT)"
+                                                    }
+                                                },
+                                                "required": ["entity", "entity_type"]
+                                            }
+                                        },
+                                        "relationships": {
+                                            "type": "array",
+                                            "items": {
+                                                "type": "object",
+                                                "properties": {
+                                                    "source": {
+                                                        "type": "string",
+                                                        "description": "Source entity"
+                                                    },
+                                                    "relationship": {
+                                                        "type": "string",
+                                                        "description": "Relationship type"
+                                                    },
+                                                    "destination": {
+                                                        "type": "string",
+                                                        "description": "Destination entity"
+                                                    },
+                                                    "fact": {
+                                                        "type": "string",
+                                                        "description": "Natural language description of the relationship"
+                                                    }
+                                                },
+                                                "required": ["source", "relationship", "destination", "fact"]
+                                            }
+                                        }
+                                    },
+                                    "required": ["episode", "entities", "relationships"]
+                                }
+                            }
+                        },
+                        "required": ["episodes"]
+                    }
+                }
+            }
+        ]
+
+        response = self.generate(messages, tools=tools)
+
+        # Attribute entities and relationships to their episodes
+        graphs: List[Dict[str, List[Dict[str, str]]]] = [{"entities": [], "relationships": []} for _ in texts]
+        if "tool_calls" in response:
+            for tool_call in response["tool_calls"]:
+                if tool_call["name"] == "extract_graph_batch":
+                    for episode in tool_call["arguments"].get("episodes", []):
+                        number = episode.get("episode")
+                        if not isinstance(number, (int, float)) or not 1 <= number <= len(texts):
+                            logger.warning(f"Skipping extraction of unknown episode {number}")
+                            continue
+                        graph = graphs[int(number) - 1]
+                        graph["entities"].extend(episode.get("entities", []))
+                        graph["relationships"].extend(episode.get("relationships", []))
+
+        logger.info(
+            f"Extracted {sum(len(g['entities']) for g in graphs)} entities and "
+            f"{sum(len(g['relationships']) for g in graphs)} relationships from {len(texts)} episodes"
+        )
+        return graphs
+
     def detect_contradictions(
         self,
         new_facts: List[str],
@@ -470,6 +470,237 @@ User ID: {user_id}"""
             logger.error(f"Error extracting relationships with Ollama: {e}")
             return []
 
+    def extract_graph(
+        self,
+        text: str,
+        user_id: str,
+        context: Optional[str] = None,
+    ) -> Dict[str, List[Dict[str, str]]]:
+        """
+        Extract entities and the relationships between them in one call using Ollama.
+
+        Args:
+            text: Text to extract entities and relationships from
+            user_id: User ID for self-reference resolution
+            context: Optional context from previous episodes
+
+        Returns:
+            Dictionary with 'entities' (dicts with 'entity' and 'entity_type')
+            and 'relationships' (dicts with source, relationship, destination, fact)
+
+        Raises:
+            ValueError: The response is not a JSON object with both lists
+        """
+        system_prompt = """You are an entity and relationship extraction system. Your ONLY task is to output valid JSON.
+
+DO NOT write explanations, comments, or conversational text.
+ONLY output the JSON object, nothing else.
+
+Extract all important entities (people, places, organizations, concepts, etc.) and the relationships between them, and return them in this EXACT format:
+{
+  "entities": [
+    {"entity": "entity_name", "entity_type": "PERSON"},
+    {"entity": "entity_name", "entity_type": "ORGANIZATION"}
+  ],
+  "relationships": [
+    {
+      "source": "source_entity",
+      "relationship": "WORKS_AT",
+      "destination": "destination_entity",
+      "fact": "Full sentence describing the relationship"
+    }
+  ]
+}
+
+Valid entity types: PERSON, LOCATION, ORGANIZATION, EVENT, CONCEPT, OTHER
+
+Rules:
+- Output MUST be valid JSON
+- Be comprehensive but avoid duplicate entities
+- Use proper capitalization for entity names
+- Source and destination must be entities from your "entities" list
+- Use clear, uppercase relationship types: WORKS_AT, LIVES_IN, KNOWS, GRADUATED_FROM, etc.
+- Only include relationships explicitly stated in the text
+- Use empty arrays when nothing is found"""
+
+        user_prompt = f"""Text: "{text}"
+
+User ID: {user_id} (use this for resolving "I", "me", "my")"""
+
+        if context:
+            user_prompt += f"\n\nContext from previous episodes:\n{context}"
+
+        user_prompt += "\n\nOutput the JSON object now (no other text):"
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+        response = self.generate(
+            messages,
+            temperature=0.1,  # Lower temperature for more deterministic output
+        )
+
+        content = response["content"].strip()
+        logger.debug(f"🔍 Raw Ollama response for graph extraction: {content[:300]}...")
+
+        graph = self._extract_json_object(content)
+        if graph is None or not all(isinstance(graph.get(key), list) for key in ("entities", "relationships")):
+            # Let the caller fall back to separate entity and relationship calls
+            raise ValueError(f"Could not extract entities and relationships from: {content[:200]}...")
+
+        entities = []
+        for entity in graph["entities"]:
+            if isinstance(entity, dict) and "entity" in entity and "entity_type" in entity:
+                entities.append(entity)
+            else:
+                logger.warning(f"Skipping invalid entity: {entity}")
+
+        relationships = []
+        required_fields = {"source", "relationship", "destination", "fact"}
+        for rel in graph["relationships"]:
+            if isinstance(rel, dict) and all(field in rel for field in required_fields):
+                relationships.append(rel)
+            else:
+                logger.warning(f"Skipping invalid relationship: {rel}")
+
+        return {"entities": entities, "relationships": relationships}
+
+    def extract_graph_batch(
+        self,
+        texts: List[str],
+        user_id: str,
+        context: Optional[str] = None,
+    ) -> List[Dict[str, List[Dict[str, str]]]]:
+        """
+        Extract the entities and relationships of several texts (episodes) in one call using Ollama.
+
+        Args:
+            texts: Texts to extract from, one per episode
+            user_id: User ID for self-reference resolution
+            context: Optional context from previous episodes
+
+        Returns:
+            One dictionary per text, like extract_graph returns
+
+        Raises:
+            ValueError: The response is not a JSON object with an episodes list
+        """
+        system_prompt = """You are an entity and relationship extraction system. Your ONLY task is to output valid JSON.
+
+DO NOT write explanations, comments, or conversational text.
+ONLY output the JSON object, nothing else.
+
+The text contains several episodes, each starting with a line "[Episode N]". For each episode, extract all important entities (people, places, organizations, concepts, etc.) and the relationships between them, and return them in this EXACT format:
+{
+  "episodes": [
+    {
+      "episode": 1,
+      "entities": [
+        {"entity": "entity_name", "entity_type": "PERSON"},
+        {"entity": "entity_name", "entity_type": "ORGANIZATION"}
+      ],
+      "relationships": [
+        {
+          "source": "source_entity",
+          "relationship": "WORKS_AT",
+          "destination": "destination_entity",
+          "fact": "Full sentence describing the relationship"
+        }
+      ]
+    }
+  ]
+}
+
+Valid entity types: PERSON, LOCATION, ORGANIZATION, EVENT, CONCEPT, OTHER
+
+Rules:
+- Output MUST be valid JSON
+- "episode" is the number N of the episode the entities and relationships come from
+- List an entity once for each episode that mentions it
+- Use proper capitalization for entity names
+- Source and destination must be entities from the "entities" list of the same episode
+- Use clear, uppercase relationship types: WORKS_AT, LIVES_IN, KNOWS, GRADUATED_FROM, etc.
+- Only include relationships explicitly stated in the episode
+- Use empty arrays when nothing is found"""
+
+        episodes_text = "\n\n".join(f"[Episode {i}]\n{text}" for i, text in enumerate(texts, 1))
+        user_prompt = f"""Text:
+{episodes_text}
+
+User ID: {user_id} (use this for resolving "I", "me", "my")"""
+
+        if context:
+            user_prompt += f"\n\nContext from previous episodes:\n{context}"
+
+        user_prompt += "\n\nOutput the JSON object now (no other text):"
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+        response = self.generate(
+            messages,
+            temperature=0.1,  # Lower temperature for more deterministic output
+        )
+
+        content = response["content"].strip()
+        logger.debug(f"🔍 Raw Ollama response for batch graph extraction: {content[:300]}...")
+
+        parsed = self._extract_json_object(content)
+        if parsed is None or not isinstance(parsed.get("episodes"), list):
+            raise ValueError(f"Could not extract episode graphs from: {content[:200]}...")
+
+        graphs: List[Dict[str, List[Dict[str, str]]]] = [{"entities": [], "relationships": []} for _ in texts]
+        required_fields = {"source", "relationship", "destination", "fact"}
+        for episode in parsed["episodes"]:
+            number = episode.get("episode") if isinstance(episode, dict) else None
+            if not isinstance(number, (int, float)) or not 1 <= number <= len(texts):
+                logger.warning(f"Skipping extraction of unknown episode: {episode}")
+                continue
+            graph = graphs[int(number) - 1]
+            for entity in episode.get("entities") or []:
+                if isinstance(entity, dict) and "entity" in entity and "entity_type" in entity:
+                    graph["entities"].append(entity)
+                else:
+                    logger.warning(f"Skipping invalid entity: {entity}")
+            for rel in episode.get("relationships") or []:
+                if isinstance(rel, dict) and all(field in rel for field in required_fields):
+                    graph["relationships"].append(rel)
+                else:
+                    logger.warning(f"Skipping invalid relationship: {rel}")
+
+        return graphs
+
+    def _extract_json_object(self, content: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract a JSON object from text (plain, in a markdown code block, or
+        surrounded by other text).
+
+        Args:
+            content: Text that may contain JSON
+
+        Returns:
+            Parsed JSON object or None if extraction fails
+        """
+        candidates = [content]
+        if "```" in content:
+            block = content.split("```")[1]
+            candidates.append(block[len("json"):] if block.startswith("json") else block)
+        if "{" in content and "}" in content:
+            candidates.append(content[content.index("{"):content.rindex("}") + 1])
+
+        for candidate in candidates:
+            try:
+                result = json.loads(candidate.strip())
+            except json.JSONDecodeError:
+                continue
+            if isinstance(result, dict):
+                return result
+        return None
+
     def detect_contradictions(
         self,
         new_facts: List[str],
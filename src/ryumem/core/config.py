@@ -44,6 +44,13 @@ class EntityExtractionConfig(BaseSettings):
         description="Maximum number of previous episodes to use as context for extraction",
         ge=0
     )
+    extraction_mode: Literal["combined", "separate"] = Field(
+        default="combined",
+        description=(
+            "combined: extract entities and relationships with one LLM call per episode "
+            "(falls back to separate calls if it fails); separate: one call for entities, then one for relationships"
+        )
+    )
 
 
 class EpisodeConfig(BaseSettings):
@@ -71,6 +78,13 @@ class EpisodeConfig(BaseSettings):
         ge=0.0,
         le=1.0
     )
+    near_duplicate_threshold: float = Field(
+        default=0.8,
+        description="Estimated Jaccard similarity of word shingles for near-duplicate "
+                    "episodes when embeddings are disabled (0.0-1.0)",
+        ge=0.0,
+        le=1.0
+    )
     time_window_hours: int = Field(
         default=24,
         description="Time window in hours to check for duplicate episodes",
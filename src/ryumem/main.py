@@ -3,10 +3,11 @@ Ryumem - Bi-temporal Knowledge Graph Memory System
 Client SDK for Ryumem Server.
 """
 
+import json
 import logging
 import requests
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Any
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from ryumem.core.config import RyumemConfig
 from ryumem.core.models import (
     SearchResult,
@@ -517,8 +518,89 @@ class Ryumem:
         min_bm25_score: Optional[float] = None,
         rrf_k: Optional[int] = None,
         kinds: Optional[List[str]] = None,
+        profile: bool = False,
     ) -> SearchResult:
-        """Search the memory system."""
+        """
+        Search the memory system.
+
+        With profile=True the server's per-stage timings are returned in
+        result.metadata["profile"].
+        """
+        payload = self._search_payload(
+            query, user_id, limit, strategy, similarity_threshold, max_depth,
+            min_rrf_score, min_bm25_score, rrf_k, kinds, profile,
+        )
+
+        response = self._post("/search", json=payload)
+        return self._search_result(response)
+
+    def search_stream(
+        self,
+        query: str,
+        user_id: str,
+        session_id: str,
+        limit: int = 10,
+        strategy: Optional[str] = None,
+        similarity_threshold: Optional[float] = None,
+        max_depth: int = 2,
+        min_rrf_score: Optional[float] = None,
+        min_bm25_score: Optional[float] = None,
+        rrf_k: Optional[int] = None,
+        kinds: Optional[List[str]] = None,
+        profile: bool = False,
+    ) -> Iterator[Tuple[str, SearchResult]]:
+        """
+        Search the memory system, yielding partial results as they arrive.
+
+        A hybrid search yields each strategy's result ("bm25", "semantic",
+        "traversal") as soon as the server has it, then the fused result as
+        "final". Arguments are as in search().
+
+        Example:
+            for event, results in ryumem.search_stream("Alice", user_id="u1", session_id="s1"):
+                print(event, [entity.name for entity in results.entities])
+        """
+        payload = self._search_payload(
+            query, user_id, limit, strategy, similarity_threshold, max_depth,
+            min_rrf_score, min_bm25_score, rrf_k, kinds, profile,
+        )
+
+        url = f"{self.base_url}/search/stream"
+        with requests.post(url, json=payload, headers=self._get_headers(), stream=True) as response:
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                logger.error(f"API POST request failed for /search/stream: {e}")
+                if not self.config.tool_tracking.ignore_errors:
+                    raise
+                return
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                message = json.loads(line)
+                if message["event"] == "error":
+                    logger.error(f"Streaming search failed: {message.get('detail')}")
+                    if not self.config.tool_tracking.ignore_errors:
+                        raise RuntimeError(message.get("detail") or "Streaming search failed")
+                    return
+                yield message["event"], self._search_result(message["result"])
+
+    def _search_payload(
+        self,
+        query: str,
+        user_id: str,
+        limit: int,
+        strategy: Optional[str],
+        similarity_threshold: Optional[float],
+        max_depth: int,
+        min_rrf_score: Optional[float],
+        min_bm25_score: Optional[float],
+        rrf_k: Optional[int],
+        kinds: Optional[List[str]],
+        profile: bool,
+    ) -> Dict[str, Any]:
+        """Build a search request body, applying config defaults."""
         # Apply config defaults
         if strategy is None:
             strategy = self.config.tool_tracking.similarity_strategy
@@ -536,11 +618,12 @@ class Ryumem:
             "min_bm25_score": min_bm25_score,
             "rrf_k": rrf_k,
             "kinds": kinds,
+            "profile": profile,
         }
+        return payload
 
-        response = self._post("/search", json=payload)
-
-        # Reconstruct SearchResult object
+    def _search_result(self, response: Dict[str, Any]) -> SearchResult:
+        """Reconstruct a SearchResult from a search response."""
         entities = []
         for e in response.get("entities", []):
             entities.append(Entity(
@@ -588,7 +671,8 @@ class Ryumem:
             entities=entities,
             edges=edges,
             scores=scores,
-            episodes=episodes
+            episodes=episodes,
+            metadata={"profile": response["profile"]} if response.get("profile") else {},
         )
 
     def get_entity_context(
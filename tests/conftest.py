@@ -0,0 +1,53 @@
+"""
+Shared fixtures for the in-process pipeline tests: a temporary ryugraph
+database, a unique user and an ingestion pipeline over the stub clients.
+
+The server package is imported inside the fixtures, so test modules that do
+not need it still run without it.
+"""
+import uuid
+
+import pytest
+
+from tests.stubs import DIMENSIONS, StubEmbedder, StubLLM
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fresh database, closed after the test."""
+    from ryumem_server.core.graph_db import RyugraphDB
+
+    database = RyugraphDB(str(tmp_path / "test.db"), embedding_dimensions=DIMENSIONS)
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def user_id():
+    """Unique user per test (extraction results are cached per user and content)."""
+    return f"user_{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture
+def make_ingestion(db):
+    """
+    Factory of ingestion pipelines over db and the stub clients.
+
+    Pipelines extract entities, without deduplication or deferred summaries,
+    unless the keyword arguments say otherwise. Callers close them.
+    """
+    from ryumem.core.config import EpisodeConfig
+    from ryumem_server.ingestion.episode import EpisodeIngestion
+
+    def factory(llm=None, embedder=None, deduplication=False, **kwargs):
+        kwargs.setdefault("enable_entity_extraction", True)
+        kwargs.setdefault("episode_config", EpisodeConfig(deduplication_enabled=deduplication))
+        kwargs.setdefault("deferred_summaries", False)
+        return EpisodeIngestion(
+            db=db,
+            llm_client=llm or StubLLM(),
+            embedding_client=embedder or StubEmbedder(),
+            **kwargs,
+        )
+
+    return factory
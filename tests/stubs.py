@@ -0,0 +1,119 @@
+"""
+Deterministic LLM and embedding clients for in-process pipeline tests.
+
+StubLLM extracts capitalized words as entities and relates consecutive
+entities of a sentence; StubEmbedder hashes words into a bag-of-words
+vector. Neither needs a provider or network access.
+"""
+import hashlib
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Embedding size of the test databases and the stub embedder
+DIMENSIONS = 64
+
+
+class StubEmbedder:
+    """Hashed bag-of-words embeddings (texts sharing words are similar)."""
+
+    def __init__(self, dimensions: int = DIMENSIONS):
+        self.dimensions = dimensions
+        self.calls: Counter = Counter()
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions)
+        for word in text.lower().split():
+            digest = hashlib.md5(word.strip(".,").encode("utf-8")).digest()
+            vector[digest[0] % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed(self, text: str) -> List[float]:
+        self.calls["embed"] += 1
+        return self._vector(text)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        self.calls["embed_batch"] += 1
+        return [self._vector(text) for text in texts]
+
+
+class StubLLM:
+    """
+    Extracts capitalized words as entities, relating consecutive ones.
+
+    Args:
+        failures: Number of extraction calls that raise before the LLM recovers
+            (-1 = every call fails)
+        batch: Whether the client supports packed extraction (extract_graph_batch)
+    """
+
+    def __init__(self, failures: int = 0, batch: bool = True):
+        self.failures = failures
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        if not batch:
+            self.extract_graph_batch = None
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+            if self.failures == 0:
+                return
+            if self.failures > 0:
+                self.failures -= 1
+        raise RuntimeError("LLM unavailable")
+
+    @staticmethod
+    def _entities(text: str) -> List[str]:
+        names: List[str] = []
+        for word in text.replace(".", " ").split():
+            if word[:1].isupper() and word not in names:
+                names.append(word)
+        return names
+
+    @staticmethod
+    def _relationships(text: str) -> List[Dict[str, str]]:
+        relationships = []
+        for sentence in text.split("."):
+            names = StubLLM._entities(sentence)
+            for source, destination in zip(names, names[1:]):
+                relationships.append({
+                    "source": source,
+                    "relationship": "RELATED_TO",
+                    "destination": destination,
+                    "fact": sentence.strip(),
+                })
+        return relationships
+
+    def _graph(self, text: str) -> Dict[str, List[Dict[str, str]]]:
+        return {
+            "entities": [{"entity": name, "entity_type": "ENTITY"} for name in self._entities(text)],
+            "relationships": self._relationships(text),
+        }
+
+    def extract_entities(self, text: str, user_id: str, context: Optional[str] = None) -> List[Dict[str, str]]:
+        self._call("extract_entities")
+        return self._graph(text)["entities"]
+
+    def extract_relationships(self, text: str, entities: List[str], user_id: str, context: Optional[str] = None):
+        self._call("extract_relationships")
+        return self._relationships(text)
+
+    def extract_graph(self, text: str, user_id: str, context: Optional[str] = None):
+        self._call("extract_graph")
+        return self._graph(text)
+
+    def extract_graph_batch(self, texts: List[str], user_id: str):
+        self._call("extract_graph_batch")
+        return [self._graph(text) for text in texts]
+
+    def detect_contradictions(self, new_facts: List[str], existing_facts: List[str]):
+        self.calls["detect_contradictions"] += 1
+        return []
+
+    def generate(self, messages, temperature: float = 0.3):
+        self.calls["generate"] += 1
+        return {"content": "An entity mentioned in the notes."}
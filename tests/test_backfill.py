@@ -0,0 +1,85 @@
+"""
+Tests for the extraction backfill of episodes saved without extraction.
+
+Runs against a temporary ryugraph database with stub LLM and embedding
+clients, in process.
+Run with: PYTHONPATH=src:server python -m pytest tests/test_backfill.py
+"""
+import pytest
+
+pytest.importorskip("ryumem_server")
+
+from ryumem_server.ingestion.backfill import ExtractionBackfill
+
+from tests.stubs import StubLLM
+
+CONTENTS = [
+    "Alice moved to Berlin.",
+    "Bob works with Alice.",
+    "Carol visited Paris.",
+    "Dave met Erin in Rome.",
+]
+
+
+def import_episodes(make_ingestion, llm, user_id):
+    """Save CONTENTS without extraction; return the pipeline over llm."""
+    ingestion = make_ingestion(llm)
+    for content in CONTENTS:
+        ingestion.ingest(content=content, user_id=user_id, extract_entities=False)
+    return ingestion
+
+
+def backfill(db, ingestion, **kwargs):
+    return ExtractionBackfill(db, ingestion, max_prompts_per_minute=0, **kwargs)
+
+
+class TestExtractionBackfill:
+    """Unextracted episodes are extracted in packs; failures stay unextracted."""
+
+    def test_packs_extract_every_episode(self, db, user_id, make_ingestion):
+        """Episodes are packed into prompts and all flagged as extracted."""
+        llm = StubLLM()
+        ingestion = import_episodes(make_ingestion, llm, user_id)
+        try:
+            progress = backfill(db, ingestion, max_episodes_per_prompt=2).run(user_id)
+        finally:
+            ingestion.close()
+
+        assert progress.state == "done"
+        assert (progress.pending, progress.extracted, progress.failed) == (4, 4, 0)
+        assert progress.prompts == llm.calls["extract_graph_batch"] == 2
+        assert db.count_unextracted_episodes(user_id) == 0
+
+    def test_failing_llm_leaves_episodes_unextracted(self, db, user_id, make_ingestion):
+        """An LLM outage counts the episodes as failed without flagging them."""
+        llm = StubLLM(failures=-1)
+        ingestion = import_episodes(make_ingestion, llm, user_id)
+        try:
+            progress = backfill(db, ingestion, max_episodes_per_prompt=2).run(user_id)
+            assert progress.state == "done"
+            assert (progress.extracted, progress.failed) == (0, 4)
+            assert db.count_unextracted_episodes(user_id) == 4
+            assert db.execute("MATCH (e:Entity) RETURN count(e) AS n")[0]["n"] == 0
+
+            # The next run after the outage extracts them
+            llm.failures = 0
+            progress = backfill(db, ingestion, max_episodes_per_prompt=2).run(user_id)
+        finally:
+            ingestion.close()
+
+        assert (progress.extracted, progress.failed) == (4, 0)
+        assert db.count_unextracted_episodes(user_id) == 0
+
+    def test_failed_pack_falls_back_to_single_episodes(self, db, user_id, make_ingestion):
+        """A failed pack prompt is retried one episode at a time."""
+        llm = StubLLM(failures=1)
+        ingestion = import_episodes(make_ingestion, llm, user_id)
+        try:
+            progress = backfill(db, ingestion, max_episodes_per_prompt=4).run(user_id)
+        finally:
+            ingestion.close()
+
+        assert (progress.extracted, progress.failed) == (4, 0)
+        assert llm.calls["extract_graph_batch"] == 1
+        assert llm.calls["extract_graph"] == 4
+        assert db.count_unextracted_episodes(user_id) == 0
@@ -0,0 +1,64 @@
+"""
+Tests for batch episode ingestion (per-episode outcomes).
+
+Runs against a temporary ryugraph database with stub LLM and embedding
+clients, in process.
+Run with: PYTHONPATH=src:server python -m pytest tests/test_batch_ingestion.py
+"""
+import pytest
+
+pytest.importorskip("ryumem_server")
+
+
+@pytest.fixture
+def ingestion(make_ingestion):
+    """Ingestion pipeline with deduplication and without extraction."""
+    pipeline = make_ingestion(enable_entity_extraction=False, deduplication=True)
+    yield pipeline
+    pipeline.close()
+
+
+def count_episodes(db, user_id):
+    return db.execute("MATCH (e:Episode {user_id: $user_id}) RETURN count(e) AS n", {"user_id": user_id})[0]["n"]
+
+
+class TestBatchResults:
+    """Every input episode gets one result saying what happened to it."""
+
+    def test_created_and_duplicate_episodes_are_reported_separately(self, ingestion, user_id):
+        """Duplicates of earlier episodes report the episode they duplicate, not a new one."""
+        existing = ingestion.ingest_batch([{"content": "Alice moved to Berlin."}], user_id)
+        assert [result["status"] for result in existing] == ["created"]
+
+        results = ingestion.ingest_batch(
+            [
+                {"content": "Alice moved to Berlin."},
+                {"content": "Bob works at Acme in Paris."},
+                {"content": "Bob works at Acme in Paris."},
+            ],
+            user_id,
+        )
+
+        assert [result["status"] for result in results] == ["duplicate", "created", "duplicate"]
+        assert results[0]["episode_id"] == existing[0]["episode_id"]
+        assert results[2]["episode_id"] == results[1]["episode_id"]
+        assert count_episodes(ingestion.db, user_id) == 2
+
+    def test_failed_episode_keeps_its_position(self, ingestion, user_id, monkeypatch):
+        """A failing episode is reported as failed without shifting the other results."""
+        new_episode = ingestion._new_episode
+
+        def failing_new_episode(**kwargs):
+            if kwargs["content"] == "broken":
+                raise ValueError("invalid episode")
+            return new_episode(**kwargs)
+
+        monkeypatch.setattr(ingestion, "_new_episode", failing_new_episode)
+        results = ingestion.ingest_batch(
+            [{"content": "Carol visited Rome."}, {"content": "broken"}, {"content": "Dave met Erin."}],
+            user_id,
+        )
+
+        assert [result["status"] for result in results] == ["created", "failed", "created"]
+        assert results[1]["episode_id"] is None
+        assert None not in (results[0]["episode_id"], results[2]["episode_id"])
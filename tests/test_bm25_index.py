@@ -0,0 +1,284 @@
+"""
+Tests for the in-process BM25 indexes (plain and sharded by user).
+
+Run with: PYTHONPATH=src:server python -m pytest tests/test_bm25_index.py
+"""
+import threading
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("ryumem_server")
+
+from ryumem_server.core.changes import ChangeEvent
+from ryumem_server.core.models import EntityNode, EpisodeKind, EpisodeNode, EpisodeType
+from ryumem_server.retrieval.analyzer import Analyzer
+from ryumem_server.retrieval.bm25 import COMPACT_MIN_DEAD, BM25Index
+from ryumem_server.retrieval.sharded_bm25 import ShardedBM25Index
+
+
+def entity_event(seq, name, user_id="bm25_user", op="upsert"):
+    """Change event upserting (or deleting) an entity named name."""
+    return ChangeEvent(
+        seq=seq,
+        op=op,
+        kind="entity",
+        uuid=f"entity-{name}",
+        user_id=user_id,
+        data={"name": name, "entity_type": "PERSON", "summary": f"{name} works on search"},
+        created_at=datetime.utcnow(),
+    )
+
+
+def make_episode(uuid, content, kind=EpisodeKind.query, tags=None, user_id="bm25_user"):
+    """Episode node with optional tags in its metadata."""
+    return EpisodeNode(
+        uuid=uuid,
+        name=uuid,
+        content=content,
+        source=EpisodeType.text,
+        kind=kind,
+        user_id=user_id,
+        metadata={"tags": tags} if tags else {},
+    )
+
+
+CORPUS = {
+    "e1": "kafka streams events between services",
+    "e2": "redis caches hot keys in memory",
+    "e3": "postgres stores rows and kafka offsets",
+    "e4": "the search service reads from redis",
+    "e5": "events are replayed from kafka topics",
+}
+
+
+@pytest.fixture(params=["plain", "sharded"])
+def index(request, tmp_path):
+    """Empty index of each kind."""
+    if request.param == "plain":
+        return BM25Index()
+    return ShardedBM25Index(shard_dir=str(tmp_path / "shards"))
+
+
+class TestChangeFeedSequence:
+    """The index tracks the last change it reflects."""
+
+    def test_clear_resets_applied_sequence(self, index):
+        """A cleared index reflects no change, so replay starts from the beginning."""
+        events = [entity_event(seq, name) for seq, name in enumerate(["alice", "bob", "carol"], start=1)]
+        assert all(index.apply_change(event) for event in events)
+        assert index.last_applied_seq == 3
+
+        index.clear()
+        assert index.last_applied_seq == 0
+
+        # Replaying the log restores the documents instead of skipping them
+        assert all(index.apply_change(event) for event in events)
+        assert [uuid for uuid, _ in index.search_entities("alice", min_score=0.01, user_id="bm25_user")] == ["entity-alice"]
+
+    def test_already_applied_events_are_skipped(self, index):
+        """Events at or below the applied sequence do not change the index."""
+        assert index.apply_change(entity_event(5, "alice"))
+        assert index.apply_change(entity_event(4, "alice", op="delete"))
+        assert index.contains("entity-alice")
+        assert index.last_applied_seq == 5
+
+
+def add_user_entities(index, user_id, names):
+    """Add one entity per name to a user's documents."""
+    for name in names:
+        index.add_entity(EntityNode(
+            uuid=f"{user_id}-{name}",
+            name=name,
+            summary=f"{name} works on search",
+            user_id=user_id,
+        ))
+
+
+class TestShardedIndex:
+    """Per-user shards: residency, persistence and concurrency."""
+
+    def test_search_without_user_leaves_residency_unchanged(self, tmp_path):
+        """A search over every shard reads cold shards without evicting active ones."""
+        index = ShardedBM25Index(shard_dir=str(tmp_path / "shards"), max_resident_shards=1)
+        for user_id in ("alice", "bob", "carol"):
+            add_user_entities(index, user_id, ["kafka", "redis", "postgres"])
+        index.save(str(tmp_path / "shards"))
+        resident = list(index._resident)
+
+        results = index.search_entities("kafka", min_score=0.01)
+
+        assert sorted(uuid for uuid, _ in results) == ["alice-kafka", "bob-kafka", "carol-kafka"]
+        assert list(index._resident) == resident
+
+    def test_user_search_reloads_evicted_shard(self, tmp_path):
+        """Evicted shards are written to disk and reloaded on their user's next search."""
+        index = ShardedBM25Index(shard_dir=str(tmp_path / "shards"), max_resident_shards=1)
+        add_user_entities(index, "alice", ["kafka", "redis", "postgres"])
+        add_user_entities(index, "bob", ["kafka", "redis", "postgres"])
+        assert list(index._resident) == ["bob"]
+
+        results = index.search_entities("redis", min_score=0.01, user_id="alice")
+        assert [uuid for uuid, _ in results] == ["alice-redis"]
+        assert list(index._resident) == ["alice"]
+
+    def test_slow_search_does_not_block_writes(self, tmp_path):
+        """A search runs outside the index-wide lock; writes to other shards proceed."""
+        index = ShardedBM25Index(shard_dir=str(tmp_path / "shards"))
+        add_user_entities(index, "alice", ["kafka", "redis", "postgres"])
+        shard = index._resident["alice"]
+        entered = threading.Event()
+        release = threading.Event()
+        search_entities = shard.search_entities
+
+        def slow_search(*args, **kwargs):
+            entered.set()
+            release.wait(10)
+            return search_entities(*args, **kwargs)
+
+        shard.search_entities = slow_search
+        searcher = threading.Thread(target=index.search_entities, args=("kafka",), kwargs={"user_id": "alice"})
+        searcher.start()
+        try:
+            assert entered.wait(10)
+            writer = threading.Thread(target=add_user_entities, args=(index, "bob", ["kafka"]))
+            writer.start()
+            writer.join(5)
+            assert not writer.is_alive()
+            assert index.contains("bob-kafka")
+        finally:
+            release.set()
+            searcher.join()
+
+    def test_scores_use_the_users_own_statistics(self, tmp_path):
+        """Other users' documents do not change a user's term statistics."""
+        alone = BM25Index()
+        add_user_entities(alone, "alice", ["kafka", "redis", "postgres"])
+        index = ShardedBM25Index(shard_dir=str(tmp_path / "shards"))
+        add_user_entities(index, "alice", ["kafka", "redis", "postgres"])
+        add_user_entities(index, "bob", [f"kafka {i}" for i in range(20)])
+
+        assert index.search_entities("kafka", min_score=0.01, user_id="alice") == alone.search_entities(
+            "kafka", min_score=0.01, user_id="alice"
+        )
+
+    def test_removed_user_stays_removed_after_reload(self, tmp_path):
+        """remove_user drops the user's shard file; a reloaded index lazily loads the others."""
+        index = ShardedBM25Index(shard_dir=str(tmp_path / "shards"))
+        add_user_entities(index, "alice", ["kafka", "redis", "postgres"])
+        add_user_entities(index, "bob", ["kafka", "redis"])
+        index.save(str(tmp_path / "shards"))
+        assert index.remove_user("bob") == 2
+        index.save(str(tmp_path / "shards"))
+
+        reloaded = ShardedBM25Index()
+        assert reloaded.load(str(tmp_path / "shards"))
+        assert reloaded.search_entities("kafka", min_score=0.01, user_id="bob") == []
+        assert [uuid for uuid, _ in reloaded.search_entities("kafka", min_score=0.01, user_id="alice")] == [
+            "alice-kafka"
+        ]
+
+
+class TestColumnarStore:
+    """Integer postings and NumPy columns behave like the object-based index."""
+
+    def test_scores_match_rank_bm25(self):
+        """Scores equal rank_bm25's BM25Okapi over the same terms."""
+        rank_bm25 = pytest.importorskip("rank_bm25")
+        index = BM25Index()
+        for uuid, content in CORPUS.items():
+            index.add_episode(make_episode(uuid, content))
+        reference = rank_bm25.BM25Okapi([index.analyzer.analyze(content) for content in CORPUS.values()])
+
+        query = "kafka events"
+        expected = dict(zip(CORPUS, reference.get_scores(index.analyzer.analyze(query))))
+        results = index.search_episodes(query, top_k=len(CORPUS), min_score=float("-inf"))
+
+        assert len(results) == len(CORPUS)
+        for uuid, score in results:
+            assert score == pytest.approx(expected[uuid])
+
+    def test_removed_documents_are_tombstoned_then_compacted(self):
+        """Removed rows never match, and compaction leaves the same results as a fresh index."""
+        index = BM25Index()
+        fresh = BM25Index()
+        names = [f"term{i}" for i in range(COMPACT_MIN_DEAD * 2)]
+        add_user_entities(index, "alice", names)
+        add_user_entities(fresh, "alice", names[COMPACT_MIN_DEAD:])
+
+        for name in names[: COMPACT_MIN_DEAD - 1]:
+            assert index.remove_entity(f"alice-{name}")
+        assert index._entities.row_count == len(names)
+        assert index.search_entities(names[0], min_score=0.01) == []
+
+        # One more removal crosses the dead-row threshold and reclaims the rows
+        assert index.remove_entity(f"alice-{names[COMPACT_MIN_DEAD - 1]}")
+        assert index._entities.row_count == len(names) - COMPACT_MIN_DEAD
+
+        query = " ".join(names[COMPACT_MIN_DEAD:COMPACT_MIN_DEAD + 3])
+        assert index.search_entities(query, min_score=0.01) == fresh.search_entities(query, min_score=0.01)
+
+    def test_episode_filters_survive_save_and_load(self, tmp_path):
+        """Kind, tag and user columns filter the same after a save/load round trip."""
+        index = BM25Index()
+        index.add_episode(make_episode("q1", "kafka consumer lag", tags=["Ops"]))
+        index.add_episode(make_episode("m1", "kafka partition keys", kind=EpisodeKind.memory, tags=["design"]))
+        index.add_episode(make_episode("q2", "kafka retention policy", user_id="other"))
+        index.add_episode(make_episode("q3", "redis eviction policy"))
+        path = str(tmp_path / "bm25.pkl")
+        index.save(path)
+
+        loaded = BM25Index()
+        assert loaded.load(path)
+        assert loaded.stats() == index.stats()
+        for reloaded in (index, loaded):
+            def matches(**filters):
+                return sorted(uuid for uuid, _ in reloaded.search_episodes("kafka", min_score=0.01, **filters))
+
+            assert matches(kinds=["memory"]) == ["m1"]
+            assert matches(tags=["ops"]) == ["q1"]
+            assert matches(user_id="bm25_user") == ["m1", "q1"]
+
+
+class TestAnalyzer:
+    """Documents and queries are analyzed into the same terms."""
+
+    def test_folding_splits_punctuation_and_accents(self):
+        """Case, accents and punctuation do not change the terms."""
+        analyzer = Analyzer()
+        assert analyzer.analyze("Café Zürich, Google.") == analyzer.analyze("cafe zurich google") == [
+            "cafe", "zurich", "google"
+        ]
+
+    def test_stopwords_and_stemming_are_configurable(self):
+        """Stopwords are dropped by default; the plural stemmer is opt-in."""
+        text = "The companies of Alice"
+        assert Analyzer().analyze(text) == ["companies", "alice"]
+        assert Analyzer(stem=True).analyze(text) == ["company", "alice"]
+        assert Analyzer(remove_stopwords=False).analyze(text) == ["the", "companies", "of", "alice"]
+
+    def test_query_terms_are_memoized(self):
+        """Repeated queries hit the term cache."""
+        analyzer = Analyzer()
+        for _ in range(3):
+            assert analyzer.analyze_query("kafka events") == ("kafka", "events")
+        assert analyzer.cache_info()["hits"] == 2
+
+    def test_stemmed_query_matches_singular_document(self):
+        """With stemming, a plural query finds the singular term."""
+        index = BM25Index(analyzer=Analyzer(stem=True))
+        for uuid, content in CORPUS.items():
+            index.add_episode(make_episode(uuid, content))
+        assert [uuid for uuid, _ in index.search_episodes("topic", min_score=0.01)] == ["e5"]
+
+    def test_load_ignores_index_built_with_other_settings(self, tmp_path):
+        """An index saved with other analyzer settings is reported as not loaded."""
+        index = BM25Index()
+        index.add_episode(make_episode("e1", CORPUS["e1"]))
+        path = str(tmp_path / "bm25.pkl")
+        index.save(path)
+
+        stemmed = BM25Index(analyzer=Analyzer(stem=True))
+        assert not stemmed.load(path)
+        assert stemmed.stats()["episode_count"] == 0
+        assert BM25Index().load(path)
@@ -0,0 +1,110 @@
+"""
+Tests for the background BM25 rebuild (database fallback, catch-up and swap).
+
+Runs a Ryumem instance over a temporary ryugraph database, in process. No
+LLM or embedding calls are made: episodes are saved through the database.
+Run with: PYTHONPATH=src:server python -m pytest tests/test_bm25_rebuild.py
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("ryumem_server")
+
+from ryumem_server.core.models import EpisodeNode, EpisodeType
+from ryumem_server.lib import Ryumem
+
+USER_ID = "rebuild_user"
+
+
+def make_episode(content):
+    """Build an unsaved episode node."""
+    now = datetime.utcnow()
+    return EpisodeNode(
+        name=content,
+        content=content,
+        source=EpisodeType.text,
+        user_id=USER_ID,
+        created_at=now,
+        valid_at=now,
+    )
+
+
+def wait_until_ready(ryumem, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = ryumem.bm25_index_status()
+        if status["state"] == "ready" and not status["rebuilding"]:
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"BM25 rebuild did not finish: {ryumem.bm25_index_status()}")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Database with three episodes and no saved BM25 index."""
+    path = str(tmp_path / "rebuild.db")
+    ryumem = Ryumem(db_path=path)
+    for content in ("kafka stream processing", "flink stream processing", "berlin apartment search"):
+        ryumem.db.save_episode(make_episode(content))
+    ryumem.close()
+    os.remove(str(tmp_path / "rebuild_bm25.pkl"))
+    return path
+
+
+class TestBackgroundRebuild:
+    """A missing index is rebuilt in the background while the database answers keyword queries."""
+
+    def test_startup_serves_from_the_database_until_the_index_is_swapped_in(self, db_path, monkeypatch):
+        """Writes during the build are replayed into the new index before the swap."""
+        release = threading.Event()
+        populate = Ryumem._populate_bm25_index
+
+        def slow_populate(self, bm25_index):
+            release.wait(30)
+            populate(self, bm25_index)
+
+        monkeypatch.setattr(Ryumem, "_populate_bm25_index", slow_populate)
+        ryumem = Ryumem(db_path=db_path)
+        try:
+            status = ryumem.bm25_index_status()
+            assert status["state"] == "building"
+            assert status["index_type"] == "DBKeywordIndex"
+            hits = ryumem.search_engine.bm25_index.search_episodes("kafka", min_score=0.01, user_id=USER_ID)
+            assert len(hits) == 1
+
+            ryumem.db.save_episode(make_episode("kafka connect during the rebuild"))
+            release.set()
+            status = wait_until_ready(ryumem)
+        finally:
+            release.set()
+            ryumem.close()
+
+        assert status["index_type"] == "BM25Index"
+        assert status["stats"]["episode_count"] == 4
+        assert status["lag"] == 0
+        assert status["rebuilt_at"] is not None
+
+    def test_saved_index_is_loaded_without_a_rebuild(self, db_path):
+        """A rebuilt index is saved on close and loaded by the next instance."""
+        ryumem = Ryumem(db_path=db_path)
+        try:
+            wait_until_ready(ryumem)
+        finally:
+            ryumem.close()
+
+        reopened = Ryumem(db_path=db_path)
+        try:
+            status = reopened.bm25_index_status()
+            hits = reopened.search_engine.bm25_index.search_episodes("stream", min_score=0.01, user_id=USER_ID)
+        finally:
+            reopened.close()
+
+        assert status["state"] == "ready"
+        assert status["index_type"] == "BM25Index"
+        assert status["rebuilt_at"] is None
+        assert status["stats"]["episode_count"] == 3
+        assert len(hits) == 2
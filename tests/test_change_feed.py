@@ -0,0 +1,250 @@
+"""
+Tests for the database change feed (durability, ordering and delivery).
+
+Runs against a temporary ryugraph database, in process.
+Run with: PYTHONPATH=src:server python -m pytest tests/test_change_feed.py
+"""
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("ryumem_server")
+
+from ryumem_server.core.graph_db import RyugraphDB
+from ryumem_server.core.models import EntityEdge, EntityNode, EpisodeNode, EpisodeType, EpisodicEdge
+
+
+def make_episode(content, user_id="feed_user"):
+    """Build an unsaved episode node."""
+    now = datetime.utcnow()
+    return EpisodeNode(
+        name=content,
+        content=content,
+        source=EpisodeType.text,
+        user_id=user_id,
+        created_at=now,
+        valid_at=now,
+    )
+
+
+def save_edge(db, user_id):
+    """Save two entities of a user and a relationship between them."""
+    source = EntityNode(name=f"{user_id} source", user_id=user_id)
+    target = EntityNode(name=f"{user_id} target", user_id=user_id)
+    db.save_entity(source)
+    db.save_entity(target)
+    edge = EntityEdge(
+        source_node_uuid=source.uuid,
+        target_node_uuid=target.uuid,
+        name="KNOWS",
+        fact=f"{user_id} source knows target",
+    )
+    db.save_entity_edge(edge, source.uuid, target.uuid)
+    return edge
+
+
+def count_episodes(db):
+    return db.execute("MATCH (e:Episode) RETURN count(e) AS n")[0]["n"]
+
+
+class TestChangeFeedDurability:
+    """A committed write always has its logged event, a rolled back one neither."""
+
+    def test_write_and_event_are_logged_together(self, db):
+        """Every saved episode has exactly one logged event with its UUID."""
+        episode = make_episode("logged together")
+        db.save_episode(episode)
+
+        events = db.changes.read_since(0)
+        assert [(e.op, e.kind, e.uuid, e.user_id) for e in events] == [
+            ("upsert", "episode", episode.uuid, "feed_user")
+        ]
+
+    def test_rolled_back_write_leaves_no_event(self, db):
+        """A transaction failing after the write drops both the row and its event."""
+        received = []
+        db.changes.subscribe(received.append)
+
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.save_episode(make_episode("never committed"))
+                raise RuntimeError("crash before commit")
+
+        assert count_episodes(db) == 0
+        assert db.changes.read_since(0) == []
+        assert received == []
+
+        # The feed keeps working after the gap
+        db.save_episode(make_episode("committed"))
+        assert len(received) == 1
+        assert [e.seq for e in db.changes.read_since(0)] == [received[0].seq]
+
+    def test_failed_statement_rolls_back_the_transaction(self, db):
+        """A failing statement inside a transaction rolls back its earlier writes."""
+        existing = make_episode("existing")
+        db.save_episode(existing)
+
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.save_episode(make_episode("rolled back"))
+                db.execute("CREATE (:Episode {uuid: $uuid})", {"uuid": existing.uuid})
+
+        assert count_episodes(db) == 1
+        assert len(db.changes.read_since(0)) == 1
+
+    def test_sequence_resumes_after_reopen(self, tmp_path):
+        """Sequence numbers stay monotonic across restarts."""
+        path = str(tmp_path / "reopen.db")
+        first = RyugraphDB(path, embedding_dimensions=4)
+        first.save_episode(make_episode("before restart"))
+        last_seq = first.changes.last_seq
+        first.close()
+
+        second = RyugraphDB(path, embedding_dimensions=4)
+        try:
+            event = second.changes.emit("resync", "graph")
+            assert event.seq == last_seq + 1
+            assert [e.seq for e in second.changes.read_since(last_seq)] == [event.seq]
+        finally:
+            second.close()
+
+    def test_prune_keeps_latest_and_retained_events(self, db):
+        """prune() never drops the newest event or events retained by a rebuild."""
+        for i in range(5):
+            db.save_episode(make_episode(f"episode {i}"))
+
+        with db.changes.retain() as seq:
+            db.save_episode(make_episode("during rebuild"))
+            db.changes.prune(db.changes.last_seq + 10)
+            assert [e.seq for e in db.changes.read_since(seq)] == [seq + 1]
+
+        db.changes.prune(db.changes.last_seq + 10)
+        remaining = db.changes.read_since(0)
+        assert [e.seq for e in remaining] == [db.changes.last_seq]
+        assert db.changes.can_replay_from(db.changes.last_seq)
+        assert not db.changes.can_replay_from(1)
+
+
+class TestChangeFeedDelivery:
+    """Subscribers see every committed event once, in order, after the commit."""
+
+    def test_concurrent_writers_deliver_in_log_order(self, db):
+        """Events from parallel writers reach subscribers in sequence order."""
+        received = []
+        db.changes.subscribe(lambda event: received.append(event.seq))
+
+        def write(worker):
+            for i in range(20):
+                db.save_episode(make_episode(f"worker {worker} episode {i}"))
+
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        logged = [e.seq for e in db.changes.read_since(0)]
+        assert len(received) == 80
+        assert received == sorted(received) == logged
+
+    def test_emit_returns_after_delivery(self, db):
+        """A write returns once subscribers have seen its event (read-your-writes)."""
+        received = []
+        db.changes.subscribe(received.append)
+
+        episode = make_episode("delivered before return")
+        db.save_episode(episode)
+        assert received and received[-1].uuid == episode.uuid
+
+    def test_slow_subscriber_does_not_block_writes(self, db):
+        """Writers commit while a subscriber runs; only delivery waits."""
+        entered = threading.Event()
+        release = threading.Event()
+
+        def slow_subscriber(event):
+            if event.data.get("name") == "slow":
+                entered.set()
+                release.wait(10)
+
+        db.changes.subscribe(slow_subscriber)
+        slow_writer = threading.Thread(target=db.save_episode, args=(make_episode("slow"),))
+        slow_writer.start()
+        assert entered.wait(10)
+
+        other_writer = threading.Thread(target=db.save_episode, args=(make_episode("other"),))
+        other_writer.start()
+        try:
+            # The second write commits although the first event is still being delivered
+            deadline = time.monotonic() + 10
+            while count_episodes(db) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert count_episodes(db) == 2
+        finally:
+            release.set()
+            slow_writer.join()
+            other_writer.join()
+
+    def test_failing_subscriber_does_not_fail_the_write(self, db):
+        """Subscriber errors are logged; the write and later deliveries succeed."""
+        received = []
+
+        def failing(event):
+            raise ValueError("subscriber bug")
+
+        db.changes.subscribe(failing)
+        db.changes.subscribe(received.append)
+        db.save_episode(make_episode("still saved"))
+
+        assert count_episodes(db) == 1
+        assert len(received) == 1
+
+    def test_edge_invalidation_is_scoped_to_the_owner(self, db):
+        """Invalidation events carry the owner so only their cached results are dropped."""
+        alice_edges = [save_edge(db, "alice"), save_edge(db, "alice")]
+        bob_edge = save_edge(db, "bob")
+        received = []
+        db.changes.subscribe(received.append)
+
+        db.invalidate_edge(alice_edges[0].uuid)
+        db.invalidate_edges([alice_edges[1].uuid, bob_edge.uuid])
+
+        assert sorted((e.op, e.uuid, e.user_id) for e in received) == sorted([
+            ("invalidate", alice_edges[0].uuid, "alice"),
+            ("invalidate", alice_edges[1].uuid, "alice"),
+            ("invalidate", bob_edge.uuid, "bob"),
+        ])
+
+    def test_external_query_resyncs_only_when_it_writes(self, db):
+        """A raw read mentioning write keywords emits nothing; a raw write emits a resync."""
+        received = []
+        db.changes.subscribe(received.append)
+
+        rows = db.execute_external(
+            "MATCH (e:Episode) WHERE e.content <> 'set x = 1; delete y' RETURN count(e) AS n"
+        )
+        assert rows == [{"n": 0}]
+        assert received == []
+
+        db.execute_external("CREATE (:Episode {uuid: 'raw'})")
+        assert count_episodes(db) == 1
+        assert [(e.op, e.kind, e.data) for e in received] == [("resync", "graph", {"reason": "cypher"})]
+        assert [e.seq for e in db.changes.read_since(0)] == [received[0].seq]
+
+    def test_extraction_writes_emit_link_events(self, db):
+        """MENTIONS edges and the extracted flag notify subscribers with the episode's owner."""
+        episode = make_episode("Alice met Bob", user_id="alice")
+        db.save_episode(episode)
+        entity = EntityNode(name="alice", user_id="alice")
+        db.save_entity(entity)
+        received = []
+        db.changes.subscribe(received.append)
+
+        db.save_episodic_edges([EpisodicEdge(source_node_uuid=episode.uuid, target_node_uuid=entity.uuid)])
+        db.mark_episodes_extracted({episode.uuid: []})
+
+        assert [(e.op, e.kind, e.uuid, e.user_id) for e in received] == [
+            ("link", "episode", episode.uuid, "alice"),
+            ("link", "episode", episode.uuid, "alice"),
+        ]
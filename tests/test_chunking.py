@@ -0,0 +1,197 @@
+"""
+Tests for document chunking and chunked ingestion of long documents.
+
+Chunker tests run in memory; pipeline tests use a temporary ryugraph database
+with stub LLM and embedding clients.
+Run with: PYTHONPATH=src:server python -m pytest tests/test_chunking.py
+"""
+import json
+
+import pytest
+
+pytest.importorskip("ryumem_server")
+
+from ryumem_server.core.models import CHUNK_METADATA_KEY, DOCUMENT_CHUNK_COUNT_KEY
+from ryumem_server.ingestion.chunking import TextChunker, estimate_tokens
+
+from tests.stubs import StubEmbedder, StubLLM
+
+DOCUMENT = " ".join([
+    "Alice joined Acme as a platform engineer in spring.",
+    "Alice moved the billing service to Kafka.",
+    "Bob reviewed the migration plan with Alice.",
+    "The team presented the results to Carol.",
+    "Carol approved a second migration for search.",
+    "Bob rewrote the indexing jobs on Flink.",
+    "Alice trained Dave on the new deployment tooling.",
+    "Dave took over the billing service on call rotation.",
+    "Erin audited the Kafka clusters before launch.",
+    "The launch went out without incidents in autumn.",
+    "Acme opened a new office in Zurich.",
+])
+
+
+class TestTextChunker:
+    """Long texts are split into overlapping chunks of at most max_tokens."""
+
+    def test_short_text_is_not_split(self):
+        """A text within max_tokens is one chunk, the text itself."""
+        chunker = TextChunker(max_tokens=40, overlap_tokens=10)
+        assert not chunker.splits("Alice joined Acme.")
+        assert [chunk.text for chunk in chunker.split("Alice joined Acme.")] == ["Alice joined Acme."]
+
+    def test_chunks_cover_the_document_with_overlap(self):
+        """Chunks are substrings at their offsets, within budget, overlapping and advancing."""
+        chunker = TextChunker(max_tokens=40, overlap_tokens=10)
+        assert chunker.splits(DOCUMENT)
+        chunks = chunker.split(DOCUMENT)
+
+        assert len(chunks) > 2
+        assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+        assert chunks[0].start == 0
+        assert chunks[-1].end == len(DOCUMENT)
+        for chunk in chunks:
+            assert DOCUMENT[chunk.start:chunk.end] == chunk.text
+            assert chunk.tokens == estimate_tokens(chunk.text) <= 40
+        for previous, chunk in zip(chunks, chunks[1:]):
+            assert previous.start < chunk.start < previous.end
+            assert DOCUMENT[chunk.start - 1] == " "
+
+    def test_long_sentence_is_split_at_words(self):
+        """A sentence longer than a chunk is packed word by word."""
+        sentence = " ".join(f"word{i}" for i in range(60)) + "."
+        chunks = TextChunker(max_tokens=20, overlap_tokens=0).split(sentence)
+
+        assert len(chunks) > 1
+        assert all(chunk.tokens <= 20 for chunk in chunks)
+        assert " ".join(chunk.text for chunk in chunks) == sentence
+
+    def test_overlap_must_be_smaller_than_a_chunk(self):
+        with pytest.raises(ValueError):
+            TextChunker(max_tokens=20, overlap_tokens=20)
+
+
+class FlakyLLM(StubLLM):
+    """Stub LLM whose extraction calls fail for texts mentioning a word while broken."""
+
+    def __init__(self, word):
+        super().__init__()
+        self.word = word
+        self.broken = True
+
+    def _check(self, text):
+        if self.broken and self.word in text:
+            raise RuntimeError("LLM unavailable")
+
+    def extract_graph(self, text, user_id, context=None):
+        self._check(text)
+        return super().extract_graph(text, user_id, context)
+
+    def extract_entities(self, text, user_id, context=None):
+        self._check(text)
+        return super().extract_entities(text, user_id, context)
+
+
+@pytest.fixture
+def make_chunking_ingestion(make_ingestion):
+    """Factory of ingestion pipelines splitting episodes over 40 tokens."""
+    def factory(llm, embedder=None):
+        return make_ingestion(
+            llm, embedder, deduplication=True, chunk_max_tokens=40, chunk_overlap_tokens=10
+        )
+
+    return factory
+
+
+def entity_names(db, user_id):
+    rows = db.execute("MATCH (e:Entity {user_id: $user_id}) RETURN e.name AS name", {"user_id": user_id})
+    return sorted(row["name"] for row in rows)
+
+
+class TestChunkedIngestion:
+    """Long episodes are saved as a document with chunk episodes, extracted chunk by chunk."""
+
+    def test_document_is_saved_with_its_chunks(self, db, user_id, make_chunking_ingestion):
+        """The document keeps the content; each chunk is embedded (in one call) and linked in order."""
+        llm = StubLLM()
+        embedder = StubEmbedder()
+        ingestion = make_chunking_ingestion(llm, embedder)
+        try:
+            document_uuid, created = ingestion.create_episode(content=DOCUMENT, user_id=user_id)
+            assert created
+            assert embedder.calls == {"embed_batch": 1}
+            ingestion.extract(episode_uuid=document_uuid, content=DOCUMENT, user_id=user_id)
+        finally:
+            ingestion.close()
+
+        document = db.get_episode_by_uuid(document_uuid)
+        chunks = db.get_episode_chunks(document_uuid)
+        expected = TextChunker(max_tokens=40, overlap_tokens=10).split(DOCUMENT)
+        assert document["content"] == DOCUMENT
+        assert json.loads(document["metadata"])[DOCUMENT_CHUNK_COUNT_KEY] == len(expected)
+        assert [chunk["content"] for chunk in chunks] == [chunk.text for chunk in expected]
+        assert [chunk["metadata"][CHUNK_METADATA_KEY]["index"] for chunk in chunks] == list(range(len(expected)))
+        assert all(chunk["extracted"] for chunk in chunks)
+
+        # One combined call per chunk; entities repeated across chunks are written once
+        assert llm.calls["extract_graph"] == len(expected)
+        names = entity_names(db, user_id)
+        assert len(names) == len(set(names))
+        assert {"alice", "bob", "carol", "kafka", "zurich"} <= set(names)
+
+    def test_resent_document_is_a_duplicate(self, user_id, make_chunking_ingestion):
+        """Ingesting the same document again returns the existing document."""
+        ingestion = make_chunking_ingestion(StubLLM())
+        try:
+            first = ingestion.ingest(content=DOCUMENT, user_id=user_id)
+            assert ingestion.ingest(content=DOCUMENT, user_id=user_id) == first
+        finally:
+            ingestion.close()
+
+    def test_document_and_chunks_are_saved_together(self, db, user_id, make_chunking_ingestion, monkeypatch):
+        """A failure while linking the chunks saves neither the document nor its chunks."""
+        def failing_link(document_uuid, chunk_uuids):
+            raise RuntimeError("crash before the chunks are linked")
+
+        monkeypatch.setattr(db, "link_episode_chunks", failing_link)
+        ingestion = make_chunking_ingestion(StubLLM())
+        try:
+            with pytest.raises(RuntimeError):
+                ingestion.create_episode(content=DOCUMENT, user_id=user_id)
+        finally:
+            ingestion.close()
+
+        assert db.execute(
+            "MATCH (e:Episode {user_id: $user_id}) RETURN count(e) AS n", {"user_id": user_id}
+        )[0]["n"] == 0
+
+    def test_retry_only_extracts_failed_chunks(self, db, user_id, make_chunking_ingestion):
+        """A failed chunk stays unextracted; extracting the document again only sends that chunk."""
+        llm = FlakyLLM("Zurich")
+        ingestion = make_chunking_ingestion(llm)
+        try:
+            document_uuid = ingestion.ingest(content=DOCUMENT, user_id=user_id)
+            chunks = db.get_episode_chunks(document_uuid)
+            assert [chunk["extracted"] for chunk in chunks] == ["Zurich" not in chunk["content"] for chunk in chunks]
+            assert db.count_unextracted_episodes(user_id) == 1
+            assert "zurich" not in entity_names(db, user_id)
+
+            llm.broken = False
+            calls = llm.calls["extract_graph"]
+            ingestion.extract(episode_uuid=document_uuid, content=DOCUMENT, user_id=user_id)
+        finally:
+            ingestion.close()
+
+        assert llm.calls["extract_graph"] == calls + 1
+        assert db.count_unextracted_episodes(user_id) == 0
+        assert "zurich" in entity_names(db, user_id)
+
+    def test_failed_chunks_fail_the_extraction(self, user_id, make_chunking_ingestion):
+        """Extracting a document raises while any of its chunks fails."""
+        ingestion = make_chunking_ingestion(FlakyLLM("Zurich"))
+        try:
+            document_uuid, _ = ingestion.create_episode(content=DOCUMENT, user_id=user_id)
+            with pytest.raises(RuntimeError, match="1 of"):
+                ingestion.extract(episode_uuid=document_uuid, content=DOCUMENT, user_id=user_id)
+        finally:
+            ingestion.close()
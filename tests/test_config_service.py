@@ -0,0 +1,119 @@
+"""
+Tests for the database-backed configuration service.
+
+Runs against a temporary ryugraph database, in process.
+Run with: PYTHONPATH=src:server python -m pytest tests/test_config_service.py
+"""
+import pytest
+
+pytest.importorskip("ryumem_server")
+
+from ryumem_server.core.config import IngestionConfig, SearchConfig
+from ryumem_server.core.config_service import ConfigService
+from ryumem_server.core.graph_db import RyugraphDB
+
+
+@pytest.fixture
+def service(tmp_path):
+    """Config service over a fresh database populated with defaults."""
+    db = RyugraphDB(str(tmp_path / "config.db"), embedding_dimensions=4)
+    config_service = ConfigService(db)
+    config_service.ensure_defaults_in_database()
+    yield config_service
+    db.close()
+
+
+class TestSearchSettings:
+    """Every search setting is stored, loaded and validated."""
+
+    def test_defaults_round_trip(self, service):
+        """Loading the stored defaults reproduces the model defaults."""
+        assert service.load_config_from_database().search == SearchConfig()
+
+    def test_updated_settings_are_loaded(self, service):
+        """Updated search settings reach the loaded config."""
+        updates = {
+            "search.hybrid_parallel": False,
+            "search.hybrid_max_workers": 2,
+            "search.bm25_budget_ms": 250,
+            "search.traversal_max_nodes": 20,
+            "search.result_cache_enabled": False,
+            "search.result_cache_ttl_seconds": 30.0,
+            "search.hybrid_planner_enabled": True,
+            "search.hybrid_planner_confidence": 0.9,
+            "search.keyword_backend": "fts",
+            "search.bm25_shard_by_user": True,
+            "search.bm25_max_resident_shards": 4,
+            "search.bm25_remove_stopwords": False,
+            "search.bm25_stemming": True,
+            "search.bm25_background_rebuild": False,
+        }
+        assert service.update_multiple_configs(updates) == (len(updates), [])
+
+        search = service.load_config_from_database().search
+        for key, value in updates.items():
+            assert getattr(search, key.split(".", 1)[1]) == value
+
+    @pytest.mark.parametrize("key,value", [
+        ("search.keyword_backend", "elastic"),
+        ("search.hybrid_max_workers", 0),
+        ("search.result_cache_size", -1),
+        ("search.bm25_budget_ms", -5),
+        ("search.hybrid_planner_confidence", -0.1),
+        ("search.hybrid_parallel", "sometimes"),
+    ])
+    def test_invalid_values_are_rejected(self, service, key, value):
+        """Out-of-range or mistyped search settings fail validation."""
+        is_valid, error = service.validate_config_value(key, value)
+        assert not is_valid
+        assert error
+
+    def test_valid_values_are_accepted(self, service):
+        """Boundary values allowed by the model pass validation."""
+        assert service.validate_config_value("search.keyword_backend", "bm25") == (True, None)
+        assert service.validate_config_value("search.bm25_budget_ms", 0) == (True, None)
+        assert service.validate_config_value("search.hybrid_max_workers", 1) == (True, None)
+
+
+class TestIngestionSettings:
+    """Ingestion settings are validated against the bounds of their model."""
+
+    def test_defaults_round_trip(self, service):
+        """Loading the stored defaults reproduces the model defaults."""
+        assert service.load_config_from_database().ingestion == IngestionConfig()
+
+    @pytest.mark.parametrize("key,value", [
+        ("ingestion.queue_workers", 0),
+        ("ingestion.queue_max_attempts", -1),
+        ("ingestion.summary_tick_seconds", 0),
+        ("ingestion.backfill_prompts_per_minute", -1),
+        ("ingestion.duplicate_index_bucket_hours", 0),
+        ("ingestion.contradiction_similarity_threshold", 1.5),
+        ("ingestion.chunk_max_tokens", -1),
+    ])
+    def test_out_of_range_values_are_rejected(self, service, key, value):
+        """Values the model would refuse to load fail validation."""
+        is_valid, error = service.validate_config_value(key, value)
+        assert not is_valid
+        assert key in error
+
+    def test_boundary_values_are_accepted(self, service):
+        """Values at the model's bounds pass validation and load."""
+        assert service.validate_config_value("ingestion.queue_workers", 1) == (True, None)
+        assert service.validate_config_value("ingestion.backfill_prompts_per_minute", 0) == (True, None)
+        assert service.update_config("ingestion.queue_workers", 1)
+        assert service.load_config_from_database().ingestion.queue_workers == 1
+
+    def test_chunk_overlap_must_be_shorter_than_a_chunk(self, service):
+        """A chunk size at or below the stored overlap is rejected unless the overlap changes with it."""
+        is_valid, error = service.validate_config_value("ingestion.chunk_max_tokens", 50)
+        assert not is_valid
+        assert "chunk_overlap_tokens" in error
+
+        updates = {"ingestion.chunk_max_tokens": 50, "ingestion.chunk_overlap_tokens": 10}
+        for key, value in updates.items():
+            assert service.validate_config_value(key, value, updates) == (True, None)
+        assert service.validate_config_value("ingestion.chunk_max_tokens", 0) == (True, None)
+
+        with pytest.raises(ValueError):
+            IngestionConfig(chunk_max_tokens=50, chunk_overlap_tokens=50)
@@ -0,0 +1,384 @@
+"""
+Tests for entity and fact resolution, combined extraction, contradiction
+detection and deferred entity summaries.
+
+Runs in process; pipeline tests use a temporary ryugraph database with stub
+LLM and embedding clients.
+Run with: PYTHONPATH=src:server python -m pytest tests/test_extraction.py
+"""
+import time
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("ryumem_server")
+
+from ryumem_server.core.changes import ChangeEvent
+from ryumem_server.core.models import EntityEdge, EntityNode
+from ryumem_server.ingestion.relation_extractor import RelationExtractor
+from ryumem_server.ingestion.summaries import SummaryScheduler
+from ryumem_server.ingestion.resolution_index import ResolutionIndex
+
+from tests.stubs import DIMENSIONS, StubEmbedder, StubLLM
+
+
+def entities_by_name(db, user_id):
+    rows = db.execute(
+        "MATCH (e:Entity {user_id: $user_id}) RETURN e.name AS name, e.mentions AS mentions",
+        {"user_id": user_id},
+    )
+    return {row["name"]: row["mentions"] for row in rows}
+
+
+def facts(db, user_id):
+    rows = db.execute(
+        "MATCH (s:Entity {user_id: $user_id})-[r:RELATES_TO]->(t:Entity) RETURN r.fact AS fact",
+        {"user_id": user_id},
+    )
+    return sorted(row["fact"] for row in rows)
+
+
+def change(op, document_uuid, user_id="alice", kind="entity"):
+    """Change event of a document."""
+    return ChangeEvent(
+        seq=1, op=op, kind=kind, uuid=document_uuid, user_id=user_id, data={}, created_at=datetime.utcnow()
+    )
+
+
+def axis(*weights):
+    """Unit vector with the given leading components."""
+    norm = sum(w * w for w in weights) ** 0.5
+    return [w / norm for w in weights] + [0.0] * (DIMENSIONS - len(weights))
+
+
+class ContradictingLLM(StubLLM):
+    """Records contradiction checks and reports the given contradictions."""
+
+    def __init__(self, contradictions=()):
+        super().__init__()
+        self.contradictions = list(contradictions)
+        self.checks = []
+
+    def detect_contradictions(self, new_facts, existing_facts):
+        self.calls["detect_contradictions"] += 1
+        self.checks.append((new_facts, existing_facts))
+        return self.contradictions
+
+
+class RecordingSummaries:
+    """Entity extractor stand-in recording each summary regeneration."""
+
+    def __init__(self):
+        self.rounds = []
+
+    def update_entity_summaries(self, contexts, max_workers=1):
+        self.rounds.append(dict(contexts))
+        return list(contexts)
+
+
+class CountingLoader:
+    """Resolution vectors of one user, counting the loads."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.loads = 0
+
+    def __call__(self, user_id):
+        self.loads += 1
+        return list(self.rows)
+
+
+class TestResolutionIndex:
+    """An episode's items are resolved with one matrix product, as if saved one at a time."""
+
+    def test_items_resolve_to_existing_and_earlier_items(self):
+        """Matches against stored vectors and against earlier items of the same call."""
+        index = ResolutionIndex("entity", CountingLoader([{"uuid": "kafka", "embedding": [1.0, 0.0, 0.0]}]))
+        resolutions = index.resolve("alice", [[0.9, 0.1, 0.0], [0.0, 1.0, 0.0], [0.0, 0.95, 0.05]], threshold=0.9)
+
+        assert resolutions[0].uuid == "kafka"
+        assert resolutions[1].is_new
+        assert resolutions[2].uuid == resolutions[1].uuid
+        assert [uuid for uuid, _ in resolutions[2].matches] == [resolutions[1].uuid]
+
+    def test_vectors_are_loaded_once_and_kept_in_sync(self):
+        """Resolved vectors are recorded; deletions remove rows; foreign writes force a reload."""
+        loader = CountingLoader([{"uuid": "kafka", "embedding": [1.0, 0.0]}])
+        index = ResolutionIndex("entity", loader)
+        new = index.resolve("alice", [[0.0, 1.0]], threshold=0.9)[0]
+        assert index.resolve("alice", [[0.0, 1.0]], threshold=0.9)[0].uuid == new.uuid
+        assert loader.loads == 1
+
+        # Resolution recorded the new document, so its upsert keeps the copy
+        index.on_change(change("upsert", new.uuid))
+        index.on_change(change("delete", "kafka"))
+        assert index.resolve("alice", [[1.0, 0.0]], threshold=0.9)[0].is_new
+        assert loader.loads == 1
+
+        index.on_change(change("upsert", "written-elsewhere"))
+        index.resolve("alice", [[1.0, 0.0]], threshold=0.9)
+        assert loader.loads == 2
+
+    def test_other_users_writes_keep_the_copy(self):
+        """Changes to another user's documents do not drop a user's vectors."""
+        loader = CountingLoader([{"uuid": "kafka", "embedding": [1.0, 0.0]}])
+        index = ResolutionIndex("entity", loader)
+        index.resolve("alice", [[1.0, 0.0]], threshold=0.9)
+        index.on_change(change("upsert", "bobs-entity", user_id="bob"))
+        index.on_change(change("upsert", "an-edge", kind="edge"))
+        index.resolve("alice", [[1.0, 0.0]], threshold=0.9)
+        assert loader.loads == 1
+
+    def test_pipeline_resolves_without_per_entity_scans(self, db, user_id, make_ingestion, monkeypatch):
+        """Entities of later episodes merge with earlier ones without a vector scan per entity."""
+        def scan(*args, **kwargs):
+            raise AssertionError("resolution scanned the database per entity")
+
+        monkeypatch.setattr(db, "search_similar_entities", scan)
+        ingestion = make_ingestion()
+        try:
+            ingestion.ingest(content="Alice met Bob.", user_id=user_id)
+            ingestion.ingest(content="Alice visited Carol.", user_id=user_id)
+        finally:
+            ingestion.close()
+
+        assert entities_by_name(db, user_id) == {"alice": 2, "bob": 1, "carol": 1}
+
+
+class TestCombinedExtraction:
+    """Entities and relationships of an episode come from one LLM call."""
+
+    CONTENT = "Alice met Bob in Paris. Bob works at Acme."
+
+    def test_combined_mode_makes_one_call(self, db, user_id, make_ingestion):
+        """Combined extraction sends the content once and stores the same graph as separate calls."""
+        llm = StubLLM()
+        ingestion = make_ingestion(llm)
+        try:
+            ingestion.ingest(content=self.CONTENT, user_id=user_id)
+        finally:
+            ingestion.close()
+
+        assert llm.calls["extract_graph"] == 1
+        assert llm.calls["extract_entities"] == llm.calls["extract_relationships"] == 0
+        assert set(entities_by_name(db, user_id)) == {"alice", "bob", "paris", "acme"}
+        assert facts(db, user_id) == ["Alice met Bob in Paris", "Alice met Bob in Paris", "Bob works at Acme"]
+
+    def test_separate_mode_matches_combined_graph(self, db, user_id, make_ingestion):
+        """The separate mode makes one call each and extracts the same graph."""
+        llm = StubLLM()
+        ingestion = make_ingestion(llm, extraction_mode="separate")
+        try:
+            ingestion.ingest(content=self.CONTENT, user_id=user_id)
+        finally:
+            ingestion.close()
+
+        assert llm.calls["extract_graph"] == 0
+        assert llm.calls["extract_entities"] == llm.calls["extract_relationships"] == 1
+        assert set(entities_by_name(db, user_id)) == {"alice", "bob", "paris", "acme"}
+        assert facts(db, user_id) == ["Alice met Bob in Paris", "Alice met Bob in Paris", "Bob works at Acme"]
+
+    def test_failed_combined_call_falls_back_to_separate_calls(self, db, user_id, make_ingestion):
+        """A failing combined call is retried as separate entity and relationship calls."""
+        llm = StubLLM(failures=1)
+        ingestion = make_ingestion(llm)
+        try:
+            ingestion.ingest(content=self.CONTENT, user_id=user_id)
+        finally:
+            ingestion.close()
+
+        assert llm.calls["extract_graph"] == 1
+        assert llm.calls["extract_entities"] == llm.calls["extract_relationships"] == 1
+        assert set(entities_by_name(db, user_id)) == {"alice", "bob", "paris", "acme"}
+        assert db.count_unextracted_episodes(user_id) == 0
+
+
+class TestContradictions:
+    """The new facts of an episode are checked with one LLM call against their most similar facts."""
+
+    @pytest.fixture
+    def alice(self, db):
+        entity = EntityNode(name="alice", user_id="alice")
+        db.save_entity(entity)
+        return entity
+
+    def save_fact(self, db, alice, relation, fact, embedding):
+        target = EntityNode(name=fact, user_id="alice")
+        db.save_entity(target)
+        edge = EntityEdge(
+            source_node_uuid=alice.uuid,
+            target_node_uuid=target.uuid,
+            name=relation,
+            fact=fact,
+            fact_embedding=embedding,
+        )
+        db.save_entity_edge(edge, alice.uuid, target.uuid)
+        return edge
+
+    def new_fact(self, alice, relation, fact, embedding):
+        return EntityEdge(
+            source_node_uuid=alice.uuid,
+            target_node_uuid="somewhere",
+            name=relation,
+            fact=fact,
+            fact_embedding=embedding,
+        )
+
+    def make_extractor(self, db, llm, **kwargs):
+        return RelationExtractor(db=db, llm_client=llm, embedding_client=StubEmbedder(DIMENSIONS), **kwargs)
+
+    def test_one_call_with_the_most_similar_candidates(self, db, alice):
+        """Each new fact brings only its most similar same-type facts into a single call."""
+        self.save_fact(db, alice, "LIVES_IN", "Alice lives in Berlin", axis(1, 0, 0, 0))
+        self.save_fact(db, alice, "LIVES_IN", "Alice lives in Paris", axis(0, 1, 0, 0))
+        self.save_fact(db, alice, "LIVES_IN", "Alice lives in Rome", axis(0, 0, 1, 0))
+        self.save_fact(db, alice, "WORKS_AT", "Alice works at Acme", axis(0, 0, 0, 1))
+        llm = ContradictingLLM()
+        extractor = self.make_extractor(db, llm, contradiction_candidates=1)
+
+        extractor.detect_contradictions(
+            [
+                self.new_fact(alice, "LIVES_IN", "Alice moved to Berlin", axis(0.9, 0.1, 0, 0)),
+                self.new_fact(alice, "WORKS_AT", "Alice works at Initech", axis(0, 0, 0, 1)),
+            ],
+            user_id="alice",
+        )
+
+        assert llm.checks == [
+            (
+                ["Alice moved to Berlin", "Alice works at Initech"],
+                ["Alice lives in Berlin", "Alice works at Acme"],
+            )
+        ]
+
+    def test_contradictions_outside_the_candidates_are_ignored(self, db, alice):
+        """A reported contradiction only counts against one of the new fact's own candidates."""
+        berlin = self.save_fact(db, alice, "LIVES_IN", "Alice lives in Berlin", axis(1, 0))
+        self.save_fact(db, alice, "WORKS_AT", "Alice works at Acme", axis(0, 1))
+        llm = ContradictingLLM([
+            {"new_fact_index": 0, "existing_fact_index": 0},
+            {"new_fact_index": 1, "existing_fact_index": 0},
+        ])
+        extractor = self.make_extractor(db, llm)
+
+        invalidated = extractor.detect_contradictions(
+            [
+                self.new_fact(alice, "LIVES_IN", "Alice moved to Rome", axis(1, 0)),
+                self.new_fact(alice, "WORKS_AT", "Alice works at Initech", axis(0, 1)),
+            ],
+            user_id="alice",
+        )
+
+        assert invalidated == [berlin.uuid]
+
+    def test_dissimilar_facts_are_not_checked(self, db, alice):
+        """Without a fact above the similarity threshold the LLM is not called."""
+        self.save_fact(db, alice, "LIVES_IN", "Alice lives in Berlin", axis(1, 0))
+        llm = ContradictingLLM()
+        extractor = self.make_extractor(db, llm, contradiction_similarity_threshold=0.5)
+
+        invalidated = extractor.detect_contradictions(
+            [self.new_fact(alice, "LIVES_IN", "Alice likes jazz", axis(0, 1))],
+            user_id="alice",
+        )
+
+        assert invalidated == []
+        assert llm.calls["detect_contradictions"] == 0
+
+    def test_earlier_episodes_are_candidates_of_later_ones(self, db, alice):
+        """Facts of an earlier episode of the same call can be contradicted by a later one."""
+        llm = ContradictingLLM([{"new_fact_index": 1, "existing_fact_index": 0}])
+        extractor = self.make_extractor(db, llm)
+        berlin = self.new_fact(alice, "LIVES_IN", "Alice lives in Berlin", axis(1, 0))
+
+        invalidated = extractor.detect_contradictions(
+            [berlin, self.new_fact(alice, "LIVES_IN", "Alice moved to Rome", axis(1, 0))],
+            user_id="alice",
+            groups=[0, 1],
+        )
+
+        assert invalidated == [berlin.uuid]
+        assert llm.checks[0][1] == ["Alice lives in Berlin"]
+
+
+class TestDeferredSummaries:
+    """Entity summaries are regenerated in the background, once per entity for coalesced contexts."""
+
+    def test_marks_are_coalesced_per_entity(self):
+        """Several marks of an entity lead to one regeneration with all their contexts."""
+        summaries = RecordingSummaries()
+        scheduler = SummaryScheduler(summaries, tick_seconds=3600)
+        try:
+            scheduler.mark("alice", ["kafka"], "Kafka is a log.")
+            scheduler.mark("alice", ["kafka", "flink"], "Flink reads Kafka.")
+            scheduler.mark("alice", ["kafka"], "Kafka is a log.")
+            assert summaries.rounds == []
+            assert scheduler.stats() == {"pending": 2, "regenerated": 0}
+
+            assert scheduler.flush() == 2
+        finally:
+            scheduler.close()
+
+        assert summaries.rounds == [
+            {"kafka": "Kafka is a log.\n\nFlink reads Kafka.", "flink": "Flink reads Kafka."}
+        ]
+        assert scheduler.stats() == {"pending": 0, "regenerated": 2}
+
+    def test_entity_is_regenerated_once_per_interval(self):
+        """Marks arriving within the interval wait for the next regeneration."""
+        summaries = RecordingSummaries()
+        scheduler = SummaryScheduler(summaries, tick_seconds=0.01, min_interval_seconds=3600)
+        try:
+            scheduler.mark("alice", ["kafka"], "first")
+            deadline = time.monotonic() + 10
+            while scheduler.stats()["regenerated"] < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert summaries.rounds == [{"kafka": "first"}]
+
+            scheduler.mark("alice", ["kafka"], "second")
+            scheduler.mark("alice", ["kafka"], "third")
+            time.sleep(0.1)
+            assert scheduler.stats()["pending"] == 1
+        finally:
+            scheduler.close()
+
+        assert summaries.rounds == [{"kafka": "first"}, {"kafka": "second\n\nthird"}]
+
+    def test_deleted_entities_and_users_are_forgotten(self):
+        """Marks of deleted entities and of deleted users are dropped."""
+        summaries = RecordingSummaries()
+        scheduler = SummaryScheduler(summaries, tick_seconds=3600)
+        scheduler.mark("alice", ["kafka", "flink"], "context")
+        scheduler.mark("bob", ["spark"], "context")
+
+        scheduler.on_change(change("delete", "kafka"))
+        scheduler.on_change(change("delete_user", None, user_id="bob", kind="user"))
+        scheduler.close()
+
+        assert summaries.rounds == [{"flink": "context"}]
+
+    def test_close_flushes_and_ignores_later_marks(self):
+        """close() regenerates what is pending; marks after it are ignored."""
+        summaries = RecordingSummaries()
+        scheduler = SummaryScheduler(summaries, tick_seconds=3600)
+        scheduler.mark("alice", ["kafka"], "context")
+        scheduler.close()
+        scheduler.mark("alice", ["flink"], "too late")
+
+        assert summaries.rounds == [{"kafka": "context"}]
+        assert scheduler.stats()["pending"] == 0
+
+    def test_pipeline_defers_summaries(self, user_id, make_ingestion):
+        """Ingestion returns before summaries are generated; an entity of two episodes is summarized once."""
+        llm = StubLLM()
+        ingestion = make_ingestion(llm, deferred_summaries=True, summary_tick_seconds=3600)
+        try:
+            ingestion.ingest(content="Alice met Bob.", user_id=user_id)
+            ingestion.ingest(content="Alice visited Carol.", user_id=user_id)
+            assert llm.calls["generate"] == 0
+
+            assert ingestion.summary_scheduler.flush() == 3
+        finally:
+            ingestion.close()
+
+        assert llm.calls["generate"] == 3
@@ -0,0 +1,179 @@
+"""
+Tests for the background extraction queue (retries, failures, recovery).
+
+Runs against a temporary ryugraph database with stub LLM and embedding
+clients, in process.
+Run with: PYTHONPATH=src:server python -m pytest tests/test_ingestion_queue.py
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("ryumem_server")
+
+from ryumem_server.ingestion.queue import IngestionQueue
+
+from tests.stubs import StubLLM
+
+CONTENT = "Alice moved to Berlin. Alice works with Bob."
+
+
+def wait_for(queue, job_id, timeout=30):
+    """Wait until a job is done or failed."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job.status in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def count_entities(db, user_id):
+    return db.execute("MATCH (e:Entity {user_id: $user_id}) RETURN count(e) AS n", {"user_id": user_id})[0]["n"]
+
+
+class TestIngestionQueue:
+    """Queued extractions are retried until they succeed or run out of attempts."""
+
+    def test_transient_llm_failure_is_retried(self, db, user_id, make_ingestion):
+        """A failed attempt is queued again and the retry extracts the episode."""
+        ingestion = make_ingestion(StubLLM(failures=2))
+        queue = IngestionQueue(db, ingestion, max_workers=1, max_attempts=3, retry_base_seconds=0.01)
+        try:
+            episode_uuid, _ = ingestion.create_episode(content=CONTENT, user_id=user_id)
+            job = wait_for(queue, queue.submit(episode_uuid, user_id).id)
+        finally:
+            queue.close()
+            ingestion.close()
+
+        assert job.status == "done"
+        assert job.attempts == 2
+        assert db.count_unextracted_episodes(user_id) == 0
+        assert count_entities(db, user_id) > 0
+
+    def test_llm_outage_fails_job_and_keeps_episode_unextracted(self, db, user_id, make_ingestion):
+        """After max_attempts the job fails and the episode can still be backfilled."""
+        ingestion = make_ingestion(StubLLM(failures=-1))
+        queue = IngestionQueue(db, ingestion, max_workers=1, max_attempts=2, retry_base_seconds=0.01)
+        try:
+            episode_uuid, _ = ingestion.create_episode(content=CONTENT, user_id=user_id)
+            job = wait_for(queue, queue.submit(episode_uuid, user_id).id)
+        finally:
+            queue.close()
+            ingestion.close()
+
+        assert job.status == "failed"
+        assert job.attempts == 2
+        assert "LLM unavailable" in job.error
+        assert db.count_unextracted_episodes(user_id) == 1
+        assert count_entities(db, user_id) == 0
+
+    def test_recover_requeues_interrupted_jobs(self, db, user_id, make_ingestion):
+        """Jobs left queued or running by a stopped process run after recover()."""
+        ingestion = make_ingestion(StubLLM())
+        stopped = IngestionQueue(db, ingestion, max_workers=1)
+        stopped.close()
+        queued_uuid, _ = ingestion.create_episode(content=CONTENT, user_id=user_id)
+        running_uuid, _ = ingestion.create_episode(content="Carol visited Paris.", user_id=user_id)
+        queued = stopped.submit(queued_uuid, user_id)
+        running = stopped.submit(running_uuid, user_id)
+        db.execute("MATCH (j:IngestionJob {id: $id}) SET j.status = 'running', j.attempts = 1", {"id": running.id})
+
+        queue = IngestionQueue(db, ingestion, max_workers=1, max_attempts=3, retry_base_seconds=0.01)
+        try:
+            assert queue.recover() == 2
+            jobs = [wait_for(queue, queued.id), wait_for(queue, running.id)]
+        finally:
+            queue.close()
+            ingestion.close()
+
+        assert [job.status for job in jobs] == ["done", "done"]
+        assert [job.attempts for job in jobs] == [1, 2]
+        assert db.count_unextracted_episodes(user_id) == 0
+
+
+class TestRetryBackoff:
+    """Failed attempts wait an exponentially growing delay before they run again."""
+
+    def test_retries_wait_for_the_backoff(self, db, user_id, make_ingestion):
+        """Each retry waits twice as long as the previous one."""
+        # Two failed attempts: the combined call and its fallback fail in each
+        ingestion = make_ingestion(StubLLM(failures=4))
+        queue = IngestionQueue(db, ingestion, max_workers=1, max_attempts=3, retry_base_seconds=0.2)
+        try:
+            episode_uuid, _ = ingestion.create_episode(content=CONTENT, user_id=user_id)
+            started = time.monotonic()
+            job = wait_for(queue, queue.submit(episode_uuid, user_id).id)
+            elapsed = time.monotonic() - started
+        finally:
+            queue.close()
+            ingestion.close()
+
+        assert job.status == "done"
+        assert job.attempts == 3
+        assert elapsed >= 0.6
+
+    def test_close_keeps_a_waiting_retry_queued(self, db, user_id, make_ingestion):
+        """close() cancels a pending retry; the job stays queued for recover()."""
+        ingestion = make_ingestion(StubLLM(failures=-1))
+        queue = IngestionQueue(db, ingestion, max_workers=1, max_attempts=3, retry_base_seconds=60)
+        try:
+            episode_uuid, _ = ingestion.create_episode(content=CONTENT, user_id=user_id)
+            job_id = queue.submit(episode_uuid, user_id).id
+            deadline = time.monotonic() + 10
+            while queue.get(job_id).attempts < 1 or queue.get(job_id).status != "queued":
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+            started = time.monotonic()
+            queue.close()
+            assert time.monotonic() - started < 5
+            job = queue.get(job_id)
+        finally:
+            queue.close()
+            ingestion.close()
+
+        assert job.status == "queued"
+        assert job.attempts == 1
+        assert "LLM unavailable" in job.error
+
+
+class TestJobRetention:
+    """Finished jobs are deleted once they are older than the retention period."""
+
+    def test_prune_deletes_only_expired_finished_jobs(self, db, user_id, make_ingestion):
+        """Old done and failed jobs go; recent and unfinished jobs stay."""
+        ingestion = make_ingestion(StubLLM())
+        stopped = IngestionQueue(db, ingestion, max_workers=1, job_retention_hours=24)
+        stopped.close()
+        jobs = {status: stopped.submit(f"episode-{status}", user_id).id for status in ("done", "failed", "queued")}
+        recent = stopped.submit("episode-recent", user_id).id
+        old = datetime.now(timezone.utc) - timedelta(hours=48)
+        for status in ("done", "failed"):
+            stopped._update(jobs[status], status=status, finished_at=old)
+        stopped._finish(recent, "done")
+        try:
+            assert stopped.prune() == 2
+        finally:
+            ingestion.close()
+
+        assert stopped.get(jobs["done"]) is None
+        assert stopped.get(jobs["failed"]) is None
+        assert stopped.get(jobs["queued"]).status == "queued"
+        assert stopped.get(recent).status == "done"
+
+
+class TestSynchronousExtractionFailure:
+    """A failed synchronous extraction keeps the saved episode unextracted."""
+
+    def test_ingest_returns_saved_episode_on_llm_failure(self, db, user_id, make_ingestion):
+        """ingest() returns the episode and leaves it for the backfill."""
+        ingestion = make_ingestion(StubLLM(failures=-1))
+        try:
+            episode_uuid = ingestion.ingest(content=CONTENT, user_id=user_id)
+        finally:
+            ingestion.close()
+
+        assert db.get_episode_by_uuid(episode_uuid) is not None
+        assert db.count_unextracted_episodes(user_id) == 1
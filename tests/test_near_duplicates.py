@@ -0,0 +1,207 @@
+"""
+Tests for the in-memory near-duplicate index (deduplication without embeddings).
+
+Index tests run in memory; pipeline tests use a temporary ryugraph database
+with stub LLM and embedding clients.
+Run with: PYTHONPATH=src:server python -m pytest tests/test_near_duplicates.py
+"""
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("ryumem_server")
+
+from ryumem.core.config import EpisodeConfig
+from ryumem_server.core.changes import ChangeEvent
+from ryumem_server.core.graph_db import RyugraphDB
+from ryumem_server.ingestion.near_duplicates import NearDuplicateIndex
+
+from tests.stubs import DIMENSIONS
+
+CONTENT = (
+    "The quarterly planning meeting moved to Thursday afternoon because the design review "
+    "ran long and half of the platform team was travelling to the Berlin office this week"
+)
+# One word of CONTENT changed: most word shingles are shared
+EDITED = CONTENT.replace("Thursday", "Friday")
+UNRELATED = "Alice adopted a cat named Pixel and bought a scratching post for the living room"
+
+
+def row(content, user_id="alice", hours_ago=0.0, episode_uuid=None):
+    """Episode row as returned by RyugraphDB.get_recent_episode_hashes."""
+    return {
+        "uuid": episode_uuid or str(uuid.uuid4()),
+        "user_id": user_id,
+        "content": content,
+        "content_hash": None,
+        "created_at": datetime.utcnow() - timedelta(hours=hours_ago),
+    }
+
+
+class Loader:
+    """Recent episodes of every user, counting the loads."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.loads = 0
+
+    def __call__(self, since):
+        self.loads += 1
+        return list(self.rows)
+
+
+def upsert(row_data):
+    """Change event of a saved episode."""
+    return ChangeEvent(
+        seq=1,
+        op="upsert",
+        kind="episode",
+        uuid=row_data["uuid"],
+        user_id=row_data["user_id"],
+        data={"content": row_data["content"], "created_at": row_data["created_at"].isoformat()},
+        created_at=datetime.utcnow(),
+    )
+
+
+def event(op, kind, episode_uuid=None, user_id="alice"):
+    return ChangeEvent(
+        seq=1, op=op, kind=kind, uuid=episode_uuid, user_id=user_id, data={}, created_at=datetime.utcnow()
+    )
+
+
+class TestNearDuplicateIndex:
+    """Lookups only visit the user's recent buckets and verify candidates by similarity."""
+
+    def test_exact_match_of_the_user_within_the_window(self):
+        """Exact duplicates are found for their owner, within the lookup window only."""
+        recent = row(CONTENT)
+        index = NearDuplicateIndex(Loader([recent, row(UNRELATED, hours_ago=30)]))
+
+        match = index.find(CONTENT, "alice", time_window_hours=24, threshold=0.8)
+        assert match["uuid"] == recent["uuid"]
+        assert match["similarity"] == 1.0
+        assert index.find(CONTENT, "bob", time_window_hours=24, threshold=0.8) is None
+        assert index.find(UNRELATED, "alice", time_window_hours=24, threshold=0.8) is None
+        assert index.find(UNRELATED, "alice", time_window_hours=36, threshold=0.8) is not None
+
+    def test_near_duplicates_are_verified_by_similarity(self):
+        """An edited episode matches its original; unrelated content does not."""
+        original = row(CONTENT)
+        index = NearDuplicateIndex(Loader([original, row(UNRELATED)]))
+
+        match = index.find(EDITED, "alice", time_window_hours=24, threshold=0.5)
+        assert match["uuid"] == original["uuid"]
+        assert 0.5 <= match["similarity"] < 1.0
+        assert index.find(EDITED, "alice", time_window_hours=24, threshold=1.0) is None
+        assert index.find("Bob repaired the bike", "alice", time_window_hours=24, threshold=0.5) is None
+
+    def test_windows_beyond_the_retention_fall_back(self):
+        """The index only covers windows within its retention period."""
+        index = NearDuplicateIndex(Loader(), retention_hours=48)
+        assert index.covers(24)
+        assert not index.covers(72)
+
+    def test_change_feed_keeps_the_index_in_sync(self):
+        """Upserts are added and deletes removed without reloading; graph-wide changes reload."""
+        loader = Loader()
+        index = NearDuplicateIndex(loader)
+        assert index.find(CONTENT, "alice", time_window_hours=24, threshold=0.8) is None
+
+        saved = row(CONTENT)
+        index.on_change(upsert(saved))
+        assert index.find(CONTENT, "alice", time_window_hours=24, threshold=0.8)["uuid"] == saved["uuid"]
+
+        index.on_change(event("delete", "episode", saved["uuid"]))
+        assert index.find(CONTENT, "alice", time_window_hours=24, threshold=0.8) is None
+
+        index.on_change(upsert(row(CONTENT, user_id="bob")))
+        index.on_change(event("delete_user", "user", user_id="bob"))
+        assert index.stats()["episodes"] == 0
+        assert loader.loads == 1
+
+        loader.rows = [row(UNRELATED)]
+        index.on_change(event("resync", "graph"))
+        assert index.find(UNRELATED, "alice", time_window_hours=24, threshold=0.8) is not None
+        assert loader.loads == 2
+
+    def test_episodes_added_before_the_load_come_from_the_load(self):
+        """Adds before first use are skipped; the load picks the episode up."""
+        saved = row(CONTENT)
+        loader = Loader([saved])
+        index = NearDuplicateIndex(loader)
+        index.on_change(upsert(saved))
+        assert index.stats() == {"episodes": 0, "buckets": 0, "loaded": False}
+
+        assert index.find(CONTENT, "alice", time_window_hours=24, threshold=0.8)["uuid"] == saved["uuid"]
+        assert index.stats()["episodes"] == 1
+
+
+@pytest.fixture
+def ingestion(db, make_ingestion, monkeypatch):
+    """Ingestion without embeddings; BM25 duplicate queries fail the test."""
+    def bm25_lookup(*args, **kwargs):
+        raise AssertionError("duplicate detection queried BM25")
+
+    monkeypatch.setattr(db, "find_similar_episode_bm25", bm25_lookup)
+    pipeline = make_ingestion(
+        enable_entity_extraction=False,
+        episode_config=EpisodeConfig(
+            enable_embeddings=False,
+            deduplication_enabled=True,
+            near_duplicate_threshold=0.5,
+        ),
+    )
+    yield pipeline
+    pipeline.close()
+
+
+class TestIndexedDeduplication:
+    """Without embeddings, ingestion finds duplicates in the index instead of BM25 queries."""
+
+    def test_ingest_detects_exact_and_near_duplicates(self, ingestion):
+        """Exact and edited copies resolve to the original episode, per user."""
+        original = ingestion.ingest(content=CONTENT, user_id="alice")
+
+        assert ingestion.ingest(content=CONTENT, user_id="alice") == original
+        assert ingestion.ingest(content=EDITED, user_id="alice") == original
+        assert ingestion.ingest(content=CONTENT, user_id="bob") != original
+
+    def test_batch_detects_duplicates_within_and_across_batches(self, ingestion):
+        """Duplicates of stored episodes and of earlier batch items are reported as duplicates."""
+        existing = ingestion.ingest(content=CONTENT, user_id="alice")
+
+        results = ingestion.ingest_batch(
+            [{"content": EDITED}, {"content": UNRELATED}, {"content": UNRELATED}],
+            "alice",
+        )
+
+        assert [result["status"] for result in results] == ["duplicate", "created", "duplicate"]
+        assert results[0]["episode_id"] == existing
+        assert results[2]["episode_id"] == results[1]["episode_id"]
+
+
+class TestContentHashColumn:
+    """Databases created before content hashes are hashed once, when the column is added."""
+
+    def test_existing_episodes_are_hashed_only_when_the_column_is_added(self, tmp_path):
+        """Opening an old database hashes its episodes; later opens leave them alone."""
+        path = str(tmp_path / "hashes.db")
+        database = RyugraphDB(path, embedding_dimensions=DIMENSIONS)
+        database.execute("ALTER TABLE Episode DROP content_hash")
+        database.execute("CREATE (:Episode {uuid: 'old', content: $content})", {"content": CONTENT})
+        database.close()
+
+        database = RyugraphDB(path, embedding_dimensions=DIMENSIONS)
+        rows = database.execute("MATCH (e:Episode {uuid: 'old'}) RETURN e.content_hash AS hash")
+        assert rows[0]["hash"] is not None
+        database.execute("MATCH (e:Episode {uuid: 'old'}) SET e.content_hash = NULL")
+        database.close()
+
+        # The column exists now: reopening does not scan the episodes again
+        database = RyugraphDB(path, embedding_dimensions=DIMENSIONS)
+        try:
+            rows = database.execute("MATCH (e:Episode {uuid: 'old'}) RETURN e.content_hash AS hash")
+        finally:
+            database.close()
+        assert rows[0]["hash"] is None
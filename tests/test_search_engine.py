@@ -0,0 +1,550 @@
+"""
+Tests for the search engine (keyword backends, hybrid execution, caching,
+batching, streaming and profiling).
+
+Runs against a temporary ryugraph database populated through the ingestion
+pipeline with stub LLM and embedding clients, in process.
+Run with: PYTHONPATH=src:server python -m pytest tests/test_search_engine.py
+"""
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+pytest.importorskip("ryumem_server")
+
+from ryumem.core.config import EpisodeConfig
+from ryumem_server.core.graph_db import RyugraphDB
+from ryumem_server.core.models import EpisodeKind, EpisodeNode, EpisodeType, SearchConfig
+from ryumem_server.ingestion.episode import EpisodeIngestion
+from ryumem_server.retrieval.bm25 import BM25Index
+from ryumem_server.retrieval.db_keyword import DBKeywordIndex
+from ryumem_server.retrieval.fts import FTSKeywordIndex
+from ryumem_server.retrieval.planner import StrategyPlanner
+from ryumem_server.retrieval.recency import RecencyScorer, epoch_ms_array
+from ryumem_server.retrieval.records import EdgeRecord, EntityRecord, EpisodeRecord, SearchHits
+from ryumem_server.retrieval.result_cache import SearchResultCache
+from ryumem_server.retrieval.search import SearchEngine
+
+from tests.stubs import StubEmbedder, StubLLM
+
+DIMENSIONS = 64
+USER_ID = "search_user"
+EPISODES = [
+    ("Alice works at Acme in Berlin.", ["work"]),
+    ("Bob manages Kafka clusters at Acme.", ["work", "infra"]),
+    ("Carol visited Paris with Dave.", ["travel"]),
+    ("Erin studies Redis caching.", None),
+]
+
+
+@pytest.fixture(scope="module")
+def graph(tmp_path_factory):
+    """Database and BM25 index populated with the test episodes, shared by the module."""
+    db = RyugraphDB(str(tmp_path_factory.mktemp("search") / "search.db"), embedding_dimensions=DIMENSIONS)
+    index = BM25Index()
+    db.changes.subscribe(index.apply_change)
+    ingestion = EpisodeIngestion(
+        db=db,
+        llm_client=StubLLM(),
+        embedding_client=StubEmbedder(DIMENSIONS),
+        enable_entity_extraction=True,
+        episode_config=EpisodeConfig(deduplication_enabled=False),
+        deferred_summaries=False,
+        bm25_index=index,
+    )
+    try:
+        for content, tags in EPISODES:
+            ingestion.ingest(content=content, user_id=USER_ID, metadata={"tags": tags} if tags else None)
+    finally:
+        ingestion.close()
+    yield db, index
+    db.close()
+
+
+@pytest.fixture
+def make_engine(graph):
+    """Factory of search engines over the shared graph, closed after the test."""
+    db, index = graph
+    engines = []
+
+    def make(embedder=None, bm25_index=None, **kwargs):
+        engine = SearchEngine(db, embedder or StubEmbedder(DIMENSIONS), bm25_index=bm25_index or index, **kwargs)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.close()
+
+
+def search_config(query, **kwargs):
+    """Search configuration for the test user with a permissive similarity threshold."""
+    kwargs.setdefault("user_id", USER_ID)
+    kwargs.setdefault("similarity_threshold", 0.3)
+    return SearchConfig(query=query, **kwargs)
+
+
+def contents(result):
+    return [episode.content for episode in result.episodes]
+
+
+def episode_contents(db, results):
+    """Contents of the episodes of (uuid, score) keyword results."""
+    episodes = db.get_episodes_by_uuids([uuid for uuid, _ in results])
+    return [episode["content"] for episode in episodes.values()]
+
+
+class TestKeywordBackends:
+    """Keyword search backends share the BM25Index search interface."""
+
+    def test_database_keyword_search_matches_bm25_results(self, graph, make_engine):
+        """The database fallback finds the same episodes as the BM25 index."""
+        db, _ = graph
+        config = search_config("kafka acme", strategy="bm25")
+        bm25 = make_engine().search(config)
+        fallback = make_engine(bm25_index=DBKeywordIndex(db)).search(config)
+
+        assert "Bob manages Kafka clusters at Acme." in contents(bm25)
+        assert set(contents(fallback)) >= set(contents(bm25))
+
+    def test_database_keyword_search_filters_tags_without_query(self, graph):
+        """Tag-only searches are filtered in the database."""
+        db, _ = graph
+        results = DBKeywordIndex(db).search_episodes("", tags=["infra"], user_id=USER_ID)
+        assert episode_contents(db, results) == ["Bob manages Kafka clusters at Acme."]
+
+    def test_fts_backend_searches_episodes_and_entities(self, graph):
+        """The FTS indexes return the matching episode and entity (skipped without the extension)."""
+        db, _ = graph
+        index = FTSKeywordIndex(db)
+        try:
+            index.ensure_indexes()
+        except RuntimeError as e:
+            pytest.skip(str(e))
+
+        results = index.search_episodes("kafka", user_id=USER_ID)
+        assert episode_contents(db, results) == ["Bob manages Kafka clusters at Acme."]
+        entities = db.get_entities_by_uuids([uuid for uuid, _ in index.search_entities("kafka", user_id=USER_ID)])
+        assert "kafka" in {entity["name"].lower() for entity in entities.values()}
+
+
+def ranked_uuids(result):
+    """Entity, edge and episode UUIDs of a result, in result order."""
+    return (
+        [entity.uuid for entity in result.entities],
+        [edge.uuid for edge in result.edges],
+        [episode.uuid for episode in result.episodes],
+    )
+
+
+@contextmanager
+def stalled_strategy(engine, name):
+    """
+    Hold a strategy of an engine until the block exits, then wait for it to
+    finish (abandoned strategies keep running on the pool).
+    """
+    release = threading.Event()
+    finished = threading.Event()
+    search = getattr(engine, f"_{name}_search")
+
+    def stalled(*args):
+        try:
+            release.wait(10)
+            return search(*args)
+        finally:
+            finished.set()
+
+    setattr(engine, f"_{name}_search", stalled)
+    try:
+        yield
+    finally:
+        release.set()
+        finished.wait(10)
+
+
+class TestHybridExecution:
+    """Hybrid strategies run concurrently within their time budgets."""
+
+    def test_parallel_and_sequential_hybrid_fuse_the_same_results(self, make_engine):
+        """Running the strategies concurrently does not change the fused ranking."""
+        config = search_config("Acme Kafka")
+        parallel = make_engine(parallel_hybrid=True).search(config)
+        sequential = make_engine(parallel_hybrid=False).search(config)
+
+        assert ranked_uuids(parallel) == ranked_uuids(sequential)
+        assert parallel.metadata["skipped_strategies"] == []
+        assert set(parallel.metadata["strategy_ms"]) == {"semantic", "bm25", "traversal"}
+
+    def test_strategy_over_budget_is_left_out(self, make_engine):
+        """A strategy exceeding its budget is skipped; the search returns the others."""
+        engine = make_engine(strategy_budgets={"traversal": 0.05})
+        started = time.perf_counter()
+        with stalled_strategy(engine, "traversal"):
+            result = engine.search(search_config("Acme Kafka"))
+
+        assert time.perf_counter() - started < 5
+        assert result.metadata["skipped_strategies"] == ["traversal"]
+        assert "Bob manages Kafka clusters at Acme." in contents(result)
+
+    def test_failed_strategy_is_left_out(self, make_engine):
+        """A failing strategy is skipped; only a failure of every strategy is raised."""
+        engine = make_engine()
+
+        def failing(*args):
+            raise RuntimeError("strategy failed")
+
+        engine._semantic_search = failing
+        result = engine.search(search_config("Acme Kafka"))
+        assert result.metadata["skipped_strategies"] == ["semantic"]
+        assert contents(result)
+
+        engine._bm25_search = failing
+        engine._traversal_search = failing
+        with pytest.raises(RuntimeError, match="strategy failed"):
+            engine.search(search_config("Acme Kafka"))
+
+
+def stage_queries(result, name):
+    """Database queries a profiled search issued in a stage."""
+    return result.metadata["profile"]["stages"][name]["db_queries"]
+
+
+class TestBatchedHydration:
+    """Results are loaded with one query per kind, however many there are."""
+
+    @pytest.mark.parametrize("query", ["kafka", "Acme Kafka Paris Redis"])
+    def test_bm25_hydration_is_one_query_per_kind(self, make_engine, query):
+        """Entities, edges and episodes are each fetched with at most one multi-get."""
+        result = make_engine().search(search_config(query, strategy="bm25", profile=True))
+        assert result.episodes
+        assert stage_queries(result, "hydrate") <= 3
+
+    def test_semantic_hydration_is_one_query(self, make_engine):
+        """Entities mentioned by every matched episode are fetched together."""
+        result = make_engine().search(search_config("Acme Kafka Paris", strategy="semantic", profile=True))
+        assert len(result.episodes) > 1
+        assert stage_queries(result, "hydrate") == 1
+
+
+class TestTraversal:
+    """Graph traversal expands one BFS layer per query within its budgets."""
+
+    def test_one_query_per_layer(self, make_engine):
+        """Each depth level is expanded with a single database query."""
+        result = make_engine().search(search_config("Acme Kafka", strategy="traversal", profile=True))
+        traverse = result.metadata["profile"]["stages"]["traverse"]
+
+        assert result.edges
+        assert traverse["calls"] == result.metadata["final_depth"]
+        assert traverse["db_queries"] == traverse["calls"]
+
+    def test_node_budget_caps_visited_entities(self, make_engine):
+        """No more entities than traversal_max_nodes are visited."""
+        unbounded = make_engine().search(search_config("Acme Kafka", strategy="traversal"))
+        bounded = make_engine(traversal_max_nodes=2).search(search_config("Acme Kafka", strategy="traversal"))
+
+        assert len(unbounded.entities) > 2
+        assert len(bounded.entities) == 2
+
+    def test_edge_budget_caps_expanded_edges(self, make_engine):
+        """No more edges than traversal_max_edges are expanded."""
+        result = make_engine(traversal_max_edges=1).search(search_config("Acme Kafka", strategy="traversal"))
+        assert len(result.edges) == 1
+
+
+@contextmanager
+def scratch_episode(db, content, user_id=USER_ID, created_at=None):
+    """Save an embedded episode for the duration of a block, then delete it."""
+    created_at = created_at or datetime.utcnow()
+    episode = EpisodeNode(
+        name=content,
+        content=content,
+        content_embedding=StubEmbedder(DIMENSIONS).embed(content),
+        source=EpisodeType.text,
+        user_id=user_id,
+        created_at=created_at,
+        valid_at=created_at,
+    )
+    db.save_episode(episode)
+    try:
+        yield episode
+    finally:
+        db.delete_episode(episode.uuid)
+
+
+@pytest.fixture
+def result_cache(graph):
+    """Result cache fed by the database change feed."""
+    db, _ = graph
+    cache = SearchResultCache(max_entries=16, ttl_seconds=0)
+    db.changes.subscribe(cache.on_change)
+    yield cache
+    db.changes.unsubscribe(cache.on_change)
+
+
+class TestResultCache:
+    """Cached results are served until the user's data changes."""
+
+    def test_repeated_search_is_served_from_cache(self, make_engine, result_cache):
+        """Searches differing only in case and whitespace share a cached result."""
+        embedder = StubEmbedder(DIMENSIONS)
+        engine = make_engine(embedder, result_cache=result_cache)
+        first = engine.search(search_config("Acme  Kafka"))
+        second = engine.search(search_config("acme kafka", profile=True))
+
+        assert ranked_uuids(second) == ranked_uuids(first)
+        assert embedder.calls["embed"] == 1
+        assert result_cache.stats()["hits"] == 1
+        assert second.metadata["profile"]["cache"]["search_results"] == {"hits": 1, "misses": 0}
+
+    def test_write_invalidates_only_the_written_user(self, graph, make_engine, result_cache):
+        """A write through the change feed drops the writer's cached results, not other users'."""
+        db, _ = graph
+        engine = make_engine(result_cache=result_cache)
+        config = search_config("zephyr", strategy="bm25")
+        assert contents(engine.search(config)) == []
+
+        with scratch_episode(db, "Zephyr notes", user_id="other_user"):
+            assert contents(engine.search(config)) == []
+            assert result_cache.stats()["hits"] == 1
+
+        with scratch_episode(db, "Zephyr notes"):
+            assert contents(engine.search(config)) == ["Zephyr notes"]
+        assert contents(engine.search(config)) == []
+
+
+class TestBatchSearch:
+    """Batched searches share one embedding call and match individual searches."""
+
+    QUERIES = ["Acme Kafka", "Paris Dave", "Redis caching"]
+
+    @pytest.mark.parametrize("strategy", ["semantic", "traversal", "hybrid"])
+    def test_batch_matches_individual_searches(self, make_engine, strategy):
+        """Every batched result equals the result of the same search run alone."""
+        configs = [search_config(query, strategy=strategy) for query in self.QUERIES]
+        embedder = StubEmbedder(DIMENSIONS)
+        batched = make_engine(embedder).search_batch(configs)
+        individual = [make_engine().search(config) for config in configs]
+
+        assert [ranked_uuids(result) for result in batched] == [ranked_uuids(result) for result in individual]
+        assert embedder.calls == {"embed_batch": 1}
+
+    def test_fused_batch_ranks_items_found_by_several_queries_first(self, make_engine):
+        """fuse_results merges batched results with reciprocal rank fusion."""
+        engine = make_engine()
+        results = engine.search_batch([search_config(query, strategy="bm25") for query in ("Acme", "Kafka")])
+        fused = engine.fuse_results(results, limit=10)
+
+        assert contents(fused)[0] == "Bob manages Kafka clusters at Acme."
+        assert set(contents(fused)) == set(contents(results[0])) | set(contents(results[1]))
+
+
+class TestRecencyPushdown:
+    """Temporal decay and the update boost are applied before the limit cut."""
+
+    NOW = datetime(2025, 6, 30, 12, 0)
+    TIMESTAMPS = [NOW, NOW - timedelta(days=3), NOW - timedelta(days=30), None]
+
+    def scorer(self):
+        return RecencyScorer(decay_factor=0.9, boost_factor=1.5, recent_threshold_days=7, reference_time=self.NOW)
+
+    def test_vectorized_and_cypher_multipliers_match_python(self, graph):
+        """The numpy and Cypher forms compute the same multipliers as multiplier()."""
+        db, _ = graph
+        scorer = self.scorer()
+        expected = [scorer.multiplier(created_at) for created_at in self.TIMESTAMPS]
+
+        assert scorer.multipliers(epoch_ms_array(self.TIMESTAMPS)) == pytest.approx(expected)
+        for created_at, multiplier in zip(self.TIMESTAMPS, expected):
+            rows = db.execute(
+                f"RETURN {scorer.cypher('$created_at')} AS multiplier",
+                {**scorer.params(), "created_at": created_at},
+            )
+            assert rows[0]["multiplier"] == pytest.approx(multiplier)
+
+    def test_missing_timestamps_are_not_weighted(self):
+        """Items without timestamps keep their score."""
+        assert self.scorer().multiplier(None) == 1.0
+        assert np.all(self.scorer().multipliers(epoch_ms_array([None, None])) == 1.0)
+
+    def test_recent_episode_outranks_older_better_match_within_limit(self, graph, make_engine):
+        """With decay, a recent weaker match makes the top 1 instead of an old exact match."""
+        db, _ = graph
+        engine = make_engine()
+        with scratch_episode(db, "Quokka habitat", created_at=datetime.utcnow() - timedelta(days=90)):
+            with scratch_episode(db, "Quokka habitat notes"):
+                decayed = engine.search(search_config("Quokka habitat", strategy="semantic", limit=1))
+                undecayed = engine.search(search_config(
+                    "Quokka habitat", strategy="semantic", limit=1,
+                    apply_temporal_decay=False, apply_update_boost=False,
+                ))
+
+        assert contents(decayed) == ["Quokka habitat notes"]
+        assert contents(undecayed) == ["Quokka habitat"]
+
+
+class TestProfiling:
+    """Searches record per-stage timings; profiles are returned on request."""
+
+    def test_profile_is_returned_only_when_requested(self, make_engine):
+        """metadata["profile"] holds stage timings and query counts with profile=True."""
+        engine = make_engine()
+        assert "profile" not in engine.search(search_config("Acme Kafka")).metadata
+
+        profile = engine.search(search_config("Acme Kafka", profile=True)).metadata["profile"]
+        assert {"embed", "keyword_scan", "vector_scan", "hydrate", "traverse", "fuse"} <= set(profile["stages"])
+        assert profile["db_queries"] == sum(entry["db_queries"] for entry in profile["stages"].values())
+        assert profile["total_ms"] > 0
+
+    def test_parallel_strategies_record_into_the_search_profile(self, make_engine):
+        """Stages run on the strategy pool are attributed to the search that started them."""
+        parallel = make_engine(parallel_hybrid=True).search(search_config("Acme Kafka", profile=True))
+        sequential = make_engine(parallel_hybrid=False).search(search_config("Acme Kafka", profile=True))
+        assert parallel.metadata["profile"]["db_queries"] == sequential.metadata["profile"]["db_queries"]
+
+    def test_every_search_is_recorded_in_the_histograms(self, make_engine):
+        """Total and stage latencies are aggregated per entry point."""
+        engine = make_engine()
+        engine.search(search_config("Acme Kafka"))
+        engine.search(search_config("Acme Kafka", strategy="bm25"))
+        engine.search_batch([search_config("Acme Kafka")])
+
+        snapshot = engine.metrics.snapshot()
+        assert snapshot["search.total"]["count"] == 2
+        assert snapshot["search.keyword_scan"]["count"] == 2
+        assert snapshot["search_batch.total"]["count"] == 1
+
+
+class TestStreaming:
+    """Streamed searches yield each strategy's result, then the fused one."""
+
+    def test_hybrid_stream_ends_with_the_search_result(self, make_engine):
+        """Every strategy is yielded once, and "final" equals the non-streamed result."""
+        engine = make_engine()
+        config = search_config("Acme Kafka")
+        events = list(engine.search_stream(config))
+
+        names = [name for name, _ in events]
+        assert sorted(names[:-1]) == ["bm25", "semantic", "traversal"]
+        assert names[-1] == "final"
+        assert ranked_uuids(events[-1][1]) == ranked_uuids(engine.search(config))
+        assert dict(events)["bm25"].metadata["strategy"] == "bm25"
+
+    def test_non_hybrid_stream_yields_only_the_final_result(self, make_engine):
+        """Single-strategy searches have nothing to stream but the result."""
+        events = list(make_engine().search_stream(search_config("Acme Kafka", strategy="bm25")))
+        assert [name for name, _ in events] == ["final"]
+
+    def test_strategy_over_budget_is_not_streamed(self, make_engine):
+        """A strategy left out of the fusion is reported in the final result only."""
+        engine = make_engine(strategy_budgets={"traversal": 0.05})
+        with stalled_strategy(engine, "traversal"):
+            events = list(engine.search_stream(search_config("Acme Kafka")))
+
+        assert "traversal" not in [name for name, _ in events]
+        assert events[-1][1].metadata["skipped_strategies"] == ["traversal"]
+
+
+class TestPlanner:
+    """The planner skips strategies a user's data cannot answer."""
+
+    def test_user_without_documents_is_not_embedded(self, graph, make_engine):
+        """Only BM25 runs for a user with no documents."""
+        db, _ = graph
+        embedder = StubEmbedder(DIMENSIONS)
+        engine = make_engine(embedder, planner=StrategyPlanner(db))
+        result = engine.search(search_config("Acme Kafka", user_id="nobody"))
+
+        assert result.metadata["plan"]["run"] == ["bm25"]
+        assert set(result.metadata["plan"]["skipped"]) == {"semantic", "traversal"}
+        assert not embedder.calls
+
+    @pytest.mark.parametrize("confidence,traversal_ran", [(0.5, False), (10.0, True)])
+    def test_short_query_defers_traversal(self, graph, make_engine, confidence, traversal_ran):
+        """Traversal runs after semantic search, only if its best score is below the confidence."""
+        db, _ = graph
+        engine = make_engine(planner=StrategyPlanner(db, confidence_score=confidence))
+        plan = engine.search(search_config("Kafka")).metadata["plan"]
+
+        assert plan["deferred"] == []
+        assert ("traversal" in plan["run"]) is traversal_ran
+        assert ("traversal" in plan["skipped"]) is not traversal_ran
+
+    def test_counts_are_cached_until_the_user_writes(self, graph):
+        """Document counts are read once per user until a change event arrives."""
+        db, _ = graph
+        counted = []
+
+        class CountingDB:
+            def count_documents(self, user_id):
+                counted.append(user_id)
+                return db.count_documents(user_id)
+
+        planner = StrategyPlanner(CountingDB())
+
+        planner.plan(search_config("Acme Kafka"))
+        planner.plan(search_config("Acme Kafka"))
+        assert counted == [USER_ID]
+
+        db.changes.subscribe(planner.on_change)
+        try:
+            with scratch_episode(db, "Zephyr notes", user_id="other_user"):
+                planner.plan(search_config("Acme Kafka"))
+            assert counted == [USER_ID]
+            with scratch_episode(db, "Zephyr notes"):
+                stats = planner.plan(search_config("Acme Kafka")).stats
+        finally:
+            db.changes.unsubscribe(planner.on_change)
+        assert counted == [USER_ID, USER_ID]
+        assert stats["episodes"] == len(EPISODES) + 1
+
+
+class TestRecords:
+    """Slotted records convert to the same models the database rows describe."""
+
+    def test_records_are_slotted(self):
+        """Records carry no per-instance dictionary."""
+        record = EntityRecord(uuid="e", name="alice", entity_type="PERSON", summary="", mentions=1)
+        assert not hasattr(record, "__dict__")
+
+    def test_episode_row_round_trip(self, graph):
+        """Episode rows become EpisodeNodes with parsed metadata and enums."""
+        db, _ = graph
+        row = next(iter(db.get_episodes_by_uuids([
+            uuid for uuid, _ in DBKeywordIndex(db).search_episodes("", tags=["infra"], user_id=USER_ID)
+        ]).values()))
+        episode = EpisodeRecord.from_row(row).to_model()
+
+        assert episode.content == "Bob manages Kafka clusters at Acme."
+        assert episode.metadata["tags"] == ["work", "infra"]
+        assert (episode.source, episode.kind) == (EpisodeType.text, EpisodeKind.query)
+        assert episode.user_id == USER_ID
+
+    def test_missing_values_become_defaults(self):
+        """NaN and None columns map to the model defaults."""
+        nan = float("nan")
+        entity = EntityRecord.from_row({
+            "uuid": "e", "name": "alice", "entity_type": "PERSON", "summary": None, "mentions": None,
+            "user_id": nan, "created_at": None,
+        }).to_model()
+        edge = EdgeRecord.from_row({
+            "edge_uuid": "r", "source_uuid": "a", "target_uuid": "b", "relation_type": "KNOWS",
+            "fact": "a knows b", "invalid_at": nan,
+        }, "edge_uuid").to_model()
+
+        assert (entity.summary, entity.mentions, entity.user_id) == ("", 1, None)
+        assert entity.created_at is not None
+        assert edge.invalid_at is None
+
+    def test_search_hits_convert_once_at_the_end(self, make_engine):
+        """A strategy's records convert to the result the engine returns."""
+        engine = make_engine()
+        config = search_config("Acme Kafka", strategy="bm25")
+        hits = engine._bm25_search(config)
+
+        assert isinstance(hits, SearchHits)
+        assert ranked_uuids(hits.to_result()) == ranked_uuids(engine.search(config))